@@ -0,0 +1 @@
+"""قياس أداء خطوط العرض والجلب (خارج التطبيق)."""
@@ -0,0 +1,210 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   قياس أداء خط العرض وخط الجلب على نقطيات صناعية وخدمة Sentinel Hub مُحاكاة │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+التشغيل من جذر المستودع:
+
+    python -m benchmarks.bench_pipeline                  # كل الحالات
+    python -m benchmarks.bench_pipeline --only display --sizes 500 2500
+    python -m benchmarks.bench_pipeline --json bench.json --baseline old.json
+
+لكل حالة: أفضل زمن ومتوسطه على ``--repeat`` تكرارات، وذروة الذاكرة
+(tracemalloc، تشمل مصفوفات NumPy). مع ``--baseline`` تُعلَّم الحالات التي
+تراجعت بأكثر من ``--tolerance`` في الزمن أو الذاكرة، ويخرج البرنامج برمز 1.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+from sentinelhub import BBox, CRS, SHConfig
+
+from benchmarks.fake_sentinelhub import Recorder, patched, synthetic_raster
+from khaled.mosaic import Mosaic
+from khaled.pipeline import fetch_indicator
+from khaled.quality import FLAGS, from_mdwi, select
+from khaled.render import get_cmap, percentile_stretch, colorize, png_bytes, legend_png
+from khaled.tiles import TileCache, BASE_RES_DEG, MAX_PX, TILE_PX
+
+EVALSCRIPT = "//VERSION=3 bench FAI"
+TILED_SIDE = 10_000  # ضلع الحالة المبلّطة بالبكسل
+WORK_DIR = tempfile.mkdtemp(prefix="khaled-bench-")  # مخازن المربعات المؤقتة (تُحذف في النهاية)
+
+
+# ───────────────────────────── أدوات القياس ─────────────────────────────
+def measure(fn, repeat):
+    """يشغّل ``fn`` ``repeat`` مرات ويعيد (أفضل زمن، المتوسط، ذروة الذاكرة MB)."""
+    times, peak = [], 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"best_s": min(times), "mean_s": sum(times) / len(times), "peak_mb": peak / 2**20}
+
+
+# ───────────────────────────── خط العرض ─────────────────────────────
+def synthetic_quality(img):
+    """رموز جودة: مياه حيث توجد قيم، وسحب على شريط علوي (عُشر الصفوف)."""
+    qa = from_mdwi(np.where(np.isnan(img), -1.0, 0.5))
+    qa[:img.shape[0] // 10] |= FLAGS["cloud"]
+    return qa
+
+
+def display_stages(img, qa, palette="BloomRamp", gamma=1.0):
+    """مراحل العرض كما في اللوحة: قناع الجودة ← مدّ ← قصّ/تطبيع/gamma ← تلوين ← PNG."""
+    cmap = get_cmap(palette)
+    stages = {
+        "quality_mask": lambda: np.where(select(qa), img, np.nan),
+        "percentile_stretch": lambda: percentile_stretch(img),
+        "colorize": lambda: colorize(img, -0.02, 0.08, gamma, cmap),
+    }
+    rgb = colorize(img, -0.02, 0.08, gamma, cmap)
+    stages["png_encode"] = lambda: png_bytes(rgb)
+    return stages
+
+
+def display_cases(sizes):
+    for side in sizes:
+        if side > MAX_PX:
+            continue
+        img = synthetic_raster(side, side, seed=side)
+        for name, fn in display_stages(img, synthetic_quality(img)).items():
+            yield f"display/{name}/{side}²", fn
+
+    # 10k² يُعالج مربعًا مربعًا (2500²) كما يُجمَّع من الشبكة؛ الذروة تتبع المربع لا الصورة
+    if TILED_SIDE in sizes:
+        cmap = get_cmap("BloomRamp")
+        block = synthetic_raster(MAX_PX, MAX_PX, seed=TILED_SIDE)
+        qa = synthetic_quality(block)
+
+        def tiled():
+            for _ in range((TILED_SIDE // MAX_PX) ** 2):
+                img = np.where(select(qa), block, np.nan)
+                lo, hi = percentile_stretch(img)
+                png_bytes(colorize(img, lo, hi, 1.0, cmap))
+        yield f"display/tiled_all_stages/{TILED_SIDE}²", tiled
+
+        # الصورة نفسها كفسيفساء خارج الذاكرة (10 م كاملة): القناع والمدّ والتلوين كتلةً كتلة
+        mosaic = Mosaic.create(os.path.join(WORK_DIR, "mosaic"), (TILED_SIDE, TILED_SIDE),
+                               bbox_for(TILED_SIDE), has_qa=True)
+        for r in range(0, TILED_SIDE, MAX_PX):
+            for c in range(0, TILED_SIDE, MAX_PX):
+                mosaic[r:r + MAX_PX, c:c + MAX_PX] = block
+                mosaic.qa[r:r + MAX_PX, c:c + MAX_PX] = qa
+        mosaic.finish()
+
+        def blockwise(view=mosaic.quality()):
+            stats = view.stats()
+            png_bytes(view.colorize(stats["p2"], stats["p98"], 1.0, cmap, max_side=MAX_PX))
+        yield f"display/mosaic_all_stages/{TILED_SIDE}²", blockwise
+
+    cmap = get_cmap("BloomRamp")
+    yield "display/legend_720dpi", lambda: legend_png(["low", "mid", "high"], cmap)
+
+
+# ───────────────────────────── خط الجلب ─────────────────────────────
+def bbox_for(side_px, lon=31.0, lat=30.0):
+    """bbox بحجم ``side_px`` بكسل بالدقة الأساسية (≈ 10 م)."""
+    span = side_px * BASE_RES_DEG
+    return BBox([lon, lat, lon + span, lat + span], CRS.WGS84)
+
+
+def fetch_cases(sizes, latency):
+    config = SHConfig()
+    interval = ("2024-06-01", "2024-06-30")
+
+    for side in sizes:
+        if side > MAX_PX:
+            continue
+        bbox = bbox_for(side)
+
+        def single(bbox=bbox, side=side):
+            with patched(Recorder(latency=latency)):
+                fetch_indicator(config, EVALSCRIPT, "L2A", bbox, (side, side), interval,
+                                True, label="FAI")
+        yield f"fetch/single_request/{side}²", single
+
+    # 10k² من المربعات: بارد (كل المربعات من الخدمة) ثم دافئ (من القرص فقط)
+    if TILED_SIDE in sizes:
+        bbox = bbox_for(TILED_SIDE)
+
+        def tiled(root):
+            cache = TileCache(os.path.join(root, "tiles.sqlite"), os.path.join(root, "tiles"))
+            with patched(Recorder(latency=latency)):
+                fetch_indicator(config, EVALSCRIPT, "L2A", bbox, (MAX_PX, MAX_PX), interval,
+                                True, label="FAI", tiles=cache)
+
+        # مجلد جديد في كل تكرار كي لا يصبح التكرار الثاني دافئًا
+        yield (f"fetch/tiled_cold/{TILED_SIDE}² ({TILE_PX}px tiles)",
+               lambda: tiled(tempfile.mkdtemp(dir=WORK_DIR)))
+        warm_root = tempfile.mkdtemp(dir=WORK_DIR)
+        tiled(warm_root)
+        yield f"fetch/tiled_warm/{TILED_SIDE}² ({TILE_PX}px tiles)", lambda: tiled(warm_root)
+
+
+# ───────────────────────────── التشغيل ─────────────────────────────
+def compare(results, baseline, tolerance):
+    """الحالات التي تراجعت مقارنة بخط الأساس: [(الاسم، المقياس، القديم، الجديد)]."""
+    regressions = []
+    for name, r in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for key in ("best_s", "peak_mb"):
+            if r[key] > old[key] * (1 + tolerance) and r[key] - old[key] > 1e-3:
+                regressions.append((name, key, old[key], r[key]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[500, 2500, TILED_SIDE])
+    parser.add_argument("--only", choices=["display", "fetch"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="زمن استجابة مُحاكى لكل طلب (ث)")
+    parser.add_argument("--json", help="حفظ النتائج في ملف JSON")
+    parser.add_argument("--baseline", help="ملف JSON سابق للمقارنة")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    cases, results = [], {}
+    try:
+        if args.only in (None, "display"):
+            cases += list(display_cases(args.sizes))
+        if args.only in (None, "fetch"):
+            cases += list(fetch_cases(args.sizes, args.latency))
+
+        print(f"{'case':<52} {'best s':>9} {'mean s':>9} {'peak MB':>9}")
+        for name, fn in cases:
+            results[name] = r = measure(fn, args.repeat)
+            print(f"{name:<52} {r['best_s']:>9.4f} {r['mean_s']:>9.4f} {r['peak_mb']:>9.1f}", flush=True)
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for name, key, old, new in regressions:
+            print(f"REGRESSION {name} {key}: {old:.4f} → {new:.4f}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   البدء البارد: زمن أول رسم لشاشة البداية واللوحة في مفسّرات جديدة          │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+كل تشغيل مفسّر Python جديد (لا ذاكرة استيراد) يشغّل اللوحة عبر ``AppTest``:
+
+    python -m benchmarks.cold_start                     # 5 تشغيلات
+    python -m benchmarks.cold_start --runs 10 --json cold.json
+    python -m benchmarks.cold_start --importtime 15     # أثقل 15 استيرادًا للوحة (-X importtime)
+
+المراحل: ``streamlit`` (استيراده)، ``welcome`` (أول رسم لشاشة البداية)، ``main``
+(الدخول إلى اللوحة: استيرادها وأول رسم)، ``first_colormap`` (أول لوحة ألوان:
+matplotlib/cmocean)، ومراحل تقرير البدء الذي تسجله اللوحة نفسها (``khaled.ui.startup``).
+لكل شاشة تُذكر المكتبات الثقيلة المحمّلة عند انتهاء رسمها.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Geo_Khaled.py")
+HEAVY = ("folium", "sentinelhub", "plotly.express", "matplotlib", "cmocean", "PIL", "pyproj")
+
+
+def child():
+    """تشغيل واحد داخل المفسّر الجديد؛ يطبع النتيجة كسطر JSON."""
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    times, loaded = {"streamlit": time.perf_counter() - t0}, {}
+
+    def step(name, fn):
+        t = time.perf_counter()
+        fn()
+        times[name] = time.perf_counter() - t
+        loaded[name] = [m for m in HEAVY if m in sys.modules]
+
+    at = AppTest.from_file(APP, default_timeout=300)
+    step("welcome", at.run)
+    step("main", lambda: at.button(key="start_app").click().run())
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    from khaled.render import get_cmap
+    step("first_colormap", lambda: get_cmap("haline"))
+
+    from khaled.ui import startup
+    report = startup.report() or {"stages": []}
+    times.update({s["stage"]: s["seconds"] for s in report["stages"]})
+    print(json.dumps({"times": times, "loaded": loaded}))
+
+
+def run_child(env, extra=()):
+    proc = subprocess.run([sys.executable, *extra, "-m", "benchmarks.cold_start", "--child"], env=env,
+                          capture_output=True, text=True, cwd=os.path.dirname(APP))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def importtime_top(stderr, n) -> list:
+    """أثقل الاستيرادات ذات المستوى الأعلى (التراكمي بالثواني) من مخرجات ``-X importtime``."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cum_us, name = (p for p in line.replace("import time:", "|", 1).split("|"))
+        if not name.startswith("  "):  # مستوى أعلى = مسافة واحدة بعد الفاصل
+            rows.append((int(cum_us) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, metavar="N", help="أثقل N استيرادًا في تشغيل إضافي")
+    parser.add_argument("--json", help="حفظ التقرير في ملف JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return child()
+
+    # لا حاجة لخادم: اللوحة لا تتصل بـ Sentinel Hub قبل رسم منطقة؛ الخادم البديل يكفي للإعداد
+    env = {**os.environ, "KHALED_SH_STANDIN": "http://127.0.0.1:9",
+           "KHALED_CACHE_DIR": tempfile.mkdtemp(prefix="khaled-cold-")}
+    for k in ("INSTANCE_ID", "SH_CLIENT_ID", "SH_CLIENT_SECRET", "KHALED_API_PORT", "KHALED_WATCH_EVERY_H"):
+        env.pop(k, None)
+
+    runs = []
+    for i in range(args.runs):
+        t = time.perf_counter()
+        result, _ = run_child(env)
+        result["process_s"] = time.perf_counter() - t
+        runs.append(result)
+        print(f"run {i + 1}/{args.runs}: welcome {result['times']['welcome']:.3f}s · "
+              f"main {result['times']['main']:.3f}s", flush=True)
+
+    stages = list(dict.fromkeys(k for r in runs for k in r["times"]))
+    report = {"runs": len(runs), "loaded": runs[0]["loaded"],
+              "process_s": float(np.median([r["process_s"] for r in runs])), "stages": {}}
+    print(f"\n{'stage':<28} {'median s':>9} {'min s':>9} {'max s':>9}")
+    for name in stages:
+        values = [r["times"][name] for r in runs if name in r["times"]]
+        report["stages"][name] = {"median": float(np.median(values)), "min": min(values), "max": max(values)}
+        print(f"{name:<28} {np.median(values):>9.3f} {min(values):>9.3f} {max(values):>9.3f}")
+    print(f"{'process (spawn → exit)':<28} {report['process_s']:>9.3f}")
+    for screen, modules in report["loaded"].items():
+        print(f"loaded after {screen}: {', '.join(modules) or '—'}")
+
+    if args.importtime:
+        _, stderr = run_child(env, ("-X", "importtime"))
+        report["importtime"] = importtime_top(stderr, args.importtime)
+        print(f"\n{'cumulative s':>12}  import")
+        for seconds, name in report["importtime"]:
+            print(f"{seconds:>12.3f}  {name}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   بديل محلي لـ SentinelHubRequest / SentinelHubCatalog بردود مسجّلة       │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import hashlib
+import os
+from contextlib import contextmanager
+from time import sleep
+from unittest import mock
+
+import numpy as np
+from sentinelhub.api.base_request import InputDataDict
+
+
+def synthetic_raster(w, h, seed=0):
+    """نقطية واقعية الشكل: تدرّج + بقع ازدهار + ضوضاء + يابسة (NaN في زاوية)."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    img = 0.02 * (x / w - 0.5) + 0.01 * (y / h)
+    for _ in range(8):
+        cx, cy, r = rng.uniform(0, w), rng.uniform(0, h), rng.uniform(0.03, 0.12) * max(w, h)
+        img += 0.08 * np.exp(-((x - cx) ** 2 + (y - cy) ** 2) / (2 * r * r))
+    img += rng.normal(0, 0.005, (h, w)).astype(np.float32)
+    img[: h // 6, : w // 5] = np.nan
+    return img.astype(np.float32)
+
+
+class Recorder:
+    """يخدم ردود ``get_data`` من مجلد تسجيلات (.npy) مع زمن استجابة مُحاكى.
+
+    المفتاح بصمة (evalscript، bbox، الأبعاد، الفترة). عند غياب التسجيل تُولَّد
+    نقطية صناعية حتمية، وتُحفظ إذا كان ``record=True``.
+    """
+
+    def __init__(self, root=None, latency=0.0, record=False, scene_dates=None):
+        self.root = root
+        self.latency = latency
+        self.record = record
+        self.scene_dates = scene_dates or ["2024-06-05", "2024-06-10", "2024-06-15", "2024-06-20"]
+        self.requests = 0
+        self.bytes = 0
+
+    def _key(self, evalscript, bbox, size, time_interval):
+        blob = f"{evalscript}|{tuple(round(c, 7) for c in bbox)}|{size}|{time_interval}"
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+    def response(self, evalscript, bbox, size, time_interval):
+        key = self._key(evalscript, bbox, size, time_interval)
+        path = os.path.join(self.root, f"{key}.npy") if self.root else None
+        if path and os.path.exists(path):
+            arr = np.load(path)
+        else:
+            arr = synthetic_raster(*size, seed=int(key[:8], 16))
+            if path and self.record:
+                os.makedirs(self.root, exist_ok=True)
+                np.save(path, arr)
+        if self.latency:
+            sleep(self.latency)
+        self.requests += 1
+        self.bytes += arr.nbytes
+        return arr
+
+    # ─── الأصناف البديلة بواجهة sentinelhub نفسها ───
+    def request_class(self):
+        recorder = self
+
+        class RecordedRequest:
+            def __init__(self, evalscript, input_data, responses, bbox, size, config=None, **kwargs):
+                self._args = (evalscript, bbox, size, input_data[0]["time_interval"])
+
+            @staticmethod
+            def input_data(data_collection=None, time_interval=None, **kwargs):
+                return InputDataDict({"data_collection": data_collection, "time_interval": time_interval})
+
+            @staticmethod
+            def output_response(identifier, mime_type):
+                return {"identifier": identifier}
+
+            def get_data(self):
+                return [recorder.response(*self._args)]
+
+        return RecordedRequest
+
+    def catalog_class(self):
+        recorder = self
+
+        class RecordedCatalog:
+            def __init__(self, config=None):
+                pass
+
+            def search(self, collection, bbox=None, time=None, fields=None, **kwargs):
+                if recorder.latency:
+                    sleep(recorder.latency)
+                start, end = (str(t)[:10] for t in time)
+                return iter([{"properties": {"datetime": f"{d}T10:00:00Z"}}
+                             for d in recorder.scene_dates if start <= d <= end])
+
+        return RecordedCatalog
+
+
+@contextmanager
+def patched(recorder):
+    """يستبدل أصناف Sentinel Hub في ``khaled.pipeline`` بالبديل المسجَّل."""
+    with mock.patch("khaled.pipeline.SentinelHubRequest", recorder.request_class()), \
+            mock.patch("khaled.pipeline.SentinelHubCatalog", recorder.catalog_class()):
+        yield recorder
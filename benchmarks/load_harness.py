@@ -0,0 +1,238 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   اختبار حمل: جلسات متزامنة تمر بالمسار الكامل للوحة ضد الخادم البديل     │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+يشغّل N جلسة Streamlit حقيقية (``AppTest``) داخل عملية واحدة، كما تتشارك
+جلسات الخادم الفعلي العملية نفسها (طابور المهام، الفهرس، مخزن المربعات)،
+وكل جلسة تمر بالمسار: البداية ← رسم المنطقة ← اختيار المؤشر ← الحساب
+(حتى ظهور النتيجة) ← تغيير gamma ← تغيير لوحة الألوان.
+
+الجلب يذهب إلى ``khaled.standin`` (يُشغَّل تلقائيًا في خيط) فلا تُستهلك وحدات معالجة.
+
+    python -m benchmarks.load_harness --sessions 8 --rounds 2
+    python -m benchmarks.load_harness --sessions 16 --shared-aoi 0.5 --latency 0.3 --json load.json
+
+التقرير: النسب المئوية لزمن كل تفاعل (p50/p90/p95/p99/max)، ومتوسط استهلاك
+المعالج (أنوية)، وذروة الذاكرة المقيمة (RSS) للعملية.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Geo_Khaled.py")
+INTERACTIONS = ("welcome", "start", "draw_aoi", "pick_indicator", "calculate", "gamma", "palette")
+POLL_S = 0.25  # الفاصل بين إعادات التشغيل أثناء انتظار ظهور عنصر
+
+
+# ───────────────────────────── قياس العملية ─────────────────────────────
+def rss_mb() -> float:
+    """الذاكرة المقيمة الحالية للعملية (Linux: /proc/self/statm)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+class ProcessSampler(threading.Thread):
+    """يأخذ عينات RSS دوريًا ويحسب زمن المعالج المستهلك بين البداية والنهاية."""
+
+    def __init__(self, interval=0.2):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = []
+        self._done = threading.Event()
+
+    def run(self):
+        self._t0, self._cpu0 = time.perf_counter(), sum(os.times()[:2])
+        while not self._done.is_set():
+            self.samples.append(rss_mb())
+            self._done.wait(self.interval)
+
+    def stop(self) -> dict:
+        self._done.set()
+        self.join()
+        wall = time.perf_counter() - self._t0
+        cpu = sum(os.times()[:2]) - self._cpu0
+        return {"wall_s": wall, "cpu_s": cpu, "avg_cores": cpu / wall,
+                "rss_peak_mb": max(self.samples), "rss_end_mb": self.samples[-1]}
+
+
+# ───────────────────────────── الجلسة المُحاكاة ─────────────────────────────
+def polygon(lon, lat, span):
+    ring = [[lon, lat], [lon + span, lat], [lon + span, lat + span], [lon, lat + span], [lon, lat]]
+    return {"type": "Feature", "properties": {}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+
+
+def by_label(elements, label):
+    for e in elements:
+        if e.label == label:
+            return e
+    raise LookupError(f"no widget labelled {label!r} in the last run")
+
+
+def wait_for(at, find, timeout):
+    """نتيجة ``find()`` (عنصر بالعنوان أو بالمفتاح) بعد ظهور العنصر.
+
+    تشغيل متزامن قد ينتهي قبل رسم الصفحة (سباق إنشاء Runtime في AppTest)، فيُعاد التشغيل
+    كل ``POLL_S`` حتى يظهر العنصر (لا ``LookupError``/``KeyError``) أو تنقضي ``timeout`` ثانية.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return find()
+        except LookupError:
+            if time.monotonic() >= deadline:
+                raise
+        time.sleep(POLL_S)
+        at.run()
+
+
+def run_session(sid, args, timings, errors, rng):
+    try:
+        _run_session(sid, args, timings, errors, rng)
+    except Exception as e:
+        errors.append((sid, "session", f"{type(e).__name__}: {e}"))
+
+
+def _run_session(sid, args, timings, errors, rng):
+    from streamlit.testing.v1 import AppTest
+
+    def timed(name, action):
+        t0 = time.perf_counter()
+        at_ = action()
+        timings[name].append(time.perf_counter() - t0)
+        if at_.exception:
+            errors.append((sid, name, str(at_.exception[0].message)))
+        return at_
+
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    timed("welcome", at.run)
+    start = wait_for(at, lambda: at.button(key="start_app"), args.timeout)
+    timed("start", lambda: start.click().run())
+
+    for r in range(args.rounds):
+        # منطقة مشتركة بين جلسات متعددة (تختبر دمج المهام والتخزين) أو منطقة خاصة بالجلسة
+        if rng.random() < args.shared_aoi:
+            lon, lat = 31.0, 30.0
+        else:
+            lon, lat = 31.0 + 0.05 * (sid % 20), 30.0 + 0.05 * (sid // 20) + 0.5 * r
+        at.session_state["_load_aoi"] = [polygon(lon, lat, args.aoi_deg)]
+        timed("draw_aoi", at.run)
+
+        indicator = wait_for(at, lambda: by_label(at.selectbox, "اختر المؤشّر:"), args.timeout)
+        timed("pick_indicator", lambda: indicator.set_value(rng.choice(indicator.options)).run())
+
+        calculate = wait_for(at, lambda: at.button(key="unique_calculate_button"), args.timeout)
+        timed("calculate", lambda: calculate.click().run())
+        if at.session_state["img"] is None:
+            errors.append((sid, "calculate", "no result"))
+
+        gamma = wait_for(at, lambda: by_label(at.slider, "Gamma"), args.timeout)
+        timed("gamma", lambda: gamma.set_value(round(rng.uniform(0.5, 2.0), 1)).run())
+        palette = wait_for(at, lambda: by_label(at.selectbox, "لوحة الألوان"), args.timeout)
+        timed("palette", lambda: palette.set_value(rng.choice(palette.options)).run())
+
+
+def share_script_cache():
+    """الخادم الحقيقي يترجم السكربت مرة واحدة (ScriptCache واحد في Runtime)، أما AppTest
+    فينشئ ذاكرة جديدة في كل تشغيل؛ الترجمة المتزامنة من عدة خيوط تكسر محلّل AST في
+    CPython 3.11، فنشارك ذاكرة واحدة بين كل الجلسات كما في الخادم.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+
+
+def install_fake_map():
+    """خريطة folium لا تعمل داخل AppTest؛ تُستبدل بدالة تعيد رسم الجلسة من session_state."""
+    import streamlit as st
+    import streamlit_folium
+
+    def st_folium(*args, **kwargs):
+        return {"all_drawings": st.session_state.get("_load_aoi") or [], "last_clicked": None}
+    streamlit_folium.st_folium = st_folium
+
+
+# ───────────────────────────── التقرير ─────────────────────────────
+def summarize(timings) -> dict:
+    report = {}
+    for name in INTERACTIONS:
+        values = np.asarray(timings.get(name) or [np.nan])
+        p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+        report[name] = {"n": len(timings.get(name, [])), "p50": p50, "p90": p90, "p95": p95,
+                        "p99": p99, "max": float(np.max(values))}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1, help="عدد دورات الحساب لكل جلسة")
+    parser.add_argument("--ramp", type=float, default=0.5, help="الفاصل بين بدء الجلسات (ث)")
+    parser.add_argument("--shared-aoi", type=float, default=0.25, help="احتمال أن ترسم الجلسة المنطقة المشتركة")
+    parser.add_argument("--aoi-deg", type=float, default=0.05, help="ضلع منطقة الاهتمام بالدرجات")
+    parser.add_argument("--latency", type=float, default=0.1, help="زمن استجابة الخادم البديل (ث)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--standin", help="عنوان خادم بديل قائم بدل تشغيل واحد محليًا")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="حفظ التقرير في ملف JSON")
+    args = parser.parse_args(argv)
+
+    # مجلد تخزين مؤقت نظيف (بارد) لكل تشغيل، إلا إذا حُدّد KHALED_CACHE_DIR صراحة
+    work_dir = None
+    if "KHALED_CACHE_DIR" not in os.environ:
+        work_dir = os.environ["KHALED_CACHE_DIR"] = tempfile.mkdtemp(prefix="khaled-load-")
+    if args.standin:
+        os.environ["KHALED_SH_STANDIN"] = args.standin
+    else:
+        from khaled.standin import serve_in_thread
+        server, url = serve_in_thread(latency=args.latency, error_rate=args.error_rate, seed=args.seed)
+        os.environ["KHALED_SH_STANDIN"] = url
+    install_fake_map()
+    share_script_cache()
+
+    timings, errors = defaultdict(list), []
+    sampler = ProcessSampler()
+    sampler.start()
+    threads = []
+    for sid in range(args.sessions):
+        t = threading.Thread(target=run_session, name=f"session-{sid}",
+                             args=(sid, args, timings, errors, random.Random(args.seed + sid)))
+        t.start()
+        threads.append(t)
+        time.sleep(args.ramp)
+    for t in threads:
+        t.join()
+    process = sampler.stop()
+    if work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"sessions": args.sessions, "rounds": args.rounds, "interactions": summarize(timings),
+              "process": process, "errors": errors}
+    print(f"{'interaction':<16} {'n':>4} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, r in report["interactions"].items():
+        print(f"{name:<16} {r['n']:>4} {r['p50']:>8.3f} {r['p90']:>8.3f} {r['p95']:>8.3f} "
+              f"{r['p99']:>8.3f} {r['max']:>8.3f}")
+    print(f"wall {process['wall_s']:.1f}s · CPU {process['cpu_s']:.1f}s ({process['avg_cores']:.2f} cores avg) · "
+          f"RSS peak {process['rss_peak_mb']:.0f} MB, end {process['rss_end_mb']:.0f} MB · errors {len(errors)}")
+    for sid, name, msg in errors[:10]:
+        print(f"  session {sid} {name}: {msg}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, default=float)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""حزمة المساعدات الخلفية للوحة جودة المياه (الجلب، الحساب، الطوابير والتخزين)."""
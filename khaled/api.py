@@ -0,0 +1,340 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   واجهة HTTP محلية للمؤشرات: إحصاءات JSON، PNG ملوّن، أو COG/NetCDF خام   │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+خدمة HTTP صغيرة تكشف خط المعالجة نفسه الذي تستخدمه اللوحة (بحث الكتالوج ← الجلب
+← قناع الجودة ← الإحصاءات/التلوين) للأنظمة الأخرى (خدمة التنبيهات، برامج GIS):
+
+* ``GET /v1/health``
+* ``GET /v1/indicators`` — المؤشرات المتاحة ونطاقاتها الافتراضية
+* ``GET /v1/indicator?name=Chl_a&bbox=minx,miny,maxx,maxy&start=YYYY-MM-DD&end=YYYY-MM-DD``
+  مع ``format=json`` (افتراضي، إحصاءات) أو ``png`` (``palette``/``gamma``/``min``/``max``/``stretch=auto``)
+  أو ``tiff`` (Cloud-Optimized GeoTIFF بقيم float32 خام ونطاق MDWI إن وُجد) أو ``netcdf``،
+  و ``mask=0`` لإلغاء قناع الجودة، أو ``exclude=cloud,shadow,cirrus,snow`` (الأعلام المستبعدة؛
+  ``none`` = لا شيء) و ``water_threshold`` (عتبة MDWI، افتراضيًا 0) لضبطه. الـ bbox المطلوب بـ WGS84، والنتيجة على شبكة UTM
+  الأصلية لمنطقتها (``bbox``/``crs`` في الرد وفي ترويسة الملفات). ``polygon=lon,lat;lon,lat;...``
+  (اختياري) يقص النتيجة على مضلع داخل الـ bbox.
+
+الحساب يمر عبر طابور المهام وفهرس النتائج ومخزن المربعات نفسها (``Services``):
+داخل عملية اللوحة (``KHALED_API_PORT``) تُستخدم النسخ ذاتها، فيُدمج طلب API مع حساب
+جارٍ من الواجهة لنفس المنطقة ويُخدم أحدهما من نتائج الآخر؛ وخارجها (``python -m
+khaled.api``) تتشارك العمليتان الفهرس والمربعات على القرص. جلسة OAuth لـ Sentinel Hub
+مخزنة على مستوى العملية في ``sentinelhub`` لكل بيانات اعتماد.
+
+الصور تُرسل بترميز مجزّأ (chunked)، والكبيرة منها تُكتب أولًا في ملف مؤقت على القرص
+بدل بناء الرد كاملًا في الذاكرة.
+
+    python -m khaled.api --port 8600
+    curl 'http://127.0.0.1:8600/v1/indicator?name=Chl_a&bbox=31,30,31.05,30.05&start=2024-06-01&end=2024-06-30&format=tiff' -o chl.tif
+"""
+import argparse
+import datetime
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from . import metrics, quality
+from .export import FORMATS as EXPORT_FORMATS
+from .indicators import aoi_geometry, aoi_grid, default_ranges, evalscripts, resolve, water_masked_indicators
+from .jobs import DONE, JobQueue, job_key
+from .metrics import array_counters, stage
+from .pipeline import fetch_indicator, lookup_indicator
+from .render import colorize, get_cmap, percentile_stretch, png_bytes
+from .results import aoi_hash, summary_stats
+
+CHUNK = 1 << 20          # حجم الجزء المرسل (بايت)
+SPOOL_MAX = 16 << 20     # الصور الأكبر تُكتب مؤقتًا على القرص قبل الإرسال
+JOB_TIMEOUT = float(os.getenv("KHALED_API_TIMEOUT", "600"))
+
+
+class ApiError(Exception):
+    """خطأ يُعاد للعميل برمز HTTP محدد."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Services:
+    """الموارد المشتركة مع اللوحة: إعداد Sentinel Hub، طابور المهام، الفهرس، المربعات، توفر المشاهد."""
+
+    def __init__(self, config, jobs, index, tiles=None, scenes=None):
+        self.config = config
+        self.jobs = jobs
+        self.index = index
+        self.tiles = tiles
+        self.scenes = scenes
+
+    def indicator(self, key, bbox, size, time_interval, mask=True, geometry=None):
+        """نتيجة المؤشر من الفهرس فورًا، وإلا عبر مهمة بالبصمة نفسها التي تستخدمها اللوحة.
+
+        ``geometry`` (اختياري) المضلع: النتيجة مقصوصة عليه كما في اللوحة.
+        """
+        ev, label, tier = evalscripts[key]
+        need_quality = mask and label in water_masked_indicators
+        hit = lookup_indicator(self.index, label, tier, bbox, size, time_interval, need_quality=need_quality,
+                               geometry=geometry)
+        if hit is not None:
+            return hit
+
+        jkey = job_key(kind="indicator", label=label, tier=tier, aoi=aoi_hash(bbox, geometry),
+                       size=size, time_interval=time_interval, mask=need_quality)
+        job_id = self.jobs.submit(
+            jkey,
+            lambda ctx: fetch_indicator(self.config, ev, tier, bbox, size, time_interval, need_quality, ctx,
+                                        index=self.index, label=label, tiles=self.tiles,
+                                        scenes=self.scenes, geometry=geometry),
+            kind="indicator"
+        )
+        row = self.jobs.wait(job_id, timeout=JOB_TIMEOUT)
+        if row["status"] == DONE:
+            result = self.jobs.result(job_id)
+            if result is not None:
+                return result
+            raise ApiError(503, "result evicted from memory, retry")
+        if row["status"] in ("queued", "running"):
+            self.jobs.cancel(job_id)
+            raise ApiError(504, f"job {job_id} still {row['status']} after {JOB_TIMEOUT:.0f}s")
+        error = row["error"] or row["status"]
+        raise ApiError(404 if error.startswith("NoScenesError") else 502, error)
+
+
+# ───────────────────────────── تحليل المعاملات ─────────────────────────────
+def parse_bbox(text):
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in text.split(","))
+    except (AttributeError, ValueError):
+        raise ApiError(400, "bbox must be minx,miny,maxx,maxy (WGS84)")
+    if not (minx < maxx and miny < maxy):
+        raise ApiError(400, "bbox must have minx < maxx and miny < maxy")
+    return aoi_grid([minx, maxx], [miny, maxy])
+
+
+def parse_polygon(text):
+    """``polygon=lon,lat;lon,lat;...`` (WGS84) كـ ``Geometry``، أو None للمستطيل وغياب المعامل."""
+    if not text:
+        return None
+    try:
+        coords = [tuple(float(v) for v in point.split(",")) for point in text.split(";")]
+    except ValueError:
+        raise ApiError(400, "polygon must be lon,lat;lon,lat;... (WGS84)")
+    if len(coords) < 3 or any(len(c) != 2 for c in coords):
+        raise ApiError(400, "polygon needs at least three lon,lat points")
+    return aoi_geometry(coords)
+
+
+def parse_interval(params):
+    today = datetime.date.today()
+    try:
+        end = datetime.date.fromisoformat(params.get("end") or today.isoformat())
+        start = datetime.date.fromisoformat(params.get("start") or (end - datetime.timedelta(days=30)).isoformat())
+    except ValueError:
+        raise ApiError(400, "start/end must be YYYY-MM-DD")
+    if start > end:
+        raise ApiError(400, "start must not be after end")
+    # الصيغة نفسها التي تبنيها اللوحة من date_input حتى تتطابق بصمات المهام
+    return start.isoformat(), end.isoformat()
+
+
+def _float(params, name, default=None):
+    try:
+        return float(params[name]) if params.get(name) not in (None, "") else default
+    except ValueError:
+        raise ApiError(400, f"{name} must be a number")
+
+
+def parse_mask_options(params):
+    """``exclude`` (أعلام SCL مفصولة بفواصل) و ``water_threshold`` لـ ``quality.select``."""
+    exclude = quality.DEFAULT_EXCLUDE
+    if "exclude" in params:
+        exclude = tuple(v.strip() for v in params["exclude"].split(",") if v.strip() not in ("", "none"))
+        unknown = set(exclude) - set(quality.SCL_FLAGS)
+        if unknown:
+            raise ApiError(400, f"exclude must be a subset of {','.join(quality.SCL_FLAGS)}")
+    threshold = _float(params, "water_threshold", quality.DEFAULT_WATER_THRESHOLD)
+    if not -1 <= threshold <= 1:
+        raise ApiError(400, "water_threshold must be within [-1, 1]")
+    return {"exclude": exclude, "water_threshold": threshold}
+
+
+def spool_file():
+    """ذاكرة للردود الصغيرة، وتنتقل إلى ملف مؤقت على القرص متى تجاوزت ``SPOOL_MAX``."""
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+
+
+# ───────────────────────────── المعالج ─────────────────────────────
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "khaled-api/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    @property
+    def services(self) -> Services:
+        return self.server.services
+
+    def _send(self, status, body: bytes, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def _stream(self, fh, content_type, filename):
+        """يرسل محتوى كائن الملف أجزاءً (Transfer-Encoding: chunked)."""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        with fh:
+            fh.seek(0)
+            while True:
+                block = fh.read(CHUNK)
+                if not block:
+                    break
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(block), block))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _authorized(self):
+        token = self.server.token
+        return not token or self.headers.get("Authorization") == f"Bearer {token}"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if not self._authorized():
+            return self._json(401, {"error": "missing or invalid bearer token"})
+        try:
+            if url.path == "/v1/health":
+                return self._json(200, {"status": "ok", "active_jobs": len(self.services.jobs.active())})
+            if url.path == "/v1/indicators":
+                return self._json(200, {"indicators": [
+                    {"name": key, "label": label, "tier": tier,
+                     "default_range": default_ranges.get(label),
+                     "water_masked": label in water_masked_indicators}
+                    for key, (_, label, tier) in evalscripts.items()]})
+            if url.path == "/v1/indicator":
+                return self._indicator(params)
+            return self._json(404, {"error": f"unknown endpoint {url.path}"})
+        except ApiError as e:
+            return self._json(e.status, {"error": str(e)})
+        except Exception as e:
+            return self._json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _indicator(self, params):
+        try:
+            key = resolve(params.get("name", ""))
+        except KeyError:
+            raise ApiError(400, f"unknown indicator {params.get('name')!r}; see /v1/indicators")
+        fmt = params.get("format", "json")
+        if fmt not in ("json", "png", "tiff", "netcdf"):
+            raise ApiError(400, "format must be json, png, tiff or netcdf")
+        bbox, size = parse_bbox(params.get("bbox"))
+        geometry = parse_polygon(params.get("polygon"))
+        time_interval = parse_interval(params)
+        mask = params.get("mask", "1") != "0"
+        mask_options = parse_mask_options(params)
+        label = evalscripts[key][1]
+
+        with metrics.collect("api", endpoint="indicator", format=fmt, label=label):
+            result = self.services.indicator(key, bbox, size, time_interval, mask=mask, geometry=geometry)
+            img = result["img"].squeeze()
+            masked = mask and result["qa"] is not None
+            if masked:
+                img = quality.apply(img.astype(np.float32), result["qa"], **mask_options)
+            out_bbox, out_size = result["bbox"], result["size"]
+
+            if fmt == "json":
+                return self._json(200, {
+                    "indicator": key, "label": label, "scene_date": result["scene_date"],
+                    "bbox": list(out_bbox), "crs": f"EPSG:{out_bbox.crs.epsg}", "size": list(out_size),
+                    "masked": masked, "from_index": bool(result.get("from_index")),
+                    "mask": {**mask_options, "exclude": list(mask_options["exclude"])} if masked else None,
+                    "coverage": quality.coverage(result["qa"]) if result["qa"] is not None else None,
+                    "warnings": result["warnings"], "stats": summary_stats(img)})
+
+            name = f"{label}_{result['scene_date']}"
+            spool = spool_file()
+            if fmt in ("tiff", "netcdf"):
+                bands = {label: img}
+                if result["qa"] is not None:
+                    bands["MDWI"] = quality.decode_mdwi(result["qa"])
+                ext, mime, writer = EXPORT_FORMATS["cog" if fmt == "tiff" else fmt]
+                with stage(f"api_{fmt}") as counters:
+                    writer(spool, bands, out_bbox, {"indicator": label, "scene_date": result["scene_date"]})
+                    counters.update(array_counters(img))
+                return self._stream(spool, mime, name + ext)
+
+            lo, hi = default_ranges.get(label, (float(np.nanmin(img)), float(np.nanmax(img))))
+            if params.get("stretch") == "auto":
+                lo, hi = percentile_stretch(img)
+            lo, hi = _float(params, "min", lo), _float(params, "max", hi)
+            if not lo < hi:
+                raise ApiError(400, "min must be below max")
+            cmap = get_cmap(params.get("palette", "BloomRamp"))
+            with stage("api_png") as counters:
+                spool.write(png_bytes(colorize(img, lo, hi, _float(params, "gamma", 1.0), cmap)))
+                counters.update(array_counters(img))
+            return self._stream(spool, "image/png", name + ".png")
+
+
+# ───────────────────────────── التشغيل ─────────────────────────────
+def make_server(services, host="127.0.0.1", port=8600, token=None) -> ThreadingHTTPServer:
+    """ينشئ الخادم (المنفذ 0 ⇒ منفذ حر)؛ ``token`` اختياري يُطلب كـ ``Authorization: Bearer``."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.services = services
+    server.token = token
+    return server
+
+
+def serve_in_thread(services, host="127.0.0.1", port=0, token=None):
+    """يشغّل الخادم في خيط خلفي ويعيد (الخادم، عنوانه)."""
+    server = make_server(services, host, port, token)
+    threading.Thread(target=server.serve_forever, name="khaled-api", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from .results import ResultsIndex
+    from .scenes import SceneCatalog
+    from .settings import sh_config
+    from .tiles import TileCache
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("KHALED_API_PORT", "8600")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("KHALED_JOB_WORKERS", "4")))
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    try:
+        config = sh_config()
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    services = Services(config, JobQueue(max_workers=args.workers), ResultsIndex(), TileCache(), SceneCatalog())
+    server = make_server(services, args.host, args.port, os.getenv("KHALED_API_TOKEN"))
+    print(f"khaled API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   حساب المؤشرات محليًا: نطاقات Sentinel-2 خام ← evalscript مترجم إلى NumPy │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+evalscripts سجل المؤشرات بسيطة (``let`` و ``if(...) return [...]`` و ``return [...]``
+مع دوال ``Math``)، فتُترجم إلى تعابير NumPy متجهة وتُقيَّم على نطاقات مجلوبة مرة واحدة.
+هكذا يبقى الـ evalscript المصدر الوحيد للمعادلة: الخدمة تقيّمه عند جلب مؤشر واحد،
+و ``khaled.compare`` يقيّمه محليًا لعدة مؤشرات من طلب نطاقات واحد، والخادم البديل
+(``khaled.standin``) يقيّمه على نطاقات اصطناعية.
+"""
+import ast
+import operator
+import re
+
+import numpy as np
+
+
+def evalscript_inputs(evalscript) -> list:
+    """أسماء النطاقات في ``input:[...]`` بترتيبها."""
+    m = re.search(r"input\s*:\s*\[([^\]]*)\]", evalscript)
+    if m is None:
+        raise ValueError("evalscript has no input list")
+    return re.findall(r'"(\w+)"', m.group(1))
+
+
+def bands_evalscript(names) -> str:
+    """evalscript يعيد النطاقات ``names`` كما هي (FLOAT32، نطاق لكل اسم بالترتيب)."""
+    names = list(names)
+    inputs = ",".join(f'"{n}"' for n in names)
+    values = ",".join(f"s.{n}" for n in names)
+    return f"""//VERSION=3
+function setup(){{return{{input:[{inputs}],
+                            output:{{bands:{len(names)},sampleType:"FLOAT32"}}}};}}
+function evaluatePixel(s){{
+    return [{values}];
+}}"""
+
+
+# ───────────────────────────── المترجم ─────────────────────────────
+_MATH = {"_pow": np.power, "_exp": np.exp, "_log": np.log, "_sqrt": np.sqrt, "_abs": np.abs,
+         "_max": np.maximum, "_min": np.minimum, "_round": lambda x: np.floor(np.asarray(x) + 0.5)}
+_CONSTANTS = {"NaN": np.nan}
+
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.Div: operator.truediv, ast.Mod: operator.mod, ast.Pow: operator.pow,
+           ast.BitOr: operator.or_, ast.BitAnd: operator.and_}
+_UNARY = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_COMPARE = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+            ast.Eq: operator.eq, ast.NotEq: operator.ne}
+
+
+def _eval(expr, env):
+    """يقيّم تعبيرًا مترجمًا دون ``eval``: حساب ومقارنات وأسماء ``env`` ودوال ``_MATH`` فقط.
+
+    الـ evalscript يأتي من العميل (الخادم البديل يقبله عبر HTTP)، فأي عقدة أخرى
+    (خصائص، استيراد، lambda، ...) ترفع ``ValueError`` بدل أن تُنفَّذ. والأس بين عددين لا
+    نطاقات فيهما مرفوض أيضًا: ``9**9**9`` بأعداد Python الصحيحة يحجز الخادم دقائق.
+    """
+    def walk(node):
+        if isinstance(node, ast.Expression):
+            return walk(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in env and node.id not in _MATH:
+            return env[node.id]
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            left, right = walk(node.left), walk(node.right)
+            if isinstance(node.op, ast.Pow) and np.ndim(left) == 0 and np.ndim(right) == 0:
+                raise ValueError("constant exponentiation is not supported")
+            return _BINARY[type(node.op)](left, right)
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+            return _UNARY[type(node.op)](walk(node.operand))
+        if isinstance(node, ast.Compare):
+            out, left = True, walk(node.left)
+            for op, right in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARE:
+                    break
+                right = walk(right)
+                out = out & _COMPARE[type(op)](left, right)
+                left = right
+            else:
+                return out
+        if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "_s"
+                and isinstance(node.slice, ast.Constant) and node.slice.value in env["_s"]):
+            return env["_s"][node.slice.value]
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _MATH
+                and not node.keywords):
+            return _MATH[node.func.id](*(walk(a) for a in node.args))
+        raise ValueError(f"unsupported expression: {ast.dump(node)[:80]}")
+
+    return walk(ast.parse(expr.strip(), mode="eval"))
+
+
+def _py_expr(expr):
+    expr = re.sub(r"Math\.(pow|exp|log|sqrt|abs|max|min|round)", r"_\1", expr)
+    expr = re.sub(r"\b[A-Za-z_]\w*\.([A-Za-z_]\w*)", r'_s["\1"]', expr)
+    return expr.replace("===", "==")
+
+
+def _py_cond(cond):
+    parts = re.split(r"(\|\||&&)", cond)
+    return "".join({"||": " | ", "&&": " & "}.get(p, f"({_py_expr(p)})") for p in parts)
+
+
+def _split_top(expr):
+    """يقسم قائمة ``return [...]`` على الفواصل العليا فقط (لا داخل الأقواس)."""
+    parts, depth, cur = [], 0, ""
+    for ch in expr:
+        depth += ch in "(["
+        depth -= ch in ")]"
+        if ch == "," and depth == 0:
+            parts.append(cur)
+            cur = ""
+        else:
+            cur += ch
+    return parts + [cur]
+
+
+def evaluate_evalscript(evalscript, bands):
+    """يقيّم ``evaluatePixel`` متجهيًا على مصفوفات النطاقات.
+
+    يدعم الصيغة البسيطة المستخدمة في سجل المؤشرات: ``let x=...;`` و
+    ``if(cond) return [...];`` و ``return [...]`` مع دوال ``Math``.
+    يعيد (h, w) أو (h, w, bands)، أو None إذا تعذّرت الترجمة.
+    """
+    m = re.search(r"function\s+evaluatePixel\s*\(\s*\w+\s*\)\s*\{(.*)\}\s*$", evalscript, re.S)
+    if m is None:
+        return None
+    shape = next(iter(bands.values())).shape
+    env = {**_CONSTANTS, "_s": bands}
+    out, done = None, np.zeros(shape, dtype=bool)
+    try:
+        with np.errstate(all="ignore"):
+            for stmt in filter(None, (s.strip() for s in m.group(1).split(";"))):
+                stmt = stmt.strip("{} \n")
+                cond_m = re.match(r"if\s*\((.*)\)\s*return\s*\[(.*)\]$", stmt, re.S)
+                ret_m = re.match(r"return\s*\[(.*)\]$", stmt, re.S)
+                let_m = re.match(r"(?:let|var|const)\s+([A-Za-z]\w*)\s*=\s*(.*)$", stmt, re.S)
+                if cond_m:
+                    take = np.broadcast_to(_eval(_py_cond(cond_m.group(1)), env), shape) & ~done
+                    values = [np.broadcast_to(_eval(_py_expr(v), env), shape) for v in _split_top(cond_m.group(2))]
+                elif ret_m:
+                    take = ~done
+                    values = [np.broadcast_to(_eval(_py_expr(v), env), shape) for v in _split_top(ret_m.group(1))]
+                elif let_m:
+                    env[let_m.group(1)] = _eval(_py_expr(let_m.group(2)), env)
+                    continue
+                else:
+                    continue
+                if out is None:
+                    out = np.full(shape + (len(values),), np.nan, dtype=np.float32)
+                for k, v in enumerate(values):
+                    out[..., k][take] = v[take]
+                done |= take
+    except Exception:
+        return None
+    if out is None:
+        return None
+    return out[..., 0] if out.shape[-1] == 1 else out
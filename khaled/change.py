@@ -0,0 +1,86 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   كشف التغير بين تاريخين: خريطة الفرق والنسبة + مساحات التغير             │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import datetime
+
+import numpy as np
+
+from .georef import pixel_area_km2
+from .metrics import stage
+from .pipeline import fetch_indicator
+from .quality import select
+
+LOOKBACK_DAYS = 30  # يُقبل مشهد حتى هذا العدد من الأيام قبل التاريخ المطلوب
+
+
+def scene_interval(date, days=LOOKBACK_DAYS) -> tuple:
+    """الفترة التي يُبحث فيها عن مشهد التاريخ ``date``: أقرب مرور في يومه أو قبله."""
+    end = datetime.date.fromisoformat(str(date)[:10])
+    return str(end - datetime.timedelta(days=days)), str(end)
+
+
+def change_maps(img_a, img_b, mask_a=None, mask_b=None, threshold=0.0, area_km2=None):
+    """يحسب الفرق (ب − أ) والنسبة (ب ÷ أ) وإحصاءات التغير بعمليات NumPy متجهة.
+
+    البكسل صالح إذا كانت قيمتاه محددتين ويقبله قناعا الجودة (bool، إن وُجدا).
+    ``threshold`` أدنى فرق مطلق يُعدّ تغيرًا؛ ``area_km2`` مساحة البكسل (عدد أو عمود لكل صف).
+    """
+    a = np.asarray(img_a, dtype=np.float32).squeeze()
+    b = np.asarray(img_b, dtype=np.float32).squeeze()
+    valid = np.isfinite(a) & np.isfinite(b)
+    for m in (mask_a, mask_b):
+        if m is not None:
+            valid &= np.asarray(m, dtype=bool).squeeze()
+
+    diff = np.where(valid, b - a, np.nan).astype(np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(valid & (a != 0), b / a, np.nan).astype(np.float32)
+
+    area = np.broadcast_to(1.0 if area_km2 is None else area_km2, diff.shape)
+    up = valid & (diff > threshold)
+    down = valid & (diff < -threshold)
+    stats = {
+        "valid_px": int(valid.sum()),
+        "increase_px": int(up.sum()),
+        "decrease_px": int(down.sum()),
+        "increase_km2": float(area[up].sum()),
+        "decrease_km2": float(area[down].sum()),
+        "valid_km2": float(area[valid].sum()),
+        "mean_diff": float(np.nanmean(diff)) if valid.any() else float("nan"),
+    }
+    return diff, ratio, stats
+
+
+def two_date_change(config, evalscript, tier, label, bbox, size, date_a, date_b,
+                    quality=False, threshold=0.0, index=None, tiles=None, ctx=None, scenes=None,
+                    mask_options=None, geometry=None):
+    """يجلب (أو يعيد استخدام) صورتي المؤشر للتاريخين على الشبكة نفسها ثم يقارن بينهما.
+
+    كل تاريخ يُحل إلى أقرب مشهد في يومه أو قبله (``scene_interval``)، فتاريخا
+    اللوحة لا يشترطان مرورًا في اليوم نفسه؛ ``result["dates"]`` تاريخا المشهدين الفعليين.
+    ``quality`` يجلب طبقة الجودة ويقصر المقارنة على ما تقبله ``quality.select(qa, **mask_options)``.
+    ``geometry`` (اختياري) المضلع المرسوم: الصورتان مقصوصتان عليه فلا يُحسب تغير خارجه.
+    """
+    results = []
+    for i, date in enumerate((date_a, date_b)):
+        if ctx is not None:
+            ctx.progress(0.45 * i, f"المشهد {date}")
+        results.append(fetch_indicator(config, evalscript, tier, bbox, size, scene_interval(date),
+                                       quality, index=index, label=label, tiles=tiles,
+                                       scenes=scenes, geometry=geometry))
+    if ctx is not None:
+        ctx.progress(0.9, "حساب التغير")
+
+    first, second = results
+    warnings = first["warnings"] + second["warnings"]
+    if first["scene_date"] == second["scene_date"]:
+        warnings.append(f"⚠️ التاريخان يقعان على المشهد نفسه ({first['scene_date']})؛ لا تغير يُقاس")
+    out_bbox, out_size = second["bbox"], second["size"]
+    with stage("change_maps"):
+        masks = [None if r["qa"] is None else select(r["qa"], **(mask_options or {})) for r in results]
+        diff, ratio, stats = change_maps(first["img"], second["img"], *masks,
+                                         threshold, pixel_area_km2(out_bbox, out_size))
+    return {"diff": diff, "ratio": ratio, "stats": stats,
+            "dates": (first["scene_date"], second["scene_date"]),
+            "bbox": out_bbox, "size": out_size,
+            "warnings": warnings}
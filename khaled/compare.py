@@ -0,0 +1,92 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   مقارنة عدة مؤشرات لمشهد واحد: طلب نطاقات واحد ← كل المؤشرات محليًا       │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+بدل طلب ``SentinelHubRequest`` لكل مؤشر (ولكل قناع)، تُجمع النطاقات التي تحتاجها
+evalscripts المؤشرات المختارة (و B03/B08/SCL لطبقة الجودة المشتركة) في طلب واحد لكل مستوى
+معالجة، ثم يُقيَّم evalscript كل مؤشر محليًا على النطاقات (``khaled.bandmath``).
+
+مؤشرات L2A و L1C لا يجمعها طلب واحد (مجموعتا بيانات مختلفتان)، فالمقارنة بينهما
+تكلف طلبين على الأكثر مهما زاد عدد المؤشرات. كل مؤشر محسوب يُحفظ في فهرس النتائج،
+فعرضه منفردًا بعد المقارنة لا يحتاج جلبًا.
+"""
+from .bandmath import bands_evalscript, evalscript_inputs, evaluate_evalscript
+from .georef import clip_to_geometry
+from .indicators import evalscripts, water_masked_indicators
+from .metrics import array_counters, stage
+from .pipeline import data_collection, fetch_single, latest_scene_date
+from .quality import QUALITY_EVALSCRIPT, encode as encode_quality
+from .results import aoi_hash, resolution_key
+
+
+def band_requests(keys, mask=True) -> dict:
+    """مستوى المعالجة ← النطاقات اللازمة (مرتبة) لمؤشرات ``keys`` وطبقة الجودة عند الحاجة."""
+    bands = {}
+    for key in keys:
+        evalscript, _, tier = evalscripts[key]
+        bands.setdefault(tier, set()).update(evalscript_inputs(evalscript))
+    if mask and any(evalscripts[key][1] in water_masked_indicators for key in keys):
+        bands.setdefault("L2A", set()).update(evalscript_inputs(QUALITY_EVALSCRIPT))
+    return {tier: sorted(names) for tier, names in sorted(bands.items(), reverse=True)}
+
+
+def compare_indicators(config, keys, bbox, size, time_interval, mask=True, index=None, scenes=None, ctx=None,
+                       geometry=None):
+    """يحسب مؤشرات ``keys`` (مفاتيح ``evalscripts``) لأحدث مشهد في الفترة على شبكة واحدة.
+
+    يعيد {"scene_date", "bbox", "size", "images": {التسمية: مصفوفة}, "qa", "requests", "warnings"}.
+    ``qa`` رموز طبقة الجودة المشتركة (من نطاقات L2A نفسها) أو None. ``geometry`` (اختياري) المضلع
+    المرسوم: يُرسل مع طلب النطاقات وتُقص عليه كل المؤشرات.
+    """
+    def step(fraction, message):
+        if ctx is not None:
+            ctx.progress(fraction, message)
+
+    requests = band_requests(keys, mask)
+    dc = data_collection(next(iter(requests)))
+    aoi = aoi_hash(bbox, geometry)
+
+    scene_date = index.cached_search(aoi, dc.api_id, time_interval) if index is not None else None
+    if scene_date is None:
+        step(0.05, "البحث عن أحدث مشهد")
+        scene_date = latest_scene_date(config, dc, bbox, time_interval, scenes)
+        if index is not None:
+            index.store_search(aoi, dc.api_id, time_interval, scene_date)
+
+    bands = {}
+    for i, (tier, names) in enumerate(requests.items()):
+        step(0.15 + 0.6 * i / len(requests), f"جلب {len(names)} نطاقًا ({tier}، {scene_date})")
+        with stage("bands_fetch", bands=len(names)) as counters:
+            arr = fetch_single(config, bands_evalscript(names), data_collection(tier), bbox, size, scene_date,
+                               geometry)
+            if geometry is not None:
+                arr = clip_to_geometry(arr, geometry, bbox, size)
+            counters.update(array_counters(arr))
+        arr = arr.reshape(arr.shape[:2] + (len(names),))
+        bands[tier] = {name: arr[..., k] for k, name in enumerate(names)}
+
+    step(0.8, "حساب المؤشرات")
+    result = {"scene_date": scene_date, "bbox": bbox, "size": size, "images": {}, "qa": None,
+              "requests": len(requests), "warnings": []}
+    if mask and "SCL" in bands.get("L2A", {}):
+        with stage("evaluate_QA"):
+            result["qa"] = encode_quality(evaluate_evalscript(QUALITY_EVALSCRIPT, bands["L2A"]))
+    for key in keys:
+        evalscript, label, tier = evalscripts[key]
+        with stage(f"evaluate_{label}") as counters:
+            img = evaluate_evalscript(evalscript, bands[tier])
+        if img is None:
+            result["warnings"].append(f"⚠️ تعذّر حساب {label} محليًا من النطاقات")
+            continue
+        counters.update(array_counters(img))
+        result["images"][label] = img
+
+    if index is not None:
+        res = resolution_key(size)
+        with stage("index_put"):
+            for label, img in result["images"].items():
+                qa = result["qa"] if label in water_masked_indicators else None
+                index.put(aoi, label, scene_date, res, bbox, img, qa)
+
+    step(1.0, "اكتمل")
+    return result
@@ -0,0 +1,186 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   تركيب زمني متدفّق (median / max / mean) مشهدًا تلو الآخر                 │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import os
+import tempfile
+
+import numpy as np
+from sentinelhub import DataCollection
+
+from . import quality
+from .bandmath import bands_evalscript, evalscript_inputs, evaluate_evalscript
+from .georef import clip_to_geometry
+from .metrics import stage
+from .pipeline import catalog_dates, data_collection, fetch_layer, fetch_single
+from .settings import cache_path
+from .tiles import grid_level, layer_key
+
+COMPOSITE_METHODS = ("median", "max", "mean")
+
+
+# ───────────────────────────── المختزلات ─────────────────────────────
+class MeanReducer:
+    """متوسط جارٍ: مجموع + عدد لكل بكسل."""
+
+    def __init__(self, shape, n_scenes):
+        self._sum = np.zeros(shape, dtype=np.float64)
+        self.count = np.zeros(shape, dtype=np.uint16)
+
+    def add(self, img):
+        valid = np.isfinite(img)
+        self._sum[valid] += img[valid]
+        self.count += valid
+
+    def close(self):
+        pass
+
+    def result(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = (self._sum / self.count).astype(np.float32)
+        out[self.count == 0] = np.nan
+        return out
+
+
+class MaxReducer:
+    """أقصى قيمة جارية (تتجاهل NaN)."""
+
+    def __init__(self, shape, n_scenes):
+        self._max = np.full(shape, np.nan, dtype=np.float32)
+        self.count = np.zeros(shape, dtype=np.uint16)
+
+    def add(self, img):
+        np.fmax(self._max, img, out=self._max)
+        self.count += np.isfinite(img)
+
+    def close(self):
+        pass
+
+    def result(self):
+        return self._max
+
+
+class MedianReducer:
+    """وسيط دقيق على أجزاء: المشاهد تُكتب في ملف memmap على القرص،
+    ثم يُحسب ``nanmedian`` كتلة صفوف تلو الأخرى، فالذاكرة محدودة بحجم الكتلة.
+
+    ``close()`` يحذف الملف المؤقت، ويجب استدعاؤه حتى لو فشل الجلب أو أُلغيت المهمة قبل ``result()``.
+    """
+
+    def __init__(self, shape, n_scenes, block_bytes=64 * 2**20):
+        fd, self._path = tempfile.mkstemp(suffix=".f32", dir=os.path.dirname(cache_path("tmp", "x")))
+        os.close(fd)
+        self._stack = np.memmap(self._path, dtype=np.float32, mode="w+", shape=(n_scenes, *shape))
+        self._n = 0
+        self._block_rows = max(1, block_bytes // (n_scenes * shape[1] * 4))
+        self.count = np.zeros(shape, dtype=np.uint16)
+
+    def add(self, img):
+        self._stack[self._n] = img
+        self._n += 1
+        self.count += np.isfinite(img)
+
+    def close(self):
+        self._stack = None
+        if os.path.exists(self._path):
+            os.remove(self._path)
+
+    def result(self):
+        h = self._stack.shape[1]
+        out = np.full(self._stack.shape[1:], np.nan, dtype=np.float32)
+        for r in range(0, h, self._block_rows):
+            block = np.asarray(self._stack[:self._n, r:r + self._block_rows])
+            rows = self.count[r:r + self._block_rows] > 0
+            if rows.any():
+                out[r:r + self._block_rows][rows] = np.nanmedian(block[:, rows], axis=0)
+        return out
+
+
+REDUCERS = {"median": MedianReducer, "max": MaxReducer, "mean": MeanReducer}
+
+
+# ───────────────────────────── التركيب ─────────────────────────────
+def cube_layers(config, cube, evalscript, tier, bbox, date, z):
+    """المؤشر وطبقة الجودة لمشهد من نطاقات المكعب (يُجلب الناقص منها فقط): (img، qa، bbox).
+
+    نطاقات المؤشر و B03/B08/SCL لطبقة الجودة تُجمع في طلب واحد لكل مستوى معالجة ومربع.
+    """
+    requests = {tier: set(evalscript_inputs(evalscript))}
+    requests.setdefault("L2A", set()).update(evalscript_inputs(quality.QUALITY_EVALSCRIPT))
+    bands = {}
+    for t, names in requests.items():
+        dc = data_collection(t)
+        bands[t], out_bbox = cube.window(
+            lambda tile_bbox, tile_size, missing: fetch_single(config, bands_evalscript(missing), dc, tile_bbox,
+                                                               tile_size, date),
+            t, sorted(names), bbox, date, z
+        )
+    img = evaluate_evalscript(evalscript, bands[tier])
+    qa = evaluate_evalscript(quality.QUALITY_EVALSCRIPT, bands["L2A"])
+    if img is None or qa is None:
+        raise ValueError("evalscript cannot be evaluated from cube bands")
+    return img, qa, out_bbox
+
+
+def temporal_composite(config, evalscript, tier, label, bbox, size, time_interval,
+                       method="median", water_mask=True, tiles=None, ctx=None, scenes=None, mask_options=None,
+                       cube=None, geometry=None):
+    """يبني تركيبًا زمنيًا لكل مشاهد ``time_interval`` مع قناع الجودة (SCL/MDWI) لكل مشهد.
+
+    ``mask_options`` (اختياري) ``exclude``/``water_threshold`` لـ ``quality.select``؛ ``water_mask``
+    يقصر القناع على المياه. ``cube`` (اختياري) ``DataCube``: نطاقات كل مشهد تُقرأ منه (والناقص
+    يُجلب إليه مرة)، والمؤشر وطبقة الجودة يُقيَّمان محليًا، فإعادة التركيب بطريقة أخرى أو لمؤشر
+    آخر على المشاهد نفسها لا تحتاج شبكة. ``geometry`` (اختياري) المضلع المرسوم: كل مشهد يُقص
+    عليه قبل الاختزال، فالتركيب NaN خارجه.
+
+    المشاهد تُجلب وتُقنَّع وتُمرَّر للمختزل واحدًا تلو الآخر، فلا يبقى في الذاكرة
+    إلا مشهد واحد (مع قناعه) مهما طالت الفترة.
+    """
+    def step(fraction, message):
+        if ctx is not None:
+            ctx.progress(fraction, message)
+
+    dc = data_collection(tier)
+    step(0.02, "البحث عن المشاهد المتاحة")
+    dates = catalog_dates(config, dc, bbox, time_interval, scenes)
+
+    layer = layer_key(label, evalscript, tier)
+    qa_layer = layer_key("QA", quality.QUALITY_EVALSCRIPT, "L2A")
+    reducer, out_bbox, out_size = None, bbox, size
+
+    try:
+        for i, date in enumerate(dates):
+            step(0.05 + 0.9 * i / len(dates), f"مشهد {i + 1}/{len(dates)} ({date})")
+            if cube is None:
+                img, out_bbox, out_size = fetch_layer(config, evalscript, dc, layer, bbox, size, date, tiles,
+                                                      geometry=geometry)
+                qa, _, _ = fetch_layer(config, quality.QUALITY_EVALSCRIPT, DataCollection.SENTINEL2_L2A,
+                                       qa_layer, bbox, size, date, tiles)
+            else:
+                img, qa, out_bbox = cube_layers(config, cube, evalscript, tier, bbox, date, grid_level(bbox))
+            img = np.asarray(img, dtype=np.float32).squeeze()
+            out_size = (img.shape[1], img.shape[0])
+            if cube is not None and geometry is not None:
+                with stage("geometry_clip"):
+                    img = clip_to_geometry(img, geometry, out_bbox, out_size)
+
+            valid = quality.select(quality.encode(qa), water_only=water_mask, **(mask_options or {}))
+            img = np.where(valid, img, np.nan).astype(np.float32)
+
+            with stage("composite_add"):
+                if reducer is None:
+                    reducer = REDUCERS[method](img.shape, len(dates))
+                reducer.add(img)
+            del img, qa, valid
+
+        step(0.97, "حساب التركيب")
+        with stage(f"composite_{method}") as counters:
+            out = reducer.result()
+            counters["scenes"] = len(dates)
+    finally:
+        # الملف المؤقت للوسيط لا يبقى بعد فشل جلب أو إلغاء المهمة
+        if reducer is not None:
+            reducer.close()
+    step(1.0, "اكتمل")
+    return {"img": out, "qa": None, "scene_date": f"{dates[0]} → {dates[-1]}",
+            "n_scenes": len(dates), "valid_count": reducer.count,
+            "bbox": out_bbox, "size": out_size, "warnings": []}
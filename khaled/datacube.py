@@ -0,0 +1,173 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   مكعب بيانات محلي مُجزّأ ومضغوط (زمن، ص، س، نطاق) على شبكة المربعات      │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+المكعب يخزن نطاقات Sentinel-2 الخام (B03، B08، SCL...) لا المؤشرات المشتقة: مشهد مجلوب مرة
+يخدم كل مؤشر وطبقة الجودة بعدها، فتُقيَّم evalscripts محليًا (``khaled.bandmath``) دون شبكة.
+
+* الكتابة: ``window`` يجلب المربعات الناقصة فقط، بطلب واحد لكل مربع يعيد كل نطاقاته الناقصة
+  (``bands_evalscript``)، ويكتب كل نطاق جزءًا كاملًا مستقلًا (استبدال ذري، بلا قراءة-تعديل-كتابة).
+* القراءة كسولة: ``read_window`` لا يفتح إلا الأجزاء التي تتقاطع مع النافذة، و ``pixel_series``
+  جزءًا واحدًا لكل تاريخ.
+
+المستهلكون: التركيب الزمني (``khaled.composite``) يقرأ نطاقات كل مشهد من المكعب عند تفعيله
+(``KHALED_DATACUBE=1``)، وقارئ البكسل في اللوحة يعرض السلسلة الزمنية للمؤشر من المكعب نفسه.
+"""
+import json
+import math
+import os
+import zlib
+
+import numpy as np
+
+from sentinelhub import CRS
+
+from .bandmath import evalscript_inputs, evaluate_evalscript
+from .georef import lonlat_to_crs
+from .metrics import stage
+from .settings import cache_path
+from .tiles import (
+    TILE_PX, BASE_RES_DEG, BASE_RES_M, ORIGIN_X, ORIGIN_Y, UTM_ORIGIN_X, UTM_ORIGIN_Y, grid_spec, pixel_window,
+    tile_window, window_bbox
+)
+
+DTYPE = np.float32
+
+
+def band_key(tier, band, crs) -> str:
+    """مفتاح النطاق في المكعب: مستوى المعالجة + الاسم، ولكل منطقة UTM شبكتها."""
+    key = f"{tier}-{band}"
+    return key if crs == CRS.WGS84 else f"{key}@{crs.epsg}"
+
+
+class DataCube:
+    """مخزن مُجزّأ بتخطيط شبيه بـ Zarr دون اعتماديات إضافية.
+
+    كل جزء (chunk) يغطي مربعًا واحدًا من الشبكة (TILE_PX × TILE_PX) لتاريخ ونطاق
+    واحد، ويُحفظ مضغوطًا بـ zlib في:
+    ``<root>/<band>/z<z>/<date>/<cy>_<cx>.zz``
+    القراءة لا تلمس إلا الأجزاء التي تتقاطع مع النافذة المطلوبة.
+    """
+
+    def __init__(self, root=None, level=6):
+        self.root = root or os.path.dirname(cache_path("datacube", "x"))
+        self.level = level
+        os.makedirs(self.root, exist_ok=True)
+        meta = os.path.join(self.root, "cube.json")
+        if not os.path.exists(meta):
+            with open(meta, "w", encoding="utf-8") as f:
+                json.dump({"dims": ["time", "y", "x", "band"], "chunk": [1, TILE_PX, TILE_PX, 1],
+                           "dtype": np.dtype(DTYPE).name, "codec": "zlib", "band_key": "<tier>-<band>",
+                           "grid": {"origin": [ORIGIN_X, ORIGIN_Y], "res_z0": BASE_RES_DEG},
+                           "utm_grid": {"origin": [UTM_ORIGIN_X, UTM_ORIGIN_Y], "res_z0": BASE_RES_M,
+                                        "band_suffix": "@<epsg>"}}, f)
+
+    def _chunk_path(self, band, z, date, cy, cx):
+        return os.path.join(self.root, band, f"z{z}", date, f"{cy}_{cx}.zz")
+
+    def has_chunk(self, band, z, date, cy, cx) -> bool:
+        return os.path.exists(self._chunk_path(band, z, date, cy, cx))
+
+    # ───────────────────────────── الكتابة ─────────────────────────────
+    def write_chunk(self, date, band, z, cx, cy, arr):
+        """يكتب جزءًا كاملًا (مربع شبكة واحد)."""
+        arr = np.ascontiguousarray(arr, dtype=DTYPE).reshape(TILE_PX, TILE_PX)
+        path = self._chunk_path(band, z, date, cy, cx)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(arr.tobytes(), self.level))
+        os.replace(tmp, path)
+
+    def window(self, fetch_bands, tier, names, bbox, date, z):
+        """نطاقات ``names`` لنافذة الـ bbox على الشبكة: {الاسم: (h, w)}، والـ bbox المحاذي.
+
+        ``fetch_bands(tile_bbox, (w, h), names)`` تعيد (h, w, len(names)) من الخدمة، وتُستدعى
+        مرة لكل مربع ينقصه نطاق على الأقل، بالنطاقات الناقصة وحدها.
+        """
+        crs = bbox.crs
+        win = pixel_window(bbox, z)
+        col0, row0, col1, row1 = win
+        keys = {name: band_key(tier, name, crs) for name in names}
+        fetched = 0
+        for cy in range(row0 // TILE_PX, (row1 - 1) // TILE_PX + 1):
+            for cx in range(col0 // TILE_PX, (col1 - 1) // TILE_PX + 1):
+                missing = [n for n in names if not self.has_chunk(keys[n], z, date, cy, cx)]
+                if not missing:
+                    continue
+                with stage("cube_fetch", bands=len(missing)):
+                    arr = np.asarray(fetch_bands(window_bbox(tile_window(cx, cy), z, crs), (TILE_PX, TILE_PX),
+                                                 missing), dtype=DTYPE)
+                arr = arr.reshape(TILE_PX, TILE_PX, len(missing))
+                for k, name in enumerate(missing):
+                    self.write_chunk(date, keys[name], z, cx, cy, arr[..., k])
+                fetched += 1
+        with stage("cube_read", bands=len(names), fetched_tiles=fetched):
+            bands = {name: self.read_window(date, keys[name], z, win) for name in names}
+        return bands, window_bbox(win, z, crs)
+
+    # ───────────────────────────── القراءة الكسولة ─────────────────────────────
+    def _read_chunk(self, band, z, date, cy, cx):
+        path = self._chunk_path(band, z, date, cy, cx)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return np.frombuffer(zlib.decompress(f.read()), dtype=DTYPE).reshape(TILE_PX, TILE_PX)
+
+    def bands(self) -> list:
+        return sorted(d for d in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, d)))
+
+    def dates(self, band, z, start=None, end=None) -> list:
+        """التواريخ المخزنة لنطاق ومستوى، ضمن مدى اختياري [start, end]."""
+        base = os.path.join(self.root, band, f"z{z}")
+        if not os.path.isdir(base):
+            return []
+        return sorted(d for d in os.listdir(base)
+                      if (start is None or d >= start) and (end is None or d <= end))
+
+    def read_window(self, date, band, z, window):
+        """يقرأ نافذة واحدة (h, w) لتاريخ ونطاق؛ الأجزاء غير المخزنة تعود NaN."""
+        col0, row0, col1, row1 = window
+        out = np.full((row1 - row0, col1 - col0), np.nan, dtype=DTYPE)
+        for cy in range(row0 // TILE_PX, (row1 - 1) // TILE_PX + 1):
+            for cx in range(col0 // TILE_PX, (col1 - 1) // TILE_PX + 1):
+                chunk = self._read_chunk(band, z, date, cy, cx)
+                if chunk is None:
+                    continue
+                c0, r0 = cx * TILE_PX, cy * TILE_PX
+                ic0, ir0 = max(c0, col0), max(r0, row0)
+                ic1, ir1 = min(c0 + TILE_PX, col1), min(r0 + TILE_PX, row1)
+                out[ir0 - row0:ir1 - row0, ic0 - col0:ic1 - col0] = \
+                    chunk[ir0 - r0:ir1 - r0, ic0 - c0:ic1 - c0]
+        return out
+
+    def pixel_series(self, band, z, lon, lat, start=None, end=None):
+        """سلسلة زمنية لبكسل واحد: يقرأ جزءًا واحدًا لكل تاريخ.
+
+        نطاقات شبكات UTM (``<tier>-<band>@epsg``) تُحوَّل إليها النقطة أولًا.
+        """
+        crs = CRS(int(band.rsplit("@", 1)[1])) if "@" in band else CRS.WGS84
+        x, y = lonlat_to_crs(crs, lon, lat)
+        base, ox, oy = grid_spec(crs)
+        res = base * 2 ** z
+        col = math.floor((x - ox) / res)
+        row = math.floor((oy - y) / res)
+        cy, cx = row // TILE_PX, col // TILE_PX
+        dates, values = [], []
+        for date in self.dates(band, z, start, end):
+            chunk = self._read_chunk(band, z, date, cy, cx)
+            if chunk is not None:
+                dates.append(date)
+                values.append(float(chunk[row - cy * TILE_PX, col - cx * TILE_PX]))
+        return dates, np.asarray(values, dtype=DTYPE)
+
+    def indicator_series(self, evalscript, tier, crs, z, lon, lat, start=None, end=None):
+        """سلسلة المؤشر لبكسل واحد من نطاقاته المخزنة (التواريخ التي لها كل النطاقات فقط)."""
+        series = {name: dict(zip(*self.pixel_series(band_key(tier, name, crs), z, lon, lat, start, end)))
+                  for name in evalscript_inputs(evalscript)}
+        dates = sorted(set.intersection(*(set(s) for s in series.values())))
+        if not dates:
+            return [], np.zeros(0, dtype=DTYPE)
+        bands = {name: np.asarray([s[d] for d in dates], dtype=DTYPE) for name, s in series.items()}
+        values = evaluate_evalscript(evalscript, bands)
+        return dates, np.full(len(dates), np.nan, dtype=DTYPE) if values is None else values.astype(DTYPE)
@@ -0,0 +1,345 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   تصدير القيم الخام: Cloud-Optimized GeoTIFF (مربعات + ملخصات) و NetCDF    │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+كاتبان تسلسليان لنطاقات float32 (المؤشر ثم القناع؛ NaN = لا بيانات) بإسناد ``bbox``:
+
+* ``write_cog``: مربعات 256×256 مضغوطة بـ Deflate مع متنبئ الفاصلة العائمة (Predictor=3)،
+  وملخصات (overviews) بمعامل 2 حتى يتسع المستوى لمربع واحد. كل أدلة IFD في رأس الملف
+  وبيانات أصغر ملخص أولًا والدقة الكاملة أخيرًا، كما يتوقع قارئ COG. المربعات تُضغط
+  واحدًا واحدًا إلى ملف مؤقت ثم تُنسخ بعد الرأس، فلا تُقرأ من المصدر (مصفوفة أو memmap)
+  إلا كتلة محدودة في كل مرة. يُنتقل إلى BigTIFF تلقائيًا فوق 4 GB.
+* ``write_netcdf``: NetCDF-3 (إزاحات 64-بت) بإحداثيات وخريطة شبكة CF-1.8، صفوفًا صفوفًا
+  ودون مكتبة netCDF4.
+
+كلاهما يكتب إلى مسار أو أي كائن ملف يقبل ``write`` (رد HTTP، ملف في المجلد المشترك).
+"""
+import datetime
+import shutil
+import struct
+import tempfile
+import zlib
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from .mosaic import Mosaic
+from .raster import MaskBand, Raster
+
+TILE = 256
+CHUNK = 2**20
+BIGTIFF_AT = 2**32  # حجم الملف الذي لا تتسع إزاحاته لـ TIFF الكلاسيكي (32-بت)
+
+# أنواع حقول TIFF: (رمز struct، الحجم)
+ASCII, SHORT, LONG, DOUBLE, LONG8 = 2, 3, 4, 12, 16
+_TIFF_TYPES = {ASCII: ("s", 1), SHORT: ("H", 2), LONG: ("I", 4), DOUBLE: ("d", 8), LONG8: ("Q", 8)}
+
+# وسوم GeoTIFF (OGC 19-008) ووسما GDAL للبيانات الوصفية وقيمة "لا بيانات"
+MODEL_PIXEL_SCALE = 33550
+MODEL_TIEPOINT = 33922
+GEO_KEY_DIRECTORY = 34735
+GDAL_METADATA = 42112
+GDAL_NODATA = 42113
+
+
+def geotiff_tags(bbox, size) -> list:
+    """وسوم الإسناد (مقياس البكسل، نقطة الربط، دليل GeoKey) لشبكة ``size`` فوق ``bbox``."""
+    w, h = size
+    dx = (bbox.max_x - bbox.min_x) / w
+    dy = (bbox.max_y - bbox.min_y) / h
+    epsg = int(bbox.crs.epsg)
+    geographic = epsg == 4326
+    # GTModelType (1024)، GTRasterType (1025: PixelIsArea)، ثم رمز النظام الجغرافي (2048) أو المسقط (3072)
+    keys = [1, 1, 0, 3,
+            1024, 0, 1, 2 if geographic else 1,
+            1025, 0, 1, 1,
+            2048 if geographic else 3072, 0, 1, epsg]
+    return [
+        (MODEL_PIXEL_SCALE, DOUBLE, (dx, dy, 0.0)),
+        (MODEL_TIEPOINT, DOUBLE, (0.0, 0.0, 0.0, bbox.min_x, bbox.max_y, 0.0)),
+        (GEO_KEY_DIRECTORY, SHORT, keys),
+    ]
+
+
+def _band(band):
+    """``Raster``/``Mosaic``/``MaskBand`` تبقى كما هي (تُفك كتلة كتلة عند القراءة)، والبقية مصفوفات."""
+    return band if isinstance(band, (Raster, Mosaic, MaskBand)) else np.asarray(band).squeeze()
+
+
+def _open(fh):
+    return (open(fh, "wb"), True) if isinstance(fh, str) else (fh, False)
+
+
+# ───────────────────────────── COG ─────────────────────────────
+def _halve(block):
+    """متوسط 2×2 يتجاهل NaN (الناتج NaN فقط إذا كانت الأربعة كلها بلا قيمة)."""
+    h, w = block.shape
+    padded = np.full((h + h % 2, w + w % 2), np.nan, np.float32)
+    padded[:h, :w] = block
+    quads = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2)
+    valid = np.isfinite(quads)
+    count = valid.sum(axis=(1, 3))
+    total = np.where(valid, quads, 0).sum(axis=(1, 3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan).astype(np.float32)
+
+
+def _level_tiles(band, factor, tile):
+    """مربعات المستوى ذي معامل التصغير ``factor`` (1 = الدقة الكاملة) بترتيب الصفوف.
+
+    مربع الملخص يُحسب من عينة المصدر بخطوة ``factor/2`` ثم متوسط 2×2، فلا تتجاوز الكتلة
+    المقروءة (2·tile)² مهما كبر المعامل.
+    """
+    h, w = band.shape
+    oh, ow = -(-h // factor), -(-w // factor)
+    step = max(1, factor // 2)
+    for r in range(0, oh, tile):
+        for c in range(0, ow, tile):
+            block = np.asarray(band[r * factor:(r + tile) * factor:step,
+                                    c * factor:(c + tile) * factor:step], dtype=np.float32)
+            if factor > 1:
+                block = _halve(block)
+            out = np.full((tile, tile), np.nan, np.float32)
+            out[:block.shape[0], :block.shape[1]] = block
+            yield out
+
+
+def _predict(tile):
+    """متنبئ الفاصلة العائمة (TIFF Predictor=3): بايتات كل صف مرتبة مستويات (الأعلى أولًا) ثم فرق أفقي."""
+    rows, cols = tile.shape
+    planes = tile.astype(">f4").view(np.uint8).reshape(rows, cols, 4).transpose(0, 2, 1).reshape(rows, 4 * cols)
+    diff = planes.copy()
+    diff[:, 1:] = np.diff(planes, axis=1)  # uint8: الطرح بترديد 256 كما في libtiff
+    return diff.tobytes()
+
+
+def _ifd(entries, at, next_at, big):
+    """يرمّز دليل IFD يبدأ عند الإزاحة ``at``؛ القيم التي لا تتسع في حقلها تلي جدول الوسوم.
+
+    الحجم لا يعتمد على قيم الإزاحات، فيمكن قياسه أولًا بإزاحات صفرية.
+    """
+    inline, off = (8, "<Q") if big else (4, "<I")
+    entries = sorted(entries, key=lambda e: e[0])
+    table_size = (8 if big else 2) + len(entries) * (20 if big else 12) + inline
+    table, extra = [struct.pack("<Q" if big else "<H", len(entries))], b""
+    for tag, typ, values in entries:
+        code, _ = _TIFF_TYPES[typ]
+        if typ == ASCII:
+            data = values.encode("ascii", "xmlcharrefreplace") + b"\0"
+            count = len(data)
+        else:
+            count = len(values)
+            data = struct.pack(f"<{count}{code}", *values)
+        if len(data) <= inline:
+            field = data.ljust(inline, b"\0")
+        else:
+            field = struct.pack(off, at + table_size + len(extra))
+            extra += data + b"\0" * (len(data) % 2)
+        table.append(struct.pack("<HH", tag, typ) + struct.pack(off, count) + field)
+    table.append(struct.pack(off, next_at))
+    return b"".join(table) + extra
+
+
+def write_cog(fh, bands, bbox, attrs=None, tile=TILE, level=6):
+    """يكتب ``bands`` ({الاسم: مصفوفة ثنائية}، الأبعاد نفسها) كـ Cloud-Optimized GeoTIFF.
+
+    كل اسم يُسجَّل وصفًا لنطاقه و ``attrs`` بيانات وصفية للملف (GDAL_METADATA)، والنطاقات
+    مخزنة مستويات منفصلة.
+    """
+    names = list(bands)
+    arrays = [_band(bands[n]) for n in names]
+    h, w = arrays[0].shape
+    spp = len(arrays)
+    factors = [1]
+    while max(h, w) > tile * factors[-1]:
+        factors.append(factors[-1] * 2)
+
+    metadata = "".join([*(f'<Item name="{k}">{escape(str(v))}</Item>' for k, v in (attrs or {}).items()),
+                        *(f'<Item name="DESCRIPTION" sample="{i}" role="description">{escape(n)}</Item>'
+                          for i, n in enumerate(names))])
+
+    def entries(factor, offsets, counts, big):
+        offset_type = LONG8 if big else LONG
+        out = [
+            (254, LONG, (0 if factor == 1 else 1,)),  # NewSubfileType: 1 = ملخص
+            (256, LONG, (-(-w // factor),)),
+            (257, LONG, (-(-h // factor),)),
+            (258, SHORT, (32,) * spp),
+            (259, SHORT, (8,)),  # Deflate
+            (262, SHORT, (1,)),  # MinIsBlack
+            (277, SHORT, (spp,)),
+            (284, SHORT, (2 if spp > 1 else 1,)),  # مستويات منفصلة
+            (317, SHORT, (3,)),  # متنبئ الفاصلة العائمة
+            (322, SHORT, (tile,)),
+            (323, SHORT, (tile,)),
+            (324, offset_type, offsets),
+            (325, offset_type, counts),
+            (339, SHORT, (3,) * spp),  # IEEE float
+            (GDAL_NODATA, ASCII, "nan"),
+        ]
+        if spp > 1:
+            out.append((338, SHORT, (0,) * (spp - 1)))
+        if factor == 1:
+            out += geotiff_tags(bbox, (w, h))
+            out.append((GDAL_METADATA, ASCII, f"<GDALMetadata>{metadata}</GDALMetadata>"))
+        return out
+
+    out, owned = _open(fh)
+    try:
+        with tempfile.TemporaryFile() as spool:
+            # البيانات: أصغر ملخص أولًا والدقة الكاملة أخيرًا؛ داخل المستوى النطاق تلو النطاق
+            counts = {}
+            for factor in reversed(factors):
+                counts[factor] = []
+                for band in arrays:
+                    for t in _level_tiles(band, factor, tile):
+                        data = zlib.compress(_predict(t), level)
+                        spool.write(data)
+                        counts[factor].append(len(data))
+            data_size = spool.tell()
+
+            def layout(big):
+                header = 16 if big else 8
+                sizes = [len(_ifd(entries(f, [0] * len(counts[f]), counts[f], big), 0, 0, big)) for f in factors]
+                return header, sizes, header + sum(sizes)
+
+            big = False
+            header, sizes, data_start = layout(big)
+            if data_start + data_size >= BIGTIFF_AT:
+                big = True
+                header, sizes, data_start = layout(big)
+
+            offsets, pos = {}, data_start
+            for factor in reversed(factors):
+                offsets[factor] = []
+                for n in counts[factor]:
+                    offsets[factor].append(pos)
+                    pos += n
+
+            if big:
+                out.write(struct.pack("<2sHHHQ", b"II", 43, 8, 0, header))
+            else:
+                out.write(struct.pack("<2sHI", b"II", 42, header))
+            at = header
+            for i, factor in enumerate(factors):
+                next_at = at + sizes[i] if i + 1 < len(factors) else 0
+                out.write(_ifd(entries(factor, offsets[factor], counts[factor], big), at, next_at, big))
+                at += sizes[i]
+
+            spool.seek(0)
+            shutil.copyfileobj(spool, out, CHUNK)
+    finally:
+        if owned:
+            out.close()
+
+
+# ───────────────────────────── NetCDF ─────────────────────────────
+NC_DIMENSION, NC_VARIABLE, NC_ATTRIBUTE = 10, 11, 12
+NC_CHAR, NC_INT, NC_FLOAT, NC_DOUBLE = 2, 4, 5, 6
+
+
+def _nc_pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _nc_name(name: str) -> bytes:
+    data = name.encode("utf-8")
+    return struct.pack(">i", len(data)) + _nc_pad(data)
+
+
+def _nc_attrs(attrs) -> bytes:
+    if not attrs:
+        return struct.pack(">ii", 0, 0)
+    out = [struct.pack(">ii", NC_ATTRIBUTE, len(attrs))]
+    for name, value in attrs.items():
+        if isinstance(value, str):
+            data = value.encode("utf-8")
+            out.append(_nc_name(name) + struct.pack(">ii", NC_CHAR, len(data)) + _nc_pad(data))
+            continue
+        arr = np.atleast_1d(value)
+        if arr.dtype == np.float32:
+            nc_type, dtype = NC_FLOAT, ">f4"
+        elif np.issubdtype(arr.dtype, np.integer):
+            nc_type, dtype = NC_INT, ">i4"
+        else:
+            nc_type, dtype = NC_DOUBLE, ">f8"
+        out.append(_nc_name(name) + struct.pack(">ii", nc_type, arr.size) + _nc_pad(arr.astype(dtype).tobytes()))
+    return b"".join(out)
+
+
+def write_netcdf(fh, bands, bbox, attrs=None):
+    """يكتب ``bands`` ({الاسم: مصفوفة ثنائية}) كـ NetCDF-3 مع إحداثيات مراكز البكسلات وخريطة الشبكة.
+
+    ``attrs`` سمات عامة إضافية (مثل تاريخ المشهد).
+    """
+    names = list(bands)
+    arrays = [_band(bands[n]) for n in names]
+    h, w = arrays[0].shape
+    dx, dy = (bbox.max_x - bbox.min_x) / w, (bbox.max_y - bbox.min_y) / h
+    xs = bbox.min_x + (np.arange(w) + 0.5) * dx
+    ys = bbox.max_y - (np.arange(h) + 0.5) * dy
+
+    if int(bbox.crs.epsg) == 4326:
+        (ydim, yattrs), (xdim, xattrs) = (
+            ("lat", {"standard_name": "latitude", "units": "degrees_north"}),
+            ("lon", {"standard_name": "longitude", "units": "degrees_east"}))
+    else:
+        (ydim, yattrs), (xdim, xattrs) = (
+            ("y", {"standard_name": "projection_y_coordinate", "units": "m"}),
+            ("x", {"standard_name": "projection_x_coordinate", "units": "m"}))
+
+    # (الاسم، الأبعاد، النوع، السمات، الحجم بالبايت، مولّد البيانات)
+    def rows(arr):
+        step = max(1, CHUNK // (4 * w))
+        for r in range(0, h, step):
+            yield np.asarray(arr[r:r + step], dtype=">f4").tobytes()
+
+    variables = [
+        ("crs", (), NC_INT, {**bbox.crs.pyproj_crs().to_cf(), "epsg_code": f"EPSG:{int(bbox.crs.epsg)}"},
+         4, lambda: iter([struct.pack(">i", 0)])),
+        (ydim, (0,), NC_DOUBLE, yattrs, 8 * h, lambda: iter([ys.astype(">f8").tobytes()])),
+        (xdim, (1,), NC_DOUBLE, xattrs, 8 * w, lambda: iter([xs.astype(">f8").tobytes()])),
+    ]
+    for name, arr in zip(names, arrays):
+        variables.append((name, (0, 1), NC_FLOAT,
+                          {"long_name": name, "_FillValue": np.float32(np.nan), "grid_mapping": "crs"},
+                          4 * h * w, lambda arr=arr: rows(arr)))
+
+    global_attrs = {"Conventions": "CF-1.8",
+                    "source": "Copernicus Sentinel-2 via Sentinel Hub",
+                    "date_created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                    **(attrs or {})}
+
+    def header(begins):
+        out = [b"CDF\x02", struct.pack(">i", 0),
+               struct.pack(">ii", NC_DIMENSION, 2),
+               _nc_name(ydim), struct.pack(">i", h), _nc_name(xdim), struct.pack(">i", w),
+               _nc_attrs(global_attrs),
+               struct.pack(">ii", NC_VARIABLE, len(variables))]
+        for (name, dims, nc_type, vattrs, nbytes, _), begin in zip(variables, begins):
+            out += [_nc_name(name), struct.pack(">i", len(dims)), *(struct.pack(">i", d) for d in dims),
+                    _nc_attrs(vattrs), struct.pack(">iIq", nc_type, min(nbytes, 2**32 - 1), begin)]
+        return b"".join(out)
+
+    begins, pos = [], len(header([0] * len(variables)))
+    for v in variables:
+        begins.append(pos)
+        pos += v[4] + (-v[4] % 4)
+
+    out, owned = _open(fh)
+    try:
+        out.write(header(begins))
+        for v in variables:
+            for block in v[5]():
+                out.write(block)
+            out.write(b"\0" * (-v[4] % 4))
+    finally:
+        if owned:
+            out.close()
+
+
+# (الامتداد، نوع المحتوى، الكاتب) لكل صيغة تصدير
+FORMATS = {
+    "cog": (".tif", "image/tiff", write_cog),
+    "netcdf": (".nc", "application/x-netcdf", write_netcdf),
+}
@@ -0,0 +1,158 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   الإسناد الجغرافي للصور المخزنة: مساحة البكسل والتحويل بين البكسل والإحداثيات │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .raster import Raster
+
+M_PER_DEG_LAT = 110_540.0
+M_PER_DEG_LON = 111_320.0
+
+
+@lru_cache(maxsize=16)
+def _transformer(src, dst):
+    from pyproj import Transformer
+
+    return Transformer.from_crs(src.pyproj_crs(), dst.pyproj_crs(), always_xy=True)
+
+
+def lonlat_to_crs(crs, lons, lats):
+    """(x, y) بنظام الإسناد ``crs`` لإحداثيات WGS84؛ تمر كما هي إن كان جغرافيًا."""
+    if crs.epsg == 4326:
+        return lons, lats
+    from sentinelhub import CRS
+
+    return _transformer(CRS.WGS84, crs).transform(lons, lats)
+
+
+def crs_to_lonlat(crs, xs, ys):
+    """عكس ``lonlat_to_crs``: (lon, lat) لإحداثيات بنظام ``crs``."""
+    if crs.epsg == 4326:
+        return xs, ys
+    from sentinelhub import CRS
+
+    return _transformer(crs, CRS.WGS84).transform(xs, ys)
+
+
+def pixel_area_km2(bbox, size):
+    """مساحة البكسل بالكم² لكل صف (h, 1)؛ في WGS84 تتغير المساحة مع خط العرض، وفي UTM ثابتة."""
+    w, h = size
+    dx = (bbox.max_x - bbox.min_x) / w
+    dy = (bbox.max_y - bbox.min_y) / h
+    if bbox.crs.epsg != 4326:
+        return np.full((h, 1), dx * dy / 1e6)
+    lats = bbox.max_y - dy * (np.arange(h) + 0.5)
+    return (dx * M_PER_DEG_LON * np.cos(np.radians(lats)) * dy * M_PER_DEG_LAT / 1e6)[:, None]
+
+
+def lonlat_to_pixel(bbox, size, lon, lat):
+    """(الصف، العمود) للنقطة (WGS84) في الشبكة المخزنة، أو None إذا وقعت خارجها. O(1)."""
+    w, h = size
+    lon, lat = lonlat_to_crs(bbox.crs, lon, lat)
+    # floor لا int: نقطة على بعد أقل من بكسل يسار الصورة أو أعلاها خارجها، لا في العمود/الصف 0
+    col = math.floor((lon - bbox.min_x) / (bbox.max_x - bbox.min_x) * w)
+    row = math.floor((bbox.max_y - lat) / (bbox.max_y - bbox.min_y) * h)
+    if 0 <= row < h and 0 <= col < w:
+        return row, col
+    return None
+
+
+def value_at(img, bbox, size, lon, lat):
+    """قيمة البكسل عند (lon, lat) مباشرة من المصفوفة المخزنة، أو None خارج الصورة."""
+    rc = lonlat_to_pixel(bbox, size, lon, lat)
+    if rc is None:
+        return None
+    return float((img if isinstance(img, Raster) else np.asarray(img).squeeze())[rc])
+
+
+def sample_line(img, bbox, size, coords, max_samples=2000):
+    """يأخذ عينات متجهة على خط متعدد الأجزاء [(lon, lat), ...] بخطوة ≈ بكسل واحد.
+
+    يعيد (المسافة من البداية كم، القيم، خطوط الطول، خطوط العرض)؛ النقاط خارج الصورة NaN.
+    """
+    a = img if isinstance(img, Raster) else np.asarray(img, dtype=np.float32).squeeze()
+    h, w = a.shape
+    pts = np.asarray(coords, dtype=np.float64)
+    mid_lat = np.radians(pts[:, 1].mean())
+    seg = np.diff(pts, axis=0) * [M_PER_DEG_LON * np.cos(mid_lat), M_PER_DEG_LAT]
+    cum = np.concatenate([[0.0], np.cumsum(np.hypot(seg[:, 0], seg[:, 1]))]) / 1000
+
+    dx, dy = (bbox.max_x - bbox.min_x) / w, (bbox.max_y - bbox.min_y) / h
+    if bbox.crs.epsg == 4326:
+        dx, dy = dx * M_PER_DEG_LON * np.cos(mid_lat), dy * M_PER_DEG_LAT
+    px_km = min(dx, dy) / 1000
+    n = int(np.clip(cum[-1] / max(px_km, 1e-9), 2, max_samples))
+    dist = np.linspace(0, cum[-1], n)
+    lons = np.interp(dist, cum, pts[:, 0])
+    lats = np.interp(dist, cum, pts[:, 1])
+
+    xs, ys = (np.asarray(v) for v in lonlat_to_crs(bbox.crs, lons, lats))
+    inside = ((xs >= bbox.min_x) & (xs <= bbox.max_x)
+              & (ys >= bbox.min_y) & (ys <= bbox.max_y))
+    cols = np.clip(((xs - bbox.min_x) / (bbox.max_x - bbox.min_x) * w).astype(np.int64), 0, w - 1)
+    rows = np.clip(((bbox.max_y - ys) / (bbox.max_y - bbox.min_y) * h).astype(np.int64), 0, h - 1)
+    values = np.full(n, np.nan, dtype=np.float32)
+    values[inside] = a[rows[inside], cols[inside]]
+    return dist, values, lons, lats
+
+
+def polygon_mask(rings, bbox, size):
+    """قناع منطقي (h, w) للبكسلات التي تقع مراكزها داخل المضلع.
+
+    ``rings`` حلقات المضلع [[(lon, lat), ...], ...] (الخارجية ثم الثقوب) بإحداثيات الـ bbox؛
+    قاعدة الزوجي/الفردي على خطوط المسح، فالثقوب تُستثنى دون معاملة خاصة. O(h·الأضلاع + h·w).
+    """
+    w, h = size
+    dx = (bbox.max_x - bbox.min_x) / w
+    dy = (bbox.max_y - bbox.min_y) / h
+    ys = bbox.max_y - dy * (np.arange(h) + 0.5)
+
+    edges = np.concatenate([np.stack([r[:-1], r[1:]], axis=1)
+                            for r in (np.asarray(ring, dtype=np.float64)[:, :2] for ring in rings)])
+    (x0, y0), (x1, y1) = edges[:, 0].T, edges[:, 1].T
+    crosses = (y0[None, :] <= ys[:, None]) != (y1[None, :] <= ys[:, None])       # (h, الأضلاع)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xs = np.where(crosses, x0 + (ys[:, None] - y0) * (x1 - x0) / (y1 - y0), bbox.min_x)
+    # أول عمود يقع مركزه يمين نقطة التقاطع؛ عدد التقاطعات يسار كل مركز بمجموع تراكمي
+    cols = np.clip(np.floor((xs - bbox.min_x) / dx - 0.5).astype(np.int64) + 1, 0, w)
+    rows = np.broadcast_to(np.arange(h)[:, None], cols.shape)
+    toggles = np.zeros((h, w + 1), dtype=np.int32)
+    np.add.at(toggles, (rows[crosses], cols[crosses]), 1)
+    return (np.cumsum(toggles[:, :w], axis=1) & 1).astype(bool)
+
+
+def geometry_rings(shape) -> list:
+    """حلقات مضلع أو مضلعات shapely (الخارجية والثقوب) بالصيغة التي يقبلها ``polygon_mask``."""
+    return [ring.coords for poly in getattr(shape, "geoms", [shape])
+            for ring in (poly.exterior, *poly.interiors)]
+
+
+@lru_cache(maxsize=8)
+def _geometry_mask(wkt, bounds, crs, size):
+    from shapely import wkt as shapely_wkt
+    from sentinelhub import BBox
+
+    mask = polygon_mask(geometry_rings(shapely_wkt.loads(wkt)), BBox(bounds, crs), size)
+    mask.flags.writeable = False
+    return mask
+
+
+def geometry_mask(geometry, bbox, size):
+    """قناع الهندسة (``sentinelhub.Geometry``) على شبكة (bbox, size)، محسوب مرة ومخزن.
+
+    المؤشر وقناع المياه ومربعات الشبكة نفسها تتشارك القناع دون إعادة المسح.
+    الهندسة المرسومة (WGS84) تُحوَّل إلى نظام الشبكة (UTM) أولًا.
+    """
+    if geometry.crs != bbox.crs:
+        geometry = geometry.transform(bbox.crs)
+    return _geometry_mask(geometry.wkt, tuple(bbox), bbox.crs, tuple(size))
+
+
+def clip_to_geometry(arr, geometry, bbox, size):
+    """نسخة float32 من ``arr`` (h, w[, نطاقات]) قيمها خارج ``geometry`` NaN."""
+    mask = geometry_mask(geometry, bbox, size)
+    arr = np.asarray(arr, dtype=np.float32)
+    return np.where(mask.reshape(mask.shape + (1,) * (arr.ndim - 2)), arr, np.float32(np.nan))
@@ -0,0 +1,342 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   سجلّ المؤشرات: evalscripts، النطاقات، الأوصاف، القناع، وأبعاد الشبكة     │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+مصدر واحد لتعريف المؤشرات تتشاركه اللوحة وواجهة HTTP (``khaled.api``)،
+فتتطابق بصمات المهام ومفاتيح الفهرس بين الواجهتين.
+"""
+import math
+
+import numpy as np
+from sentinelhub import BBox, CRS, Geometry
+from shapely.geometry import Polygon
+
+from .georef import lonlat_to_crs
+
+RESOLUTION_M = 10
+MAX_SIDE_PX = 2500
+
+# ───────────────────────────── Evalscripts dict (محدث مع إضافة OSI) ────────────────────────────
+# مفتاح العرض ← (evalscript، التسمية المختصرة، مستوى المعالجة)
+evalscripts = {
+    "FAI (VB-FAI)": (
+        """//VERSION=3
+function setup(){return{input:["B05","B06","B07"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    let bl=s.B05+(s.B07-s.B05)*((740-705)/(783-705));
+    return [s.B06-bl];
+}""", "FAI", "L2A"),
+
+    "MCI": (
+        """//VERSION=3
+function setup(){return{input:["B04","B05","B06"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    let bl=s.B04+(s.B06-s.B04)*(705-665)/(740-665);
+    return [s.B05-bl];
+}""", "MCI", "L2A"),
+
+    "NDVI": (
+        """//VERSION=3
+function setup(){return{input:["B04","B08"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [(s.B08-s.B04)/(s.B08+s.B04)];
+}""", "NDVI", "L2A"),
+
+    "MDWI": (
+        """//VERSION=3
+function setup(){return{input:["B03","B08"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [(s.B03-s.B08)/(s.B03+s.B08)];
+}""", "MDWI", "L2A"),
+
+    "Chl_a (mg/m³)": (
+        """//VERSION=3
+function setup(){return{input:["B03","B01"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [4.26*Math.pow(s.B03/s.B01,3.94)];
+}""", "Chl_a", "L2A"),
+
+    "Cyanobacteria (10³ cells/ml)": (
+        """//VERSION=3
+function setup(){return{input:["B03","B04","B02"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [115530.31*Math.pow((s.B03*s.B04)/s.B02,2.38)];
+}""", "Cya", "L2A"),
+
+    "Turbidity (NTU)": (
+        """//VERSION=3
+function setup(){return{input:["B03","B01"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [8.93*(s.B03/s.B01)-6.39];
+}""", "Turb", "L2A"),
+
+    "CDOM (mg/l)": (
+        """//VERSION=3
+function setup(){return{input:["B03","B04"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [537*Math.exp(-2.93*s.B03/s.B04)];
+}""", "CDOM", "L1C"),
+
+    "DOC (mg/l)": (
+        """//VERSION=3
+function setup(){return{input:["B03","B04"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [432*Math.exp(-2.24*s.B03/s.B04)];
+}""", "DOC", "L1C"),
+
+    "Color (Pt-Co)": (
+        """//VERSION=3
+function setup(){return{input:["B03","B04"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [25366*Math.exp(-4.53*s.B03/s.B04)];
+}""", "Color", "L1C"),
+    
+    "OSI (Oil Spill Index)": (  # إضافة مؤشر الانسكاب النفطي
+        """//VERSION=3
+function setup(){return{input:["B02","B03","B04"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    return [(s.B03 + s.B04) / s.B02];
+}""", "OSI", "L1C")
+}
+
+# ───────────────────────── Default ranges (محدث مع إضافة OSI) ───────────────────
+default_ranges = {
+    "Chl_a": (0.0, 50.0),
+    "Cya": (0.0, 100.0),
+    "Turb": (0.0, 25.0),
+    "CDOM": (0.0, 7.0),
+    "DOC": (0.0, 50.0),
+    "Color": (0.0, 60.0),
+    "FAI": (-0.02, 0.15),
+    "MCI": (-0.05, 0.25),
+    "NDVI": (-0.5, 0.6),
+    "OSI": (0.0, 0.5)  # نطاق مؤشر الانسكاب النفطي
+}
+
+# ───────────────────────── Descriptions (محدث مع إضافة OSI) ───────────────────
+descriptions = {
+    "FAI": """
+**مؤشر الطحالب الطافية (FAI)**
+* **التعريف:** يقيس انحراف الانعكاسية بالقرب من 740 نانومتر.
+* **تفسير القيم:**
+    * **-0.05 إلى 0.00:** مياه صافية
+    * **0.00 - 0.05:** تركيز منخفض
+    * **> 0.05 - 0.10:** تركيز متوسط
+    * **> 0.10:** تركيز عالي
+* **المدى المقترح:** -0.02 إلى 0.15
+""",
+
+    "MCI": """
+**مؤشر الكلوروفيل الأقصى (MCI)**
+* **التعريف:** يقيس تركيز الكلوروفيل في الماء.
+* **تفسير القيم:**
+    * **-0.05 إلى 0.00:** مياه صافية
+    * **0.00 - 0.05:** كلوروفيل منخفض
+    * **> 0.05 - 0.10:** كلوروفيل متوسط
+    * **> 0.10:** كلوروفيل عالي
+* **المدى المقترح:** -0.05 إلى 0.25
+""",
+
+    "NDVI": """
+**مؤشر الغطاء النباتي (NDVI)**
+* ** التعريف:** يستخدم للتمييز بين الماء والنباتات والكشف عن النبات الصحي اعتمادا علي نسبة محتوي الكلوروفيل المستويات العالية مؤشر جيد علي صحة النبات والمحتوي الرطوبي
+* **تفسير القيم:**
+    * **-1.0 إلى 0.00:** مياه صافية
+    * **0.00 - 0.10:** نباتات متناثرة
+    * **> 0.10 - 0.20:** غطاء نباتي متوسط
+    * **> 0.20 - 0.50:** غطاء نباتي كثيف
+    * **> 0.50:** غطاء نباتي كثيف جداً
+* **المدى المقترح:** -0.5 إلى 0.6
+""",
+
+    "MDWI": """
+**مؤشر المياه المعدل (MDWI)**
+* **التعريف:** يستخدم للتمييز بين الماء واليابسة.
+* **تفسير القيم:**
+    * **< 0.0:** يابسة
+    * **> 0.0:** مياه
+    * **0.2 - 0.7:** مياه صافية
+    * **> 0.7:** مياه عميقة
+* **المدى المقترح:** -0.5 إلى 0.7
+""",
+
+    "Chl_a": """
+**الكلوروفيل-أ (Chl_a)**
+* **التعريف:** تركيز الكلوروفيل-أ بالمجم/م³.
+* **تفسير القيم:**
+    * **< 5:** مياه نظيفة
+    * **5 - 10:** تغذية متوسطة
+    * **10 - 25:** بداية ازدهار
+    * **> 25 - 50:** ازدهار كثيف
+    * **> 50:** ازدهار خطير
+* **المدى المقترح:** 0.0 إلى 50.0
+""",
+
+    "Cya": """
+**البكتيريا الزرقاء (Cyanobacteria)**
+* **التعريف:** تركيز الخلايا (آلاف خلية/مل).
+* **تفسير القيم:**
+    * **0 - 10:** منخفض
+    * **> 10 - 20:** مراقبة
+    * **> 20 - 100:** تحذير صحي
+    * **> 100:** خطر مباشر
+* **المدى المقترح:** 0.0 إلى 100.0
+""",
+
+    "Turb": """
+**العكارة (Turbidity)**
+* **التعريف:** قياس تشتت الضوء (NTU).
+* **تفسير القيم:**
+    * **< 5:** صافية
+    * **5 - 10:** خفيفة
+    * **10 - 25:** متوسطة
+    * **> 25 - 50:** عالية
+    * **> 50:** تلوث شديد
+* **المدى المقترح:** 0.0 إلى 25.0
+""",
+
+    "CDOM": """
+**المادة العضوية الملونة (CDOM)**
+* **التعريف:** تركيز المواد العضوية (ملجم/لتر).
+* **تفسير القيم:**
+    * **0.0 - 1.0:** منخفض
+    * **> 1.0 - 3.0:** معتدل
+    * **> 3.0:** مرتفع
+* **المدى المقترح:** 0.0 إلى 7.0
+""",
+
+    "DOC": """
+**الكربون العضوي المذاب (DOC)**
+* **التعريف:** تركيز الكربون (ملجم/لتر).
+* **تفسير القيم:**
+    * **0.0 - 5.0:** منخفض
+    * **5 - 10:** معتدل
+    * **10 - 20:** مرتفع
+    * **> 20:** تلوث شديد
+* **المدى المقترح:** 0.0 إلى 50.0
+""",
+
+    "Color": """
+**لون المياه (Pt-Co)**
+* **التعريف:** قياس اللون الظاهر.
+* **تفسير القيم:**
+    * **0 - 15:** صافية
+    * **15 - 40:** ملونة
+    * **> 40:** داكنة
+* **المدى المقترح:** 0.0 إلى 60.0
+""",
+    
+    "OSI": """  # وصف مؤشر الانسكاب النفطي
+**مؤشر الانسكاب النفطي (OSI)**
+* **التعريف:** يقيس وجود انسكابات نفطية على سطح الماء باستخدام النطاقات المرئية (الأخضر، الأحمر، الأحمر الحدودي).
+* **تفسير القيم:**
+    * **0.0 - 0.1:** مياه نظيفة
+    * **0.1 - 0.2:** مشتبه به (تلوث خفيف)
+    * **0.2 - 0.3:** انسكاب نفطي محتمل
+    * **> 0.3:** انسكاب نفطي مؤكد
+* **المعادلة:** (B03 + B04) / B02
+* **المدى المقترح:** 0.0 إلى 0.5
+* **المراجع العلمية:**
+    - Rajendran et al. (2021) - Oil spill detection using Sentinel-2
+    - Rajendran et al. (2021) - Mapping oil spills in the Indian Ocean
+"""
+}
+
+# المؤشرات التي تُقنَّع بطبقة الجودة: مياه بلا سحب ولا ظلال (khaled.quality)
+water_masked_indicators = ["FAI", "MCI", "Cya", "Turb", "Chl_a", "CDOM", "DOC", "Color", "OSI"]
+
+# المؤشرات التي تُستخرج منها أجسام منفصلة (ازدهار طافٍ، بكتيريا زرقاء، بقع نفطية)
+object_indicators = ["FAI", "Cya", "OSI"]
+
+# ───────────────────────── أسماء العرض ومفاتيح التدرّج (محدث مع إضافة OSI) ───────────────────
+# مفتاح المؤشر ← اسم العرض في قائمة الاختيار
+display_names = {
+    "FAI (VB-FAI)": "FAI (مؤشر الطحالب الطافية)",
+    "MCI": "MCI (مؤشر الكلوروفيل الأقصى)",
+    "NDVI": "NDVI (مؤشر الغطاء النباتي الطبيعي)",
+    "MDWI": "MDWI (مؤشر المياه المعدل)",
+    "Chl_a (mg/m³)": "Chl_a (كلوروفيل-أ بالمجم/م³)",
+    "Cyanobacteria (10³ cells/ml)": "البكتيريا الزرقاء (آلاف خلية/مل)(Cyanobacteria)",
+    "Turbidity (NTU)": "العكارة (NTU)",
+    "CDOM (mg/l)": "المادة العضوية الملونة (ملجم/لتر)(CDOM)",
+    "DOC (mg/l)": "الكربون العضوي المذاب (ملجم/لتر)(DOC)",
+    "Color (Pt-Co)": "اللون (وحدات Pt-Co)",
+    "OSI (Oil Spill Index)": "OSI (مؤشر الانسكاب النفطي)"  # اسم العرض الجديد
+}
+
+# التسمية المختصرة ← تسميات مفتاح التدرّج النصي (أدنى، وسط، أعلى)
+legend_labels = {
+    "FAI": ["ضعيف", "متوسط", "مرتفع"],
+    "MCI": ["منخفض", "متوسط", "مرتفع"],
+    "NDVI": ["ضعيف", "متوسط", "كثيف"],
+    "MDWI": ["يابسة", "مختلط", "مياه"],
+    "Chl_a": ["منخفض", "متوسط", "مرتفع"],
+    "Cya": ["منخفض", "متوسط", "مرتفع"],
+    "Turb": ["منخفض", "متوسط", "مرتفع"],
+    "CDOM": ["منخفض", "متوسط", "مرتفع"],
+    "DOC": ["منخفض", "متوسط", "مرتفع"],
+    "Color": ["فاتح", "متوسط", "غامق"],
+    "OSI": ["نظيف", "مشتبه", "انسكاب"]  # تسميات OSI
+}
+
+# قيم مفتاح التدرّج الرقمي (أدنى، وسط، أعلى) من النطاق الافتراضي؛ منزلتان للمؤشرات الطيفية
+legend_ticks = {
+    label: [f"{v:.{2 if label in ('FAI', 'MCI', 'NDVI', 'MDWI', 'OSI') else 1}f}" for v in (lo, (lo + hi) / 2, hi)]
+    for label, (lo, hi) in default_ranges.items()
+}
+
+
+def resolve(name: str) -> str:
+    """يعيد مفتاح المؤشر من المفتاح الكامل أو التسمية المختصرة أو الاسم قبل الوحدة
+    ("Chl_a (mg/m³)" أو "Chl_a" أو "Turbidity")، دون حساسية لحالة الأحرف."""
+    wanted = name.strip().lower()
+    for key, (_, label, _) in evalscripts.items():
+        if wanted in (key.lower(), label.lower(), key.split(" (")[0].lower()):
+            return key
+    raise KeyError(name)
+
+
+def aoi_grid(lons, lats):
+    """BBox بنظام UTM يحيط بالإحداثيات (WGS84) وأبعاد شبكة على بكسلات Sentinel-2 الأصلية.
+
+    نطاق UTM لمركز المنطقة، والحدود محاذاة على مضاعفات الدقة (10 م، تتضاعف حتى يبقى
+    الضلع ضمن 2500 بكسل): مساحة البكسل ثابتة، والبكسلات تتطابق بين الطلبات ومع مربعات
+    الشبكة (``khaled.tiles``) فلا يُعاد تشكيلها عند التجميع.
+    """
+    crs = CRS.get_utm_from_wgs84((min(lons) + max(lons)) / 2, (min(lats) + max(lats)) / 2)
+    xs, ys = (np.asarray(v, dtype=np.float64) for v in
+              lonlat_to_crs(crs, np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64)))
+    res = RESOLUTION_M
+    while True:
+        x0, y0 = math.floor(xs.min() / res) * res, math.floor(ys.min() / res) * res
+        x1 = max(math.ceil(xs.max() / res) * res, x0 + res)
+        y1 = max(math.ceil(ys.max() / res) * res, y0 + res)
+        size = (round((x1 - x0) / res), round((y1 - y0) / res))
+        if max(size) <= MAX_SIDE_PX:
+            return BBox([x0, y0, x1, y1], crs), size
+        res *= 2
+
+
+def aoi_geometry(coords, fill=0.98):
+    """المضلع المرسوم [(lon, lat), ...] كـ ``Geometry`` (WGS84) لقص الطلبات عليه.
+
+    يعيد None للمستطيل (أو ما يملأ ``fill`` من الـ bbox المحيط): القص لا يوفّر شيئًا،
+    وتبقى بصمة المنطقة ونتائجها المفهرسة كما هي.
+    """
+    poly = Polygon([p[:2] for p in coords])
+    if not poly.is_valid:
+        poly = poly.buffer(0)
+    if poly.is_empty or poly.area >= fill * poly.envelope.area:
+        return None
+    return Geometry(poly, CRS.WGS84)
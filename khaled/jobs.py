@@ -0,0 +1,200 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   طابور مهام محلي: مجمع عمال + جدول مهام SQLite + دمج المهام المتطابقة   │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from . import metrics
+from .settings import cache_path
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """ترفع داخل المهمة عند طلب الإلغاء."""
+
+
+def job_key(**params) -> str:
+    """بصمة ثابتة لمعاملات المهمة؛ المهام ذات البصمة نفسها تُدمج في مهمة واحدة."""
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class JobContext:
+    """يمرَّر إلى دالة المهمة لتحديث التقدّم والتحقق من الإلغاء."""
+
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+
+    def cancelled(self) -> bool:
+        return self._queue._cancel_flags.get(self.job_id, threading.Event()).is_set()
+
+    def progress(self, fraction: float, message: str = ""):
+        """يسجّل التقدّم ويرفع ``JobCancelled`` إذا طُلب الإلغاء."""
+        if self.cancelled():
+            raise JobCancelled(self.job_id)
+        self._queue._update(self.job_id, progress=float(fraction), message=message)
+
+
+class JobQueue:
+    """طابور مهام مشترك بين كل الجلسات داخل العملية نفسها.
+
+    الحالة والتقدّم تُحفظ في SQLite، أما النتائج (مصفوفات NumPy) فتبقى في الذاكرة.
+    """
+
+    def __init__(self, db_path=None, max_workers=4, keep_results=64):
+        self.db_path = db_path or cache_path("jobs.sqlite")
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="khaled-job")
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._results = {}
+        self._cancel_flags = {}
+        self._subscribers = {}
+        self._keep_results = keep_results
+        self._init_db()
+
+    # ───────────────────────────── SQLite ─────────────────────────────
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id        TEXT PRIMARY KEY,
+                    key       TEXT NOT NULL,
+                    kind      TEXT NOT NULL,
+                    status    TEXT NOT NULL,
+                    progress  REAL NOT NULL DEFAULT 0,
+                    message   TEXT NOT NULL DEFAULT '',
+                    error     TEXT,
+                    created   REAL NOT NULL,
+                    updated   REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs(key, status)")
+            # مهام بقيت "قيد التشغيل" من عملية سابقة لن تكتمل أبدًا
+            conn.execute(
+                "UPDATE jobs SET status=?, error=?, updated=? WHERE status IN (?, ?)",
+                (FAILED, "interrupted by restart", time.time(), *ACTIVE_STATES)
+            )
+
+    def _update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        cols = ", ".join(f"{k}=?" for k in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {cols} WHERE id=?", (*fields.values(), job_id))
+
+    # ───────────────────────────── الواجهة العامة ─────────────────────────────
+    def submit(self, key, fn, kind="job") -> str:
+        """يضيف مهمة ``fn(ctx)`` ويعيد معرّفها، أو معرّف مهمة جارية لها البصمة نفسها."""
+        with self._lock:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE key=? AND status IN (?, ?) ORDER BY created DESC LIMIT 1",
+                    (key, *ACTIVE_STATES)
+                ).fetchone()
+                if row is not None and row["id"] in self._futures:
+                    self._subscribers[row["id"]] += 1
+                    return row["id"]
+
+                job_id = uuid.uuid4().hex
+                now = time.time()
+                conn.execute(
+                    "INSERT INTO jobs (id, key, kind, status, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, key, kind, QUEUED, now, now)
+                )
+            self._cancel_flags[job_id] = threading.Event()
+            self._subscribers[job_id] = 1
+            self._futures[job_id] = self._pool.submit(self._run, job_id, fn, kind)
+        return job_id
+
+    def _run(self, job_id, fn, kind):
+        ctx = JobContext(self, job_id)
+        if ctx.cancelled():
+            self._update(job_id, status=CANCELLED)
+            return
+        self._update(job_id, status=RUNNING)
+        try:
+            with metrics.collect(kind, job_id=job_id) as run:
+                result = fn(ctx)
+            if isinstance(result, dict):
+                result["metrics"] = run.record()
+        except JobCancelled:
+            self._update(job_id, status=CANCELLED, message="أُلغيت المهمة")
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            with self._lock:
+                self._results[job_id] = result
+                while len(self._results) > self._keep_results:
+                    self._results.pop(next(iter(self._results)))
+            self._update(job_id, status=DONE, progress=1.0)
+        finally:
+            with self._lock:
+                self._forget(job_id)
+
+    def _forget(self, job_id):
+        self._futures.pop(job_id, None)
+        self._cancel_flags.pop(job_id, None)
+        self._subscribers.pop(job_id, None)
+
+    def status(self, job_id) -> dict:
+        """يعيد صف المهمة كقاموس (status, progress, message, error...) أو None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def result(self, job_id):
+        """نتيجة مهمة مكتملة (أو None إذا لم تعد محفوظة في الذاكرة)."""
+        with self._lock:
+            return self._results.get(job_id)
+
+    def wait(self, job_id, timeout=None) -> dict:
+        """ينتظر انتهاء المهمة (أو انقضاء ``timeout``) ويعيد صفها كما في ``status``."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except (FutureTimeout, CancelledError):
+                pass
+        return self.status(job_id)
+
+    def cancel(self, job_id) -> bool:
+        """يلغي اشتراك المستخدم في المهمة، وتُلغى فعليًا عند انسحاب آخر مشترك.
+
+        المهمة الجارية تتوقف عند أول تحديث للتقدّم بعد طلب الإلغاء.
+        """
+        with self._lock:
+            flag = self._cancel_flags.get(job_id)
+            if flag is None:
+                return False
+            self._subscribers[job_id] -= 1
+            if self._subscribers[job_id] > 0:
+                return True
+            flag.set()
+            future = self._futures.get(job_id)
+            dropped = future is not None and future.cancel()
+            if dropped:
+                self._forget(job_id)
+        if dropped:
+            self._update(job_id, status=CANCELLED)
+        return True
+
+    def active(self) -> list:
+        """قائمة المهام المنتظرة والجارية (للعرض والمراقبة)."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created", ACTIVE_STATES
+            ).fetchall()
+        return [dict(r) for r in rows]
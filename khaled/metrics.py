@@ -0,0 +1,123 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   قياس زمن كل مرحلة: مؤقتات + عدّادات بايت/بكسل ← سجل JSONL و Prometheus │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .settings import cache_path
+
+METRICS_LOG = os.getenv("KHALED_METRICS_LOG") or cache_path("metrics.jsonl")
+PROM_TEXTFILE = os.getenv("KHALED_PROM_TEXTFILE")  # مثال: /var/lib/node_exporter/khaled.prom
+
+_current = contextvars.ContextVar("khaled_metrics_run", default=None)
+_sink_lock = threading.Lock()
+_totals = {}  # (kind, stage) → {"seconds", "count", "bytes", "pixels"} لملف Prometheus
+
+
+class RunMetrics:
+    """مراحل تشغيل واحد (مهمة أو إعادة رسم) بترتيب انتهائها."""
+
+    def __init__(self, kind, **labels):
+        self.kind = kind
+        self.labels = labels
+        self.started = time.time()
+        self.stages = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, **counters):
+        with self._lock:
+            self.stages.append({"stage": name, "seconds": seconds, **counters})
+
+    def record(self) -> dict:
+        return {"ts": self.started, "kind": self.kind, **self.labels,
+                "total_s": time.perf_counter() - self._t0, "stages": list(self.stages)}
+
+
+def current():
+    """التشغيل الجاري في هذا السياق، أو None."""
+    return _current.get()
+
+
+@contextmanager
+def bind(run):
+    """يربط ``run`` بالخيط الحالي (لخيوط العمال الداخلية مثل جلب المربعات)."""
+    token = _current.set(run)
+    try:
+        yield run
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def collect(kind, emit_record=True, **labels):
+    """يجمع مراحل كل ما يُنفَّذ داخله، ثم يرسل السجل إلى المخازن عند الخروج."""
+    run = RunMetrics(kind, **labels)
+    status = "ok"
+    with bind(run):
+        try:
+            yield run
+        except BaseException as e:
+            status = type(e).__name__
+            raise
+        finally:
+            if emit_record:
+                emit({**run.record(), "status": status})
+
+
+@contextmanager
+def stage(name, **counters):
+    """يقيس زمن مرحلة؛ القاموس المُعاد يقبل عدّادات إضافية (bytes، pixels...).
+
+    خارج ``collect`` لا يسجّل شيئًا، فالتكلفة شبه معدومة.
+    """
+    run = _current.get()
+    t0 = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        if run is not None:
+            run.add(name, time.perf_counter() - t0, **counters)
+
+
+def array_counters(arr) -> dict:
+    """عدّادات الحجم لمصفوفة NumPy."""
+    return {"bytes": int(arr.nbytes), "pixels": int(arr.size)}
+
+
+# ───────────────────────────── المخازن ─────────────────────────────
+def emit(record):
+    """يضيف السجل كسطر JSON إلى ``METRICS_LOG`` ويحدّث ملف Prometheus إن طُلب."""
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _sink_lock:
+        with open(METRICS_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        if PROM_TEXTFILE:
+            for s in record["stages"]:
+                t = _totals.setdefault((record["kind"], s["stage"]),
+                                       {"seconds": 0.0, "count": 0, "bytes": 0, "pixels": 0})
+                t["seconds"] += s["seconds"]
+                t["count"] += 1
+                t["bytes"] += s.get("bytes", 0)
+                t["pixels"] += s.get("pixels", 0)
+            _write_textfile()
+
+
+def _write_textfile():
+    """يكتب المجاميع بصيغة Prometheus النصية (لـ textfile collector) كتابةً ذرّية."""
+    lines = []
+    for metric, field in (("khaled_stage_seconds_total", "seconds"),
+                          ("khaled_stage_runs_total", "count"),
+                          ("khaled_stage_bytes_total", "bytes"),
+                          ("khaled_stage_pixels_total", "pixels")):
+        lines.append(f"# TYPE {metric} counter")
+        for (kind, name), t in sorted(_totals.items()):
+            lines.append(f'{metric}{{kind="{kind}",stage="{name}"}} {t[field]}')
+    tmp = PROM_TEXTFILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, PROM_TEXTFILE)
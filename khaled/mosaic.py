@@ -0,0 +1,306 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   فسيفساء خارج الذاكرة: المنطقة بالدقة الكاملة في ملفات memmap، كتلةً كتلة │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+فوق 2500 بكسل للضلع تخفض اللوحة الدقة (20، 40 م، ...) لتبقى الصورة في الذاكرة. الفسيفساء
+تبقي 10 م مهما كبرت المنطقة (مجرى النيل كاملًا مثلًا): مربعات الشبكة (``khaled.tiles``)
+تُكتب فور جلبها في ملفات memmap على القرص، رموز float16 للمؤشر (uint16، و NaN رمز قيمته
+NaN في الجدول) ورموز طبقة الجودة (``khaled.quality``)، ولا تُجمع الصورة في الذاكرة أبدًا.
+
+كل ما بعد ذلك يمر على كتل صفوف من ``BLOCK_PX`` بكسل تقريبًا:
+
+* القناع: ``quality.select`` على رموز جودة الكتلة (كسولًا عند القراءة)، والمضلع المرسوم
+  يُمسح كتلةً كتلة مرة واحدة عند البناء.
+* إحصاءات المدّ: مدرج تكراري للرموز يُجمع كتلةً كتلة (جدول float16 واحد لكل الكتل)،
+  ومنه النسب المئوية والمتوسط كما في ``Raster``.
+* التلوين: جدول ألوان من 65536 مدخلًا يُفهرس برموز كل كتلة، مع خطوة تصغير للعرض.
+* التصدير: ``mosaic[rows, cols]`` يعيد float32 للنافذة المطلوبة فقط، فيقرأ كاتبا COG/NetCDF
+  (``khaled.export``) الفسيفساء كما يقرآن ``Raster``.
+
+فالذاكرة القصوى بحجم الكتلة لا المنطقة. ``meta.json`` يُكتب أخيرًا علامةً على اكتمال الملفات.
+
+الفسيفساء هي النسخة المخزنة الوحيدة لمربعاتها (``TileCache.assemble(out=...)`` لا يحفظها)، ومجلد
+``mosaics/`` محدود بـ ``KHALED_MOSAIC_CACHE_MB``: ``evict`` يحذف الأقدم استخدامًا أولًا (``open``
+يحدّث زمن ``meta.json``)، والفسيفساء غير المكتملة الأقدم من ``STALE_S`` (بناء انقطع).
+"""
+import copy
+import json
+import math
+import os
+import shutil
+import time
+
+import numpy as np
+
+from . import quality
+from .georef import geometry_rings, polygon_mask
+from .raster import CODES, FLOAT16_TABLE, MaskBand, Raster, float16_codes, hist_percentiles, hist_stats
+from .render import colorize
+
+BLOCK_PX = int(os.getenv("KHALED_BLOCK_PX", str(4 * 2**20)))  # بكسلات الكتلة الواحدة
+NAN_CODE = int(float16_codes(np.float32([np.nan]))[0])
+CACHE_MB = float(os.getenv("KHALED_MOSAIC_CACHE_MB", "4096"))  # سقف مجلد mosaics/ على القرص
+STALE_S = 6 * 3600  # بعدها تُعدّ الفسيفساء غير المكتملة بناءً منقطعًا
+
+
+class Mosaic:
+    """فسيفساء على القرص: ``codes`` (h, w) رموز float16 و ``qa`` رموز الجودة أو None، كلاهما memmap.
+
+    ``mask_options`` (من ``quality()``) قناع جودة يُطبَّق كسولًا على كل نافذة تُقرأ.
+    """
+
+    table = FLOAT16_TABLE
+    ndim = 2
+
+    def __init__(self, path, shape, bbox, has_qa=False, mode="r", mask_options=None):
+        self.path = path
+        self.bbox = bbox
+        self.codes = np.memmap(os.path.join(path, "codes.u16"), dtype=np.uint16, mode=mode, shape=shape)
+        self.qa = np.memmap(os.path.join(path, "qa.u16"), dtype=np.uint16, mode=mode, shape=shape) \
+            if has_qa else None
+        self.mask_options = mask_options
+
+    @classmethod
+    def create(cls, path, shape, bbox, has_qa=False) -> "Mosaic":
+        """ملفات جديدة بأبعاد ``shape`` مملوءة بـ "لا بيانات" كتلةً كتلة."""
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        mosaic = cls(path, shape, bbox, has_qa, mode="w+")
+        for rows in mosaic.blocks():
+            mosaic.codes[rows] = NAN_CODE
+            if has_qa:
+                mosaic.qa[rows] = quality.NODATA
+        return mosaic
+
+    @classmethod
+    def open(cls, path):
+        """فسيفساء مكتملة (لها ``meta.json``) للقراءة، أو None."""
+        from sentinelhub import BBox, CRS
+
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        os.utime(meta_path)  # آخر استخدام، لترتيب الإخلاء
+        return cls(path, tuple(meta["shape"]), BBox(meta["bbox"], CRS(meta["crs"])), meta["qa"])
+
+    def finish(self, **attrs):
+        """يفرغ الملفات إلى القرص ويكتب ``meta.json`` (علامة الاكتمال) مع ``attrs``."""
+        self.codes.flush()
+        if self.qa is not None:
+            self.qa.flush()
+        meta = {"shape": list(self.shape), "bbox": list(self.bbox), "crs": int(self.bbox.crs.epsg),
+                "qa": self.qa is not None, **attrs}
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def drop_quality(self):
+        """يحذف طبقة الجودة (بعد تعذّر جلبها) بدل أن تقنّع كل شيء كـ "لا بيانات"."""
+        self.qa = None
+        os.remove(os.path.join(self.path, "qa.u16"))
+
+    # ───────────────────────────── الشكل والحجم ─────────────────────────────
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def size(self):
+        return self.codes.size
+
+    @property
+    def grid(self):
+        return self.shape[1], self.shape[0]
+
+    @property
+    def nbytes(self):
+        """حجم الملفات على القرص (لا الذاكرة)."""
+        return self.codes.nbytes + (0 if self.qa is None else self.qa.nbytes)
+
+    def squeeze(self):
+        return self
+
+    def has(self, name) -> bool:
+        return self.qa is not None and name in quality.FLAGS
+
+    def blocks(self, rows=None):
+        """شرائح صفوف متتالية بنحو ``BLOCK_PX`` بكسل لكل منها (من ``rows`` صفًا، افتراضيًا كل الصفوف)."""
+        h, w = self.shape if rows is None else (rows, self.shape[1])
+        step = max(1, BLOCK_PX // w)
+        for r in range(0, h, step):
+            yield slice(r, min(r + step, h))
+
+    # ───────────────────────────── الكتابة ─────────────────────────────
+    def __setitem__(self, key, values):
+        """يكتب قيم float32 (NaN = لا بيانات) مرمّزة؛ هدف ``TileCache.assemble(out=...)``."""
+        self.codes[key] = float16_codes(values)
+
+    def clip(self, geometry):
+        """يضع "لا بيانات" خارج ``geometry`` (``sentinelhub.Geometry``) بمسح المضلع كتلةً كتلة."""
+        from sentinelhub import BBox
+
+        if geometry.crs != self.bbox.crs:
+            geometry = geometry.transform(self.bbox.crs)
+        rings = geometry_rings(geometry.geometry)
+        h, w = self.shape
+        dy = (self.bbox.max_y - self.bbox.min_y) / h
+        for rows in self.blocks():
+            block_bbox = BBox([self.bbox.min_x, self.bbox.max_y - rows.stop * dy,
+                               self.bbox.max_x, self.bbox.max_y - rows.start * dy], self.bbox.crs)
+            outside = ~polygon_mask(rings, block_bbox, (w, rows.stop - rows.start))
+            self.codes[rows][outside] = NAN_CODE
+
+    # ───────────────────────────── القناع والقيم ─────────────────────────────
+    def quality(self, exclude=quality.DEFAULT_EXCLUDE, water_only=True,
+                water_threshold=quality.DEFAULT_WATER_THRESHOLD) -> "Mosaic":
+        """نسخة تشارك الملفات، وقناع الجودة (``quality.select``) يُطبَّق على كل نافذة تُقرأ."""
+        view = copy.copy(self)
+        view.mask_options = {"exclude": tuple(exclude), "water_only": water_only,
+                             "water_threshold": water_threshold}
+        return view
+
+    def mapped(self, fn) -> "Mosaic":
+        """نسخة تشارك الملفات مع ``fn`` (دالة تصاعدية مثل ``np.log1p``) مطبقة على الجدول فقط."""
+        view = copy.copy(self)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            view.table = np.asarray(fn(self.table), dtype=np.float32)
+        return view
+
+    def _keep(self, rows, cols=slice(None)):
+        if self.mask_options is None or self.qa is None:
+            return None
+        return quality.select(self.qa[rows, cols], **self.mask_options)
+
+    def __getitem__(self, key):
+        """قيم float32 (NaN = لا بيانات أو خارج القناع) للنافذة المطلوبة فقط."""
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        values = self.table[self.codes[rows, cols]]
+        keep = self._keep(rows, cols)
+        if keep is not None:
+            values[~keep] = np.nan
+        return values
+
+    def mask(self, name="valid", rows=slice(None), cols=slice(None)):
+        """القناع ``name`` (bool) للنافذة المطلوبة: "valid" أو أحد أعلام ``quality.FLAGS``."""
+        if name == "valid":
+            return np.isfinite(self[rows, cols])
+        return (quality.flags(self.qa[rows, cols]) & quality.FLAGS[name]) != 0
+
+    def band(self, name):
+        """القناع ``name`` كنطاق 0/1 قابل للتقطيع (للتصدير)."""
+        return MaskBand(self, name)
+
+    # ───────────────────────────── الإحصاءات ─────────────────────────────
+    def histogram(self) -> np.ndarray:
+        """عدد البكسلات الصالحة لكل رمز، مجموعًا كتلةً كتلة."""
+        hist = np.zeros(CODES, dtype=np.int64)
+        for rows in self.blocks():
+            codes = np.asarray(self.codes[rows])
+            keep = self._keep(rows)
+            hist += np.bincount((codes if keep is None else codes[keep]).ravel(), minlength=CODES)
+        hist[~np.isfinite(self.table)] = 0
+        return hist
+
+    def percentiles(self, q, hist=None) -> list:
+        return hist_percentiles(self.table, self.histogram() if hist is None else hist, q)
+
+    def stats(self) -> dict:
+        """إحصاءات ``summary_stats`` نفسها من المدرج التكراري للكتل."""
+        return hist_stats(self.table, self.histogram())
+
+    # ───────────────────────────── العرض ─────────────────────────────
+    def step_for(self, max_side) -> int:
+        """خطوة التصغير التي تبقي أطول ضلع ضمن ``max_side``."""
+        return max(1, math.ceil(max(self.shape) / max_side)) if max_side else 1
+
+    def _strided(self, step):
+        """(نافذة الصفوف المصغّرة، شريحة صفوف المصدر) لكل كتلة بخطوة ``step``."""
+        oh = -(-self.shape[0] // step)
+        for out_rows in self.blocks(oh):
+            yield out_rows, slice(out_rows.start * step, out_rows.stop * step, step)
+
+    def colorize(self, min_thr, max_thr, gamma, cmap, max_side=None) -> np.ndarray:
+        """RGB (uint8) بخطوة تصغير تبقي الضلع ضمن ``max_side``: جدول ألوان للرموز يُفهرس كتلةً كتلة."""
+        lut = colorize(self.table, min_thr, max_thr, gamma, cmap)
+        nodata = colorize(np.float32([np.nan]), min_thr, max_thr, gamma, cmap)[0]
+        step = self.step_for(max_side)
+        oh, ow = -(-self.shape[0] // step), -(-self.shape[1] // step)
+        rgb = np.empty((oh, ow, 3), dtype=np.uint8)
+        for out_rows, rows in self._strided(step):
+            block = lut[self.codes[rows, ::step]]
+            keep = self._keep(rows, slice(None, None, step))
+            if keep is not None:
+                block[~keep] = nodata
+            rgb[out_rows] = block
+        return rgb
+
+    def overview(self, max_side) -> Raster:
+        """``Raster`` مصغّر (عينة بخطوة) للعرض وقراءة البكسل والمقطع، بإسناد يغطي بكسلاته تمامًا."""
+        from sentinelhub import BBox
+
+        step = self.step_for(max_side)
+        oh, ow = -(-self.shape[0] // step), -(-self.shape[1] // step)
+        values = np.empty((oh, ow), dtype=np.float32)
+        qa = None if self.qa is None else np.empty((oh, ow), dtype=np.uint16)
+        for out_rows, rows in self._strided(step):
+            values[out_rows] = self.table[self.codes[rows, ::step]]
+            if qa is not None:
+                qa[out_rows] = self.qa[rows, ::step]
+        h, w = self.shape
+        res_x = (self.bbox.max_x - self.bbox.min_x) / w * step
+        res_y = (self.bbox.max_y - self.bbox.min_y) / h * step
+        bbox = BBox([self.bbox.min_x, self.bbox.max_y - oh * res_y,
+                     self.bbox.min_x + ow * res_x, self.bbox.max_y], self.bbox.crs)
+        return Raster.pack(values, qa, bbox)
+
+
+def _dir_bytes(path) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def evict(root, max_bytes=None, keep=(), now=None) -> list:
+    """يبقي مجلد الفسيفساء ``root`` ضمن ``max_bytes`` (افتراضيًا ``CACHE_MB``) بحذف الأقدم استخدامًا.
+
+    الفسيفساء غير المكتملة (بلا ``meta.json``) تُحذف فقط إن مضى على آخر تعديل لها ``STALE_S``،
+    وما في ``keep`` لا يُحذف أبدًا. يعيد مسارات المحذوفة.
+    """
+    max_bytes = CACHE_MB * 2**20 if max_bytes is None else max_bytes
+    now = time.time() if now is None else now
+    keep = {os.path.abspath(p) for p in keep}
+    complete, removed = [], []
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        path = os.path.join(root, name)
+        if not os.path.isdir(path) or os.path.abspath(path) in keep:
+            continue
+        meta = os.path.join(path, "meta.json")
+        try:
+            if os.path.exists(meta):
+                complete.append((os.path.getmtime(meta), path, _dir_bytes(path)))
+            elif now - os.path.getmtime(path) > STALE_S:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+        except FileNotFoundError:  # حذفتها جلسة أخرى
+            continue
+    total = sum(size for _, _, size in complete) + sum(_dir_bytes(p) for p in keep if os.path.isdir(p))
+    for _, path, size in sorted(complete):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(path)
+        total -= size
+    return removed
+
+
+class QualityTarget:
+    """هدف ``TileCache.assemble`` لطبقة الجودة: كل مربع يُرمَّز (``quality.encode``) في ``mosaic.qa``."""
+
+    def __init__(self, mosaic):
+        self.mosaic = mosaic
+        self.nbytes = mosaic.qa.nbytes
+        self.size = mosaic.qa.size
+
+    def __setitem__(self, key, tile):
+        self.mosaic.qa[key] = quality.encode(tile)
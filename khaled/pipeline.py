@@ -0,0 +1,294 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   خط المعالجة: البحث في الكتالوج ← جلب المؤشر ← جلب طبقة الجودة           │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import os
+
+from sentinelhub import (
+    SentinelHubRequest, MimeType, DataCollection, SentinelHubCatalog
+)
+
+from .georef import clip_to_geometry
+from .metrics import array_counters, stage
+from .mosaic import Mosaic, QualityTarget, evict
+from .quality import QUALITY_EVALSCRIPT, encode as encode_quality
+from .results import aoi_hash, resolution_key, row_bbox
+from .settings import cache_path
+from .tiles import MAX_PX, layer_key, pixel_window, window_bbox
+
+
+class NoScenesError(Exception):
+    """لا توجد مرئيات متاحة في النطاق الزمني المطلوب."""
+
+
+class CatalogSearchError(Exception):
+    """فشل البحث عن التواريخ المتاحة في الكتالوج."""
+
+
+def data_collection(tier: str) -> DataCollection:
+    """يحوّل مستوى المعالجة (L1C/L2A) إلى مجموعة بيانات Sentinel-2."""
+    return DataCollection.SENTINEL2_L1C if tier == "L1C" else DataCollection.SENTINEL2_L2A
+
+
+def catalog_dates(config, dc, bbox, time_interval, scenes=None) -> list:
+    """كل تواريخ المشاهد المتاحة (YYYY-MM-DD) مرتبة تصاعديًا وبلا تكرار.
+
+    ``scenes`` (اختياري) فهرس ``SceneCatalog``: يُسأل الكتالوج عن الأشهر غير المخزنة فقط.
+    """
+    if scenes is not None:
+        dates = scenes.dates(config, dc, bbox, time_interval)
+        if not dates:
+            raise NoScenesError(time_interval)
+        return dates
+
+    cat = SentinelHubCatalog(config=config)
+    with stage("catalog_search") as counters:
+        try:
+            search_iter = cat.search(
+                dc,
+                bbox=bbox,
+                time=time_interval,
+                fields={"include": ["properties.datetime"], "exclude": ["links", "assets"]}
+            )
+            dates = [item["properties"]["datetime"][:10] for item in search_iter]
+        except Exception as e:
+            raise CatalogSearchError(str(e)) from e
+        counters["scenes"] = len(dates)
+
+    if not dates:
+        raise NoScenesError(time_interval)
+    return sorted(set(dates))
+
+
+def latest_scene_date(config, dc, bbox, time_interval, scenes=None) -> str:
+    """يبحث في الكتالوج ويعيد أحدث تاريخ مشهد (YYYY-MM-DD)."""
+    if scenes is not None:
+        date = scenes.latest(config, dc, bbox, time_interval)
+        if date is None:
+            raise NoScenesError(time_interval)
+        return date
+    return catalog_dates(config, dc, bbox, time_interval)[-1]
+
+
+def fetch_single(config, evalscript, dc, bbox, size, scene_date, geometry=None):
+    """يجلب صورة أحادية النطاق لتاريخ مشهد واحد.
+
+    ``geometry`` (اختياري) ``sentinelhub.Geometry``: تعيد الخدمة بكسلات المضلع وحدها
+    (خارجه بلا بيانات)؛ القص الفعلي إلى NaN في ``fetch_layer``.
+    """
+    if geometry is not None and geometry.crs != bbox.crs:
+        geometry = geometry.transform(bbox.crs)  # الخدمة تطلب الـ bbox والهندسة بنظام واحد
+    input_data = SentinelHubRequest.input_data(
+        data_collection=dc,
+        time_interval=(scene_date, scene_date),
+        mosaicking_order="mostRecent"
+    )
+    # عنوان الخدمة من الإعدادات (sh_base_url) لا من مجموعة البيانات، ليعمل الخادم البديل المحلي
+    input_data.service_url = None
+    req = SentinelHubRequest(
+        evalscript=evalscript,
+        input_data=[input_data],
+        responses=[SentinelHubRequest.output_response("default", MimeType.TIFF)],
+        bbox=bbox, geometry=geometry, size=size, config=config
+    )
+    with stage("get_data") as counters:
+        arr = req.get_data()[0]
+        counters.update(array_counters(arr))
+    return arr
+
+
+def fetch_layer(config, evalscript, dc, layer, bbox, size, scene_date, tiles=None, progress=None,
+                geometry=None):
+    """يجلب طبقة لتاريخ مشهد؛ عند تمرير ``tiles`` تُجمَّع من مربعات الشبكة.
+
+    ``geometry`` (اختياري) المضلع المرسوم: يُرسل مع الطلب (أو يحدد المربعات المطلوبة)
+    وتصبح البكسلات خارجه NaN بقناع الهندسة، فتتخطاها الإحصاءات والعرض.
+    يعيد (المصفوفة، الـ bbox الفعلي، الأبعاد الفعلية (w, h)).
+    """
+    if tiles is None:
+        arr, out_bbox, out_size = fetch_single(config, evalscript, dc, bbox, size, scene_date, geometry), bbox, size
+    else:
+        arr, out_bbox, out_size, _ = tiles.assemble(
+            lambda tile_bbox, tile_size: fetch_single(config, evalscript, dc, tile_bbox, tile_size, scene_date),
+            layer, bbox, scene_date, progress=progress, geometry=geometry
+        )
+    if geometry is not None:
+        with stage("geometry_clip") as counters:
+            arr = clip_to_geometry(arr, geometry, out_bbox, out_size)
+            counters.update(array_counters(arr))
+    return arr, out_bbox, out_size
+
+
+def lookup_indicator(index, label, tier, bbox, size, time_interval, need_quality=False, geometry=None):
+    """يحاول خدمة الطلب من فهرس النتائج دون أي اتصال بالشبكة؛ يعيد None عند عدم التوفر."""
+    aoi = aoi_hash(bbox, geometry)
+    scene_date = index.cached_search(aoi, data_collection(tier).api_id, time_interval)
+    if scene_date is None:
+        return None
+    row = index.get(aoi, label, scene_date, resolution_key(size))
+    if row is None or (need_quality and not row["has_mask"]):
+        return None
+    img, qa = index.load(row)
+    return {"img": img, "qa": qa, "scene_date": scene_date, "warnings": [],
+            "bbox": row_bbox(row), "size": (img.shape[1], img.shape[0]), "from_index": True}
+
+
+def fetch_indicator(config, evalscript, tier, bbox, size, time_interval,
+                    quality=False, ctx=None, index=None, label=None, tiles=None, scenes=None,
+                    geometry=None):
+    """يشغّل خط المعالجة كاملًا ويعيد قاموس النتيجة.
+
+    ``ctx`` (اختياري) كائن ``JobContext`` لتحديث التقدّم وفحص الإلغاء.
+    ``index`` (اختياري) فهرس ``ResultsIndex`` يُستشار قبل الكتالوج وتُحفظ فيه النتيجة.
+    ``tiles`` (اختياري) ``TileCache``: تُجمَّع الصورة من مربعات الشبكة ولا يُجلب إلا الناقص،
+    وعندها يكون ``bbox``/``size`` في النتيجة هما النافذة المحاذية للشبكة.
+    ``scenes`` (اختياري) ``SceneCatalog`` لإيجاد أحدث مشهد من فهرس التوفر المخزن.
+    ``geometry`` (اختياري) المضلع المرسوم داخل ``bbox``: النتيجة مقصوصة عليه ومفهرسة باسمه.
+    """
+    def step(fraction, message):
+        if ctx is not None:
+            ctx.progress(fraction, message)
+
+    dc = data_collection(tier)
+    aoi = aoi_hash(bbox, geometry)
+
+    # ─── الفهرس أولًا: تاريخ المشهد المحفوظ يغني عن البحث في الكتالوج ───
+    scene_date = index.cached_search(aoi, dc.api_id, time_interval) if index is not None else None
+    if scene_date is None:
+        step(0.05, "البحث عن أحدث مشهد")
+        scene_date = latest_scene_date(config, dc, bbox, time_interval, scenes)
+        if index is not None:
+            index.store_search(aoi, dc.api_id, time_interval, scene_date)
+
+    return fetch_scene(config, evalscript, tier, bbox, size, scene_date, quality,
+                       step=step, index=index, label=label, tiles=tiles, geometry=geometry)
+
+
+def fetch_scene(config, evalscript, tier, bbox, size, scene_date, quality=False,
+                step=None, index=None, label=None, tiles=None, geometry=None):
+    """يجلب المؤشر (وطبقة الجودة SCL + MDWI عند الطلب) لتاريخ مشهد معروف دون بحث في الكتالوج.
+
+    ``result["qa"]`` رموز ``khaled.quality`` (uint16) أو None؛ القناع نفسه يختاره المستدعي.
+
+    ``step(fraction, message)`` (اختياري) لتحديث التقدّم؛ بقية المعاملات كما في ``fetch_indicator``.
+    """
+    step = step or (lambda fraction, message: None)
+    dc = data_collection(tier)
+    out_bbox, out_size = bbox, size
+
+    def fetch(ev, collection, layer, start, span):
+        nonlocal out_bbox, out_size
+        arr, out_bbox, out_size = fetch_layer(
+            config, ev, collection, layer, bbox, size, scene_date, tiles,
+            progress=lambda f: step(start + span * f, f"جلب المربعات الناقصة ({layer.split('-')[0]})"),
+            geometry=geometry
+        )
+        return arr
+
+    aoi, res = aoi_hash(bbox, geometry), resolution_key(size)
+
+    row = index.get(aoi, label, scene_date, res) if index is not None else None
+    if row is not None:
+        step(0.30, "قراءة النتيجة من الفهرس")
+        with stage("index_load") as counters:
+            img, qa = index.load(row)
+            counters.update(array_counters(img))
+        out_bbox, out_size = row_bbox(row), (img.shape[1], img.shape[0])
+    else:
+        step(0.30, f"جلب المؤشر ({scene_date})")
+        with stage("indicator_fetch") as counters:
+            img = fetch(evalscript, dc, layer_key(label, evalscript, tier), 0.30, 0.40)
+            counters.update(array_counters(img))
+        qa = None
+
+    result = {"img": img, "qa": qa, "scene_date": scene_date, "warnings": []}
+
+    if quality and qa is None:
+        step(0.70, "جلب طبقة الجودة (SCL + MDWI)")
+        try:
+            with stage("quality_fetch") as counters:
+                arr = fetch(QUALITY_EVALSCRIPT, DataCollection.SENTINEL2_L2A,
+                            layer_key("QA", QUALITY_EVALSCRIPT, "L2A"), 0.70, 0.25)
+                counters.update(array_counters(arr))
+                result["qa"] = encode_quality(arr)
+        except Exception as e:
+            result["warnings"].append(f"⚠️ تعذّر تحميل طبقة الجودة: {e}")
+
+    result.update({"bbox": out_bbox, "size": out_size})
+    if index is not None and (row is None or result["qa"] is not None and not row["has_mask"]):
+        with stage("index_put"):
+            index.put(aoi, label, scene_date, res, out_bbox, result["img"], result["qa"])
+
+    step(1.0, "اكتمل")
+    return result
+
+
+def fetch_mosaic(config, evalscript, tier, bbox, time_interval, quality=False, ctx=None,
+                 index=None, label=None, tiles=None, scenes=None, geometry=None):
+    """يجلب المؤشر بالدقة الكاملة (10 م) مهما كبرت المنطقة في فسيفساء خارج الذاكرة (``Mosaic``).
+
+    المربعات (``tiles`` مطلوب) تُكتب في ملفات memmap فور جلبها، وطبقة الجودة كذلك عند ``quality``؛
+    والفسيفساء المكتملة لنفس المنطقة والمشهد تُعاد فتحها بلا أي جلب.
+    ``result["img"]`` نظرة مصغّرة (``Raster`` ضمن ``MAX_PX``، و ``bbox``/``size`` لها) لقراءة البكسل
+    والمقطع، والفسيفساء نفسها في ``result["mosaic"]`` للإحصاءات والتلوين والتصدير كتلةً كتلة.
+    بقية المعاملات كما في ``fetch_indicator``.
+    """
+    def step(fraction, message):
+        if ctx is not None:
+            ctx.progress(fraction, message)
+
+    if tiles is None:
+        raise ValueError("وضع الفسيفساء يتطلب ذاكرة المربعات (tiles)")
+    dc = data_collection(tier)
+    aoi = aoi_hash(bbox, geometry)
+
+    scene_date = index.cached_search(aoi, dc.api_id, time_interval) if index is not None else None
+    if scene_date is None:
+        step(0.05, "البحث عن أحدث مشهد")
+        scene_date = latest_scene_date(config, dc, bbox, time_interval, scenes)
+        if index is not None:
+            index.store_search(aoi, dc.api_id, time_interval, scene_date)
+
+    layer = layer_key(label, evalscript, tier)
+    window = pixel_window(bbox, 0)
+    out_bbox = window_bbox(window, 0, bbox.crs)
+    shape = (window[3] - window[1], window[2] - window[0])
+    path = cache_path("mosaics", f"{aoi}_{layer}_{scene_date}")
+    warnings = []
+
+    mosaic = Mosaic.open(path)
+    if mosaic is None or quality and mosaic.qa is None:
+        def fetch(ev, collection, name, target, start, span):
+            tiles.assemble(
+                lambda tile_bbox, tile_size: fetch_single(config, ev, collection, tile_bbox, tile_size, scene_date),
+                name, bbox, scene_date, geometry=geometry, z=0, out=target,
+                progress=lambda f: step(start + span * f, f"جلب مربعات الفسيفساء ({name.split('-')[0]})")
+            )
+
+        mosaic = Mosaic.create(path, shape, out_bbox, has_qa=quality)
+        step(0.10, f"جلب المؤشر بالدقة الكاملة ({scene_date})")
+        with stage("mosaic_fetch", pixels=mosaic.size):
+            fetch(evalscript, dc, layer, mosaic, 0.10, 0.55)
+        if quality:
+            try:
+                with stage("mosaic_quality_fetch", pixels=mosaic.size):
+                    fetch(QUALITY_EVALSCRIPT, DataCollection.SENTINEL2_L2A,
+                          layer_key("QA", QUALITY_EVALSCRIPT, "L2A"), QualityTarget(mosaic), 0.65, 0.25)
+            except Exception as e:
+                mosaic.drop_quality()
+                warnings.append(f"⚠️ تعذّر تحميل طبقة الجودة: {e}")
+        if geometry is not None:
+            step(0.92, "قص الفسيفساء على المضلع")
+            with stage("mosaic_clip", pixels=mosaic.size):
+                mosaic.clip(geometry)
+        mosaic.finish(scene_date=scene_date, label=label)
+        mosaic = Mosaic.open(path)
+        with stage("mosaic_evict") as counters:
+            counters["removed"] = len(evict(os.path.dirname(path), keep=[path]))
+
+    step(0.95, "إعداد النظرة المصغّرة")
+    with stage("mosaic_overview") as counters:
+        img = mosaic.overview(MAX_PX)
+        counters.update(array_counters(img))
+    step(1.0, "اكتمل")
+    return {"img": img, "qa": None, "mosaic": mosaic, "scene_date": scene_date, "warnings": warnings,
+            "bbox": img.bbox, "size": img.grid}
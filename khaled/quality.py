@@ -0,0 +1,122 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   طبقة الجودة: SCL و MDWI لكل مشهد كأعلام بتية مضغوطة (رمز uint16/بكسل)  │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+بدل أن يقنّع كل مؤشر على طريقته (FAI يُسقط فئات SCL داخل الـ evalscript، والبقية
+تجلب MDWI منفصلًا وتقطع عند ``<= 0`` ثابتة)، تُجلب لكل مشهد طبقة واحدة من L2A
+يرمّزها الـ evalscript نفسه في عدد صحيح 16-بت:
+
+* البايت الأدنى أعلام SCL: ``cloud`` (8، 9)، ``shadow`` (3)، ``cirrus`` (10)،
+  ``snow`` (11)، ``nodata`` (0، 1 أو بلا بيانات).
+* البايت الأعلى MDWI مكمّمًا على 0..254 (الخطوة 2/254)، و 255 = غير معرّف.
+
+علم ``water`` لا يُخزَّن في الطبقة بل يُشتق من بايت MDWI بالعتبة المطلوبة، فتغيير العتبة
+أو الأعلام المستبعدة عملية بتية محلية على الرموز المخزنة، بلا أي تنزيل إضافي.
+طبقة الجودة تُخزَّن في ذاكرة المربعات باسمها، فتتشاركها كل المؤشرات على المشهد نفسه.
+"""
+import numpy as np
+
+FLAGS = {"water": 1, "cloud": 2, "shadow": 4, "cirrus": 8, "snow": 16, "nodata": 32}
+SCL_FLAGS = ("cloud", "shadow", "cirrus", "snow")
+FLAG_NAMES = {"water": "مياه", "cloud": "سحب", "shadow": "ظلال السحب",
+              "cirrus": "سيروس", "snow": "ثلج/جليد", "nodata": "بلا بيانات"}
+
+# الافتراضي للمؤشرات المائية: مياه (MDWI > 0) وخالية من السحب وظلالها والسيروس والثلج
+DEFAULT_EXCLUDE = SCL_FLAGS
+DEFAULT_WATER_THRESHOLD = 0.0
+
+MDWI_NODATA = 255
+NODATA = (MDWI_NODATA << 8) | FLAGS["nodata"]
+
+QUALITY_EVALSCRIPT = """//VERSION=3
+function setup(){return{input:["B03","B08","SCL"],
+                            output:{bands:1,sampleType:"FLOAT32"}};}
+function evaluatePixel(s){
+    let m=Math.round((Math.max(Math.min((s.B03-s.B08)/(s.B03+s.B08),1),-1)+1)*127)*256;
+    if(s.SCL==0||s.SCL==1) return [65312];
+    if(s.SCL==3) return [m+4];
+    if(s.SCL==8||s.SCL==9) return [m+2];
+    if(s.SCL==10) return [m+8];
+    if(s.SCL==11) return [m+16];
+    return [m];
+}"""
+
+
+# ───────────────────────────── الترميز ─────────────────────────────
+def _single_band(arr) -> np.ndarray:
+    # محور النطاق وحده: (h, w, 1) ← (h, w)؛ صف أو عمود واحد (1, w)/(h, 1) يبقى بشكله كالمؤشر
+    a = np.asarray(arr, dtype=np.float32)
+    return a[..., 0] if a.ndim == 3 else a
+
+
+def encode(arr) -> np.ndarray:
+    """طبقة الجودة كما جُلبت (float32، NaN خارج المضلع أو بلا بيانات) ← رموز uint16."""
+    a = _single_band(arr)
+    return np.clip(np.where(np.isfinite(a), a, NODATA), 0, 0xFFFF).astype(np.uint16)
+
+
+def mdwi_code(threshold) -> int:
+    """رمز MDWI (0..254) للعتبة ``threshold``."""
+    return int(np.clip(np.floor((threshold + 1) * 127 + 0.5), 0, MDWI_NODATA - 1))
+
+
+def from_mdwi(mdwi) -> np.ndarray:
+    """رموز جودة من MDWI وحده (نتائج الفهرس القديمة): بلا أعلام SCL."""
+    m = _single_band(mdwi)
+    codes = np.floor((np.clip(m, -1, 1) + 1) * 127 + 0.5)
+    return np.where(np.isfinite(m), codes.astype(np.uint16) << 8, NODATA).astype(np.uint16)
+
+
+def decode_mdwi(qa) -> np.ndarray:
+    """MDWI (float32، NaN = غير معرّف) من رموز الجودة، للتصدير."""
+    m = (np.asarray(qa) >> 8).astype(np.uint8)
+    out = m.astype(np.float32) / 127 - 1
+    out[m == MDWI_NODATA] = np.nan
+    return out
+
+
+# ───────────────────────────── الأعلام ─────────────────────────────
+def bits(names) -> int:
+    """قناع بتي لأسماء الأعلام ``names``."""
+    out = 0
+    for name in names:
+        out |= FLAGS[name]
+    return out
+
+
+def water(mdwi_codes, threshold=DEFAULT_WATER_THRESHOLD) -> np.ndarray:
+    """MDWI > ``threshold`` من بايت MDWI (uint8)؛ غير المعرّف ليس مياهًا."""
+    m = np.asarray(mdwi_codes, dtype=np.uint8)
+    return (m > mdwi_code(threshold)) & (m != MDWI_NODATA)
+
+
+def flags(qa, water_threshold=DEFAULT_WATER_THRESHOLD) -> np.ndarray:
+    """أعلام كل بكسل (uint8) مع علم ``water`` بالعتبة المطلوبة."""
+    qa = np.asarray(qa, dtype=np.uint16)
+    out = (qa & 0xFF).astype(np.uint8)
+    out[water(qa >> 8, water_threshold)] |= FLAGS["water"]
+    return out
+
+
+def select(qa, exclude=DEFAULT_EXCLUDE, water_only=True, water_threshold=DEFAULT_WATER_THRESHOLD):
+    """البكسلات المقبولة (bool): لها بيانات، ولا تحمل أيًا من ``exclude``، ومياه إن طُلب."""
+    f = flags(qa, water_threshold)
+    keep = (f & (bits(exclude) | FLAGS["nodata"])) == 0
+    if water_only:
+        keep &= (f & FLAGS["water"]) != 0
+    return keep
+
+
+def apply(img, qa, **options):
+    """يضع NaN في مكانه حيث لا تقبل ``select(qa, **options)`` البكسل."""
+    img[~select(qa, **options)] = np.nan
+    return img
+
+
+def coverage(qa) -> dict:
+    """نسبة البكسلات (من ذات البيانات) التي يحملها كل علم SCL، مع المياه بالعتبة الافتراضية."""
+    f = flags(qa)
+    has_data = (f & FLAGS["nodata"]) == 0
+    n = int(has_data.sum())
+    return {name: float(((f & FLAGS[name]) != 0)[has_data].sum() / n) if n else 0.0
+            for name in ("water", *SCL_FLAGS)}
@@ -0,0 +1,240 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   نقطية مضغوطة في الذاكرة: رموز 16-بت + جدول قيم + أقنعة بتية + الإسناد   │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+بدل float32 (4 بايت/بكسل) مع NaN وقناع MDWI بـ float32 آخر، تُحفظ النقطية كرموز
+uint16 (بايتان/بكسل) وجدول من 65536 قيمة، والأقنعة (صالح، مياه، ...) بتًا واحدًا
+للبكسل عبر ``np.packbits``:
+
+* ``linear``: ترميز خطي لمدى البيانات الفعلي (الخطوة = المدى / 65535).
+* ``float16``: بتات float16 محوَّلة إلى مفتاح يحفظ الترتيب (للمؤشرات ذات الذيل الطويل
+  مثل Chl_a، حيث الخطوة الخطية تمحو القيم الصغيرة). تختاره ``encoding="auto"`` تلقائيًا.
+
+في الحالتين الجدول تصاعدي مع الرمز، فالإحصاءات والنسب المئوية تُحسب من مدرج تكراري
+للرموز (``bincount``)، والتلوين جدول ألوان من 65536 مدخلًا يُفهرس بالرموز، والتحويلات
+التصاعدية (log1p) تطبَّق على الجدول وحده. الفهرسة ``raster[rows, cols]`` تعيد float32 مع
+NaN للكتلة المطلوبة فقط، فيقرأ التصدير وقراءة البكسل والمقطع دون تضخيم الصورة كاملة.
+"""
+import numpy as np
+
+from . import quality
+
+CODES = 65536
+
+
+def _keys_to_float16(keys):
+    """عكس مفتاح الترتيب: البتات الأصلية لـ float16 ثم القيمة."""
+    keys = np.asarray(keys, dtype=np.uint16)
+    bits = np.where(keys & 0x8000, keys & 0x7FFF, ~keys & 0xFFFF).astype(np.uint16)
+    return bits.view(np.float16).astype(np.float32)
+
+
+def float16_codes(a) -> np.ndarray:
+    """مفاتيح ترتيب float16 (uint16) لـ ``a``؛ NaN يبقى رمزًا قيمته NaN في ``FLOAT16_TABLE``."""
+    bits = np.asarray(a, dtype=np.float32).astype(np.float16).view(np.uint16)
+    return np.where(bits & 0x8000, ~bits, bits | 0x8000).astype(np.uint16)
+
+
+FLOAT16_TABLE = _keys_to_float16(np.arange(CODES))
+
+
+def hist_percentiles(table, hist, q) -> list:
+    """النسب المئوية بالاستيفاء الخطي بين الرتب (كـ ``np.percentile``) من مدرج تكراري للرموز."""
+    cum = np.cumsum(hist)
+    n = int(cum[-1])
+    if n == 0:
+        raise ValueError("no valid pixels")
+    out = []
+    for p in np.atleast_1d(q):
+        rank = p / 100 * (n - 1)
+        lo, hi = (table[np.searchsorted(cum, r, side="right")] for r in (np.floor(rank), np.ceil(rank)))
+        out.append(float(lo + (hi - lo) * (rank - np.floor(rank))))
+    return out
+
+
+def hist_stats(table, hist) -> dict:
+    """إحصاءات ``summary_stats`` نفسها من مدرج تكراري للرموز دون فكها."""
+    nz = np.flatnonzero(hist)
+    if nz.size == 0:
+        return {"min": None, "max": None, "mean": None, "p2": None, "p98": None, "valid_px": 0}
+    n = int(hist.sum())
+    p2, p98 = hist_percentiles(table, hist, [2, 98])
+    return {"min": float(table[nz[0]]), "max": float(table[nz[-1]]),
+            "mean": float((hist[nz] * table[nz].astype(np.float64)).sum() / n),
+            "p2": p2, "p98": p98, "valid_px": n}
+
+
+class Raster:
+    """قيم مؤشر مرمزة (``codes``/``table``) وأقنعة بتية (``masks``) مع ``bbox`` الشبكة.
+
+    ``shape`` و ``size`` و ``nbytes`` بمعنى NumPy (أبعاد الشبكة ``grid`` = (العرض، الارتفاع)).
+    """
+
+    def __init__(self, codes, table, masks, bbox=None, mdwi=None):
+        self.codes = codes  # (h, w) uint16
+        self.table = table  # (65536,) float32 تصاعدي: قيمة كل رمز
+        self.masks = masks  # {الاسم: (h, ceil(w/8)) uint8}؛ "valid" موجود دائمًا
+        self.bbox = bbox
+        self.mdwi = mdwi    # (h, w) uint8 بايت MDWI من طبقة الجودة (لإعادة حساب "water" بعتبة أخرى) أو None
+
+    @classmethod
+    def pack(cls, img, qa=None, bbox=None, encoding="auto"):
+        """يرمّز ``img`` (NaN = لا بيانات)؛ ``qa`` (اختياري) رموز ``khaled.quality`` تصبح
+        أقنعة بتية لكل علم ("water" بالعتبة الافتراضية، "cloud"، "shadow"، ...)."""
+        a = np.asarray(img, dtype=np.float32)
+        a = a[..., 0] if a.ndim == 3 else a  # محور النطاق وحده: صف أو عمود واحد يبقى ثنائي الأبعاد
+        valid = np.isfinite(a)
+        finite = a[valid]
+        lo, hi = (float(finite.min()), float(finite.max())) if finite.size else (0.0, 0.0)
+
+        if encoding == "auto":
+            encoding = "linear"
+            if finite.size and max(abs(lo), abs(hi)) < 65000:
+                typical = float(np.median(np.abs(finite)))
+                if (hi - lo) / (CODES - 1) > 1e-3 * typical:
+                    encoding = "float16"
+
+        if encoding == "float16":
+            codes = float16_codes(np.where(valid, a, 0))
+            table = FLOAT16_TABLE
+        else:
+            scale = (hi - lo) / (CODES - 1) or 1.0
+            codes = np.where(valid, np.rint((np.where(valid, a, lo) - lo) / scale), 0).astype(np.uint16)
+            table = (lo + scale * np.arange(CODES, dtype=np.float64)).astype(np.float32)
+
+        masks = {"valid": np.packbits(valid, axis=1)}
+        mdwi = None
+        if qa is not None:
+            qa = np.asarray(qa, dtype=np.uint16)
+            qa = qa[..., 0] if qa.ndim == 3 else qa
+            flags = quality.flags(qa)
+            for name, bit in quality.FLAGS.items():
+                masks[name] = np.packbits((flags & bit) != 0, axis=1)
+            mdwi = (qa >> 8).astype(np.uint8)
+        return cls(codes, table, masks, bbox, mdwi)
+
+    # ───────────────────────────── الشكل والحجم ─────────────────────────────
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def size(self):
+        return self.codes.size
+
+    @property
+    def grid(self):
+        return self.shape[1], self.shape[0]
+
+    @property
+    def nbytes(self):
+        extra = 0 if self.mdwi is None else self.mdwi.nbytes
+        return self.codes.nbytes + extra + sum(m.nbytes for m in self.masks.values())
+
+    ndim = 2
+
+    def squeeze(self):
+        return self
+
+    def has(self, name) -> bool:
+        return name in self.masks
+
+    # ───────────────────────────── الأقنعة ─────────────────────────────
+    def mask(self, name="valid", rows=slice(None), cols=slice(None)):
+        """القناع ``name`` (bool) للصفوف/الأعمدة المطلوبة فقط."""
+        bits = self.masks[name]
+        if isinstance(cols, slice):
+            return np.unpackbits(bits[rows], axis=-1, count=self.shape[1]).astype(bool)[..., cols]
+        cols = np.asarray(cols)
+        return ((bits[rows, cols >> 3] >> (7 - (cols & 7))) & 1).astype(bool)
+
+    def masked(self, name) -> "Raster":
+        """نسخة تشارك الرموز، وقناع "valid" فيها مقيد بـ ``name`` (عملية بتية على الأقنعة المضغوطة)."""
+        return Raster(self.codes, self.table, {**self.masks, "valid": self.masks["valid"] & self.masks[name]},
+                      self.bbox, self.mdwi)
+
+    def quality(self, exclude=quality.DEFAULT_EXCLUDE, water_only=True,
+                water_threshold=quality.DEFAULT_WATER_THRESHOLD) -> "Raster":
+        """نسخة تشارك الرموز، وقناع "valid" فيها يستبعد أعلام ``exclude`` و"nodata" (ويقتصر على
+        المياه إن طُلب): ``quality.select`` نفسها لكن على الأقنعة المضغوطة بايتًا بايتًا.
+
+        عتبة مياه غير الافتراضية تعيد حساب "water" من بايت MDWI المخزن، بلا تنزيل.
+        """
+        masks = dict(self.masks)
+        if water_threshold != quality.DEFAULT_WATER_THRESHOLD and self.mdwi is not None:
+            masks["water"] = np.packbits(quality.water(self.mdwi, water_threshold), axis=1)
+        valid = masks["valid"] & ~masks["nodata"]
+        for name in exclude:
+            valid &= ~masks[name]
+        if water_only:
+            valid &= masks["water"]
+        masks["valid"] = valid
+        return Raster(self.codes, self.table, masks, self.bbox, self.mdwi)
+
+    def mapped(self, fn) -> "Raster":
+        """نسخة تشارك الرموز مع ``fn`` (دالة تصاعدية مثل ``np.log1p``) مطبقة على الجدول فقط."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            table = np.asarray(fn(self.table), dtype=np.float32)
+        return Raster(self.codes, table, self.masks, self.bbox, self.mdwi)
+
+    def band(self, name) -> "MaskBand":
+        """القناع ``name`` كنطاق 0/1 قابل للتقطيع (للتصدير)."""
+        return MaskBand(self, name)
+
+    # ───────────────────────────── القيم ─────────────────────────────
+    def __getitem__(self, key):
+        """قيم float32 (NaN = لا بيانات) للكتلة أو البكسلات المطلوبة فقط."""
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        values = self.table[self.codes[rows, cols]]
+        valid = self.mask("valid", rows, cols)
+        if np.ndim(values) == 0:
+            return values if valid else np.float32(np.nan)
+        values[~valid] = np.nan
+        return values
+
+    def __array__(self, dtype=None, copy=None):
+        """الصورة كاملة float32 مع NaN (للمراحل التي تحتاجها فعلًا، مثل استخراج الأجسام)."""
+        out = self[:, :]
+        return out if dtype is None else out.astype(dtype)
+
+    def histogram(self) -> np.ndarray:
+        """عدد البكسلات الصالحة لكل رمز (القيم التي صارت NaN في الجدول لا تُعد)."""
+        hist = np.bincount(self.codes[self.mask()], minlength=CODES)
+        hist[~np.isfinite(self.table)] = 0
+        return hist
+
+    def percentiles(self, q, hist=None) -> list:
+        """النسب المئوية بالاستيفاء الخطي بين الرتب (كـ ``np.percentile``) من المدرج التكراري."""
+        return hist_percentiles(self.table, self.histogram() if hist is None else hist, q)
+
+    def stats(self) -> dict:
+        """إحصاءات ``summary_stats`` نفسها من المدرج التكراري دون فك الرموز."""
+        return hist_stats(self.table, self.histogram())
+
+
+class MaskBand:
+    """قناع من ``Raster`` يُقرأ كقيم float32 (1 = ضمن القناع، 0 خارجه، NaN بلا بيانات)."""
+
+    def __init__(self, raster, name):
+        self.raster = raster
+        self.name = name
+        self.shape = raster.shape
+
+    def squeeze(self):
+        return self
+
+    def __getitem__(self, key):
+        rows, cols = key if isinstance(key, tuple) else (key, slice(None))
+        out = self.raster.mask(self.name, rows, cols).astype(np.float32)
+        out[~self.raster.mask("valid", rows, cols)] = np.nan
+        return out
+
+
+def shared_mask(rasters) -> list:
+    """نسخ تشارك الرموز وقناع "valid" فيها واحد: البكسل صالح في كل النقطيات.
+
+    للمقارنة جنبًا إلى جنب: كل لوحة تعرض البكسلات نفسها (عملية بتية على الأقنعة المضغوطة)؛
+    قناع الجودة يُطبَّق قبلها على ما يلزمه (``Raster.quality``).
+    """
+    valid = np.bitwise_and.reduce([r.masks["valid"] for r in rasters])
+    return [Raster(r.codes, r.table, {**r.masks, "valid": valid}, r.bbox, r.mdwi) for r in rasters]
@@ -0,0 +1,140 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   خط العرض: قناع المياه ← مدّ النسب المئوية ← تلوين ← مفتاح التدرّج (PNG) │
+#   وإطارات الفيلم الزمني (تُرسم داخل عمليات عاملة)                         │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import io
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .metrics import stage
+from .raster import Raster
+
+NODATA_RGB = (40, 40, 40)  # لون البكسلات بلا قيمة (يابسة/سحب) في الإطارات
+
+# matplotlib و cmocean (≈0.6 ث) لا يُستوردان مع الوحدة: القناع والمدّ والتلوين لا يحتاجانهما،
+# فتبقى اللوحة والمجدول والواجهة البرمجية خفيفة حتى أول لوحة ألوان أو مفتاح تدرّج.
+_colormaps = None  # (cmocean.cm، BloomRamp، matplotlib.colormaps) بعد أول استيراد
+
+
+def _load_matplotlib():
+    """يستورد matplotlib و cmocean ويعدّهما (الخط، إشارة السالب) مرة واحدة لكل عملية.
+
+    أول استيراد يظهر كمرحلة ``import_matplotlib`` في سجل التشغيل الجاري.
+    """
+    global _colormaps
+    if _colormaps is None:
+        with stage("import_matplotlib"):
+            import cmocean
+            import matplotlib as mpl
+            from matplotlib.colors import LinearSegmentedColormap
+
+            mpl.rcParams["savefig.dpi"] = 150
+            mpl.rcParams["font.family"] = "Arial"
+            mpl.rcParams["axes.unicode_minus"] = False
+            # ───────────────────────── BloomRamp colormap (Blue-→-Red) ─────────────────
+            bloom_cmap = LinearSegmentedColormap.from_list(
+                "BloomRamp",
+                ["#0020a5", "#01b3ff", "#ffff5e", "#ff9b00", "#c10000"],
+                N=256
+            )
+            _colormaps = (cmocean.cm, bloom_cmap, mpl.colormaps)
+    return _colormaps
+
+
+def get_cmap(palette_name):
+    """يعيد لوحة الألوان بالاسم: cmocean أولًا ثم BloomRamp ثم matplotlib."""
+    cmocean_cm, bloom_cmap, colormaps = _load_matplotlib()
+    if hasattr(cmocean_cm, palette_name):
+        return getattr(cmocean_cm, palette_name)
+    if palette_name == "BloomRamp":
+        return bloom_cmap
+    return colormaps.get_cmap(palette_name)
+
+
+def ar(text: str) -> str:
+    """يعيد النص العربي مشكلاً ومرتباً RTL ليقبله matplotlib."""
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def percentile_stretch(img, low=2, high=98):
+    """حدود المدّ (p2, p98) من البكسلات الصالحة."""
+    if isinstance(img, Raster):
+        lo, hi = img.percentiles([low, high])
+        return lo, hi
+    lo, hi = np.percentile(img[~np.isnan(img)], [low, high])
+    return float(lo), float(hi)
+
+
+def colorize(img, min_thr, max_thr, gamma, cmap):
+    """قصّ ← تطبيع ← gamma ← لوحة الألوان، ويعيد صورة RGB (uint8).
+
+    لـ ``Raster`` يُلوَّن جدول القيم (65536 مدخلًا) مرة واحدة ثم يُفهرس بالرموز.
+    """
+    if isinstance(img, Raster):
+        lut = colorize(img.table, min_thr, max_thr, gamma, cmap)
+        rgb = lut[img.codes]
+        rgb[~img.mask()] = colorize(np.float32([np.nan]), min_thr, max_thr, gamma, cmap)[0]
+        return rgb
+    img_clip = np.clip(img, min_thr, max_thr)
+    norm = (img_clip - min_thr) / (max_thr - min_thr)
+    rgba = cmap(np.power(norm, gamma))
+    return (rgba[..., :3] * 255).astype(np.uint8)
+
+
+def png_bytes(rgb) -> bytes:
+    """يرمّز صورة RGB (uint8) كـ PNG."""
+    buf = io.BytesIO()
+    Image.fromarray(rgb).save(buf, format="png")
+    return buf.getvalue()
+
+
+def legend_png(tick_labels, cmap, figsize=(10, 1.5), fontsize=14, dpi=720,
+               pad_inches=0.5, frame=True, tight_pad=3):
+    """شريط التدرّج مع ثلاث تسميات (أدنى/وسط/أعلى) كصورة PNG."""
+    _load_matplotlib()
+    from matplotlib.figure import Figure
+
+    # Figure مستقلة لا pyplot: الحالة العامة لـ pyplot (الشكل الحالي) تتداخل بين جلسات متزامنة
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    gradient = np.linspace(0, 1, 256).reshape(1, -1)
+    ax.imshow(gradient, aspect="auto", cmap=cmap)
+    ax.set_xticks([0, 128, 255])
+    ax.set_xticklabels(tick_labels, fontsize=fontsize)
+    ax.set_yticks([])
+    if not frame:
+        ax.tick_params(axis='x', length=0)
+        ax.set_frame_on(False)
+    if tight_pad is not None:
+        fig.tight_layout(pad=tight_pad)  # بعد إعداد جميع العناصر وقبل حفظ الصورة
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", pad_inches=pad_inches, dpi=dpi)
+    return buf.getvalue()
+
+
+def frame_rgb(img, keep, vmin, vmax, gamma, palette_name, stamp, max_side=None):
+    """إطار فيلم زمني: قناع ← تلوين بمدّ ثابت ← تصغير ← ختم التاريخ؛ يعيد RGB (uint8).
+
+    ``keep`` (bool أو None) البكسلات التي يقبلها قناع الجودة (``quality.select``).
+    دالة على مستوى الوحدة ومعاملاتها قابلة للتسلسل (اسم اللوحة لا كائنها) لتعمل في ``ProcessPoolExecutor``.
+    """
+    img = np.asarray(img, dtype=np.float32).squeeze()
+    if keep is not None:
+        img = np.where(keep, img, np.nan)
+    rgb = colorize(img, vmin, vmax, gamma, get_cmap(palette_name))
+    rgb[~np.isfinite(img)] = NODATA_RGB
+
+    frame = Image.fromarray(rgb)
+    if max_side and max(frame.size) > max_side:
+        frame.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+    draw = ImageDraw.Draw(frame)
+    font = ImageFont.load_default(size=max(12, frame.height // 18))
+    x0, y0, x1, y1 = draw.textbbox((8, 8), stamp, font=font)
+    draw.rectangle((x0 - 4, y0 - 4, x1 + 4, y1 + 4), fill=(0, 0, 0))
+    draw.text((8, 8), stamp, fill=(255, 255, 255), font=font)
+    return np.asarray(frame)
@@ -0,0 +1,357 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   تقارير دفعية: لكل منطقة خريطة كل مؤشر + مفتاح التدرّج + الإحصاءات + الفئات │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+تقرير واحد (HTML أو PDF) لكل منطقة اهتمام (خزان، بحيرة) يضم لكل مؤشر: الخريطة الملوّنة،
+مفتاح التدرّج، الإحصاءات والمساحة الصالحة، وفئات "تفسير القيم" من ``descriptions`` مع
+مساحة كل فئة ونسبتها.
+
+1. النقطيات من فهرس النتائج (``lookup_indicator``)، وما ليس فيه يُحسب مرة ويُحفظ فيه
+   (مع مخزن المربعات وفهرس المشاهد)، في خيوط لأن العمل شبكي.
+2. كل قسم (منطقة، مؤشر) يُرسم في مجمع عمليات (``render_pool``): العامل يقرأ النقطية من
+   ملفها في الفهرس بنفسه (لا تُنقل المصفوفات بين العمليات)، ويلوّنها بجدول ألوان ``Raster``،
+   ومفاتيح التدرّج (بتشكيل ``ar()``) مخزنة في كل عامل لكل (مؤشر، لوحة).
+3. الأقسام تُرسل بنافذة محدودة وتعود بالترتيب، ويُكتب تقرير المنطقة فور اكتمال أقسامها
+   ثم يُترك: الذاكرة تتبع عدد العمال وأقسام منطقة واحدة لا عدد المناطق.
+
+    python -m khaled.report areas.json --indicators Chl_a Turbidity --start 2024-06-01 --end 2024-06-30
+    python -m khaled.report --watchlist --format pdf --workers 8
+
+``areas.json``: ``[{"name": "خزان 1", "bbox": [minx, miny, maxx, maxy]}, ...]`` (WGS84)، و``"polygon":
+[[lon, lat], ...]`` (اختياري) يقص نقطيات المنطقة على حدود الخزان.
+"""
+import argparse
+import base64
+import datetime
+import html
+import io
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+from sentinelhub import BBox, CRS
+
+from .georef import pixel_area_km2
+from .indicators import (
+    aoi_geometry, aoi_grid, default_ranges, descriptions, display_names, evalscripts, legend_labels, legend_ticks,
+    resolve, water_masked_indicators
+)
+from .objects import class_breaks
+from .pipeline import fetch_indicator, lookup_indicator
+from .raster import Raster
+from .render import NODATA_RGB, ar, colorize, get_cmap, legend_png, png_bytes
+from .results import aoi_hash, load_raster, resolution_key, row_bbox
+from .settings import export_path
+from .timelapse import ordered_frames, render_pool
+
+FORMATS = {"html": "text/html", "pdf": "application/pdf"}
+PAGE_IN = (8.27, 11.69)  # A4 عمودي
+PAGE_DPI = 110
+
+
+# ───────────────────────────── جلب النقطيات ─────────────────────────────
+def resolve_section(config, area, key, time_interval, index, tiles=None, scenes=None) -> dict:
+    """صف فهرس النتائج لنقطية (منطقة، مؤشر) بعد حسابها إن لزم؛ أو {"error"}.
+
+    ``area["geometry"]`` (اختياري) مضلع المنطقة: النقطية مقصوصة عليه ومفهرسة باسمه.
+    """
+    ev, label, tier = evalscripts[key]
+    quality = label in water_masked_indicators
+    bbox, size, geometry = area["bbox"], area["size"], area.get("geometry")
+    try:
+        hit = lookup_indicator(index, label, tier, bbox, size, time_interval, need_quality=quality,
+                               geometry=geometry)
+        scene_date = hit["scene_date"] if hit else fetch_indicator(
+            config, ev, tier, bbox, size, time_interval, quality, index=index, label=label,
+            tiles=tiles, scenes=scenes, geometry=geometry
+        )["scene_date"]
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    row = index.get(aoi_hash(bbox, geometry), label, scene_date, resolution_key(size))
+    if row is None:
+        return {"error": "لم تُحفظ النقطية في فهرس النتائج"}
+    return {"path": row["raster_path"], "bounds": list(row_bbox(row)), "epsg": int(row["crs"]),
+            "scene_date": scene_date}
+
+
+# ───────────────────────────── رسم القسم (عامل) ─────────────────────────────
+@lru_cache(maxsize=64)
+def _legends(label, palette):
+    """مفتاحا التدرّج (نصي بتشكيل ``ar()``، ورقمي إن وُجد) كـ PNG؛ مرة لكل عامل."""
+    cmap = get_cmap(palette)
+    text = legend_png([ar(t) for t in legend_labels.get(label, ["منخفض", "متوسط", "مرتفع"])], cmap, dpi=200)
+    num = None
+    if label in legend_ticks:
+        num = legend_png(legend_ticks[label], cmap, figsize=(8, 0.5), fontsize=12, dpi=200,
+                         pad_inches=0, frame=False, tight_pad=None)
+    return text, num
+
+
+def class_areas(raster, label, px_km2) -> list:
+    """مساحة كل فئة من "تفسير القيم" ونسبتها، من المدرج التكراري للرموز دون فك الصورة."""
+    breaks = class_breaks(descriptions.get(label, ""))
+    hist = raster.histogram()
+    total = int(hist.sum())
+    if not breaks or total == 0:
+        return []
+    lowers = np.array([b[0] for b in breaks])
+    cls = np.clip(np.searchsorted(lowers, np.nan_to_num(raster.table, nan=-np.inf), side="right") - 1,
+                  0, len(breaks) - 1)
+    counts = np.bincount(cls, weights=hist, minlength=len(breaks))
+    return [{"class": name, "lower": None if not np.isfinite(lower) else float(lower),
+             "km2": float(n * px_km2), "share": float(n / total)}
+            for (lower, name), n in zip(breaks, counts)]
+
+
+def render_section(area_name, key, resolved, fmt, palette="BloomRamp", gamma=1.0, max_side=1200) -> dict:
+    """قسم واحد: الخريطة والمفتاح والإحصاءات والفئات (وصفحة PDF كاملة عند ``fmt="pdf"``).
+
+    دالة على مستوى الوحدة ومعاملاتها قابلة للتسلسل لتعمل في ``ProcessPoolExecutor``.
+    """
+    _, label, _ = evalscripts[key]
+    section = {"key": key, "label": label, "title": display_names.get(key, label), **resolved}
+    if "error" in resolved:
+        return section
+
+    img, qa = load_raster(resolved["path"])
+    bbox = BBox(resolved["bounds"], CRS(resolved["epsg"]))
+    raster = Raster.pack(img, qa, bbox)
+    del img, qa
+    if label in water_masked_indicators and raster.has("water"):
+        raster = raster.quality()
+
+    stats = raster.stats()
+    vmin, vmax = default_ranges.get(label) or (stats["p2"] or 0.0, stats["p98"] or 1.0)
+    if vmax - vmin < 1e-6:
+        vmax += 1e-6
+    rgb = colorize(raster, vmin, vmax, gamma, get_cmap(palette))
+    rgb[~raster.mask()] = NODATA_RGB
+    image = Image.fromarray(rgb)
+    del rgb
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+
+    px_km2 = float(np.mean(pixel_area_km2(bbox, raster.grid)))
+    legend, legend_num = _legends(label, palette)
+    section.update({"stats": stats, "vmin": vmin, "vmax": vmax, "area_km2": stats["valid_px"] * px_km2,
+                    "classes": class_areas(raster, label, px_km2)})
+    if fmt == "pdf":
+        section["page"] = pdf_page(area_name, section, image, legend, legend_num)
+    else:
+        section.update({"png": png_bytes(np.asarray(image)), "legend": legend, "legend_num": legend_num})
+    return section
+
+
+def _fmt(v):
+    return "—" if v is None else f"{v:.4g}"
+
+
+def pdf_page(area_name, section, image, legend, legend_num) -> bytes:
+    """صفحة A4 للقسم (JPEG): العنوان، الخريطة، المفتاح، جدول الإحصاءات وجدول الفئات."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=PAGE_IN)
+    fig.text(0.5, 0.965, ar(f"{area_name} — {section['title']}"), ha="center", fontsize=15, weight="bold")
+    fig.text(0.5, 0.94, ar(f"تاريخ المشهد: {section['scene_date']}"), ha="center", fontsize=10)
+
+    ax = fig.add_axes([0.06, 0.47, 0.88, 0.45])
+    ax.imshow(np.asarray(image))
+    ax.set_axis_off()
+    for rect, png in (([0.12, 0.405, 0.76, 0.055], legend), ([0.18, 0.38, 0.64, 0.025], legend_num)):
+        if png is not None:
+            lax = fig.add_axes(rect)
+            lax.imshow(np.asarray(Image.open(io.BytesIO(png))))
+            lax.set_axis_off()
+
+    stats = section["stats"]
+    rows = [[_fmt(stats["mean"]), _fmt(stats["min"]), _fmt(stats["max"]), _fmt(stats["p2"]), _fmt(stats["p98"]),
+             f"{section['area_km2']:.3f}"]]
+    tax = fig.add_axes([0.06, 0.29, 0.88, 0.07])
+    tax.set_axis_off()
+    tax.table(cellText=rows, colLabels=[ar("المتوسط"), ar("الأدنى"), ar("الأعلى"), "p2", "p98", ar("المساحة (كم²)")],
+              loc="center", cellLoc="center").set_fontsize(9)
+
+    if section["classes"]:
+        cax = fig.add_axes([0.06, 0.04, 0.88, 0.22])
+        cax.set_axis_off()
+        cax.table(cellText=[[f"{c['share']:.1%}", f"{c['km2']:.3f}", _fmt(c["lower"]), ar(c["class"])]
+                            for c in section["classes"]],
+                  colLabels=[ar("النسبة"), ar("المساحة (كم²)"), ar("من"), ar("الفئة")],
+                  loc="upper center", cellLoc="center").set_fontsize(9)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="jpeg", dpi=PAGE_DPI, pil_kwargs={"quality": 85})
+    return buf.getvalue()
+
+
+# ───────────────────────────── تجميع التقرير ─────────────────────────────
+def _data_uri(png) -> str:
+    return "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+
+
+def _description_html(text) -> str:
+    lines = [html.escape(re.sub(r"\*\*(.+?)\*\*", r"\1", line).strip().lstrip("* "))
+             for line in text.strip().splitlines()]
+    return "<br>".join(line for line in lines if line)
+
+
+def write_html(path, area, sections, time_interval):
+    """تقرير HTML واحد مستقل (الصور مضمّنة) من اليمين إلى اليسار."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"<!doctype html><html lang='ar' dir='rtl'><head><meta charset='utf-8'>"
+                f"<title>{html.escape(area['name'])}</title><style>"
+                "body{font-family:Arial,sans-serif;max-width:1000px;margin:auto;padding:1em}"
+                "img{max-width:100%}table{border-collapse:collapse;margin:.5em 0}"
+                "td,th{border:1px solid #ccc;padding:.3em .7em;text-align:center}"
+                "section{page-break-after:always;margin-bottom:2em}.err{color:#c10000}</style></head><body>")
+        f.write(f"<h1>{html.escape(area['name'])}</h1><p>الفترة: {time_interval[0]} ← {time_interval[1]}</p>")
+        for s in sections:
+            f.write(f"<section><h2>{html.escape(s['title'])}</h2>")
+            if "error" in s:
+                f.write(f"<p class='err'>⚠️ {html.escape(s['error'])}</p></section>")
+                continue
+            st = s["stats"]
+            f.write(f"<p>تاريخ المشهد: {s['scene_date']} · المدى المعروض: {s['vmin']:.3g} – {s['vmax']:.3g}</p>")
+            f.write(f"<img src='{_data_uri(s['png'])}' alt='{html.escape(s['label'])}'>")
+            for png in (s["legend"], s["legend_num"]):
+                if png is not None:
+                    f.write(f"<img src='{_data_uri(png)}' alt='legend'>")
+            f.write("<table><tr><th>المتوسط</th><th>الأدنى</th><th>الأعلى</th><th>p2</th><th>p98</th>"
+                    "<th>بكسل صالح</th><th>المساحة (كم²)</th></tr>"
+                    f"<tr><td>{_fmt(st['mean'])}</td><td>{_fmt(st['min'])}</td><td>{_fmt(st['max'])}</td>"
+                    f"<td>{_fmt(st['p2'])}</td><td>{_fmt(st['p98'])}</td><td>{st['valid_px']}</td>"
+                    f"<td>{s['area_km2']:.3f}</td></tr></table>")
+            if s["classes"]:
+                f.write("<table><tr><th>الفئة</th><th>من</th><th>المساحة (كم²)</th><th>النسبة</th></tr>")
+                for c in s["classes"]:
+                    f.write(f"<tr><td>{html.escape(c['class'])}</td><td>{_fmt(c['lower'])}</td>"
+                            f"<td>{c['km2']:.3f}</td><td>{c['share']:.1%}</td></tr>")
+                f.write("</table>")
+            f.write(f"<p>{_description_html(descriptions.get(s['label'], ''))}</p></section>")
+        f.write("</body></html>")
+
+
+def write_pdf(path, area, sections, time_interval):
+    """PDF متعدد الصفحات من صفحات الأقسام (الأقسام الفاشلة صفحة نصية قصيرة)."""
+    from matplotlib.figure import Figure
+
+    pages = []
+    for s in sections:
+        if "page" in s:
+            pages.append(Image.open(io.BytesIO(s["page"])).convert("RGB"))
+            continue
+        fig = Figure(figsize=PAGE_IN)
+        fig.text(0.5, 0.95, ar(f"{area['name']} — {s['title']}"), ha="center", fontsize=15)
+        fig.text(0.5, 0.9, ar(f"⚠️ تعذّر إعداد القسم: {s['error']}"), ha="center", fontsize=10, wrap=True)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="jpeg", dpi=PAGE_DPI)
+        pages.append(Image.open(buf).convert("RGB"))
+    pages[0].save(path, format="PDF", save_all=True, append_images=pages[1:], resolution=PAGE_DPI,
+                  title=f"{area['name']} {time_interval[0]}..{time_interval[1]}")
+
+
+def report_path(out_dir, name, time_interval, fmt) -> str:
+    slug = re.sub(r"[^\w-]+", "_", name).strip("_")
+    filename = f"report_{slug}_{time_interval[0]}_{time_interval[1]}.{fmt}"
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        return os.path.join(out_dir, filename)
+    return export_path(filename)
+
+
+def build_reports(config, areas, keys, time_interval, fmt="html", out_dir=None, palette="BloomRamp", gamma=1.0,
+                  workers=None, fetch_workers=4, index=None, tiles=None, scenes=None, ctx=None) -> list:
+    """يكتب تقريرًا لكل منطقة ويعيد [{name, path, sections, failed}].
+
+    ``areas``: [{"name", "bbox", "size", "indicators"، "geometry" (اختياريان)}] بشبكة ``aoi_grid``؛ ``keys`` مفاتيح
+    ``evalscripts`` لكل منطقة لا تحدد مؤشراتها.
+    """
+    from . import report
+    from .results import ResultsIndex
+
+    index = index or ResultsIndex()
+    time_interval = tuple(str(t)[:10] for t in time_interval)
+    plan = [(i, key) for i, area in enumerate(areas) for key in (area.get("indicators") or keys)]
+    workers = workers or min(4, os.cpu_count() or 1)
+    reports = []
+
+    def finish(i, sections):
+        area = areas[i]
+        path = report_path(out_dir, area["name"], time_interval, fmt)
+        (write_pdf if fmt == "pdf" else write_html)(path, area, sections, time_interval)
+        reports.append({"name": area["name"], "path": path, "sections": len(sections),
+                        "failed": [s["error"] for s in sections if "error" in s]})
+        if ctx is not None:
+            ctx.progress(len(reports) / len(areas), f"{area['name']} ({len(reports)}/{len(areas)})")
+
+    # الدالة تُرسل إلى العمال بمرجعها عبر الحزمة: تحت ``python -m khaled.report`` هذه الوحدة هي
+    # ``__main__``، و ``__main__.render_section`` لا يوجد في العمال (``render_pool`` يبدّل ``__main__``)
+    with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="khaled-report") as fetch_pool, \
+            render_pool(workers) as pool:
+        resolved = fetch_pool.map(lambda ik: resolve_section(config, areas[ik[0]], ik[1], time_interval, index,
+                                                             tiles, scenes), plan)
+        jobs = ((areas[i]["name"], key, r, fmt, palette, gamma) for (i, key), r in zip(plan, resolved))
+        current, sections = None, []
+        for (i, _), section in zip(plan, ordered_frames(pool, jobs, window=2 * workers, fn=report.render_section)):
+            if current is not None and i != current:
+                finish(current, sections)
+                sections = []
+            current = i
+            sections.append(section)
+        if sections:
+            finish(current, sections)
+    return reports
+
+
+# ───────────────────────────── سطر الأوامر ─────────────────────────────
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from . import metrics
+    from .scenes import SceneCatalog
+    from .settings import sh_config
+    from .tiles import TileCache
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("areas", nargs="?", help="ملف JSON بالمناطق [{name, bbox, polygon (اختياري)}]")
+    parser.add_argument("--watchlist", action="store_true", help="مناطق قائمة المراقبة ومؤشراتها")
+    parser.add_argument("--indicators", nargs="+", default=["Chl_a", "Turbidity"])
+    today = datetime.date.today()
+    parser.add_argument("--start", default=(today - datetime.timedelta(days=7)).isoformat())
+    parser.add_argument("--end", default=today.isoformat())
+    parser.add_argument("--format", choices=list(FORMATS), default="html")
+    parser.add_argument("--palette", default="BloomRamp")
+    parser.add_argument("--workers", type=int, help="عمليات الرسم (افتراضيًا ≤ 4)")
+    parser.add_argument("--out", help="مجلد التقارير (افتراضيًا مجلد التصدير)")
+    args = parser.parse_args(argv)
+    if not args.areas and not args.watchlist:
+        parser.error("areas file or --watchlist is required")
+
+    if args.watchlist:
+        from .watchlist import WatchList
+
+        areas = WatchList().watches()
+    else:
+        with open(args.areas, encoding="utf-8") as f:
+            areas = json.load(f)
+        for area in areas:
+            minx, miny, maxx, maxy = area["bbox"]
+            area["bbox"], area["size"] = aoi_grid([minx, maxx], [miny, maxy])
+            area["indicators"] = [resolve(n) for n in area.get("indicators", [])]
+            area["geometry"] = aoi_geometry(area["polygon"]) if area.get("polygon") else None
+
+    load_dotenv()
+    with metrics.collect("report"):
+        reports = build_reports(sh_config(), areas, [resolve(n) for n in args.indicators], (args.start, args.end),
+                                fmt=args.format, out_dir=args.out, palette=args.palette, workers=args.workers,
+                                tiles=TileCache(), scenes=SceneCatalog())
+    for r in reports:
+        print(f"{r['path']}  {r['sections']} sections" + (f"  ⚠️ {len(r['failed'])} failed" if r["failed"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   فهرس دائم للنتائج المحسوبة (SQLite) + ملفات النقطية المخزنة على القرص    │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from sentinelhub import BBox, CRS
+from shapely import wkt as shapely_wkt
+
+from . import quality
+from .mosaic import Mosaic
+from .raster import Raster
+from .settings import cache_path
+
+
+def aoi_hash(bbox, geometry=None) -> str:
+    """بصمة هندسة منطقة الاهتمام (إحداثيات مقرّبة + نظام الإسناد).
+
+    ``geometry`` (اختياري) المضلع المرسوم: نتائجه مقصوصة عليه، فلا تختلط بنتائج مضلع
+    آخر يشاركه الـ bbox نفسه.
+    """
+    coords = ",".join(f"{c:.6f}" for c in bbox)
+    if geometry is not None:
+        coords += "|" + shapely_wkt.dumps(geometry.geometry, rounding_precision=6)
+    return hashlib.sha1(f"{coords}|{bbox.crs.epsg}".encode("utf-8")).hexdigest()[:16]
+
+
+def resolution_key(size) -> str:
+    """أبعاد الشبكة الناتجة كنص (العرض×الارتفاع)."""
+    return f"{size[0]}x{size[1]}"
+
+
+def row_bbox(row) -> BBox:
+    """يعيد بناء الـ BBox المخزن مع صف المنتج."""
+    return BBox([float(c) for c in row["bbox"].split(",")], CRS(row["crs"]))
+
+
+def load_raster(path):
+    """يقرأ ملف نقطية مخزنًا: (img, رموز الجودة أو None).
+
+    النتائج الأقدم تحمل MDWI (float32) وحده، فيُرمَّز بلا أعلام SCL.
+    """
+    with np.load(path) as data:
+        img = data["img"]
+        if "qa" in data.files:
+            qa = data["qa"]
+        else:
+            qa = quality.from_mdwi(data["mdwi"]) if "mdwi" in data.files else None
+    return img, qa
+
+
+def summary_stats(img) -> dict:
+    """إحصاءات موجزة تتجاهل القيم المفقودة (NaN)."""
+    if isinstance(img, (Raster, Mosaic)):
+        return img.stats()
+    a = np.asarray(img, dtype=np.float32)
+    valid = a[np.isfinite(a)]
+    if valid.size == 0:
+        return {"min": None, "max": None, "mean": None, "p2": None, "p98": None, "valid_px": 0}
+    p2, p98 = np.percentile(valid, [2, 98])
+    return {"min": float(valid.min()), "max": float(valid.max()), "mean": float(valid.mean()),
+            "p2": float(p2), "p98": float(p98), "valid_px": int(valid.size)}
+
+
+class ResultsIndex:
+    """فهرس المنتجات المحسوبة بالمفتاح (بصمة المنطقة، المؤشر، تاريخ المشهد، الدقة).
+
+    يحفظ أيضًا نتائج البحث في الكتالوج للفترات المنتهية (أرشيف لا يتغيّر)،
+    فتُخدم الاستعلامات المكررة دون أي اتصال بالشبكة.
+    """
+
+    def __init__(self, db_path=None, raster_dir=None):
+        self.db_path = db_path or cache_path("results.sqlite")
+        self.raster_dir = raster_dir or os.path.dirname(cache_path("rasters", "x"))
+        os.makedirs(self.raster_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    aoi_hash    TEXT NOT NULL,
+                    label       TEXT NOT NULL,
+                    scene_date  TEXT NOT NULL,
+                    resolution  TEXT NOT NULL,
+                    bbox        TEXT NOT NULL,
+                    crs         INTEGER NOT NULL,
+                    min REAL, max REAL, mean REAL, p2 REAL, p98 REAL,
+                    valid_px    INTEGER,
+                    raster_path TEXT NOT NULL,
+                    has_mask    INTEGER NOT NULL,
+                    created     REAL NOT NULL,
+                    PRIMARY KEY (aoi_hash, label, scene_date, resolution)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS searches (
+                    aoi_hash    TEXT NOT NULL,
+                    collection  TEXT NOT NULL,
+                    start       TEXT NOT NULL,
+                    end         TEXT NOT NULL,
+                    scene_date  TEXT NOT NULL,
+                    PRIMARY KEY (aoi_hash, collection, start, end)
+                )""")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ───────────────────────────── نتائج البحث في الكتالوج ─────────────────────────────
+    def cached_search(self, aoi, collection, time_interval):
+        """أحدث تاريخ مشهد محفوظ لهذه الفترة، أو None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT scene_date FROM searches WHERE aoi_hash=? AND collection=? AND start=? AND end=?",
+                (aoi, collection, *time_interval)
+            ).fetchone()
+        return row["scene_date"] if row else None
+
+    def store_search(self, aoi, collection, time_interval, scene_date):
+        """يحفظ نتيجة البحث فقط إذا انتهت الفترة قبل اليوم (لن تظهر مشاهد أحدث)."""
+        if time_interval[1] >= datetime.date.today().isoformat():
+            return
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?)",
+                (aoi, collection, *time_interval, scene_date)
+            )
+
+    # ───────────────────────────── المنتجات ─────────────────────────────
+    def get(self, aoi, label, scene_date, resolution):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM products WHERE aoi_hash=? AND label=? AND scene_date=? AND resolution=?",
+                (aoi, label, scene_date, resolution)
+            ).fetchone()
+        if row is None or not os.path.exists(row["raster_path"]):
+            return None
+        return dict(row)
+
+    def load(self, row):
+        """يقرأ النقطية المخزنة: (img, رموز الجودة أو None)."""
+        return load_raster(row["raster_path"])
+
+    def put(self, aoi, label, scene_date, resolution, bbox, img, qa=None) -> dict:
+        """يخزن النقطية (ورموز طبقة الجودة، uint16) على القرص ويسجّلها مع إحصاءاتها في الفهرس.
+
+        مع ``qa`` تُحسب الإحصاءات على البكسلات التي يقبلها قناع الجودة الافتراضي (``quality.select``)
+        كما تعرضها اللوحة، لا على السحب والظلال واليابسة.
+        """
+        name = f"{aoi}_{label}_{scene_date}_{resolution}.npz"
+        path = os.path.join(self.raster_dir, name)
+        arrays = {"img": img} if qa is None else {"img": img, "qa": qa}
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+        stats = summary_stats(img if qa is None else np.where(quality.select(qa), img, np.nan))
+        row = {"aoi_hash": aoi, "label": label, "scene_date": scene_date,
+               "resolution": resolution, "bbox": ",".join(f"{c:.6f}" for c in bbox),
+               "crs": int(bbox.crs.epsg), **stats, "raster_path": path,
+               "has_mask": int(qa is not None), "created": time.time()}
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO products ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                tuple(row.values())
+            )
+        return row
+
+    def history(self, aoi, limit=20) -> list:
+        """النتائج السابقة لهذه المنطقة، الأحدث أولًا."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM products WHERE aoi_hash=? ORDER BY scene_date DESC, created DESC LIMIT ?",
+                (aoi, limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
@@ -0,0 +1,219 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   فهرس توفر المشاهد: نتائج الكتالوج مخزنة لكل (خلية شبكة، مجموعة، شهر)    │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+بدل تحويل نتيجة ``SentinelHubCatalog.search`` كاملة إلى قائمة في كل نقرة ثم رميها
+بعد ``max(dates)``، تُخزَّن عناصر الكتالوج (التاريخ، نسبة السحب، معرّف المشهد
+وبلاطة MGRS، وحدود المشهد) في SQLite لكل خلية شبكة ثابتة (0.5°) ومجموعة بيانات.
+
+* التغطية تُسجَّل بالشهر الميلادي: الفترة المطلوبة تُقسَّم إلى أشهر، والأشهر الناقصة
+  المتتالية تُجلب ببحث واحد مرقّم تُكتب عناصره صفحة صفحة، فتمديد الفترة لاحقًا
+  لا يجلب إلا الأشهر الجديدة.
+* ``latest`` يمر على الأشهر من الأحدث ويتوقف عند أول شهر فيه مشهد، فلا يُسأل
+  الكتالوج عن سنوات كاملة لإيجاد آخر مرور.
+* الأشهر التي لم تستقر بعد (تنتهي خلال آخر ``SETTLE_DAYS`` أيام) تُعد صالحة
+  ``RECENT_TTL`` ثانية فقط، لأن مشاهد جديدة قد تُضاف إليها.
+"""
+import datetime
+import math
+import re
+import sqlite3
+import threading
+import time
+
+from sentinelhub import BBox, CRS, SentinelHubCatalog
+
+from .metrics import stage
+from .pipeline import CatalogSearchError
+from .settings import cache_path
+
+CELL_DEG = 0.5
+SETTLE_DAYS = 3
+RECENT_TTL = 3600
+PAGE = 100  # حجم صفحة الكتالوج (الحد الأقصى لخدمة Sentinel Hub)
+_MGRS = re.compile(r"_T(\d{2}[A-Z]{3})_")
+
+
+def wgs84_bounds(bbox) -> BBox:
+    """حدود الـ bbox بدرجات WGS84 (خلايا الفهرس وحدود المشاهد بالدرجات)."""
+    return bbox if bbox.crs == CRS.WGS84 else bbox.transform_bounds(CRS.WGS84)
+
+
+def cells_for(bbox) -> list:
+    """خلايا الشبكة (cx, cy) التي يتقاطع معها ``bbox`` (بأي نظام إسناد)."""
+    bbox = wgs84_bounds(bbox)
+    x0, x1 = math.floor(bbox.min_x / CELL_DEG), math.floor(bbox.max_x / CELL_DEG)
+    y0, y1 = math.floor(bbox.min_y / CELL_DEG), math.floor(bbox.max_y / CELL_DEG)
+    return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+
+def cell_bbox(cell) -> BBox:
+    cx, cy = cell
+    return BBox([cx * CELL_DEG, cy * CELL_DEG, (cx + 1) * CELL_DEG, (cy + 1) * CELL_DEG], CRS.WGS84)
+
+
+def mgrs_tile(item_id):
+    """بلاطة MGRS من معرّف المشهد (مثل S2A_MSIL2A_..._T36RUU_...)، أو None."""
+    m = _MGRS.search(item_id or "")
+    return m.group(1) if m else None
+
+
+def months(start, end) -> list:
+    """الأشهر (أول يوم، آخر يوم) التي تغطي [start, end] كتواريخ ``datetime.date``."""
+    out, first = [], start.replace(day=1)
+    while first <= end:
+        nxt = (first + datetime.timedelta(days=32)).replace(day=1)
+        out.append((first, nxt - datetime.timedelta(days=1)))
+        first = nxt
+    return out
+
+
+def _runs(missing):
+    """يدمج الأشهر الناقصة المتتالية في فترات بحث متصلة."""
+    runs = []
+    for first, last in missing:
+        if runs and runs[-1][1] + datetime.timedelta(days=1) == first:
+            runs[-1] = (runs[-1][0], last)
+        else:
+            runs.append((first, last))
+    return runs
+
+
+class SceneCatalog:
+    """ذاكرة دائمة لعناصر الكتالوج مع تغطية شهرية لكل (خلية، مجموعة)."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or cache_path("scenes.sqlite")
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scenes (
+                    cell        TEXT NOT NULL,
+                    collection  TEXT NOT NULL,
+                    id          TEXT NOT NULL,
+                    date        TEXT NOT NULL,
+                    cloud       REAL,
+                    tile        TEXT,
+                    min_x REAL, min_y REAL, max_x REAL, max_y REAL,
+                    PRIMARY KEY (cell, collection, id)
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS scenes_date ON scenes(cell, collection, date)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    cell        TEXT NOT NULL,
+                    collection  TEXT NOT NULL,
+                    month       TEXT NOT NULL,
+                    checked     REAL NOT NULL,
+                    PRIMARY KEY (cell, collection, month)
+                )""")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ───────────────────────────── التغطية والتعبئة ─────────────────────────────
+    def _missing(self, cell_key, collection, month_list) -> list:
+        """الأشهر غير المغطاة (أو غير المستقرة وانتهت صلاحيتها)."""
+        settled = (datetime.date.today() - datetime.timedelta(days=SETTLE_DAYS))
+        with self._connect() as conn:
+            rows = {r["month"]: r["checked"] for r in conn.execute(
+                "SELECT month, checked FROM coverage WHERE cell=? AND collection=?", (cell_key, collection))}
+        now = time.time()
+        return [(first, last) for first, last in month_list
+                if first.isoformat()[:7] not in rows
+                or (last > settled and now - rows[first.isoformat()[:7]] > RECENT_TTL)]
+
+    def _fill(self, config, dc, cell, first, last):
+        """بحث مرقّم واحد للفترة [first, last]؛ كل صفحة تُكتب فور وصولها."""
+        cell_key = f"{cell[0]},{cell[1]}"
+        cat = SentinelHubCatalog(config=config)
+        with stage("catalog_search") as counters:
+            try:
+                search_iter = cat.search(
+                    dc, bbox=cell_bbox(cell), time=(first.isoformat(), last.isoformat()), limit=PAGE,
+                    fields={"include": ["id", "bbox", "properties.datetime", "properties.eo:cloud_cover"],
+                            "exclude": ["links", "assets"]}
+                )
+                page = []
+                for item in search_iter:
+                    page.append(item)
+                    if len(page) == PAGE:
+                        self._store(cell_key, dc.api_id, page)
+                        counters["scenes"] = counters.get("scenes", 0) + len(page)
+                        page = []
+                self._store(cell_key, dc.api_id, page)
+                counters["scenes"] = counters.get("scenes", 0) + len(page)
+            except Exception as e:
+                raise CatalogSearchError(str(e)) from e
+
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?)",
+                             [(cell_key, dc.api_id, m.isoformat()[:7], now) for m, _ in months(first, last)])
+
+    def _store(self, cell_key, collection, items):
+        if not items:
+            return
+        rows = []
+        for item in items:
+            props = item.get("properties", {})
+            b = item.get("bbox") or [None] * 4
+            rows.append((cell_key, collection, item.get("id") or props["datetime"], props["datetime"][:10],
+                         props.get("eo:cloud_cover"), mgrs_tile(item.get("id")), *b[:4]))
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO scenes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _ensure(self, config, dc, bbox, first, last):
+        """يجلب الأشهر الناقصة بين [first, last] لكل خلايا ``bbox``."""
+        for cell in cells_for(bbox):
+            missing = self._missing(f"{cell[0]},{cell[1]}", dc.api_id, months(first, last))
+            for run_first, run_last in _runs(missing):
+                self._fill(config, dc, cell, run_first, run_last)
+
+    def _query(self, dc, bbox, start, end) -> list:
+        bbox = wgs84_bounds(bbox)
+        cells = [f"{cx},{cy}" for cx, cy in cells_for(bbox)]
+        marks = ",".join("?" * len(cells))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM scenes WHERE collection=? AND cell IN ({marks}) AND date BETWEEN ? AND ? "
+                "AND (min_x IS NULL OR (min_x <= ? AND max_x >= ? AND min_y <= ? AND max_y >= ?)) "
+                "ORDER BY date",
+                (dc.api_id, *cells, start, end, bbox.max_x, bbox.min_x, bbox.max_y, bbox.min_y)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    # ───────────────────────────── الواجهة العامة ─────────────────────────────
+    def calendar(self, config, dc, bbox, time_interval) -> list:
+        """المشاهد المتاحة مجمّعة باليوم: [{date, cloud (الأدنى)، tiles، ids}] تصاعديًا."""
+        start, end = (datetime.date.fromisoformat(str(t)[:10]) for t in time_interval)
+        self._ensure(config, dc, bbox, start, end)
+        with stage("scene_lookup") as counters:
+            days = {}
+            for r in self._query(dc, bbox, start.isoformat(), end.isoformat()):
+                day = days.setdefault(r["date"], {"date": r["date"], "cloud": None, "tiles": [], "ids": []})
+                if r["id"] not in day["ids"]:
+                    day["ids"].append(r["id"])
+                if r["tile"] and r["tile"] not in day["tiles"]:
+                    day["tiles"].append(r["tile"])
+                if r["cloud"] is not None and (day["cloud"] is None or r["cloud"] < day["cloud"]):
+                    day["cloud"] = r["cloud"]
+            counters["scenes"] = len(days)
+        return list(days.values())
+
+    def dates(self, config, dc, bbox, time_interval) -> list:
+        """كل تواريخ المشاهد (YYYY-MM-DD) في الفترة، مرتبة وبلا تكرار."""
+        return [d["date"] for d in self.calendar(config, dc, bbox, time_interval)]
+
+    def latest(self, config, dc, bbox, time_interval):
+        """أحدث تاريخ مشهد في الفترة أو None؛ يجلب الأشهر من الأحدث ويتوقف عند أول نتيجة."""
+        start, end = (datetime.date.fromisoformat(str(t)[:10]) for t in time_interval)
+        for first, last in reversed(months(start, end)):
+            first, last = max(first, start), min(last, end)
+            self._ensure(config, dc, bbox, first, last)
+            rows = self._query(dc, bbox, first.isoformat(), last.isoformat())
+            if rows:
+                return rows[-1]["date"]
+        return None
@@ -0,0 +1,39 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   إعدادات مشتركة: مسارات التخزين المؤقت والتصدير وإعداد Sentinel Hub       │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import os
+
+CACHE_DIR = os.getenv("KHALED_CACHE_DIR", os.path.join(os.getcwd(), ".khaled_cache"))
+EXPORT_DIR = os.getenv("KHALED_EXPORT_DIR")  # مجلد مشترك للملفات المصدَّرة (وإلا exports/ داخل التخزين المؤقت)
+
+
+def cache_path(*parts: str) -> str:
+    """يعيد مسارًا داخل مجلد التخزين المؤقت وينشئ المجلد الأب عند الحاجة."""
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def export_path(filename: str) -> str:
+    """مسار ملف مصدَّر في المجلد المشترك ``KHALED_EXPORT_DIR`` أو في ``exports/`` بالتخزين المؤقت."""
+    if EXPORT_DIR:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        return os.path.join(EXPORT_DIR, filename)
+    return cache_path("exports", filename)
+
+
+def sh_config():
+    """إعداد Sentinel Hub من متغيرات البيئة (والخادم البديل إن حُدّد) للأدوات خارج اللوحة."""
+    from sentinelhub import SHConfig
+
+    from .standin import configure_standin
+
+    config = SHConfig()
+    config.instance_id = os.getenv("INSTANCE_ID")
+    config.sh_client_id = os.getenv("SH_CLIENT_ID")
+    config.sh_client_secret = os.getenv("SH_CLIENT_SECRET")
+    if os.getenv("KHALED_SH_STANDIN"):
+        configure_standin(config, os.getenv("KHALED_SH_STANDIN"))
+    if not all([config.instance_id, config.sh_client_id, config.sh_client_secret]):
+        raise RuntimeError("Sentinel Hub credentials missing (INSTANCE_ID, SH_CLIENT_ID, SH_CLIENT_SECRET)")
+    return config
@@ -0,0 +1,331 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   خادم محلي بديل لـ Sentinel Hub: تسجيل/إعادة تشغيل + بيانات صناعية      │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+خادم HTTP يحاكي نقاط Sentinel Hub التي تستخدمها اللوحة:
+
+* ``POST /auth/realms/main/protocol/openid-connect/token`` — رمز OAuth وهمي
+* ``POST /api/v1/catalog/1.0.0/search`` — بحث STAC مع ترقيم الصفحات (``next``)
+* ``POST /api/v1/process`` — صورة TIFF (FLOAT32) للـ bbox والأبعاد المطلوبة
+
+الأوضاع:
+
+* اصطناعي (افتراضي): تُولَّد نطاقات Sentinel-2 ناعمة لأي bbox (مياه/يابسة،
+  ازدهار، سحب تتغيّر مع التاريخ، SCL) ثم يُقيَّم الـ evalscript عليها بمترجم
+  مصغّر، فتعطي كل المؤشرات قيمًا معقولة ومتّسقة بين المربعات المتجاورة.
+* ``--replay DIR``: الردود المسجّلة تُخدم أولًا (والباقي اصطناعي، أو 404 مع ``--strict``).
+* ``--record DIR --upstream URL``: وسيط إلى الخدمة الحقيقية يحفظ كل رد.
+
+مع ``--latency``/``--jitter`` و ``--error-rate``/``--error-status`` لمحاكاة الشبكة.
+
+    python -m khaled.standin --port 8765
+    KHALED_SH_STANDIN=http://127.0.0.1:8765 streamlit run Geo_Khaled.py
+"""
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import tifffile
+
+from .bandmath import evaluate_evalscript
+from .georef import geometry_rings, polygon_mask
+
+TOKEN_PATH = "/auth/realms/main/protocol/openid-connect/token"
+CATALOG_PATH = "/api/v1/catalog/1.0.0/search"
+PROCESS_PATH = "/api/v1/process"
+REVISIT_DAYS = 5
+FIRST_SCENE = datetime.date(2015, 7, 4)
+
+# انعكاسية نموذجية (مياه، يابسة) لكل نطاق
+_WATER = {"B01": 0.07, "B02": 0.06, "B03": 0.05, "B04": 0.03, "B05": 0.02, "B06": 0.012,
+          "B07": 0.011, "B08": 0.010, "B8A": 0.009, "B09": 0.005, "B11": 0.004, "B12": 0.003}
+_LAND = {"B01": 0.05, "B02": 0.06, "B03": 0.09, "B04": 0.11, "B05": 0.16, "B06": 0.24,
+         "B07": 0.27, "B08": 0.29, "B8A": 0.30, "B09": 0.10, "B11": 0.26, "B12": 0.18}
+# إضافة الازدهار الطحلبي: أخضر وحافة حمراء وقريب تحت أحمر أعلى
+_BLOOM = {"B03": 0.02, "B04": -0.005, "B05": 0.03, "B06": 0.04, "B07": 0.035, "B08": 0.03, "B8A": 0.03}
+
+
+def configure_standin(config, url):
+    """يوجّه ``SHConfig`` إلى الخادم البديل، ويملأ بيانات اعتماد وهمية عند غيابها."""
+    url = url.rstrip("/")
+    config.sh_base_url = url
+    config.sh_token_url = url + TOKEN_PATH
+    config.instance_id = config.instance_id or "standin"
+    config.sh_client_id = config.sh_client_id or "standin"
+    config.sh_client_secret = config.sh_client_secret or "standin"
+    if url.startswith("http://"):
+        os.environ.setdefault("OAUTHLIB_INSECURE_TRANSPORT", "1")  # oauthlib يرفض http بدونها
+    return config
+
+
+# ───────────────────────────── البيانات الاصطناعية ─────────────────────────────
+def scene_dates(start, end):
+    """تواريخ المرور المنتظمة (كل 5 أيام) داخل [start, end]."""
+    first = max(start, FIRST_SCENE)
+    offset = (-(first - FIRST_SCENE).days) % REVISIT_DAYS
+    day = first + datetime.timedelta(days=offset)
+    out = []
+    while day <= end:
+        out.append(day)
+        day += datetime.timedelta(days=REVISIT_DAYS)
+    return out
+
+
+def _lonlat_grid(bbox, crs, w, h):
+    x0, y0, x1, y1 = bbox
+    xs = x0 + (np.arange(w) + 0.5) * (x1 - x0) / w
+    ys = y1 - (np.arange(h) + 0.5) * (y1 - y0) / h
+    lon, lat = np.meshgrid(xs, ys)
+    if crs != 4326:
+        from pyproj import Transformer
+        lon, lat = Transformer.from_crs(crs, 4326, always_xy=True).transform(lon, lat)
+    return lon, lat
+
+
+def synthetic_bands(bbox, crs, w, h, date):
+    """نطاقات Sentinel-2 (و SCL) كدوال ناعمة في الإحداثيات الجغرافية والتاريخ."""
+    lon, lat = _lonlat_grid(bbox, crs, w, h)
+    t = (date - FIRST_SCENE).days
+    water = 0.5 + 0.5 * np.tanh(6 * (np.sin(lon * 37.0) * np.cos(lat * 29.0) + 0.35 * np.sin(lon * 113 + lat * 97)))
+    bloom = water * np.clip(np.sin(lon * 230 + t * 0.11) * np.cos(lat * 190 - t * 0.07), 0, None) ** 2
+    cloud = np.clip(np.sin(lon * 61 + t * 1.7) * np.sin(lat * 53 - t * 1.3) - 0.55, 0, None) * 3
+    rng = np.random.default_rng(int(abs(bbox[0] * 1e5 + bbox[1] * 1e3)) % 2**32 + t)
+
+    bands = {}
+    for name in _WATER:
+        base = water * _WATER[name] + (1 - water) * _LAND[name] + bloom * _BLOOM.get(name, 0.0)
+        base = base + cloud * 0.5 + rng.normal(0, 0.002, base.shape)
+        bands[name] = np.clip(base, 1e-4, None).astype(np.float32)
+    bands["SCL"] = np.where(cloud > 0.3, 9, np.where(cloud > 0.05, 8,
+                            np.where(water > 0.5, 6, 4))).astype(np.float32)
+    bands["dataMask"] = np.ones_like(bands["B02"])
+    return bands
+
+
+def synthesize(evalscript, bbox, crs, w, h, date):
+    """صورة اصطناعية بمخرجات الـ evalscript (أو حقل ناعم إذا تعذّر تقييمه)."""
+    bands = synthetic_bands(bbox, crs, w, h, date)
+    out = evaluate_evalscript(evalscript, bands)
+    if out is None:
+        n = int((re.search(r"bands\s*:\s*(\d+)", evalscript) or [0, 1])[1])
+        out = np.stack([bands["B06"] - bands["B05"]] * n, axis=-1).squeeze()
+    return np.asarray(out, dtype=np.float32)
+
+
+def tiff_bytes(arr) -> bytes:
+    buf = io.BytesIO()
+    tifffile.imwrite(buf, np.asarray(arr, dtype=np.float32))
+    return buf.getvalue()
+
+
+# ───────────────────────────── الخادم ─────────────────────────────
+class StandinState:
+    """إعدادات الخادم وعدّاداته (مشتركة بين كل خيوط الطلبات)."""
+
+    def __init__(self, replay_dir=None, record_dir=None, upstream=None, strict=False,
+                 latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=None):
+        self.replay_dir = replay_dir
+        self.record_dir = record_dir
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.strict = strict
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"token": 0, "catalog": 0, "process": 0, "replayed": 0, "errors": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+
+def record_key(path, body: bytes) -> str:
+    """بصمة الطلب: المسار + جسم JSON بترتيب مفاتيح ثابت."""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha1(path.encode("utf-8") + b"|" + body).hexdigest()
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "khaled-standin/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    @property
+    def state(self) -> StandinState:
+        return self.server.state
+
+    def _send(self, status, body: bytes, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path.split("?")[0]
+        state = self.state
+
+        if state.latency or state.jitter:
+            time.sleep(state.latency + state.random.uniform(0, state.jitter))
+
+        if path == TOKEN_PATH:
+            state.count("token")
+            if state.upstream:
+                return self._proxy(path, body, record=False)
+            return self._json(200, {"access_token": "standin-" + os.urandom(8).hex(),
+                                    "token_type": "Bearer", "expires_in": 3600})
+
+        if path not in (CATALOG_PATH, PROCESS_PATH):
+            return self._json(404, {"error": {"status": 404, "message": f"unknown endpoint {path}"}})
+        state.count("catalog" if path == CATALOG_PATH else "process")
+
+        if state.error_rate and state.random.random() < state.error_rate:
+            state.count("errors")
+            headers = {"Retry-After": "1"} if state.error_status == 429 else None
+            return self._json(state.error_status, {"error": {"status": state.error_status,
+                                                             "reason": "injected", "message": "injected error"}},
+                              headers)
+
+        key = record_key(path, body)
+        if state.replay_dir:
+            meta = os.path.join(state.replay_dir, key + ".json")
+            if os.path.exists(meta):
+                state.count("replayed")
+                with open(meta, encoding="utf-8") as f:
+                    info = json.load(f)
+                with open(os.path.join(state.replay_dir, key + ".bin"), "rb") as f:
+                    return self._send(info["status"], f.read(), info["content_type"])
+            if state.strict:
+                return self._json(404, {"error": {"status": 404, "message": "no recording for request"}})
+
+        if state.upstream:
+            return self._proxy(path, body, record=True, key=key)
+
+        try:
+            request = json.loads(body)
+            if path == CATALOG_PATH:
+                return self._json(200, self._catalog(request))
+            return self._send(200, self._process(request), "image/tiff")
+        except Exception as e:
+            return self._json(400, {"error": {"status": 400, "message": f"{type(e).__name__}: {e}"}})
+
+    # ─── الاستجابات الاصطناعية ───
+    def _catalog(self, request):
+        start, end = (datetime.date.fromisoformat(t[:10]) for t in request["datetime"].split("/"))
+        limit, offset = int(request.get("limit", 100)), int(request.get("next") or 0)
+        dates = scene_dates(start, end)
+        page = dates[offset:offset + limit]
+        features = [{"type": "Feature", "id": f"S2_STANDIN_{d:%Y%m%d}",
+                     "bbox": request.get("bbox"),
+                     "properties": {"datetime": f"{d.isoformat()}T10:00:00Z", "eo:cloud_cover": 10.0}}
+                    for d in page]
+        nxt = offset + limit if offset + limit < len(dates) else None
+        return {"type": "FeatureCollection", "features": features,
+                "context": {"limit": limit, "returned": len(features), **({"next": nxt} if nxt else {})}}
+
+    def _process(self, request):
+        bounds = request["input"]["bounds"]
+        crs = int(bounds.get("properties", {}).get("crs", "4326").rstrip("/").split("/")[-1])
+        time_range = request["input"]["data"][0].get("dataFilter", {}).get("timeRange", {})
+        date = datetime.date.fromisoformat((time_range.get("to") or "2024-01-01")[:10])
+        w, h = int(request["output"]["width"]), int(request["output"]["height"])
+        arr = synthesize(request["evalscript"], bounds["bbox"], crs, w, h, date)
+        if "geometry" in bounds:  # كالخدمة: لا بيانات (0) خارج المضلع المرسل
+            outside = self._outside(bounds, crs, w, h)
+            arr = np.where(outside.reshape(outside.shape + (1,) * (arr.ndim - 2)), np.float32(0), arr)
+        return tiff_bytes(arr)
+
+    @staticmethod
+    def _outside(bounds, crs, w, h):
+        from sentinelhub import BBox, CRS
+        from shapely.geometry import shape
+
+        inside = polygon_mask(geometry_rings(shape(bounds["geometry"])), BBox(bounds["bbox"], CRS(crs)), (w, h))
+        return ~inside
+
+    # ─── الوسيط والتسجيل ───
+    def _proxy(self, path, body, record, key=None):
+        headers = {k: v for k, v in self.headers.items()
+                   if k.lower() in ("authorization", "content-type", "accept")}
+        req = urllib.request.Request(self.state.upstream + path, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=120) as resp:
+                status, payload, ctype = resp.status, resp.read(), resp.headers.get("Content-Type", "")
+        except urllib.error.HTTPError as e:
+            status, payload, ctype = e.code, e.read(), e.headers.get("Content-Type", "")
+        if record and status == 200 and self.state.record_dir:
+            os.makedirs(self.state.record_dir, exist_ok=True)
+            with open(os.path.join(self.state.record_dir, key + ".bin"), "wb") as f:
+                f.write(payload)
+            with open(os.path.join(self.state.record_dir, key + ".json"), "w", encoding="utf-8") as f:
+                json.dump({"path": path, "status": status, "content_type": ctype}, f)
+        return self._send(status, payload, ctype or "application/octet-stream")
+
+
+def make_server(host="127.0.0.1", port=8765, **options) -> ThreadingHTTPServer:
+    """ينشئ الخادم (المنفذ 0 ⇒ منفذ حر)؛ ``options`` تُمرَّر إلى ``StandinState``."""
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.state = StandinState(**options)
+    return server
+
+
+def serve_in_thread(host="127.0.0.1", port=0, **options):
+    """يشغّل الخادم في خيط خلفي ويعيد (الخادم، عنوانه)."""
+    server = make_server(host, port, **options)
+    threading.Thread(target=server.serve_forever, name="khaled-standin", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--replay", dest="replay_dir", help="مجلد الردود المسجّلة")
+    parser.add_argument("--strict", action="store_true", help="404 لكل طلب بلا تسجيل (مع --replay)")
+    parser.add_argument("--record", dest="record_dir", help="مجلد حفظ الردود (مع --upstream)")
+    parser.add_argument("--upstream", help="مثال: https://services.sentinel-hub.com")
+    parser.add_argument("--latency", type=float, default=0.0, help="تأخير ثابت لكل طلب (ث)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="تأخير عشوائي إضافي حتى (ث)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="نسبة الطلبات التي تفشل عمدًا")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int)
+    args = vars(parser.parse_args(argv))
+    host, port = args.pop("host"), args.pop("port")
+    if args["record_dir"] and not args["upstream"]:
+        parser.error("--record يتطلب --upstream")
+
+    server = make_server(host, port, **args)
+    print(f"Sentinel Hub stand-in on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   تخزين مؤقت مُبلَّط: شبكة ثابتة + فهرس مكاني ⇒ جلب المربعات الناقصة فقط   │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sentinelhub import BBox, CRS
+from shapely.geometry import box
+from shapely.prepared import prep
+
+from . import metrics
+from .settings import cache_path
+
+TILE_PX = 512                      # ضلع المربع بالبكسل
+BASE_RES_DEG = 10 / 111_320        # ≈ 10 م عند خط الاستواء (شبكة WGS84)
+BASE_RES_M = 10.0                  # دقة Sentinel-2 الأصلية (شبكة UTM)
+MAX_PX = 2500                      # الحد الأقصى لأبعاد الصورة المجمّعة (كما في اللوحة)
+ORIGIN_X, ORIGIN_Y = -180.0, 90.0  # أصل شبكة WGS84 (أعلى اليسار)
+UTM_ORIGIN_X, UTM_ORIGIN_Y = 0.0, 10_000_000.0  # أصل شبكة UTM: مضاعفات 10 م كبكسلات Sentinel-2
+
+
+# ───────────────────────────── الشبكة ─────────────────────────────
+def grid_spec(crs):
+    """(دقة المستوى 0، أصل س، أصل ص) لشبكة نظام الإسناد: درجات لـ WGS84، أمتار لـ UTM."""
+    if crs == CRS.WGS84:
+        return BASE_RES_DEG, ORIGIN_X, ORIGIN_Y
+    return BASE_RES_M, UTM_ORIGIN_X, UTM_ORIGIN_Y
+
+
+def grid_layer(layer, crs) -> str:
+    """مفتاح الطبقة في المخزن: لكل منطقة UTM شبكتها، فلا تتشارك أرقام المربعات."""
+    return layer if crs == CRS.WGS84 else f"{layer}@{crs.epsg}"
+
+
+def _snap(v):
+    # حدود UTM المحاذاة تقع على مضاعفات الدقة؛ التقريب يمنع بكسلًا زائدًا من خطأ الفاصلة العائمة
+    return round(v, 6)
+
+
+def grid_level(bbox, max_px=MAX_PX) -> int:
+    """أصغر مستوى هرمي (دقة BASE·2^z) تبقى فيه الصورة ضمن ``max_px``."""
+    span = max(bbox.max_x - bbox.min_x, bbox.max_y - bbox.min_y) / grid_spec(bbox.crs)[0]
+    return max(0, math.ceil(math.log2(span / max_px))) if span > max_px else 0
+
+
+def pixel_window(bbox, z):
+    """نافذة البكسلات المحاذية للشبكة التي تغطي الـ bbox: (col0, row0, col1, row1)."""
+    base, ox, oy = grid_spec(bbox.crs)
+    res = base * 2 ** z
+    col0 = math.floor(_snap((bbox.min_x - ox) / res))
+    col1 = math.ceil(_snap((bbox.max_x - ox) / res))
+    row0 = math.floor(_snap((oy - bbox.max_y) / res))
+    row1 = math.ceil(_snap((oy - bbox.min_y) / res))
+    return col0, row0, max(col1, col0 + 1), max(row1, row0 + 1)
+
+
+def window_bbox(window, z, crs=CRS.WGS84) -> BBox:
+    """الـ bbox الدقيق لنافذة بكسلات على شبكة ``crs``."""
+    base, ox, oy = grid_spec(crs)
+    res = base * 2 ** z
+    col0, row0, col1, row1 = window
+    return BBox([ox + col0 * res, oy - row1 * res,
+                 ox + col1 * res, oy - row0 * res], crs)
+
+
+def tile_window(tx, ty):
+    return tx * TILE_PX, ty * TILE_PX, (tx + 1) * TILE_PX, (ty + 1) * TILE_PX
+
+
+def layer_key(label, evalscript, tier) -> str:
+    """مفتاح الطبقة: اسم المؤشر + بصمة الـ evalscript (تغيّر المعادلة يبطل المربعات القديمة)."""
+    digest = hashlib.sha1(f"{tier}|{evalscript}".encode("utf-8")).hexdigest()[:10]
+    return f"{label}-{digest}"
+
+
+# ───────────────────────────── الفهرس والتخزين ─────────────────────────────
+class TileCache:
+    """مربعات محفوظة على القرص مع فهرس مكاني في SQLite لكل (طبقة، تاريخ، مستوى).
+
+    الشبكة منتظمة، فالاستعلام المكاني يصبح مدى أعداد صحيحة على (tx, ty)
+    يخدمه فهرس مركّب مباشرة دون الحاجة إلى R-tree عام.
+    """
+
+    def __init__(self, db_path=None, tile_dir=None, max_workers=8):
+        self.db_path = db_path or cache_path("tiles.sqlite")
+        self.tile_dir = tile_dir or os.path.dirname(cache_path("tiles", "x"))
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tiles (
+                    layer   TEXT NOT NULL,
+                    date    TEXT NOT NULL,
+                    z       INTEGER NOT NULL,
+                    tx      INTEGER NOT NULL,
+                    ty      INTEGER NOT NULL,
+                    path    TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (layer, date, z, tx, ty)
+                )""")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+
+    def cached(self, layer, date, z, tx0, ty0, tx1, ty1) -> set:
+        """المربعات المحفوظة داخل المدى [tx0, tx1] × [ty0, ty1]."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT tx, ty, path FROM tiles WHERE layer=? AND date=? AND z=? "
+                "AND tx BETWEEN ? AND ? AND ty BETWEEN ? AND ?",
+                (layer, date, z, tx0, tx1, ty0, ty1)
+            ).fetchall()
+        return {(tx, ty) for tx, ty, path in rows if os.path.exists(path)}
+
+    def _path(self, layer, date, z, tx, ty):
+        return os.path.join(self.tile_dir, layer, date, str(z), f"{tx}_{ty}.npy")
+
+    def read(self, layer, date, z, tx, ty):
+        return np.load(self._path(layer, date, z, tx, ty))
+
+    def write(self, layer, date, z, tx, ty, tile):
+        path = self._path(layer, date, z, tx, ty)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npy"
+        np.save(tmp, np.asarray(tile, dtype=np.float32))
+        os.replace(tmp, path)
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (layer, date, z, tx, ty, path, time.time()))
+
+    # ───────────────────────────── التجميع ─────────────────────────────
+    def assemble(self, fetch_tile, layer, bbox, date, progress=None, geometry=None, z=None, out=None,
+                 store=None):
+        """يجمع صورة الـ bbox من المربعات المحفوظة ويجلب الناقص فقط.
+
+        ``fetch_tile(tile_bbox, (w, h))`` تعيد مصفوفة المربع من الخدمة.
+        الشبكة شبكة نظام إسناد الـ bbox (``grid_spec``): على UTM تطابق بكسلاتها بكسلات Sentinel-2
+        الأصلية فيتطابق التجميع مع الطلب المباشر بلا إعادة تشكيل.
+        ``geometry`` (اختياري، ``sentinelhub.Geometry``): المربعات التي لا يقطعها
+        لا تُجلب ولا تُقرأ وتبقى NaN؛ التي يقطعها تُجلب كاملة لتبقى مشتركة بين المناطق.
+        ``z`` (اختياري) مستوى الشبكة بدل ``grid_level`` (0 = الدقة الكاملة مهما كبرت المنطقة).
+        ``out`` (اختياري) هدف بأبعاد النافذة يقبل ``out[rows, cols] = tile`` (مثل ``Mosaic``):
+        كل مربع يُكتب فيه فور جلبه أو قراءته ولا يُحتفظ به، فالذاكرة بحجم المربعات الجارية لا الصورة.
+        ``store`` يحفظ المربعات المجلوبة في الذاكرة المؤقتة؛ افتراضيًا لا يُحفظ شيء مع ``out``،
+        فالهدف (الفسيفساء) هو النسخة المخزنة ولا يُخزَّن كل بكسل مرتين.
+        يعيد (المصفوفة أو ``out``، الـ bbox المحاذي للشبكة، الأبعاد (w, h)، عدد المربعات المجلوبة).
+        """
+        crs = bbox.crs
+        layer = grid_layer(layer, crs)
+        z = grid_level(bbox) if z is None else z
+        window = pixel_window(bbox, z)
+        col0, row0, col1, row1 = window
+        tx0, ty0 = col0 // TILE_PX, row0 // TILE_PX
+        tx1, ty1 = (col1 - 1) // TILE_PX, (row1 - 1) // TILE_PX
+
+        wanted = {(tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)}
+        outside = 0
+        if geometry is not None:
+            shape = prep((geometry if geometry.crs == crs else geometry.transform(crs)).geometry)
+            inside = {t for t in wanted if shape.intersects(box(*window_bbox(tile_window(*t), z, crs)))}
+            wanted, outside = inside, len(wanted) - len(inside)
+        with metrics.stage("tile_lookup", tiles=len(wanted), outside=outside):
+            missing = sorted(wanted - self.cached(layer, date, z, tx0, ty0, tx1, ty1))
+
+        run = metrics.current()
+        streaming = out is not None
+        store = not streaming if store is None else store
+        if not streaming:
+            out = np.full((row1 - row0, col1 - col0), np.nan, dtype=np.float32)
+
+        def place(t, tile):
+            c0, r0, c1, r1 = tile_window(*t)
+            ic0, ir0 = max(c0, col0), max(r0, row0)
+            ic1, ir1 = min(c1, col1), min(r1, row1)
+            out[ir0 - row0:ir1 - row0, ic0 - col0:ic1 - col0] = tile[ir0 - r0:ir1 - r0, ic0 - c0:ic1 - c0]
+
+        def fetch(t):
+            with metrics.bind(run):
+                tile = np.asarray(fetch_tile(window_bbox(tile_window(*t), z, crs), (TILE_PX, TILE_PX)),
+                                  dtype=np.float32).squeeze()
+                if store:
+                    with metrics.stage("tile_write", **metrics.array_counters(tile)):
+                        self.write(layer, date, z, *t, tile)
+                if streaming:
+                    place(t, tile)
+                    return None
+            return tile
+
+        fetched = {}
+        if missing:
+            with metrics.stage("tile_fetch", tiles=len(missing)), \
+                    ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as pool:
+                for i, (t, tile) in enumerate(zip(missing, pool.map(fetch, missing)), 1):
+                    fetched[t] = tile
+                    if progress is not None:
+                        progress(i / len(missing))
+
+        with metrics.stage("tile_mosaic", tiles=len(wanted) - len(missing)) as counters:
+            for t in wanted:
+                if t not in fetched:
+                    place(t, self.read(layer, date, z, *t))
+                elif not streaming:
+                    place(t, fetched[t])
+            counters.update(metrics.array_counters(out))
+
+        return out, window_bbox(window, z, crs), (col1 - col0, row1 - row0), len(missing)
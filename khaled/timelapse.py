@@ -0,0 +1,248 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   فيلم زمني: جلب المشاهد ← تلوين متوازٍ (عمليات) ← ترميز متدفق WebP/GIF/MP4 │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+لكل تاريخ مشهد في الفترة يُجلب المؤشر (أو يُعاد من الفهرس/المربعات)، ويُرسل إلى
+مجمع عمليات يلوّنه بمدّ ولوحة ثابتين (فتتقارن الإطارات) ويختمه بالتاريخ، ثم يُمرَّر
+الإطار فور جاهزيته إلى المرمِّز ويُترك. في أي لحظة لا يوجد في الذاكرة إلا نافذة
+صغيرة من الإطارات قيد التلوين، مهما طالت الفترة.
+
+المرمِّزات:
+
+* WebP متحرك: مرمِّز libwebp التزايدي في Pillow (``save_all`` يجمع الإطارات في قائمة أولًا، فهو
+  البديل فقط إن لم يتوفر المرمِّز).
+* GIF: لوحة ألوان ثابتة مشتقة من لوحة المؤشر، وكل إطار يُكتب فور وصوله.
+* MP4: إطارات RGB خام عبر أنبوب إلى ``ffmpeg`` (إن وُجد في PATH أو ``KHALED_FFMPEG``).
+"""
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import types
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from .pipeline import NoScenesError, catalog_dates, data_collection, fetch_scene
+from .quality import select
+from .render import NODATA_RGB, frame_rgb, get_cmap
+
+FORMATS = {"webp": "image/webp", "gif": "image/gif", "mp4": "video/mp4"}
+FFMPEG = os.getenv("KHALED_FFMPEG") or shutil.which("ffmpeg")
+
+
+def available_formats() -> list:
+    return [f for f in FORMATS if f != "mp4" or FFMPEG]
+
+
+# ───────────────────────────── المرمِّزات المتدفقة ─────────────────────────────
+def _anim_encoder(size):
+    """مرمِّز libwebp التزايدي الداخلي في Pillow، أو None إن لم يتوفر بهذا التوقيع."""
+    try:
+        from PIL import _webp
+
+        # (الحجم، الخلفية، التكرار، تقليل الحجم، kmin، kmax، خلط، تفصيل) كما في WebPImagePlugin
+        return _webp.WebPAnimEncoder(size, 0, 0, False, 3, 5, False, False)
+    except (ImportError, AttributeError, TypeError):
+        return None
+
+
+class WebPWriter:
+    """WebP متحرك: كل إطار يُضغط فور إضافته، ويُكتب الملف عند الإغلاق.
+
+    المرمِّز التزايدي ``PIL._webp.WebPAnimEncoder`` داخلي في Pillow (توقيعه مثبت لنطاق
+    الإصدارات في requirements.txt)؛ إن لم يتوفر بهذا التوقيع تُجمع الإطارات وتُكتب بـ
+    ``Image.save(save_all=True)`` العامة، وهي تحوّل ``append_images`` إلى قائمة على أي حال.
+    """
+
+    def __init__(self, fh, size, fps, quality=80):
+        self.fh = fh
+        self.step = 1000 / fps
+        self.quality = quality
+        self.timestamp = 0.0
+        self.enc = _anim_encoder(size)
+        self.frames = [] if self.enc is None else None
+
+    def add(self, rgb):
+        if self.enc is None:
+            self.frames.append(Image.fromarray(rgb))
+            return
+        self.enc.add(Image.fromarray(rgb).getim(), round(self.timestamp), False, self.quality, 100, 4)
+        self.timestamp += self.step
+
+    def close(self):
+        if self.enc is None:
+            first, *rest = self.frames
+            first.save(self.fh, "WEBP", save_all=True, append_images=rest, duration=round(self.step),
+                       loop=0, quality=self.quality, method=4)
+            return
+        self.enc.add(None, round(self.timestamp), False, self.quality, 100, 0)
+        self.fh.write(self.enc.assemble("", "", ""))
+
+
+class GifWriter:
+    """GIF متحرك بلوحة ثابتة (ألوان لوحة المؤشر + لون "بلا قيمة" + أبيض/أسود للختم)."""
+
+    def __init__(self, fh, size, fps, palette_name):
+        self.fh = fh
+        self.duration = round(1000 / fps)
+        colors = (get_cmap(palette_name)(np.linspace(0, 1, 252))[:, :3] * 255).astype(np.uint8)
+        colors = np.vstack([colors, [NODATA_RGB, (0, 0, 0), (255, 255, 255), (128, 128, 128)]])
+        self.palette = Image.new("P", (1, 1))
+        self.palette.putpalette(colors.astype(np.uint8).ravel().tolist())
+        self.started = False
+
+    def add(self, rgb):
+        frame = Image.fromarray(rgb).quantize(palette=self.palette, dither=Image.Dither.NONE)
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(frame, info={"loop": 0, "duration": self.duration})
+            self.fh.write(b"".join(header))
+            self.started = True
+        for chunk in GifImagePlugin.getdata(frame, duration=self.duration):
+            self.fh.write(chunk)
+
+    def close(self):
+        self.fh.write(b";")
+
+
+class Mp4Writer:
+    """MP4 (H.264) عبر ffmpeg: الإطارات تُكتب خامًا في stdin ولا تُخزَّن."""
+
+    def __init__(self, path, size, fps):
+        if not FFMPEG:
+            raise RuntimeError("ffmpeg not found (set KHALED_FFMPEG or add it to PATH)")
+        w, h = size
+        self.proc = subprocess.Popen(
+            [FFMPEG, "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}",
+             "-r", str(fps), "-i", "-", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-c:v", "libx264",
+             "-pix_fmt", "yuv420p", "-movflags", "+faststart", path],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    def add(self, rgb):
+        self.proc.stdin.write(np.ascontiguousarray(rgb).tobytes())
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {self.proc.stderr.read().decode(errors='replace')[-500:]}")
+
+
+def open_writer(fmt, path, size, fps, palette_name):
+    """يعيد (المرمِّز، الملف المفتوح أو None لـ MP4 الذي يكتب بنفسه)."""
+    if fmt == "mp4":
+        return Mp4Writer(path, size, fps), None
+    fh = open(path, "wb")
+    if fmt == "webp":
+        return WebPWriter(fh, size, fps), fh
+    return GifWriter(fh, size, fps, palette_name), fh
+
+
+# ───────────────────────────── التجميع ─────────────────────────────
+_rendezvous = None
+
+
+def _join_rendezvous(barrier):
+    global _rendezvous
+    _rendezvous = barrier
+
+
+def _wait_rendezvous():
+    _rendezvous.wait(timeout=120)
+
+
+@contextmanager
+def render_pool(workers):
+    """مجمع عمليات spawn (لا fork: خادم Streamlit متعدد الخيوط) لا يشغّل السكربت الرئيسي في عماله.
+
+    spawn يستورد ``__main__`` في كل عامل، وتحت Streamlit هو اللوحة نفسها (طابور المهام، خادم
+    الواجهة البرمجية، مجدول المراقبة...). لذا يُبدَّل ``__main__`` بوحدة فارغة لحظة إطلاق العمال.
+    المجمع يطلق العمال عند الطلب (عاملًا لكل مهمة لا تجد عاملًا خاملًا)، فتُرسل ``workers`` مهمة
+    تنتظر حاجزًا واحدًا: لا تكتمل إحداها قبل أن يعمل العمال كلهم، فيُطلقون جميعًا قبل الاستعادة.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                               initializer=_join_rendezvous, initargs=(barrier,))
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        for future in [pool.submit(_wait_rendezvous) for _ in range(workers)]:
+            future.result()
+    except BaseException:
+        pool.shutdown(cancel_futures=True)
+        raise
+    finally:
+        sys.modules["__main__"] = main
+    with pool:
+        yield pool
+
+
+def ordered_frames(pool, jobs, window, fn=frame_rgb):
+    """يرسل ``jobs`` (مولّد معاملات ``fn``) إلى المجمع بنافذة محدودة ويعيد النتائج بالترتيب."""
+    pending = deque()
+    for args in jobs:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def timelapse(config, evalscript, tier, label, bbox, size, time_interval, path, fmt="webp",
+              vmin=0.0, vmax=1.0, gamma=1.0, palette="BloomRamp", quality=False,
+              dates=None, max_cloud=None, fps=4, max_side=1024, max_frames=120, workers=None,
+              index=None, tiles=None, scenes=None, ctx=None, mask_options=None, geometry=None):
+    """يكتب فيلمًا زمنيًا للمؤشر في ``path`` ويعيد ملخصه (التواريخ، عدد الإطارات، الحجم).
+
+    ``dates`` (اختياري) قائمة تواريخ محددة مسبقًا؛ وإلا كل مشاهد الفترة، وإن أُعطي ``max_cloud``
+    (مع فهرس ``scenes``) تُستبعد الأيام التي تزيد نسبة سحبها عنه.
+    تُختار ``max_frames`` إطارًا على الأكثر موزعة بانتظام. ``quality`` يقنّع كل إطار بطبقة جودة
+    مشهده (``quality.select(qa, **mask_options)``)، و``geometry`` (اختياري) يقصّه على المضلع المرسوم.
+    """
+    def step(fraction, message):
+        if ctx is not None:
+            ctx.progress(fraction, message)
+
+    if dates is None:
+        step(0.02, "البحث عن المشاهد المتاحة")
+        if scenes is not None and max_cloud is not None:
+            dates = [d["date"] for d in scenes.calendar(config, data_collection(tier), bbox, time_interval)
+                     if d["cloud"] is None or d["cloud"] <= max_cloud]
+            if not dates:
+                raise NoScenesError(time_interval)
+        else:
+            dates = catalog_dates(config, data_collection(tier), bbox, time_interval, scenes)
+    if len(dates) > max_frames:
+        dates = [dates[i] for i in np.linspace(0, len(dates) - 1, max_frames).round().astype(int)]
+
+    def frame_args():
+        for i, date in enumerate(dates):
+            step(0.05 + 0.9 * i / len(dates), f"إطار {i + 1}/{len(dates)} ({date})")
+            result = fetch_scene(config, evalscript, tier, bbox, size, date, quality,
+                                 index=index, label=label, tiles=tiles, geometry=geometry)
+            keep = None if result["qa"] is None else select(result["qa"], **(mask_options or {}))
+            yield (result["img"], keep, vmin, vmax, gamma, palette, f"{label}  {date}", max_side)
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    writer = fh = None
+    try:
+        with render_pool(workers) as pool:
+            for rgb in ordered_frames(pool, frame_args(), window=2 * workers):
+                if writer is None:
+                    writer, fh = open_writer(fmt, path, (rgb.shape[1], rgb.shape[0]), fps, palette)
+                writer.add(rgb)
+        if writer is None:
+            raise ValueError("no frames to encode")
+        writer.close()
+    finally:
+        if fh is not None:
+            fh.close()
+
+    step(1.0, "اكتمل")
+    return {"path": path, "format": fmt, "mime": FORMATS[fmt], "frames": len(dates), "dates": dates,
+            "bytes": os.path.getsize(path), "warnings": []}
@@ -0,0 +1 @@
+"""واجهة Streamlit: شاشات خفيفة (البداية/الخروج) تُرسم دون استيراد اللوحة، واللوحة نفسها عند أول دخول."""
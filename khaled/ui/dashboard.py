@@ -0,0 +1,937 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   Streamlit | Sentinel-2 Water-Quality Dashboard (Basemaps + BloomRamp)    │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+اللوحة الرئيسية: الشريط الجانبي، الخريطة، الحساب والمهام، العرض والتحليلات.
+
+تُستورد عند أول دخول بعد شاشة البداية (``Geo_Khaled.py``)، فلا تحمّل شاشتا البداية
+والخروج folium ولا sentinelhub. plotly يُستورد عند أول شكل، و matplotlib/cmocean عند
+أول تلوين (``khaled.render``). السجلات الثابتة (الخرائط، اللوحات، أسماء المؤشرات)
+على مستوى الوحدة: تُبنى مرة واحدة لكل عملية، و ``main()`` تُنفَّذ مع كل إعادة تشغيل.
+"""
+import base64
+import datetime
+import math
+import os
+import time
+
+import numpy as np
+import streamlit as st
+import folium
+from folium.plugins import Draw
+from streamlit_folium import st_folium
+
+from khaled import metrics, quality
+from khaled.jobs import job_key, QUEUED, RUNNING, DONE, CANCELLED
+from khaled.pipeline import (
+    fetch_indicator, fetch_mosaic, lookup_indicator, data_collection, CatalogSearchError
+)
+from khaled.results import aoi_hash, row_bbox, summary_stats
+from khaled.raster import Raster, shared_mask
+from khaled.composite import temporal_composite
+from khaled.change import two_date_change
+from khaled.compare import compare_indicators
+from khaled.objects import class_breaks, extract_objects, objects_geojson
+from khaled.georef import value_at, sample_line
+from khaled.indicators import (
+    evalscripts, default_ranges, descriptions, water_masked_indicators, object_indicators, aoi_grid, aoi_geometry,
+    display_names, legend_labels, legend_ticks
+)
+from khaled.timelapse import timelapse, available_formats
+from khaled.settings import export_path
+from khaled.tiles import MAX_PX, grid_level
+from khaled.export import FORMATS as EXPORT_FORMATS
+from khaled.render import (
+    ar, get_cmap, colorize, legend_png, png_bytes
+)
+from khaled.ui import startup
+from khaled.ui.resources import (
+    get_config, get_job_queue, get_results_index, get_tile_cache, get_datacube, get_scene_catalog, get_watch_list,
+    submit_watch_run
+)
+from khaled.ui.screens import rerun_app, show_exit_button
+
+# ───────────────────────────── السجلات الثابتة ─────────────────────────────
+BASEMAPS = {
+    "خريطة Esri العالمية": "https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}",
+    "OpenStreetMap":       "https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+    "خريطة Stamen التضاريسية": "https://stamen-tiles-{s}.a.ssl.fastly.net/terrain/{z}/{y}/{x}.jpg"
+}
+
+PALETTES = ["haline", "viridis", "plasma", "RdYlGn_r",
+            "BloomRamp", "thermal", "algae"]
+
+# ─── وضع التركيب الزمني: أحدث مشهد أو تركيب لكل مشاهد الفترة ───
+COMPOSITE_MODES = {
+    "أحدث مشهد": None,
+    "وسيط الفترة (median)": "median",
+    "أقصى قيمة (max)": "max",
+    "متوسط الفترة (mean)": "mean",
+}
+
+# المؤشرات المقارنة افتراضيًا (الأكثر طلبًا معًا لمشهد واحد)
+COMPARE_DEFAULT = ["Chl_a (mg/m³)", "Turbidity (NTU)", "CDOM (mg/l)", "FAI (VB-FAI)"]
+
+WEEKDAYS_AR = ["الاثنين", "الثلاثاء", "الأربعاء", "الخميس", "الجمعة", "السبت", "الأحد"]
+
+
+def plotly():
+    """(plotly.express، plotly.graph_objects) عند أول شكل فقط."""
+    with startup.importing("plotly"):
+        import plotly.express as px
+        import plotly.graph_objects as go
+    return px, go
+
+
+def last_drawing(drawings, geom_type):
+    """آخر رسم من نوع معيّن (Polygon لمنطقة الاهتمام، LineString للمقطع العرضي)."""
+    found = [d for d in (drawings or []) if d.get("geometry", {}).get("type") == geom_type]
+    return found[-1] if found else None
+
+
+def drawing_bbox_size(drawing):
+    """يحوّل آخر رسم على الخريطة إلى BBox بنظام UTM وأبعاد شبكة بكسلات Sentinel-2 الأصلية (10 م فأكثر، حتى 2500 بكسل)."""
+    coords = drawing["geometry"]["coordinates"][0]
+    return aoi_grid([p[0] for p in coords], [p[1] for p in coords])
+
+
+def drawing_geometry(drawing):
+    """مضلع آخر رسم لقص الطلب عليه، أو None إذا كان مستطيلًا."""
+    return aoi_geometry(drawing["geometry"]["coordinates"][0])
+
+
+def show_result(**values):
+    """يضع نتيجة معروضة جديدة في الجلسة مع رمز متزايد (``img_token``) تُفهرس به ذاكرة الرسم.
+
+    ``id()`` النقطية لا يصلح مفتاحًا: قد يُعاد استخدامه لنقطية جديدة بعد تحرير القديمة.
+    """
+    values["img_token"] = st.session_state["img_token"] + 1
+    st.session_state.update(values)
+
+
+# ───────────────────────────── تقويم المشاهد المتاحة ─────────────────────────────
+def scene_calendar_figure(days, start, end):
+    """تقويم أسبوعي (أعمدة = أسابيع، صفوف = أيام) ملوّن بنسبة السحب في كل مرور."""
+    _, go = plotly()
+    first = start - datetime.timedelta(days=start.weekday())
+    n_weeks = (end - first).days // 7 + 1
+    z = np.full((7, n_weeks), np.nan)
+    text = np.full((7, n_weeks), "", dtype=object)
+    for day in days:
+        d = datetime.date.fromisoformat(day["date"])
+        row, col = d.weekday(), (d - first).days // 7
+        z[row, col] = day["cloud"] if day["cloud"] is not None else 0.0
+        cloud = f"{day['cloud']:.0f}%" if day["cloud"] is not None else "—"
+        text[row, col] = f"{day['date']}<br>☁️ {cloud}<br>{' / '.join(day['tiles']) or ''}"
+    weeks = [str(first + datetime.timedelta(weeks=i)) for i in range(n_weeks)]
+    fig = go.Figure(go.Heatmap(z=z, x=weeks, y=WEEKDAYS_AR, text=text, hoverinfo="text",
+                               colorscale="RdYlGn_r", zmin=0, zmax=100, xgap=2, ygap=2,
+                               colorbar=dict(title="☁️ %", thickness=10)))
+    fig.update_layout(height=230, margin=dict(l=0, r=0, t=10, b=0), yaxis=dict(autorange="reversed"))
+    return fig
+
+
+# ───────────────────────────── المقارنة جنبًا إلى جنب ─────────────────────────────
+def comparison_figure(panels, stretches, gamma, cmap, max_side=800):
+    """لوحات صغيرة (عمودان) بمحاور مرتبطة: التكبير أو التحريك في لوحة يطبَّق على الكل.
+
+    كل لوحة صورة PNG مصغّرة (``max_side``) بإحداثيات بكسل الشبكة الكاملة، فتتطابق المحاور.
+    """
+    from plotly.subplots import make_subplots
+
+    _, go = plotly()
+    cols = min(len(panels), 2)
+    rows = math.ceil(len(panels) / cols)
+    fig = make_subplots(rows=rows, cols=cols, horizontal_spacing=0.02, vertical_spacing=0.08,
+                        subplot_titles=[f"{label} ({stretches[label][0]:.3g} – {stretches[label][1]:.3g})"
+                                        for label in panels])
+    for i, (label, img) in enumerate(panels.items()):
+        lo, hi = stretches[label]
+        rgb = colorize(img, lo, hi, gamma, cmap)
+        stride = max(1, math.ceil(max(rgb.shape[:2]) / max_side))
+        source = "data:image/png;base64," + base64.b64encode(png_bytes(rgb[::stride, ::stride])).decode()
+        fig.add_trace(go.Image(source=source, dx=stride, dy=stride, hoverinfo="skip"),
+                      row=i // cols + 1, col=i % cols + 1)
+    fig.update_xaxes(matches="x", showticklabels=False)
+    fig.update_yaxes(matches="y", showticklabels=False)
+    h, w = next(iter(panels.values())).shape
+    fig.update_layout(height=int(rows * 420 * min(1.5, max(0.5, h / w))) + 40, margin=dict(l=0, r=0, t=30, b=0))
+    return fig
+
+
+def main():
+    """جسم اللوحة لتشغيل واحد للسكربت."""
+    # ======== تهيئة Sentinel Hub والموارد المشتركة (مرة لكل عملية) ========
+    try:
+        config = get_config()
+    except RuntimeError:
+        st.error("❌ بيانات اعتماد Sentinel Hub غير مكتملة!")
+        st.stop()
+    except Exception as e:
+        st.error(f"❌ خطأ في تهيئة الإعدادات: {str(e)}")
+        st.stop()
+
+    jobs, results_index, tile_cache = get_job_queue(), get_results_index(), get_tile_cache()
+    scene_catalog, watch_list, datacube = get_scene_catalog(), get_watch_list(), get_datacube()
+
+    # ───────────────────────────── عناصر التحكم الجانبية ────────────────────────────
+    with st.sidebar:
+        st.header("🗺️ إعدادات العرض")
+
+        basemap_url   = st.selectbox("خريطة الأساس", list(BASEMAPS.keys()))
+        basemap_tiles = BASEMAPS[basemap_url]
+
+        palette_name = st.selectbox("لوحة الألوان", PALETTES, index=0)
+
+        auto_stretch = st.checkbox("قصّ تلقائي (P2–P98)", True)
+        min_thr = st.number_input("القص الأدنى", value=-0.05, step=0.01, format="%.4f")
+        max_thr = st.number_input("القص الأقصى", value=0.05,  step=0.01, format="%.4f")
+        gamma = st.sidebar.slider("Gamma", 0.2, 3.0, 1.0, 0.1)
+
+
+       # شرح معدل ليتناسب مع التصميم الجديد
+        st.caption("""
+        **تفسير القيم:**
+        - **أقصى اليسار (3.00):** تظليل الألوان
+        - **الوسط (1.0):** متوازن (افتراضي)
+        - **أقصى اليمين (0.20):** تفتيح الألوان
+        """)
+
+
+        apply_mask = st.checkbox("🚿 إظهار المياه فقط (MDWI)", value=False, key="mask_toggle")
+        # طبقة الجودة (SCL + MDWI) تُجلب مرة لكل مشهد؛ الأعلام والعتبة تُطبَّق محليًا بلا تنزيل
+        mask_exclude = st.multiselect("☁️ استبعاد من القناع (SCL)", list(quality.SCL_FLAGS),
+                                      default=list(quality.DEFAULT_EXCLUDE), format_func=quality.FLAG_NAMES.get,
+                                      key="mask_exclude", disabled=not apply_mask)
+        water_thr = st.slider("عتبة المياه (MDWI >)", -0.5, 0.5, quality.DEFAULT_WATER_THRESHOLD, 0.01,
+                              key="water_thr", disabled=not apply_mask)
+        mask_options = {"exclude": tuple(mask_exclude), "water_threshold": water_thr}
+        log_chl    = st.checkbox("📈 تحويل لوغاريتمي لـ Chl_a", False)
+
+
+        # ─── محدد نطاق التاريخ ──────────────────────────────
+        st.markdown("📅 **اختر النطاق الزمني**")
+
+        start_date = st.date_input(
+            "تاريخ البداية:",
+            value=datetime.date(2024, 6, 1),
+            min_value=datetime.date(2015, 6, 23),
+            max_value=datetime.date.today(),
+            key="start_date_picker"
+        )
+
+        end_date = st.date_input(
+            "تاريخ النهاية:",
+            value=datetime.date(2024, 6, 25),
+            min_value=start_date,
+            max_value=datetime.date.today(),
+            key="end_date_picker"
+        )
+
+        if start_date > end_date:
+            st.error("⚠️ تاريخ النهاية يجب أن يكون بعد تاريخ البداية")
+            st.stop()
+
+        time_interval = (str(start_date), str(end_date))
+
+        # تقويم المشاهد المتاحة يُملأ بعد رسم منطقة الاهتمام (أسفل الخريطة في ترتيب التنفيذ)
+        scene_calendar_slot = st.container()
+
+        composite_method = COMPOSITE_MODES[st.selectbox(
+            "🧩 التركيب الزمني", list(COMPOSITE_MODES.keys()), index=0,
+            help="التركيب يجمع كل مشاهد الفترة بعد حجب السحب (SCL) لسد فجوات الغيوم"
+        )]
+        mosaic_mode = st.checkbox(
+            "🗺️ فسيفساء بالدقة الكاملة (خارج الذاكرة)", False, key="mosaic_mode",
+            disabled=composite_method is not None,
+            help="10 م مهما كبرت المنطقة: المربعات في ملفات على القرص، والإحصاءات والتلوين والتصدير كتلةً كتلة"
+        )
+
+        # زر الخروج داخل الشريط الجانبي
+        show_exit_button()
+    # ← هنا ينتهى الـ with تلقائيًّا ـــــــــــــــــــــــــــــــــــــــ
+
+    # عناصر الصفحة الرئيسة (خارج الشريط)
+    st.title("منصة تحليل ومراقبة جودة المياه والغطاء النباتي بدقة مكانية 10 م 🌍")
+    st.markdown("---")
+
+
+    selected_indicator_display_name = st.selectbox(
+        "اختر المؤشّر:",
+        list(display_names.values())
+    )
+
+    indicator = next(key for key, value in display_names.items() if value == selected_indicator_display_name)
+
+    # ───────────────────────── Layout (left ↔ right) ───────────────────────────
+    left_col, right_col = st.columns([3, 1])
+
+    # ─────────────────────────── Folium map widget ─────────────────────────────
+    with left_col:
+        # حاوية تجميع الخريطة والزر مع تقليل المسافة بينهما
+        st.markdown('<div class="map-button-group">', unsafe_allow_html=True)
+
+        m = folium.Map(location=[23, 30], zoom_start=6, tiles=None)
+        folium.TileLayer(tiles=basemap_tiles, attr=basemap_url).add_to(m)
+        Draw(draw_options={"rectangle": True},
+                edit_options={"edit": False}).add_to(m)
+        # طبقة الأجسام المستخرجة (ازدهار/بقع) إن وُجدت
+        if st.session_state["objects"] is not None:
+            folium.GeoJson(
+                st.session_state["objects"]["geojson"],
+                name="الأجسام المكتشفة",
+                style_function=lambda _: {"color": "#c10000", "weight": 2, "fillOpacity": 0.25},
+                tooltip=folium.GeoJsonTooltip(fields=["id", "area_km2", "mean", "max"],
+                                              aliases=["#", "المساحة (كم²)", "المتوسط", "الأقصى"])
+            ).add_to(m)
+        aoi = st_folium(m, height=450, width=None, use_container_width=True,
+                        returned_objects=["all_drawings", "last_clicked"])
+
+        # ───────────────────────────── Calculation Button ───────────────────────────
+        calculate_clicked = st.button(
+            "🧮 احسب المؤشر",
+            key="unique_calculate_button",
+            type="primary",
+            use_container_width=True,
+            help="انقر لحساب المؤشر المحدد"
+        )
+
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    scene_pick = None
+    with scene_calendar_slot.expander("🗓️ المشاهد المتاحة", expanded=False):
+        cal_drawing = last_drawing((aoi or {}).get("all_drawings"), "Polygon")
+        if cal_drawing is None:
+            st.caption("ارسم منطقة الاهتمام لعرض مرات المرور المتاحة")
+        else:
+            try:
+                days = scene_catalog.calendar(config, data_collection(evalscripts[indicator][2]),
+                                              drawing_bbox_size(cal_drawing)[0], time_interval)
+            except CatalogSearchError as e:
+                days = []
+                st.error(f"❌ تعذّر البحث عن المشاهد المتاحة: {e}")
+            if days:
+                st.plotly_chart(scene_calendar_figure(days, start_date, end_date), use_container_width=True)
+                max_cloud = st.slider("أقصى نسبة سحب (%)", 0, 100, 100, 5, key="scene_max_cloud")
+                shown = {d["date"]: d for d in reversed(days) if d["cloud"] is None or d["cloud"] <= max_cloud}
+                scene_pick = st.selectbox(
+                    "المشهد المستخدم في الحساب", [None, *shown], key="scene_pick",
+                    format_func=lambda d: "أحدث مشهد في الفترة" if d is None else (
+                        f"{d} · ☁️ {shown[d]['cloud']:.0f}% · {' / '.join(shown[d]['tiles']) or '—'}"
+                        if shown[d]["cloud"] is not None else d)
+                )
+                st.caption(f"{len(days)} مرور في الفترة · {len(shown)} ضمن حد السحب")
+            else:
+                st.caption("لا توجد مرات مرور في هذه الفترة")
+
+    if calculate_clicked:
+        drawing = last_drawing(aoi.get("all_drawings"), "Polygon")
+        if drawing is None:
+            st.warning("✋ الرجاء رسم منطقة الاهتمام أولاً")
+            st.stop()
+
+        bbox, size = drawing_bbox_size(drawing)
+        geometry = drawing_geometry(drawing)
+
+        ev, label, tier = evalscripts[indicator]
+        need_quality = label in water_masked_indicators
+
+        # مشهد محدد من التقويم يحصر الفترة في يومه؛ وإلا فأحدث مشهد في الفترة
+        calc_interval = (scene_pick, scene_pick) if scene_pick else time_interval
+
+        # ─── الفهرس الدائم أولًا: نتيجة محفوظة تُعرض فورًا دون كتالوج أو جلب ───
+        hit = None if composite_method or mosaic_mode else lookup_indicator(
+            results_index, label, tier, bbox, size, calc_interval, need_quality=need_quality,
+            geometry=geometry
+        )
+        if composite_method:
+            key = job_key(kind="composite", method=composite_method, label=label, tier=tier,
+                          aoi=aoi_hash(bbox, geometry), size=size, time_interval=time_interval, mask=mask_options)
+            st.session_state["job_id"] = jobs.submit(
+                key,
+                lambda ctx: temporal_composite(config, ev, tier, label, bbox, size, time_interval,
+                                               method=composite_method,
+                                               water_mask=label in water_masked_indicators,
+                                               tiles=tile_cache, ctx=ctx, scenes=scene_catalog,
+                                               mask_options=mask_options, cube=datacube, geometry=geometry),
+                kind="composite"
+            )
+            st.session_state["job_meta"] = {"label": label}
+        elif mosaic_mode:
+            key = job_key(kind="mosaic", label=label, tier=tier, aoi=aoi_hash(bbox, geometry),
+                          time_interval=calc_interval, mask=need_quality)
+            st.session_state["job_id"] = jobs.submit(
+                key,
+                lambda ctx: fetch_mosaic(config, ev, tier, bbox, calc_interval, need_quality, ctx,
+                                         index=results_index, label=label, tiles=tile_cache,
+                                         scenes=scene_catalog, geometry=geometry),
+                kind="mosaic"
+            )
+            st.session_state["job_meta"] = {"label": label}
+        elif hit is not None:
+            show_result(label=label, bbox=hit["bbox"], size=hit["size"],
+                        img=Raster.pack(hit["img"], hit["qa"], hit["bbox"]),
+                        scene_date=hit["scene_date"], mosaic=None)
+        else:
+            # ─── إرسال الحساب كمهمة خلفية بدل حجز خيط الواجهة ───
+            key = job_key(kind="indicator", label=label, tier=tier, aoi=aoi_hash(bbox, geometry),
+                          size=size, time_interval=calc_interval, mask=need_quality)
+            st.session_state["job_id"] = jobs.submit(
+                key,
+                lambda ctx: fetch_indicator(config, ev, tier, bbox, size, calc_interval, need_quality, ctx,
+                                            index=results_index, label=label, tiles=tile_cache,
+                                            scenes=scene_catalog, geometry=geometry),
+                kind="indicator"
+            )
+            st.session_state["job_meta"] = {"label": label}
+
+    # ───────────────────────────── كشف التغير بين تاريخين ─────────────────────────────
+    with left_col:
+        with st.expander("🔀 كشف التغير بين تاريخين", expanded=False):
+            c1, c2 = st.columns(2)
+            date_a = c1.date_input("التاريخ الأول:", value=start_date, key="change_date_a",
+                                   min_value=datetime.date(2015, 6, 23), max_value=datetime.date.today())
+            date_b = c2.date_input("التاريخ الثاني:", value=end_date, key="change_date_b",
+                                   min_value=datetime.date(2015, 6, 23), max_value=datetime.date.today())
+            st.caption("يُستخدم لكل تاريخ أقرب مشهد في يومه أو قبله.")
+            change_thr = st.number_input("أدنى فرق يُعدّ تغيرًا", value=0.0, min_value=0.0,
+                                         step=0.01, format="%.4f", key="change_thr")
+            change_clicked = st.button("🔀 احسب التغير", key="change_button", use_container_width=True)
+
+    if change_clicked:
+        drawing = last_drawing(aoi.get("all_drawings"), "Polygon")
+        if drawing is None:
+            st.warning("✋ الرجاء رسم منطقة الاهتمام أولاً")
+            st.stop()
+        if date_a >= date_b:
+            st.warning("⚠️ التاريخ الثاني يجب أن يكون بعد التاريخ الأول")
+            st.stop()
+
+        bbox, size = drawing_bbox_size(drawing)
+        geometry = drawing_geometry(drawing)
+        ev, label, tier = evalscripts[indicator]
+        need_quality = label in water_masked_indicators
+        key = job_key(kind="change", label=label, tier=tier, aoi=aoi_hash(bbox, geometry), size=size,
+                      dates=(str(date_a), str(date_b)), threshold=change_thr, mask=mask_options)
+        st.session_state["job_id"] = jobs.submit(
+            key,
+            lambda ctx: two_date_change(config, ev, tier, label, bbox, size, str(date_a), str(date_b),
+                                        need_quality, change_thr, index=results_index, tiles=tile_cache, ctx=ctx,
+                                        scenes=scene_catalog, mask_options=mask_options, geometry=geometry),
+            kind="change"
+        )
+        st.session_state["job_meta"] = {"label": label, "kind": "change"}
+
+    # ───────────────────────────── الفيلم الزمني ─────────────────────────────
+    with left_col:
+        with st.expander("🎞️ فيلم زمني (Time-lapse)", expanded=False):
+            c1, c2, c3 = st.columns(3)
+            tl_format = c1.selectbox("الصيغة", available_formats(), key="tl_format",
+                                     format_func=str.upper)
+            tl_fps = c2.number_input("إطار/ث", value=4, min_value=1, max_value=30, key="tl_fps")
+            tl_cloud = c3.slider("أقصى سحب (%)", 0, 100, 30, 5, key="tl_cloud")
+            st.caption("مدّ ولوحة ثابتان لكل الإطارات: القص اليدوي إن أُلغي القص التلقائي، وإلا المدى الافتراضي للمؤشر.")
+            timelapse_clicked = st.button("🎞️ أنشئ الفيلم", key="tl_button", use_container_width=True)
+
+    if timelapse_clicked:
+        drawing = last_drawing(aoi.get("all_drawings"), "Polygon")
+        if drawing is None:
+            st.warning("✋ الرجاء رسم منطقة الاهتمام أولاً")
+            st.stop()
+
+        bbox, size = drawing_bbox_size(drawing)
+        geometry = drawing_geometry(drawing)
+        ev, label, tier = evalscripts[indicator]
+        need_quality = label in water_masked_indicators and apply_mask
+        vmin, vmax = default_ranges.get(label, (min_thr, max_thr)) if auto_stretch else (min_thr, max_thr)
+        key = job_key(kind="timelapse", label=label, tier=tier, aoi=aoi_hash(bbox, geometry), size=size,
+                      time_interval=time_interval, fmt=tl_format, fps=tl_fps, cloud=tl_cloud,
+                      stretch=(vmin, vmax), gamma=gamma, palette=palette_name,
+                      mask=mask_options if need_quality else None)
+        path = export_path(f"timelapse-{key[:16]}.{tl_format}")
+        st.session_state["job_id"] = jobs.submit(
+            key,
+            lambda ctx: timelapse(config, ev, tier, label, bbox, size, time_interval, path, fmt=tl_format,
+                                  vmin=vmin, vmax=vmax, gamma=gamma, palette=palette_name,
+                                  quality=need_quality, max_cloud=tl_cloud, fps=tl_fps,
+                                  index=results_index, tiles=tile_cache, scenes=scene_catalog, ctx=ctx,
+                                  mask_options=mask_options, geometry=geometry),
+            kind="timelapse"
+        )
+        st.session_state["job_meta"] = {"label": label, "kind": "timelapse"}
+
+    # ───────────────────────────── مقارنة عدة مؤشرات ─────────────────────────────
+    with left_col:
+        with st.expander("🧮 مقارنة عدة مؤشرات لمشهد واحد", expanded=False):
+            compare_keys = st.multiselect("المؤشرات", list(display_names), default=COMPARE_DEFAULT,
+                                          format_func=display_names.get, key="compare_indicators",
+                                          max_selections=6)
+            st.caption("النطاقات تُجلب مرة واحدة لكل مستوى معالجة (L2A/L1C) وتُحسب منها كل المؤشرات "
+                       "وقناع المياه المشترك؛ المشهد هو المختار في التقويم أو أحدث مشهد في الفترة.")
+            compare_clicked = st.button("🧮 قارن", key="compare_button", use_container_width=True,
+                                        disabled=len(compare_keys) < 2)
+
+    if compare_clicked:
+        drawing = last_drawing(aoi.get("all_drawings"), "Polygon")
+        if drawing is None:
+            st.warning("✋ الرجاء رسم منطقة الاهتمام أولاً")
+            st.stop()
+
+        bbox, size = drawing_bbox_size(drawing)
+        geometry = drawing_geometry(drawing)
+        calc_interval = (scene_pick, scene_pick) if scene_pick else time_interval
+        key = job_key(kind="compare", indicators=sorted(compare_keys), aoi=aoi_hash(bbox, geometry), size=size,
+                      time_interval=calc_interval)
+        st.session_state["job_id"] = jobs.submit(
+            key,
+            lambda ctx: compare_indicators(config, compare_keys, bbox, size, calc_interval,
+                                           index=results_index, scenes=scene_catalog, ctx=ctx,
+                                           geometry=geometry),
+            kind="compare"
+        )
+        st.session_state["job_meta"] = {"kind": "compare"}
+
+    # ───────────────────────────── متابعة المهمة الجارية ─────────────────────────────
+    if st.session_state["job_id"] is not None:
+        job = jobs.status(st.session_state["job_id"])
+        status = job["status"] if job else CANCELLED
+
+        if status in (QUEUED, RUNNING):
+            with left_col:
+                st.progress(job["progress"], text=job["message"] or "⏳ في انتظار دورك في الطابور...")
+                if st.button("⛔ إلغاء الحساب", key="cancel_job"):
+                    jobs.cancel(st.session_state["job_id"])
+                    st.session_state["job_id"] = None
+                    rerun_app()
+        else:
+            st.session_state["job_id"] = None
+            result = jobs.result(job["id"]) if status == DONE else None
+            if result is not None:
+                st.session_state["job_metrics"] = result.get("metrics")
+            meta = dict(st.session_state["job_meta"] or {})
+            kind = meta.pop("kind", None)
+            if result is not None and kind == "change":
+                st.session_state["change"] = {**result, "label": meta["label"]}
+                for w in result["warnings"]:
+                    st.warning(w)
+            elif result is not None and kind == "timelapse":
+                st.session_state["timelapse"] = {**result, "label": meta["label"]}
+            elif result is not None and kind == "compare":
+                st.session_state["compare"] = {
+                    "scene_date": result["scene_date"], "requests": result["requests"], "render": None,
+                    "rasters": {label: Raster.pack(img, result["qa"], result["bbox"])
+                                for label, img in result["images"].items()}
+                }
+                for w in result["warnings"]:
+                    st.warning(w)
+            elif result is not None and kind == "watchlist":
+                st.success(f"📌 قائمة المراقبة: {result['scenes']} مشهد جديد، {len(result['alerts'])} تنبيه")
+                for f in result["failed"]:
+                    st.warning(f"⚠️ {f['watch']} · {f['label']} · {f['scene_date']}: {f['error']}")
+                for w in result["warnings"]:
+                    st.warning(w)
+            elif result is not None:
+                img = result["img"]
+                show_result(**meta, img=img if isinstance(img, Raster) else
+                            Raster.pack(img, result["qa"], result["bbox"]),
+                            mosaic=result.get("mosaic"), scene_date=result["scene_date"],
+                            bbox=result["bbox"], size=result["size"])
+                for w in result["warnings"]:
+                    st.warning(w)
+            elif status == DONE:
+                st.warning("⚠️ انتهت صلاحية نتيجة المهمة، أعد الحساب.")
+            elif job and job["error"]:
+                if job["error"].startswith("NoScenesError"):
+                    st.warning("⚠️ لا توجد مرئيات متاحة في هذا النطاق الزمني. جرّب تواريخ أخرى.")
+                elif job["error"].startswith("CatalogSearchError"):
+                    st.error(f"❌ تعذّر البحث عن التواريخ المتاحة: {job['error']}")
+                else:
+                    st.error(f"❌ {job['error']}")
+
+    # ─────────────────────────── Display (left_col) ────────────────────────────
+    if st.session_state["img"] is not None:
+        render_run = metrics.RunMetrics("render", label=st.session_state["label"])
+        with left_col, metrics.bind(render_run):
+            # ─── الرسم يُعاد حسابه فقط إذا تغيّرت الصورة أو إعدادات العرض ───
+            # (النقر على الخريطة لقراءة بكسل أو رسم مقطع لا يعيد التلوين ولا ترميز Plotly)
+            render_key = (st.session_state["img_token"],
+                          st.session_state["label"], log_chl, apply_mask, auto_stretch,
+                          min_thr, max_thr, palette_name, gamma, tuple(mask_options.items()))
+            render = st.session_state["render_cache"]
+            if render is None or render["key"] != render_key:
+                # النقطية المضغوطة: log والقناع يطبَّقان على جدول القيم والأقنعة البتية دون نسخ float
+                # (والفسيفساء، إن وُجدت، كذلك: إحصاءاتها وتلوينها كتلةً كتلة من الملفات)
+                img, mosaic = st.session_state["img"], st.session_state["mosaic"]
+
+                if st.session_state["label"] == "Chl_a" and log_chl:
+                    img = img.mapped(np.log1p)
+                    mosaic = mosaic and mosaic.mapped(np.log1p)
+
+                if apply_mask and st.session_state["label"] in water_masked_indicators and img.has("water"):
+                    img = img.quality(**mask_options)
+                    mosaic = mosaic and mosaic.quality(**mask_options)
+
+                source = img if mosaic is None else mosaic
+                with metrics.stage("percentile_stretch", **metrics.array_counters(source)):
+                    stats = summary_stats(source)
+                real_min, real_max = (np.nan, np.nan) if stats["min"] is None else (stats["min"], stats["max"])
+
+                if auto_stretch and stats["p2"] is not None:
+                    min_thr, max_thr = stats["p2"], stats["p98"]
+                else:
+                    if (min_thr == -0.05 and max_thr == 0.05
+                                and st.session_state["label"] in default_ranges):
+                        min_thr, max_thr = default_ranges[st.session_state["label"]]
+                if max_thr - min_thr < 1e-6:
+                    max_thr += 1e-6
+
+                # اختيار لوحة الألوان
+                cmap = get_cmap(palette_name)
+                with metrics.stage("colorize") as counters:
+                    rgb = colorize(img, min_thr, max_thr, gamma, cmap) if mosaic is None else \
+                        mosaic.colorize(min_thr, max_thr, gamma, cmap, max_side=MAX_PX)
+                    counters.update(metrics.array_counters(rgb))
+
+                # عرض الصورة باستخدام plotly
+                px, _ = plotly()
+                with metrics.stage("plotly_figure"):
+                    fig = px.imshow(rgb, origin="upper")
+                    fig.update_xaxes(showticklabels=False)
+                    fig.update_yaxes(showticklabels=False)
+                    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+
+                render = {"key": render_key, "values": img, "rgb": rgb, "fig": fig,
+                          "min_thr": min_thr, "max_thr": max_thr,
+                          "real_min": real_min, "real_max": real_max}
+                st.session_state["render_cache"] = render
+
+            img, rgb = render["values"], render["rgb"]
+            min_thr, max_thr = render["min_thr"], render["max_thr"]
+            cmap = get_cmap(palette_name)
+            st.sidebar.markdown(f"**min / max قبل القصّ:** {render['real_min']:.3f} – {render['real_max']:.3f}")
+            with metrics.stage("plotly_encode"):
+                st.plotly_chart(render["fig"], use_container_width=True)
+
+            scene_date = st.session_state.get("scene_date", "")
+            st.sidebar.markdown(f"**📅 تاريخ المشهد:** {scene_date}")
+
+            # تحسين عرض caption للصورة الرئيسية
+            caption_text = (
+                f"🖼️ مؤشر {display_names.get(indicator, st.session_state['label'])} "
+                f"(تاريخ {scene_date})\nالمدى المعروض: {min_thr:.3f} – {max_thr:.3f}"
+            )
+            st.image(rgb, caption=caption_text, use_container_width=True)
+
+            legend_key = (st.session_state["label"], palette_name)
+            legend = st.session_state["legend_cache"]
+            if legend is None or legend["key"] != legend_key:
+                legend = {"key": legend_key, "text": None, "num": None}
+
+                labels_text = legend_labels.get(st.session_state["label"], ["منخفض", "متوسط", "مرتفع"])
+                labels_text = [ar(t) for t in labels_text]
+                with metrics.stage("legend_render") as counters:
+                    legend["text"] = legend_png(labels_text, cmap)
+                    counters["bytes"] = len(legend["text"])
+
+                # ─── مفتاح التدرّج الرقمي (3 قيم) ───
+                if st.session_state["label"] in legend_ticks:
+                    legend["num"] = legend_png(
+                        legend_ticks[st.session_state["label"]], cmap,
+                        figsize=(8, 0.5), fontsize=12, dpi=None, pad_inches=0,
+                        frame=False, tight_pad=None
+                    )
+
+                st.session_state["legend_cache"] = legend
+
+            st.markdown(f"<p class='gradient-title'>🔎  التفسير النصي والرقمي للتدرج اللوني للانعكاسات الطيفية</p>",
+                unsafe_allow_html=True)
+            st.image(legend["text"], use_container_width=True)
+            if legend["num"] is not None:
+                st.image(legend["num"], use_container_width=True)
+
+            # ─── قراءة البكسل والمقطع العرضي من المصفوفة المخزنة (دون إعادة جلب) ───
+            geo = (st.session_state["bbox"], st.session_state["size"])
+            clicked = (aoi or {}).get("last_clicked")
+            if clicked:
+                val = value_at(img, *geo, clicked["lng"], clicked["lat"])
+                if val is None:
+                    st.caption(f"📍 ({clicked['lat']:.5f}, {clicked['lng']:.5f}) خارج حدود الصورة المحسوبة")
+                else:
+                    st.info(f"📍 القيمة عند ({clicked['lat']:.5f}, {clicked['lng']:.5f}): "
+                            f"{'لا توجد (مقنّعة)' if np.isnan(val) else f'{val:.4f}'}")
+
+                # سلسلة البكسل الزمنية من مكعب النطاقات (مشاهد التركيبات السابقة) دون أي جلب
+                series_source = next(((e, t) for e, lb, t in evalscripts.values() if lb == st.session_state["label"]),
+                                     None)
+                if datacube is not None and series_source is not None:
+                    with metrics.stage("pixel_series"):
+                        dates, values = datacube.indicator_series(
+                            *series_source, geo[0].crs, grid_level(geo[0]), clicked["lng"], clicked["lat"],
+                            *time_interval
+                        )
+                    if len(dates) > 1:
+                        px, _ = plotly()
+                        series = px.line(x=dates, y=values, markers=True,
+                                         labels={"x": "التاريخ", "y": st.session_state["label"]})
+                        series.update_layout(margin=dict(l=0, r=0, t=30, b=0), title="🕒 السلسلة الزمنية للبكسل")
+                        st.plotly_chart(series, use_container_width=True)
+
+            line = last_drawing((aoi or {}).get("all_drawings"), "LineString")
+            if line is not None:
+                dist, values, _, _ = sample_line(img, *geo, line["geometry"]["coordinates"])
+                if np.isfinite(values).any():
+                    px, _ = plotly()
+                    prof = px.line(x=dist, y=values, labels={"x": "المسافة (كم)", "y": st.session_state["label"]})
+                    prof.update_layout(margin=dict(l=0, r=0, t=30, b=0), title="📈 المقطع العرضي")
+                    st.plotly_chart(prof, use_container_width=True)
+                else:
+                    st.caption("📈 المقطع العرضي المرسوم لا يمر بقيم صالحة في الصورة الحالية")
+
+            # ─── استخراج الأجسام بالمكونات المتصلة (FAI / Cya / OSI) ───
+            if st.session_state["label"] in object_indicators:
+                breaks = [b for b in class_breaks(descriptions[st.session_state["label"]]) if np.isfinite(b[0])]
+                with st.expander("🎯 استخراج الأجسام (ازدهار / بقع نفطية)", expanded=False):
+                    cls = st.selectbox("أدنى فئة تُعدّ جسمًا", breaks, index=max(len(breaks) - 2, 0),
+                                       format_func=lambda b: f"≥ {b[0]:g} — {b[1]}", key="object_class")
+                    min_px = st.number_input("أصغر جسم (بكسل)", value=4, min_value=1, step=1, key="object_min_px")
+                    if st.button("🎯 استخراج", key="extract_objects"):
+                        raster = st.session_state["img"]
+                        det = np.asarray(raster.quality(**mask_options) if raster.has("water") else raster)
+                        objs, summary = extract_objects(det, cls[0], st.session_state["bbox"],
+                                                        st.session_state["size"], min_pixels=int(min_px))
+                        st.session_state["objects"] = {
+                            "scene": (st.session_state["label"], scene_date),
+                            "summary": summary, "geojson": objects_geojson(objs),
+                            "table": [{"#": o["id"], "المساحة (كم²)": round(o["area_km2"], 4),
+                                       "المتوسط": round(o["mean"], 4), "الأقصى": round(o["max"], 4),
+                                       "خط الطول": round(o["centroid"][0], 5),
+                                       "خط العرض": round(o["centroid"][1], 5)} for o in objs]
+                        }
+                        rerun_app()
+
+                    found = st.session_state["objects"]
+                    if found is not None and found["scene"] == (st.session_state["label"], scene_date):
+                        summary = found["summary"]
+                        if summary["count"]:
+                            top = found["table"][0]
+                            st.success(f"{summary['count']} جسم، بمساحة إجمالية {summary['total_km2']:.2f} كم²؛ "
+                                       f"الأكبر عند ({top['خط العرض']}, {top['خط الطول']})")
+                            st.dataframe(found["table"], use_container_width=True, hide_index=True)
+                        else:
+                            st.info("لا توجد أجسام فوق العتبة المختارة.")
+
+            # ─── تصدير القيم الخام (float32 بإسناد جغرافي، والقناع نطاقًا ثانيًا) ───
+            with st.expander("💾 تصدير القيم (COG / NetCDF)", expanded=False):
+                has_mask = st.session_state["img"].has("water")
+                export_fmt = st.radio("الصيغة", list(EXPORT_FORMATS), horizontal=True, key="export_format",
+                                      format_func={"cog": "Cloud-Optimized GeoTIFF", "netcdf": "NetCDF (CF)"}.get)
+                export_mask = st.checkbox("تضمين قناع المياه", value=has_mask, disabled=not has_mask, key="export_mask")
+                export_scene = (st.session_state["label"], scene_date, aoi_hash(st.session_state["bbox"]))
+                if st.button("💾 تصدير", key="export_button"):
+                    ext, mime, writer = EXPORT_FORMATS[export_fmt]
+                    # الفسيفساء تُصدَّر بدقتها الكاملة (نوافذ تُقرأ من الملفات)، لا نظرتها المصغّرة
+                    source = st.session_state["mosaic"] or st.session_state["img"]
+                    bands = {st.session_state["label"]: source}
+                    if export_mask and has_mask:
+                        bands["water"] = source.band("water")
+                    path = export_path(f"{st.session_state['label']}_{scene_date}_{export_scene[2][:8]}{ext}")
+                    with metrics.stage(f"export_{export_fmt}", **metrics.array_counters(source)):
+                        writer(path, bands, source.bbox,
+                               {"indicator": st.session_state["label"], "scene_date": scene_date})
+                    st.session_state["export"] = {"path": path, "mime": mime, "scene": export_scene}
+
+                exported = st.session_state["export"]
+                if exported is not None and exported["scene"] == export_scene:
+                    st.caption(f"📁 {exported['path']}")
+                    with open(exported["path"], "rb") as fh:
+                        st.download_button(f"⬇️ تنزيل ({os.path.getsize(exported['path']) / 2**20:.1f} MB)", fh,
+                                           file_name=os.path.basename(exported["path"]),
+                                           mime=exported["mime"], key="export_download")
+
+        # سجل العرض يُرسل فقط عند إعادة الحساب الفعلية (لا عند كل إعادة تشغيل للصفحة)
+        if any(s["stage"] != "plotly_encode" for s in render_run.stages):
+            record = render_run.record()
+            metrics.emit(record)
+            st.session_state["render_metrics"] = record
+
+    # ─────────────────────────── زمن المراحل ────────────────────────────
+    # تقرير البدء (الاستيرادات الكسولة وأول رسم لكل شاشة) مشترك بين جلسات العملية
+    startup_report = startup.report()
+    if st.session_state["job_metrics"] or st.session_state["render_metrics"] or startup_report:
+        with st.sidebar.expander("⏱️ زمن مراحل آخر تشغيل"):
+            for title, record in (("الحساب", st.session_state["job_metrics"]),
+                                  ("العرض", st.session_state["render_metrics"]),
+                                  ("بدء التشغيل", startup_report)):
+                if record:
+                    st.markdown(f"**{title}:** {record['total_s']:.2f} ث")
+                    st.dataframe([{"المرحلة": s["stage"], "الزمن (ث)": round(s["seconds"], 3),
+                                   "MB": round(s.get("bytes", 0) / 2**20, 2), "بكسل": s.get("pixels", 0)}
+                                  for s in record["stages"]],
+                                 use_container_width=True, hide_index=True)
+
+    # ─────────────────────────── عرض كشف التغير ────────────────────────────
+    if st.session_state["change"] is not None:
+        with left_col:
+            ch = st.session_state["change"]
+            st.markdown(f"### 🔀 التغير في {ch['label']}: {ch['dates'][0]} ← {ch['dates'][1]}")
+            stats = ch["stats"]
+            m1, m2, m3 = st.columns(3)
+            m1.metric("مساحة الزيادة (كم²)", f"{stats['increase_km2']:.3f}")
+            m2.metric("مساحة النقص (كم²)", f"{stats['decrease_km2']:.3f}")
+            m3.metric("متوسط الفرق", f"{stats['mean_diff']:.4f}")
+
+            # لوحة متباعدة (diverging) متماثلة حول الصفر
+            div_cmap = get_cmap("balance")
+            diff = ch["diff"]
+            if np.isfinite(diff).any():
+                lim = float(np.nanpercentile(np.abs(diff), 98)) or 1e-6
+                st.image(colorize(diff, -lim, lim, 1.0, div_cmap), use_container_width=True,
+                         caption=f"الفرق (الثاني − الأول)، المدى ±{lim:.3f}")
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    log_ratio = np.log2(ch["ratio"])
+                if np.isfinite(log_ratio).any():
+                    rlim = float(np.nanpercentile(np.abs(log_ratio[np.isfinite(log_ratio)]), 98)) or 1e-6
+                    st.image(colorize(log_ratio, -rlim, rlim, 1.0, div_cmap), use_container_width=True,
+                             caption=f"النسبة (الثاني ÷ الأول) بمقياس log2، المدى ±{rlim:.2f}")
+            else:
+                st.warning("⚠️ لا توجد بكسلات صالحة مشتركة بين التاريخين.")
+            if st.button("✖️ إغلاق عرض التغير", key="close_change"):
+                st.session_state["change"] = None
+                rerun_app()
+
+    # ─────────────────────────── عرض الفيلم الزمني ────────────────────────────
+    if st.session_state["timelapse"] is not None:
+        with left_col:
+            tl = st.session_state["timelapse"]
+            st.markdown(f"### 🎞️ {tl['label']}: {tl['frames']} إطار ({tl['dates'][0]} ← {tl['dates'][-1]})")
+            if tl["format"] == "mp4":
+                st.video(tl["path"])
+            else:
+                st.image(tl["path"], use_container_width=True)
+            with open(tl["path"], "rb") as fh:
+                st.download_button(f"⬇️ تنزيل {tl['format'].upper()} ({tl['bytes'] / 2**20:.1f} MB)", fh,
+                                   file_name=f"{tl['label']}_{tl['dates'][0]}_{tl['dates'][-1]}.{tl['format']}",
+                                   mime=tl["mime"], key="tl_download")
+            if st.button("✖️ إغلاق الفيلم", key="close_timelapse"):
+                st.session_state["timelapse"] = None
+                rerun_app()
+
+    # ─────────────────────────── عرض المقارنة ────────────────────────────
+    if st.session_state["compare"] is not None:
+        with left_col:
+            cmp = st.session_state["compare"]
+            rasters = cmp["rasters"]
+            st.markdown(f"### 🧮 {len(rasters)} مؤشرات · مشهد {cmp['scene_date']} · "
+                        f"{cmp['requests']} طلب نطاقات")
+            compare_key = (log_chl, apply_mask, auto_stretch, min_thr, max_thr, palette_name, gamma,
+                           tuple(mask_options.items()))
+            if cmp["render"] is None or cmp["render"]["key"] != compare_key:
+                labels = list(rasters)
+                masked = [r.quality(**mask_options) if apply_mask and r.has("water") else r for r in rasters.values()]
+                panels = dict(zip(labels, shared_mask(masked)))
+                if "Chl_a" in panels and log_chl:
+                    panels["Chl_a"] = panels["Chl_a"].mapped(np.log1p)
+
+                stretches, table = {}, []
+                with metrics.stage("percentile_stretch"):
+                    for label, img in panels.items():
+                        stats = summary_stats(img)
+                        if auto_stretch and stats["p2"] is not None:
+                            lo, hi = stats["p2"], stats["p98"]
+                        else:
+                            lo, hi = default_ranges.get(label, (min_thr, max_thr))
+                        stretches[label] = (lo, max(hi, lo + 1e-6))
+                        table.append({"المؤشر": label, "المتوسط": stats["mean"], "p2": stats["p2"],
+                                      "p98": stats["p98"], "بكسل صالح": stats["valid_px"]})
+                with metrics.stage("plotly_figure"):
+                    fig = comparison_figure(panels, stretches, gamma, get_cmap(palette_name))
+                cmp["render"] = {"key": compare_key, "fig": fig, "table": table}
+
+            st.plotly_chart(cmp["render"]["fig"], use_container_width=True)
+            st.caption("قناع مشترك: كل لوحة تعرض البكسلات الصالحة في جميع المؤشرات"
+                       + (" وضمن قناع الجودة (مياه، بلا الأعلام المستبعدة)" if apply_mask else "") + ". التكبير متزامن بين اللوحات.")
+            st.dataframe(cmp["render"]["table"], use_container_width=True, hide_index=True)
+            if st.button("✖️ إغلاق المقارنة", key="close_compare"):
+                st.session_state["compare"] = None
+                rerun_app()
+
+    # ───────────────────── شرح المؤشّر (right_col) ────────────────────────────
+    with right_col:
+        if st.session_state.get("label"):
+            with st.expander("📘 شرح المؤشّر", expanded=True):
+                st.markdown(
+                    descriptions.get(
+                        st.session_state["label"],
+                        "لا يوجد وصف متوفر لهذا المؤشر"
+                    )
+                )
+
+        # ─── النتائج السابقة لهذه المنطقة (من الفهرس الدائم) ───
+        drawing = last_drawing((aoi or {}).get("all_drawings"), "Polygon")
+        if drawing is not None:
+            history = results_index.history(aoi_hash(drawing_bbox_size(drawing)[0], drawing_geometry(drawing)))
+            if history:
+                with st.expander("🗂️ نتائج سابقة لهذه المنطقة", expanded=False):
+                    for row in history:
+                        mean = f"{row['mean']:.3f}" if row["mean"] is not None else "—"
+                        st.markdown(f"**{row['label']}** · {row['scene_date']} · المتوسط {mean}")
+                        if st.button("عرض", key=f"hist_{row['label']}_{row['scene_date']}_{row['resolution']}"):
+                            img, qa = results_index.load(row)
+                            show_result(label=row["label"], img=Raster.pack(img, qa, row_bbox(row)),
+                                        scene_date=row["scene_date"], bbox=row_bbox(row),
+                                        size=(img.shape[1], img.shape[0]), mosaic=None)
+                            rerun_app()
+
+        # ─── قائمة المراقبة: إضافة المنطقة المرسومة، السلاسل الزمنية، التنبيهات ───
+        with st.expander("📌 قائمة المراقبة", expanded=False):
+            if drawing is not None:
+                watch_name = st.text_input("اسم المنطقة", key="watch_name")
+                watch_keys = st.multiselect("المؤشرات", list(display_names), default=[indicator],
+                                            format_func=display_names.get, key="watch_indicators")
+                watch_start = st.date_input("بداية السلسلة", value=start_date, key="watch_start",
+                                            min_value=datetime.date(2015, 6, 23), max_value=datetime.date.today())
+                if st.button("➕ أضف المنطقة المرسومة", key="watch_add", disabled=not (watch_name and watch_keys)):
+                    try:
+                        watch_list.add(watch_name, *drawing_bbox_size(drawing), watch_keys, watch_start,
+                                       geometry=drawing_geometry(drawing))
+                        st.success(f"✅ أُضيفت «{watch_name}»")
+                    except ValueError:
+                        st.warning("⚠️ توجد منطقة بهذا الاسم")
+
+            watches = {w["id"]: w for w in watch_list.watches()}
+            if watches:
+                if st.button("🔄 تحديث كل المناطق الآن", key="watch_run", use_container_width=True):
+                    st.session_state["job_id"] = submit_watch_run(config, jobs, watch_list, tile_cache, scene_catalog)
+                    st.session_state["job_meta"] = {"kind": "watchlist"}
+                    rerun_app()
+                watch = watches[st.selectbox("المنطقة", list(watches), format_func=lambda i: watches[i]["name"],
+                                             key="watch_pick")]
+                watch_key = st.selectbox("مؤشر السلسلة", watch["indicators"], key="watch_pick_indicator")
+                watch_label = evalscripts[watch_key][1]
+                series = watch_list.series(watch["id"], watch_label)
+                if series:
+                    px, _ = plotly()
+                    fig_ts = px.line(x=[r["scene_date"] for r in series],
+                                     y=[[r["mean"] for r in series], [r["p98"] for r in series]],
+                                     markers=True, labels={"x": "تاريخ المشهد", "value": watch_label})
+                    for trace, name in zip(fig_ts.data, ("المتوسط", "p98")):
+                        trace.name = name
+                    if watch["thresholds"].get(watch_label) is not None:
+                        fig_ts.add_hline(y=watch["thresholds"][watch_label], line_dash="dash", line_color="#c10000")
+                    fig_ts.update_layout(margin=dict(l=0, r=0, t=10, b=0), legend_title_text="")
+                    st.plotly_chart(fig_ts, use_container_width=True)
+                    st.caption(f"آخر مشهد معالج: {watch_list.last_date(watch['id'], watch_label)} · "
+                               f"{len(series)} مشهد · آخر فئة: {series[-1]['class'] or '—'}")
+                else:
+                    st.caption("لم تُعالج مشاهد بعد؛ شغّل التحديث.")
+                for a in watch_list.alerts(watch["id"], limit=10):
+                    st.markdown(f"🚨 **{a['label']}** · {a['scene_date']} · p98 = {a['value']:.3f} "
+                                f"(≥ {a['threshold']:g}) · {a['class'] or ''}")
+                if st.button("🗑️ حذف المنطقة", key="watch_remove"):
+                    watch_list.remove(watch["id"])
+                    rerun_app()
+
+    # ─────────────── إعادة التشغيل الدورية أثناء انتظار المهمة الخلفية ───────────────
+    if st.session_state["job_id"] is not None:
+        time.sleep(1)
+        rerun_app()
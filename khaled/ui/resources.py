@@ -0,0 +1,97 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   موارد العملية المشتركة بين كل الجلسات: الإعداد، الطابور، الفهارس، الخدمات │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+كل مورد يُنشأ مرة واحدة لكل عملية خادم (``st.cache_resource``) عند أول طلب له،
+لا مع كل إعادة تشغيل للسكربت ولا في شاشة البداية.
+"""
+import os
+
+import streamlit as st
+
+from khaled import api
+from khaled.datacube import DataCube
+from khaled.jobs import JobQueue, job_key
+from khaled.results import ResultsIndex
+from khaled.scenes import SceneCatalog
+from khaled.settings import sh_config
+from khaled.tiles import TileCache
+from khaled.watchlist import WatchList, Scheduler, run as run_watch_list
+
+
+# ======== تهيئة Sentinel Hub (متغيرات البيئة، والخادم البديل إن حُدّد) ========
+@st.cache_resource
+def get_config():
+    """الاستثناء لا يُخزَّن: إعداد ناقص يُعاد فحصه في التشغيل التالي."""
+    return sh_config()
+
+
+# ======== طابور المهام الخلفية (مشترك بين كل الجلسات) ========
+@st.cache_resource
+def get_job_queue():
+    """طابور واحد لكل عملية خادم حتى تُدمج الحسابات المتطابقة بين المستخدمين."""
+    return JobQueue(max_workers=int(os.getenv("KHALED_JOB_WORKERS", "4")))
+
+
+# ======== فهرس النتائج الدائم (يبقى بعد إعادة تشغيل الخادم) ========
+@st.cache_resource
+def get_results_index():
+    return ResultsIndex()
+
+
+# ======== مربعات الشبكة المخزنة (المناطق المتداخلة تجلب الجزء الناقص فقط) ========
+@st.cache_resource
+def get_tile_cache():
+    return TileCache()
+
+
+# ======== مكعب النطاقات المحلي (اختياري: KHALED_DATACUBE=1) للتركيب الزمني وسلاسل البكسل ========
+@st.cache_resource
+def get_datacube():
+    return DataCube() if os.getenv("KHALED_DATACUBE", "0") == "1" else None
+
+
+# ======== فهرس توفر المشاهد (نتائج الكتالوج مخزنة شهريًا لكل خلية شبكة) ========
+@st.cache_resource
+def get_scene_catalog():
+    return SceneCatalog()
+
+
+# ======== واجهة HTTP للمؤشرات (اختيارية) داخل عملية اللوحة وبمواردها نفسها ========
+@st.cache_resource
+def get_api_server(port):
+    services = api.Services(get_config(), get_job_queue(), get_results_index(), get_tile_cache(),
+                            get_scene_catalog())
+    return api.serve_in_thread(services, host=os.getenv("KHALED_API_HOST", "127.0.0.1"),
+                               port=port, token=os.getenv("KHALED_API_TOKEN"))
+
+
+# ======== قائمة المراقبة: مناطق محفوظة تُحدَّث تزايديًا عبر الطابور المشترك ========
+@st.cache_resource
+def get_watch_list():
+    return WatchList()
+
+
+def submit_watch_run(config, jobs, watch_list, tile_cache, scene_catalog):
+    """تشغيل المجدول كمهمة؛ التشغيل اليدوي والمجدول يُدمجان إذا تزامنا."""
+    return jobs.submit(job_key(kind="watchlist"),
+                       lambda ctx: run_watch_list(config, watch_list, tiles=tile_cache, ctx=ctx,
+                                                  scenes=scene_catalog),
+                       kind="watchlist")
+
+
+@st.cache_resource
+def get_watch_scheduler(hours):
+    # الموارد تُمرَّر مسبقًا: خيط المجدول يعمل خارج أي تشغيل للسكربت
+    resources = (get_config(), get_job_queue(), get_watch_list(), get_tile_cache(), get_scene_catalog())
+    scheduler = Scheduler(lambda: submit_watch_run(*resources), hours * 3600)
+    scheduler.start()
+    return scheduler
+
+
+def start_services():
+    """الواجهة البرمجية والمجدول (إن طُلبا في البيئة) يعملان منذ أول جلسة، حتى في شاشة البداية."""
+    if os.getenv("KHALED_API_PORT"):
+        get_api_server(int(os.getenv("KHALED_API_PORT")))
+    if os.getenv("KHALED_WATCH_EVERY_H"):
+        get_watch_scheduler(float(os.getenv("KHALED_WATCH_EVERY_H")))
@@ -0,0 +1,83 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   شاشات البداية والخروج وإعدادات الجلسة (streamlit وحده، بلا مكتبات ثقيلة) │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+import streamlit as st
+
+# ──────────────────────── إعدادات الجلسة ───────────────────────
+SESSION_DEFAULTS = [("img", None), ("img_token", 0), ("label", ""),
+                    ("bbox", None), ("size", None), ("scene_date", ""),
+                    ("show_welcome", True), ("show_main_app", False),
+                    ("show_exit_message", False), ("job_id", None),
+                    ("job_meta", None), ("change", None), ("objects", None),
+                    ("render_cache", None), ("legend_cache", None),
+                    ("job_metrics", None), ("render_metrics", None), ("timelapse", None),
+                    ("export", None), ("compare", None), ("mosaic", None)]
+
+
+def init_session():
+    for k, v in SESSION_DEFAULTS:
+        st.session_state.setdefault(k, v)
+
+
+# ======== دالة مساعدة لإعادة التشغيل ========
+def rerun_app():
+    """دالة مساعدة لإعادة تشغيل التطبيق مع دعم الإصدارات المختلفة"""
+    if hasattr(st, 'rerun'):
+        st.rerun()
+    elif hasattr(st, 'experimental_rerun'):
+        st.experimental_rerun()
+    else:
+        # حل بديل باستخدام JavaScript
+        js = """
+        <script>
+            window.location.reload();
+        </script>
+        """
+        st.components.v1.html(js)
+    raise st.StopException
+
+
+# ───────────────────────────── نافذة البداية ───────────────────────────────
+def show_welcome_page():
+    st.markdown(
+        """
+        <div class="welcome-container">
+            <div class="welcome-content">
+                <h1 class="welcome-title">
+                        مرحبًا بك انت الان علي كوكب الارض والطبيعة بين يديك كما لم تراها من قبل حيث تلتقي علوم الاستشعار مع الطبيعة لتكشف لك اسرار البيئة من حولك
+                </h1>
+            </div>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    clicked = st.button("بدء التطبيق", key="start_app", type="primary")
+
+    if clicked:
+        st.session_state.show_welcome = False
+        st.session_state.show_main_app = True
+        rerun_app()
+
+
+# ───────────────────────────── رسالة الخروج ───────────────────────────────
+def show_exit_message():
+    st.markdown("""
+    <div class="welcome-container">
+        <h1 class="welcome-title">شكرًا لاستخدامك برنامجنا</h1>
+        <h2 class="welcome-subtitle">تم الخروج من البرنامج بنجاح. نتمنى لك يومًا سعيدًا!</h2>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if st.button("العودة إلى البداية", key="back_to_start", use_container_width=True):
+        st.session_state.show_exit_message = False
+        st.session_state.show_welcome = True
+        rerun_app()
+
+
+# ───────────────────────────── زر الخروج ───────────────────────────────
+def show_exit_button():
+    if st.sidebar.button("🚪 الخروج من البرنامج", use_container_width=True):
+        st.session_state.show_main_app = False
+        st.session_state.show_exit_message = True
+        rerun_app()
@@ -0,0 +1,59 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   تقرير البدء البارد: زمن الاستيرادات الكسولة وأول رسم لكل شاشة            │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+سجل واحد لكل عملية خادم (نوع ``startup``) يُرسل عبر ``metrics.emit`` بعد أول رسم
+لكل شاشة، ويظهر في لوحة "زمن مراحل آخر تشغيل":
+
+* ``import_<الاسم>``: أول استيراد لمجموعة وحدات (اللوحة، ...) وعدد الوحدات الجديدة.
+* ``first_paint_<الشاشة>``: زمن أول تشغيل كامل للسكربت رسم هذه الشاشة (welcome/exit/main)،
+  ويشمل الاستيرادات التي تمت فيه. ``total_s`` = أول رسم في العملية (البدء البارد).
+
+``python -m benchmarks.cold_start`` يقيس الشيء نفسه في مفسّرات جديدة.
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from khaled import metrics
+
+_run = metrics.RunMetrics("startup")
+_lock = threading.Lock()
+_done = set()  # المراحل المسجلة (كل استيراد وكل شاشة مرة واحدة لكل عملية)
+
+
+def _first(name) -> bool:
+    with _lock:
+        if name in _done:
+            return False
+        _done.add(name)
+        return True
+
+
+@contextmanager
+def importing(name):
+    """يقيس أول استيراد لما بداخله؛ بعدها الوحدات في ``sys.modules`` ولا شيء يُقاس."""
+    if f"import_{name}" in _done:
+        yield
+        return
+    t0, before = time.perf_counter(), len(sys.modules)
+    yield
+    if _first(f"import_{name}"):
+        _run.add(f"import_{name}", time.perf_counter() - t0, modules=len(sys.modules) - before)
+
+
+def painted(screen, run_t0):
+    """يسجل أول رسم كامل لـ ``screen`` (منذ ``run_t0`` بداية التشغيل) ويرسل التقرير."""
+    if not _first(f"first_paint_{screen}"):
+        return
+    _run.add(f"first_paint_{screen}", time.perf_counter() - run_t0, modules=len(sys.modules))
+    metrics.emit(report())
+
+
+def report():
+    """تقرير البدء حتى الآن، أو None قبل أول رسم."""
+    paints = [s for s in _run.stages if s["stage"].startswith("first_paint_")]
+    if not paints:
+        return None
+    return {**_run.record(), "total_s": paints[0]["seconds"]}
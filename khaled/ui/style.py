@@ -0,0 +1,567 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   تنسيق اللوحة: CSS للنصوص العربية والشريط الجانبي وشاشة البداية           │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""نص ثابت يُبنى مرة واحدة عند استيراد الوحدة، ويُحقن في الصفحة مع كل تشغيل للسكربت."""
+
+CSS = """
+<style>
+
+/* 1. اجعل الـ Header الافتراضي لـ Streamlit شفافًا */
+[data-testid="stHeader"] {
+    background-color: rgba(255, 255, 255, 0.0) !important; /* شفافية كاملة */
+    /* يمكنك استخدام قيمة أقل من 1 لجعلها شبه شفافة، مثلاً:
+       background-color: rgba(255, 255, 255, 0.2) !important; */
+    border-bottom: none !important; /* إزالة أي حدود سفلية قد تظهر */
+    box-shadow: none !important; /* إزالة أي ظل قد يظهر */
+}
+
+/* تنسيقات عامة للنصوص */
+/* 1) اجعل كل الصفحة RTL تلقائيًّا (بدون !important) */
+body {
+    direction: rtl;
+    text-align: right;
+}
+
+/* تنسيقات خاصة للعناوين */
+h1, h2, h3 {
+    text-align: center !important;
+    font-weight: bold !important;
+    color: #2c3e50 !important;
+}
+
+/* تنسيقات للشريط الجانبي (على اليسار) */
+[data-testid="stSidebar"] {
+    background: linear-gradient(135deg, rgba(255,228,225,0.9) 0%, rgba(255,248,220,0.9) 100%) !important;
+    border-radius: 15px 0 0 15px;
+    padding: 20px !important;
+    box-shadow: 0 4px 20px rgba(0,0,0,0.15);
+    backdrop-filter: blur(10px);
+    border: 1px solid rgba(255,255,255,0.5);
+    margin: 10px;
+    right: 0 !important; /* التعديل هنا */
+    left: auto !important; /* التعديل هنا */
+    top: 0 !important;
+    height: 100vh;
+    overflow-y: auto;
+    width: 320px !important;
+    transition: all 0.3s ease; /* إضافة تحريك سلس */
+}
+
+/* إخفاء الشريط الجانبي عند الانكماش */
+[data-testid="stSidebar"][aria-expanded="false"] {
+    transform: translateX(100%);
+}
+
+/* تنسيقات لأزرار الستريمليت */
+.stButton>button {
+    font-family: 'Arial', 'Tahoma', sans-serif !important;
+    text-align: center !important;
+    width: 100%;
+    background: linear-gradient(135deg, #ff9a9e 0%, #fad0c4 100%) !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 10px !important;
+    padding: 10px !important;
+    margin-top: 10px;
+    transition: all 0.3s ease;
+}
+
+.stButton>button:hover {
+    transform: scale(1.03);
+    box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+}
+
+/* تنسيقات لصناديق الاختيار والاختيار المنبثق */
+.stCheckbox>label, .stSelectbox>label, .stNumberInput>label,
+.stSlider>label, .stDateInput>label {
+    direction: rtl !important;
+    text-align: right !important;
+    color: #6a5acd !important;
+    font-weight: bold !important;
+}
+
+/* تنسيقات للتحذيرات والأخطاء */
+.stAlert {
+    direction: rtl !important;
+    text-align: right !important;
+    background-color: rgba(255, 228, 225, 0.7) !important;
+    border-left: 4px solid #ff6b6b !important;
+}
+
+/* تنسيقات خاصة للقوائم */
+ul {
+    padding-right: 20px !important;
+    direction: rtl !important;
+}
+
+/* تنسيقات للخرائط */
+.map-container {
+    width: calc(100% - 1rem) !important;
+    margin-right: 0 !important;
+    margin-left: auto !important;
+    direction: ltr !important;
+    border-radius: 15px;
+    overflow: hidden;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+}
+
+/* تنسيقات للبطاقات */
+.stExpander {
+    background-color: rgba(255, 250, 240, 0.8) !important;
+    border-radius: 10px !important;
+    border: 1px solid rgba(255, 218, 185, 0.5) !important;
+}
+
+/* تنسيقات للألوان الرومانسية */
+:root {
+    --primary-color: #ff9a9e;
+    --secondary-color: #fad0c4;
+    --accent-color: #a18cd1;
+    --text-color: #5a5a5a;
+}
+
+/* تنسيقات نافذة البداية */
+.welcome-container {
+    position: fixed !important;
+    top: 0 !important;
+    left: 0 !important;
+    width: 100vw !important;
+    height: 100vh !important;
+    margin: 0 !important;
+    padding: 0 !important;
+    background: url('https://raw.githubusercontent.com/GisDune/Khaled/refs/heads/main/12.webp') center/cover no-repeat !important;
+    background-attachment: fixed;        /* تأثير Parallax خفيف على الحواسيب */
+    display: flex !important;
+    flex-direction: column !important;
+    justify-content: center !important; /* توسيط عمودي */
+    align-items: center !important; /* توسيط أفقي */
+    text-align: center !important; /* توسيط النص داخل الحاوية */
+    box-sizing: border-box; /* التأكد من أن التبطين والحواف مشمولة في الحجم الكلي */
+
+}
+.welcome-content {
+    flex: 1;
+    display: flex;
+    flex-direction: column;
+    justify-content: flex-start;           /* رفع المحتوى إلى أعلى الحاوية */
+    align-items: center;
+    padding: 4vh 20px 20px !important;     /* 4vh من الأعلى + 20px يمين/يسار/أسفل */
+    margin: 0 !important;
+    box-sizing: border-box;
+    width: 100%;                           /* يشغل العرض بالكامل */
+
+}
+
+.st-emotion-cache-1kyxreq {
+    padding: 0 !important;
+}
+
+/* تنسيقات الزر العام في التطبيق */
+.stButton>button {
+    font-size: 1.2rem !important;
+    padding: 12px 24px !important;
+    background: linear-gradient(135deg, #6a11cb 0%, #2575fc 100%) !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 16px 60px !important;
+    box-shadow: 0 4px 8px rgba(0,0,0,0.2) !important;
+    margin: 0 auto !important;
+    display: block !important;
+    width: auto !important;
+    max-width: 100vh !important;
+}
+
+/* --- welcome-title --- */
+.welcome-title{
+    font-size: 3.5rem !important;
+    color: #000 !important;
+    padding: 15px 30px !important;
+    border-radius: 10px !important;
+    text-align: center !important;
+    margin: 0 !important;
+    text-shadow: 0 2px 4px rgba(255,215,0,0.35);
+    max-width: 95% !important;   /* كان 80% */
+    width: 95% !important;       /* دعم إضافى لبعض المتصفحات */
+}
+
+/* --- welcome-subtitle --- */
+.welcome-subtitle{
+    font-size: 1.8rem !important;
+    color: #000 !important;
+    background: rgba(255,255,255,0.8) !important;
+    padding: 10px 20px !important;
+    border-radius: 8px !important;
+    text-align: center !important;
+    margin-top: 20px !important;
+    max-width: 95% !important;   /* توسعة العرض مثل العنوان */
+    width: 95% !important;
+}
+
+
+.welcome-btn {
+    font-size: 1.5rem;
+    padding: 15px 40px;
+    border-radius: 18px 66px;
+    background: linear-gradient(135deg, #6a11cb 0%, #2575fc 100%);
+    color: white;
+    border: none;
+    cursor: pointer;
+    transition: all 0.3s ease;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+    margin-top: 20px;
+}
+
+.welcome-btn:hover {
+    transform: scale(1.05);
+    box-shadow: 0 8px 20px rgba(0,0,0,0.3);
+}
+
+.gradient-title{
+    font-size:20px;
+    font-weight:bold;
+    text-align:center;
+    direction:rtl;
+    margin-top:0.3rem;
+    margin-bottom:0.2rem;
+}
+
+/* زر البدء في نافذة الترحيب (التنسيقات الرئيسية) */
+div[data-testid="stButton"] > button[kind="primary"] {
+    background: linear-gradient(135deg, #2e7d32 0%, #4caf50 100%) !important;
+    width: 200px !important;
+    height: 70px !important;
+    font-size: 80px !important;
+    font-weight: bold !important;
+    border-radius: 35px !important;
+    color: white !important;
+    border: none !important;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.3) !important;
+    transition: all 0.5s ease !important;
+    display: flex !important;
+    justify-content: center !important;
+    align-items: center !important;
+    padding: 0 !important;
+    position: fixed !important; /* هذا يسمح لنا بتحديد موقعه بدقة */
+    top: 65% !important; /* تم تعديله ليكون أقرب لأسفل الشاشة */
+    left: 10% !important;
+    transform: translate(-50%, -50%) !important;
+    z-index: 9999 !important;
+    overflow: hidden !important;
+    cursor: pointer !important;
+    /* إزالة padding-left: 15px !important; لأنه كان يتسبب في إزاحة طفيفة */
+}
+
+div[data-testid="stButton"] > button[kind="primary"]:hover {
+    width: 100px !important;
+    height: 100px !important;
+    border-radius: 50% !important;
+    background: radial-gradient(
+        circle at center,
+        #4CAF50 0%,
+        #388E3C 30%,
+        #2E7D32 70%,
+        #1B5E20 100%
+    ) !important;
+    transform: translate(-50%, -50%) scale(1.1) !important;
+    box-shadow: 0 0 25px rgba(46, 125, 50, 0.6) !important;
+    animation: rotateEarth 8s infinite linear !important;
+}
+
+@keyframes rotateEarth {
+    from { background-position: 0 0; }
+    to { background-position: 100% 0; }
+}
+
+div[data-testid="stButton"] > button[kind="primary"]:hover::after {
+    content: "🌍";
+    font-size: 40px;
+    position: absolute;
+    top: 50%;
+    left: 50%;
+    transform: translate(-50%, -50%);
+}
+
+/* تنسيق فريد لزر حساب المؤشر فقط */
+div[data-testid="stVerticalBlock"] div[data-testid="stHorizontalBlock"]
+div[data-testid="stButton"] button[kind="primary"][data-testid="baseButton-secondary"] {
+    all: unset !important;
+    background: linear-gradient(135deg, #4CAF50 0%, #2E7D32 100%) !important;
+    color: white !important;
+    border: none !important;
+    border-radius: 8px !important;
+    padding: 12px 24px !important;
+    font-size: 1.2rem !important;
+    font-weight: bold !important;
+    width: 100% !important;
+    margin: 10px 0 !important;
+    cursor: pointer !important;
+    transition: all 0.3s ease !important;
+    box-shadow: 0 2px 5px rgba(0,0,0,0.2) !important;
+    display: flex !important;
+    justify-content: center !important;
+    align-items: flex-end !important;
+    margin-top: -20px !important; /* تحريك الزر لأعلى */
+}
+
+div[data-testid="stVerticalBlock"] div[data-testid="stHorizontalBlock"]
+div[data-testid="stButton"] button[kind="primary"][data-testid="baseButton-secondary"]:hover {
+    transform: translateY(-2px) !important;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.3) !important;
+    background: linear-gradient(135deg, #2E7D32 0%, #4CAF50 100%) !important;
+}
+
+div[data-testid="stVerticalBlock"] div[data-testid="stHorizontalBlock"]
+div[data-testid="stButton"] button[kind="primary"][data-testid="baseButton-secondary"]:active {
+    transform: translateY(1px) !important;
+    box-shadow: 0 1px 3px rgba(0,0,0,0.2) !important;
+}
+
+
+
+/* تنسيقات جديدة لتقليل المسافة بين الخريطة والزر */
+.map-button-group {
+    display: flex;
+    flex-direction: column;
+    gap: 8px;
+    margin-bottom: 15px;
+}
+
+.map-button-group .stButton>button {
+    margin-top: 5px !important;
+    margin-bottom: 5px !important;
+    padding: 12px 24px !important;
+    border-radius: 12px !important;
+}
+
+/* تعديل حجم الخريطة */
+.st-folium {
+    margin-bottom: 0 !important;
+}
+
+/* تنسيقات متجاوبة للجوال والشاشات الصغيرة (كتلة واحدة مدمجة) */
+@media (max-width: 768px) {
+    /* تكييس الأعمدة */
+    .st-emotion-cache-1cypcdb, .st-emotion-cache-1y4p8pa {
+        flex-direction: column;
+    }
+
+    /* تعديل حجم الخريطة */
+    .map-container {
+        height: 300px !important;
+    }
+    
+    /* تكييس الشريط الجانبي */
+    [data-testid="stSidebar"] {
+        width: 280px !important;
+        border-radius: 15px 0 0 15px;
+        transform: translateX(0);
+        height: auto; /* السماح للشريط الجانبي بالتكيف مع المحتوى */
+        padding: 10px !important; /* تقليل التبطين في الجوال */
+        right: 0;
+        left: auto !important;
+    }
+    
+    [data-testid="stSidebar"][aria-expanded="false"] {
+        transform: translateX(100%);
+    }
+
+    /* تعديلات العنوان على الجوال */
+    .welcome-title {
+        font-size: 1.4rem !important; /* حجم خط مناسب للجوال */
+        padding: 10px !important; /* تقليل الهوامش الداخلية */
+        line-height: 1.4 !important; /* تحسين ارتفاع السطور */
+        text-shadow: 0 1px 2px rgba(255,215,0,0.35); /* ظل أخف */
+        margin-top: 40vh !important; /* هامش علوي لتموضع أفضل */
+        max-width: 100% !important; /* تحديد عرض أقصى للسماح بالالتفاف */
+        word-wrap: break-word; /* كسر الكلمات الطويلة */
+        white-space: normal; /* السماح بالتفاف النص بشكل طبيعي */
+        box-sizing: border-box; /* تضمين التبطين والحواف */
+        margin-bottom: 20px !important; /* مسافة بين العنوان والزر */
+    }
+
+    .welcome-subtitle {
+        font-size: 1rem !important; /* تصغير حجم الخط الفرعي */
+        padding: 8px 15px !important;
+    }
+
+    /* تعديلات زر البدء على الجوال */
+    div[data-testid="stButton"] > button[kind="primary"] {
+        font-size: 2rem !important; /* حجم خط أكبر للزر */
+        width: 200px !important; /* عرض ثابت للزر */
+        height: 60px !important; /* ارتفاع ثابت للزر */
+        top: 80% !important; /* تغيير الموضع الرأسي للزر */
+        left: 50% !important; /* توسيط أفقي */
+        transform: translate(-50%, -50%) !important; /* توسيط دقيق */
+        border-radius: 30px !important; /* زوايا مدورة */
+        animation: pulse 2s infinite;  /* إضافة تأثير النبض */
+        padding: 0 !important; /* إزالة التبطين الزائد */
+    }
+
+    /* إخفاء التأثيرات المعقدة على الجوال لزر البدء */
+    div[data-testid="stButton"] > button[kind="primary"]:hover {
+        width: 200px !important; /* الحفاظ على نفس الحجم عند التحويم */
+        height: 60px !important;
+        border-radius: 30px !important;
+        animation: pulse 2s infinite !important; /* استمرار النبض */
+        transform: translate(-50%, -50%) !important; /* نفس المركز */
+        box-shadow: 0 5px 15px rgba(0,0,0,0.3) !important; /* ظل موحد */
+    }
+
+    div[data-testid="stButton"] > button[kind="primary"]:hover::after {
+        content: "" !important; /* إزالة أيقونة الأرض عند التحويم على الجوال */
+    }
+    
+    /* تأثير النبض للزر على الجوال */
+    @keyframes pulse {
+        0% { transform: translate(-50%, -50%) scale(1); }
+        50% { transform: translate(-50%, -50%) scale(1.05); }
+        100% { transform: translate(-50%, -50%) scale(1); }
+    }
+}
+
+/* شاشات متوسطة الحجم (أجهزة لوحية) */
+@media (min-width: 769px) and (max-width: 1024px) {
+    .welcome-title {
+        font-size: 2.5rem !important;
+    }
+    .welcome-container{
+        /* ❶ اجعل الصورة بالكامل داخل الإطار دون قصّ */
+        background-size: contain !important;   /* بدلاً من cover */
+        /* ❷ اجعلها تتكرر رأسيًّا إذا لازم الأمر حتى لا يظهر فراغ */
+        background-repeat: no-repeat !important;
+        background-position: top center !important;
+    }
+    #_______________________________________________________________________________________________
+    
+            
+    #_________________________________________________________________________________________________
+    .map-container {
+        height: 400px !important;
+    }
+    
+    div[data-testid="stButton"] > button[kind="primary"] {
+        font-size: 3rem !important;
+        width: 70% !important;
+    }
+}
+
+/* تعديلات عامة للاستجابة */
+.stPlotlyChart, .stImage {
+    max-width: 100% !important;
+    height: auto !important;
+}
+
+/* تكبير النصوص في العناصر الرئيسية */
+h1, h2, h3 {
+    font-size: calc(16px + 1vw) !important;
+}
+
+/* تكبير خطوط التسميات */
+.stSelectbox label, .stSlider label, .stDateInput label {
+    font-size: calc(12px + 0.5vw) !important;
+}
+            
+            /* ========== الهواتف والأجهزة الصغيرة (≤ 768px) ========== */
+@media (max-width: 768px){
+    .welcome-container{
+        /* 1) ألغِ الخلفيّة السابقة كلّياً ثم عرِّفها من جديد */
+        background: url('https://raw.githubusercontent.com/GisDune/Khaled/refs/heads/main/b.jpg')
+                    top center / contain              /* الحجم = contain */
+                    no-repeat scroll !important;      /* لا قصّ ولا ثبات */
+
+        /* 2) استبدل height:100vh بحدّ أدنى كى تسمح للتمرير إن احتجت */
+        height: auto !important;
+        min-height: 100vh !important;  /* تظلّ تغطّى الشاشة كاملة مع إمكانيّة التمدّد */
+    }
+
+    /* إزالة حوافّ Streamlit الافتراضية لتستفيد من عرض الهاتف بالكامل */
+    section.main > div.block-container{
+        padding: 0 !important;
+        max-width: 100% !important;
+    }
+}
+/* للشاشات المتوسطة والصغيرة */
+@media (max-width: 772px){
+.welcome-container {
+    background:
+        linear-gradient(
+            to bottom,
+            transparent 0%,
+            transparent 10%,
+            rgba(230,249,255,0.05) 12%,
+            rgba(230,249,255,0.15) 20%,
+            rgba(215,246,236,0.3) 35%,
+            rgba(180,235,180,0.5) 55%,
+            rgba(168,227,144,0.7) 75%,
+            rgba(168,227,144,0.85) 90%,
+            rgba(168,227,144,0.95) 100%
+        ),
+        url('https://raw.githubusercontent.com/GisDune/Khaled/refs/heads/main/b.jpg')
+        top center / contain no-repeat scroll !important;
+
+        min-height: 100vh !important;
+        height: auto !important;
+    }
+
+    section.main > div.block-container {
+        padding: 0 !important;
+        max-width: 100% !important;
+    }
+}
+
+/* للشاشات الصغيرة جداً مثل 322px */
+@media (max-width: 340px){
+.welcome-container {
+    background:
+        linear-gradient(
+            to bottom,
+            transparent 0%,
+            transparent 1%,                   /* ⬅︎ نُقدّم التدرج قليلاً */
+           
+            rgba(180,235,180,0.5) 60%,
+            rgba(168,227,144,0.75) 75%,
+            rgba(168,227,144,0.9) 90%,
+            rgba(168,227,144,1) 100%
+        ),
+        url('https://raw.githubusercontent.com/GisDune/Khaled/refs/heads/main/b.jpg')
+        top center / contain no-repeat scroll !important;
+    }
+}
+
+
+/* —————— إجبار السلايدر على LTR بشكل فعّال —————— */
+/* ========== 1) اجعل الـ slider نفسه LTR بالكامل ========== */
+    [data-testid="stSlider"] {
+    direction: ltr !important;
+    unicode-bidi: isolate-override !important;
+    text-align: left !important;
+}
+
+/* ========== 2) عزل BaseWeb track/thumb داخليًا ========== */
+[data-testid="stSlider"] div[data-baseweb="slider"] {
+    direction: ltr !important;
+    unicode-bidi: isolate-override !important;
+    position: relative !important;
+}
+
+/* ========== 3) Thumb (الدائرة) والرقم فوقها ========== */
+[data-testid="stSlider"] div[data-baseweb="slider"] div[role="slider"] {
+    direction: ltr !important;
+    unicode-bidi: isolate-override !important;
+    position: relative !important;
+}
+/* تنسيق مخصص لإظهار الدائرة الصغيرة وقيمة المؤشر */
+div[data-baseweb="slider"] {
+    position: relative;
+    height: 32px;  /* هذا هو ما يسمح بظهور الدائرة الصغيرة فوق الشريط */
+}
+
+
+
+
+
+#_________________________________________________________________________________________________________________________
+
+            
+</style>
+"""
@@ -0,0 +1,397 @@
+# ╭──────────────────────────────────────────────────────────────────────────╮
+#   قائمة المراقبة: مناطق محفوظة + تحديث تزايدي مجدول + سلاسل زمنية وتنبيهات │
+# ╰──────────────────────────────────────────────────────────────────────────╯
+"""
+مناطق اهتمام محفوظة (خزانات، بحيرات) مع مؤشراتها. كل تشغيل للمجدول:
+
+1. يسأل الكتالوج فقط عن الفترة بعد آخر مشهد عولج لكل (منطقة، مؤشر).
+2. يعالج المشاهد الجديدة وحدها بالتوازي (جلب ← قناع المياه ← إحصاءات).
+3. يلحق الإحصاءات بالسلسلة الزمنية المخزنة (SQLite) ويرفع تنبيهًا حين يبلغ
+   p98 للمشهد حد التنبيه، وحدود الفئات مأخوذة من "تفسير القيم" في ``descriptions``.
+
+فتكلفة التشغيل اليومي تتبع عدد المشاهد الجديدة لا طول التاريخ.
+
+    python -m khaled.watchlist add "خزان 1" --bbox 31,30,31.05,30.05 --indicators Chl_a Turbidity --start 2024-01-01
+    python -m khaled.watchlist run --every 24
+    python -m khaled.watchlist alerts
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+from sentinelhub import BBox, CRS, Geometry
+
+from . import metrics, quality
+from .indicators import aoi_grid, descriptions, evalscripts, resolve, water_masked_indicators
+from .objects import class_breaks
+from .pipeline import NoScenesError, catalog_dates, data_collection, fetch_scene
+from .results import summary_stats
+from .settings import cache_path
+
+log = logging.getLogger(__name__)
+
+ALERT_WEBHOOK = os.getenv("KHALED_ALERT_WEBHOOK")  # يُرسل إليه JSON بالتنبيهات الجديدة (اختياري)
+ALERT_STAT = "p98"  # الإحصاءة التي تُقارن بحد التنبيه: البؤر لا المتوسط
+
+
+def classify(value, breaks):
+    """اسم الفئة التي تقع فيها القيمة، أو None."""
+    if value is None:
+        return None
+    name = None
+    for lower, label in breaks:
+        if value >= lower:
+            name = label
+    return name
+
+
+def default_threshold(label):
+    """حد التنبيه الافتراضي: الحد الأدنى للفئة قبل الأخيرة (مثل "ازدهار كثيف" لـ Chl_a)."""
+    breaks = [b for b in class_breaks(descriptions.get(label, "")) if np.isfinite(b[0])]
+    return breaks[-2][0] if len(breaks) >= 2 else None
+
+
+class WatchList:
+    """المناطق المحفوظة، وآخر مشهد معالج لكل مؤشر، والسلاسل الزمنية، والتنبيهات."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or cache_path("watchlist.sqlite")
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS watches (
+                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name        TEXT NOT NULL UNIQUE,
+                    bbox        TEXT NOT NULL,
+                    crs         INTEGER NOT NULL,
+                    width       INTEGER NOT NULL,
+                    height      INTEGER NOT NULL,
+                    indicators  TEXT NOT NULL,
+                    thresholds  TEXT NOT NULL,
+                    start       TEXT NOT NULL,
+                    created     REAL NOT NULL,
+                    geometry    TEXT
+                )""")
+            # قواعد أقدم من عمود المضلع: المناطق المحفوظة فيها مستطيلات (geometry = NULL)
+            if "geometry" not in {r["name"] for r in conn.execute("PRAGMA table_info(watches)")}:
+                conn.execute("ALTER TABLE watches ADD COLUMN geometry TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS progress (
+                    watch_id    INTEGER NOT NULL,
+                    label       TEXT NOT NULL,
+                    last_date   TEXT NOT NULL,
+                    PRIMARY KEY (watch_id, label)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS series (
+                    watch_id    INTEGER NOT NULL,
+                    label       TEXT NOT NULL,
+                    scene_date  TEXT NOT NULL,
+                    min REAL, max REAL, mean REAL, p2 REAL, p98 REAL,
+                    valid_px    INTEGER,
+                    class       TEXT,
+                    created     REAL NOT NULL,
+                    PRIMARY KEY (watch_id, label, scene_date)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS alerts (
+                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                    watch_id    INTEGER NOT NULL,
+                    label       TEXT NOT NULL,
+                    scene_date  TEXT NOT NULL,
+                    value       REAL NOT NULL,
+                    threshold   REAL NOT NULL,
+                    class       TEXT,
+                    created     REAL NOT NULL,
+                    UNIQUE (watch_id, label, scene_date)
+                )""")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ───────────────────────────── المناطق ─────────────────────────────
+    def add(self, name, bbox, size, indicators, start, thresholds=None, geometry=None) -> int:
+        """يحفظ منطقة مع مفاتيح مؤشراتها؛ ``thresholds`` {التسمية: حد} يغلب الحدود الافتراضية.
+
+        ``geometry`` (اختياري) المضلع المرسوم: يُحفظ بنظام الـ bbox وتُقص عليه كل مشاهد المنطقة.
+        """
+        labels = [evalscripts[k][1] for k in indicators]
+        limits = {label: default_threshold(label) for label in labels}
+        limits.update(thresholds or {})
+        with self._lock, self._connect() as conn:
+            if conn.execute("SELECT 1 FROM watches WHERE name=?", (name,)).fetchone():
+                raise ValueError(f"watch {name!r} already exists")
+            cur = conn.execute(
+                "INSERT INTO watches (name, bbox, crs, width, height, indicators, thresholds, start, created, "
+                "geometry) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, ",".join(f"{c:.6f}" for c in bbox), int(bbox.crs.epsg), size[0], size[1],
+                 json.dumps(list(indicators)), json.dumps(limits), str(start), time.time(),
+                 None if geometry is None else geometry.transform(bbox.crs).wkt)
+            )
+            return cur.lastrowid
+
+    def remove(self, watch_id):
+        with self._lock, self._connect() as conn:
+            for table in ("progress", "series", "alerts"):
+                conn.execute(f"DELETE FROM {table} WHERE watch_id=?", (watch_id,))
+            conn.execute("DELETE FROM watches WHERE id=?", (watch_id,))
+
+    def watches(self) -> list:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM watches ORDER BY name").fetchall()
+        out = []
+        for r in rows:
+            w = dict(r)
+            w["bbox"] = BBox([float(c) for c in r["bbox"].split(",")], CRS(r["crs"]))
+            w["geometry"] = None if r["geometry"] is None else Geometry(r["geometry"], CRS(r["crs"]))
+            w["size"] = (r["width"], r["height"])
+            w["indicators"] = json.loads(r["indicators"])
+            w["thresholds"] = json.loads(r["thresholds"])
+            out.append(w)
+        return out
+
+    # ───────────────────────────── التقدّم والسلاسل ─────────────────────────────
+    def last_date(self, watch_id, label):
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_date FROM progress WHERE watch_id=? AND label=?",
+                               (watch_id, label)).fetchone()
+        return row["last_date"] if row else None
+
+    def record(self, watch_id, label, points, last_date=None):
+        """يلحق نقاط [(تاريخ المشهد، الإحصاءات، الفئة)] بالسلسلة ويقدّم آخر تاريخ معالج."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(watch_id, label, d, s["min"], s["max"], s["mean"], s["p2"], s["p98"],
+                  s["valid_px"], cls, now) for d, s, cls in points]
+            )
+            if last_date is not None:
+                conn.execute("INSERT OR REPLACE INTO progress VALUES (?, ?, ?)", (watch_id, label, last_date))
+
+    def series(self, watch_id, label) -> list:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM series WHERE watch_id=? AND label=? ORDER BY scene_date",
+                                (watch_id, label)).fetchall()
+        return [dict(r) for r in rows]
+
+    # ───────────────────────────── التنبيهات ─────────────────────────────
+    def raise_alert(self, watch_id, label, scene_date, value, threshold, cls) -> bool:
+        """يسجّل التنبيه مرة واحدة لكل مشهد؛ يعيد False إذا كان مسجّلًا من قبل."""
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO alerts (watch_id, label, scene_date, value, threshold, class, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (watch_id, label, scene_date, value, threshold, cls, time.time())
+            )
+            return cur.rowcount > 0
+
+    def alerts(self, watch_id=None, limit=50) -> list:
+        query = ("SELECT a.*, w.name FROM alerts a JOIN watches w ON w.id = a.watch_id"
+                 + (" WHERE a.watch_id=?" if watch_id is not None else "")
+                 + " ORDER BY a.scene_date DESC, a.id DESC LIMIT ?")
+        args = (watch_id, limit) if watch_id is not None else (limit,)
+        with self._connect() as conn:
+            return [dict(r) for r in conn.execute(query, args).fetchall()]
+
+
+# ───────────────────────────── التشغيل التزايدي ─────────────────────────────
+def _next_day(date_str):
+    return (datetime.date.fromisoformat(date_str) + datetime.timedelta(days=1)).isoformat()
+
+
+def new_scenes(config, wl, watch, key, today, scenes=None):
+    """تواريخ المشاهد بعد آخر تاريخ معالج فقط (الكتالوج لا يُسأل عن التاريخ القديم)."""
+    _, label, tier = evalscripts[key]
+    last = wl.last_date(watch["id"], label)
+    start = _next_day(last) if last else watch["start"]
+    if start > today:
+        return []
+    try:
+        return catalog_dates(config, data_collection(tier), watch["bbox"], (start, today), scenes)
+    except NoScenesError:
+        return []
+
+
+def scene_stats(config, watch, key, scene_date, tiles=None):
+    """إحصاءات المؤشر لمشهد واحد بعد قناع الجودة (مياه بلا سحب ولا ظلال) داخل مضلع المنطقة."""
+    ev, label, tier = evalscripts[key]
+    result = fetch_scene(config, ev, tier, watch["bbox"], watch["size"], scene_date,
+                         label in water_masked_indicators, label=label, tiles=tiles,
+                         geometry=watch.get("geometry"))
+    img = result["img"].squeeze().astype(np.float32)
+    if result["qa"] is not None:
+        img = quality.apply(img, result["qa"])
+    return summary_stats(img)
+
+
+def run(config, wl, today=None, max_workers=4, tiles=None, ctx=None, scenes=None) -> dict:
+    """تشغيل واحد للمجدول على كل المناطق؛ يعيد ملخصًا (مشاهد جديدة، إخفاقات، تنبيهات)."""
+    today = today or datetime.date.today().isoformat()
+    watches = wl.watches()
+    pairs = [(w, key) for w in watches for key in w["indicators"]]
+    report = {"watches": len(watches), "scenes": 0, "failed": [], "alerts": [], "warnings": []}
+    run_metrics = metrics.current()
+
+    def bound(fn, *args):
+        with metrics.bind(run_metrics):
+            return fn(*args)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="khaled-watch") as pool:
+        # ─── البحث في الكتالوج للفترات الجديدة فقط (بالتوازي) ───
+        plans = list(pool.map(lambda wk: bound(new_scenes, config, wl, wk[0], wk[1], today, scenes), pairs))
+        tasks = {}
+        for (w, key), dates in zip(pairs, plans):
+            for d in dates:
+                tasks[pool.submit(bound, scene_stats, config, w, key, d, tiles)] = (w, key, d)
+
+        done, results = 0, {}
+        for fut in as_completed(tasks):
+            w, key, d = tasks[fut]
+            done += 1
+            if ctx is not None:
+                ctx.progress(done / len(tasks), f"{w['name']} · {evalscripts[key][1]} · {d}")
+            try:
+                results[(w["id"], key, d)] = fut.result()
+            except Exception as e:
+                report["failed"].append({"watch": w["name"], "label": evalscripts[key][1], "scene_date": d,
+                                         "error": f"{type(e).__name__}: {e}"})
+
+    # ─── إلحاق السلاسل وتقديم آخر تاريخ حتى أول مشهد فشل (يُعاد في التشغيل التالي) ───
+    for (w, key), dates in zip(pairs, plans):
+        label = evalscripts[key][1]
+        breaks = class_breaks(descriptions.get(label, ""))
+        threshold = w["thresholds"].get(label)
+        points, last = [], None
+        for d in dates:
+            stats = results.get((w["id"], key, d))
+            if stats is None:
+                break
+            points.append((d, stats, classify(stats["mean"], breaks)))
+            last = d
+        wl.record(w["id"], label, points, last)
+        report["scenes"] += len(points)
+
+        for d, stats, _ in points:
+            value = stats[ALERT_STAT]
+            if threshold is None or value is None or value < threshold:
+                continue
+            cls = classify(value, breaks)
+            if wl.raise_alert(w["id"], label, d, value, threshold, cls):
+                report["alerts"].append({"watch": w["name"], "label": label, "scene_date": d,
+                                         "stat": ALERT_STAT, "value": value, "threshold": threshold,
+                                         "class": cls})
+
+    if report["alerts"] and ALERT_WEBHOOK:
+        try:
+            notify(ALERT_WEBHOOK, report["alerts"])
+        except Exception as e:
+            report["warnings"].append(f"⚠️ تعذّر إرسال التنبيهات: {e}")
+    return report
+
+
+def notify(url, alerts):
+    """يرسل التنبيهات الجديدة كـ JSON إلى خدمة التنبيهات."""
+    req = urllib.request.Request(url, data=json.dumps({"alerts": alerts}, ensure_ascii=False).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(req, timeout=30):
+        pass
+
+
+class Scheduler(threading.Thread):
+    """يستدعي ``fn()`` كل ``interval`` ثانية في خيط خلفي (أول استدعاء فورًا)."""
+
+    def __init__(self, fn, interval):
+        super().__init__(name="khaled-watch-scheduler", daemon=True)
+        self.fn = fn
+        self.interval = interval
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            try:
+                self.fn()
+            except Exception:
+                log.exception("watch-list run failed")
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+
+
+# ───────────────────────────── سطر الأوامر ─────────────────────────────
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from .scenes import SceneCatalog
+    from .settings import sh_config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="إضافة منطقة مراقبة")
+    add.add_argument("name")
+    add.add_argument("--bbox", required=True, help="minx,miny,maxx,maxy (WGS84)")
+    add.add_argument("--indicators", nargs="+", required=True, help="مثال: Chl_a Turbidity OSI")
+    add.add_argument("--start", default=(datetime.date.today() - datetime.timedelta(days=30)).isoformat())
+    sub.add_parser("list", help="المناطق وآخر مشهد معالج")
+    rm = sub.add_parser("remove", help="حذف منطقة وسلاسلها")
+    rm.add_argument("id", type=int)
+    go = sub.add_parser("run", help="تشغيل المجدول")
+    go.add_argument("--every", type=float, help="التكرار كل N ساعة (بدونها: تشغيل واحد)")
+    go.add_argument("--workers", type=int, default=4)
+    al = sub.add_parser("alerts", help="أحدث التنبيهات")
+    al.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    wl = WatchList()
+    if args.command == "add":
+        lons_lats = [float(v) for v in args.bbox.split(",")]
+        bbox, size = aoi_grid(lons_lats[0::2], lons_lats[1::2])
+        watch_id = wl.add(args.name, bbox, size, [resolve(n) for n in args.indicators], args.start)
+        print(f"watch {watch_id}: {args.name} {size[0]}x{size[1]} px")
+    elif args.command == "list":
+        for w in wl.watches():
+            lasts = ", ".join(f"{evalscripts[k][1]}→{wl.last_date(w['id'], evalscripts[k][1]) or '—'}"
+                              for k in w["indicators"])
+            print(f"{w['id']:>3}  {w['name']}  {lasts}")
+    elif args.command == "remove":
+        wl.remove(args.id)
+    elif args.command == "alerts":
+        for a in wl.alerts(limit=args.limit):
+            print(f"{a['scene_date']}  {a['name']}  {a['label']}  {ALERT_STAT}={a['value']:.3f} ≥ "
+                  f"{a['threshold']:g}  {a['class'] or ''}")
+    else:
+        load_dotenv()
+        config = sh_config()
+        scenes = SceneCatalog()
+
+        def once():
+            with metrics.collect("watchlist"):
+                report = run(config, wl, max_workers=args.workers, scenes=scenes)
+            print(json.dumps(report, ensure_ascii=False, default=float))
+
+        if args.every:
+            logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+            scheduler = Scheduler(once, args.every * 3600)
+            scheduler.start()
+            try:
+                scheduler.join()
+            except KeyboardInterrupt:
+                scheduler.stop()
+        else:
+            once()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import json
+import socket
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+import numpy as np
+import pytest
+
+from khaled import api, quality
+from khaled.indicators import aoi_grid
+from khaled.jobs import JobQueue
+from khaled.pipeline import NoScenesError
+from khaled.results import ResultsIndex
+
+BBOX, SIZE = aoi_grid([31.0, 31.01], [30.0, 30.01])
+QUERY = "name=Chl_a&bbox=31,30,31.01,30.01&start=2024-06-01&end=2024-06-30"
+CLEAR, CLOUD = 200 << 8, (200 << 8) | quality.FLAGS["cloud"]
+
+
+class FakeJobs:
+    def active(self):
+        return []
+
+
+class FakeServices:
+    """``Services`` بنتيجة ثابتة: 4×5 قيم، والعمود الأول سحب."""
+
+    def __init__(self):
+        self.jobs = FakeJobs()
+        self.calls = []
+
+    def indicator(self, key, bbox, size, time_interval, mask=True, geometry=None):
+        self.calls.append({"key": key, "time_interval": time_interval, "mask": mask, "geometry": geometry})
+        qa = np.full((4, 5), CLEAR, dtype=np.uint16)
+        qa[:, 0] = CLOUD
+        return {"img": np.arange(20, dtype=np.float32).reshape(4, 5), "qa": qa, "scene_date": "2024-06-21",
+                "bbox": BBOX, "size": (5, 4), "warnings": [], "from_index": False}
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(services, token=None):
+        server, url = api.serve_in_thread(services, token=token)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def get(url, headers=None):
+    """يعيد (الحالة، الترويسات، الجسم) دون رفع استثناء لرموز الخطأ."""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers or {}), timeout=30) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+@pytest.mark.parametrize("query, message", [
+    ("name=nope&bbox=31,30,31.01,30.01", "unknown indicator"),
+    ("name=Chl_a&bbox=31,30,31.01", "bbox must be"),
+    ("name=Chl_a&bbox=31.01,30,31,30.01", "minx < maxx"),
+    (QUERY.replace("2024-06-01", "June"), "YYYY-MM-DD"),
+    (QUERY.replace("2024-06-30", "2024-05-01"), "start must not be after end"),
+    (QUERY + "&exclude=cloud,fog", "exclude must be a subset"),
+    (QUERY + "&water_threshold=2", "water_threshold"),
+    (QUERY + "&format=png&min=1&max=0", "min must be below max"),
+    (QUERY + "&format=png&gamma=x", "gamma must be a number"),
+    (QUERY + "&format=jpeg", "format must be"),
+    (QUERY + "&polygon=31,30;31.01", "polygon"),
+])
+def test_bad_parameters_are_400(serve, query, message):
+    url = serve(FakeServices())
+    status, _, body = get(f"{url}/v1/indicator?{query}")
+    assert status == 400 and message in json.loads(body)["error"]
+
+
+def test_bearer_token(serve):
+    url = serve(FakeServices(), token="s3cret")
+    status, _, body = get(f"{url}/v1/health")
+    assert status == 401 and "bearer" in json.loads(body)["error"]
+    assert get(f"{url}/v1/health", {"Authorization": "Bearer wrong"})[0] == 401
+    status, _, body = get(f"{url}/v1/health", {"Authorization": "Bearer s3cret"})
+    assert status == 200 and json.loads(body) == {"status": "ok", "active_jobs": 0}
+
+
+def test_json_stats_apply_the_quality_mask(serve):
+    services = FakeServices()
+    url = serve(services)
+    status, headers, body = get(f"{url}/v1/indicator?{QUERY}")
+    payload = json.loads(body)
+    assert status == 200 and headers["Content-Type"] == "application/json"
+    assert services.calls == [{"key": "Chl_a (mg/m³)", "time_interval": ("2024-06-01", "2024-06-30"),
+                               "mask": True, "geometry": None}]
+    assert payload["scene_date"] == "2024-06-21" and payload["crs"] == f"EPSG:{BBOX.crs.epsg}"
+    assert payload["masked"] and payload["mask"]["exclude"] == list(quality.SCL_FLAGS)
+    assert payload["coverage"]["cloud"] == pytest.approx(0.2) and payload["coverage"]["water"] == 1.0
+    kept = np.arange(20).reshape(4, 5)[:, 1:]
+    assert payload["stats"]["valid_px"] == 16 and payload["stats"]["mean"] == pytest.approx(kept.mean())
+
+    payload = json.loads(get(f"{url}/v1/indicator?{QUERY}&mask=0")[2])
+    assert not payload["masked"] and payload["stats"]["valid_px"] == 20 and payload["stats"]["min"] == 0.0
+    payload = json.loads(get(f"{url}/v1/indicator?{QUERY}&exclude=none")[2])
+    assert payload["stats"]["valid_px"] == 20 and payload["mask"]["exclude"] == []
+
+
+def test_polygon_is_passed_to_services(serve):
+    services = FakeServices()
+    url = serve(services)
+    assert get(f"{url}/v1/indicator?{QUERY}&polygon=31,30;31.01,30;31,30.01")[0] == 200
+    assert get(f"{url}/v1/indicator?{QUERY}&polygon=31,30;31.01,30;31.01,30.01;31,30.01")[0] == 200
+    triangle, rectangle = (c["geometry"] for c in services.calls)
+    assert triangle.geometry.area == pytest.approx(0.00005) and rectangle is None
+
+
+def read_chunked(url, path):
+    """طلب HTTP/1.1 خام: يعيد (الترويسات، أجزاء الجسم كما أُرسلت)."""
+    parts = urlsplit(url)
+    with socket.create_connection((parts.hostname, parts.port), timeout=30) as sock:
+        sock.sendall(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: close\r\n\r\n".encode())
+        raw = b""
+        while chunk := sock.recv(65536):
+            raw += chunk
+    head, body = raw.split(b"\r\n\r\n", 1)
+    chunks = []
+    while True:
+        size, body = body.split(b"\r\n", 1)
+        if int(size, 16) == 0:
+            break
+        chunks.append(body[:int(size, 16)])
+        body = body[int(size, 16) + 2:]
+    return head.decode("latin-1"), chunks
+
+
+def test_png_and_cog_are_streamed_in_chunks(serve, monkeypatch):
+    monkeypatch.setattr(api, "CHUNK", 64)
+    url = serve(FakeServices())
+    head, chunks = read_chunked(url, f"/v1/indicator?{QUERY}&format=png&palette=viridis")
+    assert "Transfer-Encoding: chunked" in head and "Content-Type: image/png" in head
+    assert 'filename="Chl_a_2024-06-21.png"' in head
+    assert len(chunks) > 1 and all(len(c) <= 64 for c in chunks)
+    assert b"".join(chunks).startswith(b"\x89PNG\r\n\x1a\n")
+
+    head, chunks = read_chunked(url, f"/v1/indicator?{QUERY}&format=tiff")
+    assert "Content-Type: image/tiff" in head and 'filename="Chl_a_2024-06-21.tif"' in head
+    assert len(chunks) > 1 and b"".join(chunks)[:2] == b"II"
+
+
+@pytest.mark.parametrize("error, status", [
+    (NoScenesError(("2024-06-01", "2024-06-30")), 404),
+    (ConnectionError("upstream reset"), 502),
+])
+def test_job_errors_map_to_http_status(serve, tmp_path, monkeypatch, error, status):
+    def fetch_indicator(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(api, "fetch_indicator", fetch_indicator)
+    index = ResultsIndex(str(tmp_path / "results.sqlite"), str(tmp_path / "rasters"))
+    services = api.Services(None, JobQueue(str(tmp_path / "jobs.sqlite"), max_workers=1), index)
+    got, _, body = get(f"{serve(services)}/v1/indicator?{QUERY}")
+    assert got == status and json.loads(body)["error"].startswith(type(error).__name__)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from khaled.bandmath import bands_evalscript, evalscript_inputs, evaluate_evalscript
+from khaled.indicators import evalscripts
+
+
+def script(body, inputs=("B03", "B08")):
+    names = ",".join(f'"{n}"' for n in inputs)
+    return f"""//VERSION=3
+function setup(){{return{{input:[{names}],output:{{bands:1}}}};}}
+function evaluatePixel(s){{
+{body}
+}}"""
+
+
+@pytest.fixture
+def bands():
+    rng = np.random.default_rng(0)
+    return {name: rng.uniform(0.01, 0.4, (6, 7)).astype(np.float32) for name in ("B03", "B08")}
+
+
+def test_arithmetic_let_and_math(bands):
+    out = evaluate_evalscript(script("let r=(s.B03-s.B08)/(s.B03+s.B08); return [Math.pow(r,2)+Math.exp(0)];"),
+                              bands)
+    r = (bands["B03"] - bands["B08"]) / (bands["B03"] + bands["B08"])
+    np.testing.assert_allclose(out, r ** 2 + 1, rtol=1e-6)
+
+
+def test_first_matching_return_wins(bands):
+    out = evaluate_evalscript(script("if(s.B03>s.B08&&s.B03>0.2) return [1]; if(s.B03===s.B08) return [2];"
+                                     " return [NaN];"), bands)
+    first = (bands["B03"] > bands["B08"]) & (bands["B03"] > 0.2)
+    assert (out[first] == 1).all()
+    assert np.isnan(out[~first]).all()
+
+
+def test_multiple_output_bands(bands):
+    out = evaluate_evalscript(bands_evalscript(["B08", "B03"]), bands)
+    assert out.shape == (6, 7, 2)
+    np.testing.assert_array_equal(out[..., 0], bands["B08"])
+
+
+@pytest.mark.parametrize("body", [
+    "return [__import__('os').system('true') + s.B03];",
+    "return [s.B03.__class__];",
+    "let np=1; return [_pow.__globals__];",
+    "return [(lambda: 1)()];",
+    "return [open('/etc/passwd')];",
+    "return [s.B99];",
+    "return [9**9**9 + s.B03];",
+    "let a=8+1; return [a**a**a + s.B03];",
+])
+def test_rejects_anything_but_band_math(body, bands):
+    assert evaluate_evalscript(script(body), bands) is None
+
+
+def test_band_powers_still_evaluate(bands):
+    out = evaluate_evalscript(script("return [s.B03**2 + 2**s.B08];"), bands)
+    np.testing.assert_allclose(out, bands["B03"] ** 2 + 2 ** bands["B08"], rtol=1e-6)
+
+
+def test_injected_code_does_not_run(bands, tmp_path):
+    marker = tmp_path / "pwned"
+    evaluate_evalscript(script(f"return [__import__('os').system('touch {marker}') + s.B03];"), bands)
+    assert not marker.exists()
+
+
+def test_registry_evalscripts_evaluate(bands):
+    for name, (ev, label, tier) in evalscripts.items():
+        rng = np.random.default_rng(1)
+        inputs = {b: rng.uniform(0.01, 0.4, (4, 5)).astype(np.float32) for b in evalscript_inputs(ev)}
+        out = evaluate_evalscript(ev, inputs)
+        assert out is not None and out.shape[:2] == (4, 5), label
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from sentinelhub import SHConfig
+
+from khaled.change import change_maps, scene_interval, two_date_change
+from khaled.georef import geometry_mask
+from khaled.indicators import aoi_geometry, aoi_grid, evalscripts
+from khaled.pipeline import NoScenesError
+from khaled.standin import configure_standin, serve_in_thread
+
+BBOX, SIZE = aoi_grid([31.0, 31.03], [30.0, 30.03])
+
+
+@pytest.fixture(scope="module")
+def config():
+    server, url = serve_in_thread()
+    yield configure_standin(SHConfig(), url)
+    server.shutdown()
+
+
+def test_change_maps_values_and_masks():
+    a = np.array([[1.0, 2.0, 0.0], [4.0, np.nan, 3.0]], dtype=np.float32)
+    b = np.array([[2.0, 1.0, 5.0], [4.5, 1.0, 9.0]], dtype=np.float32)
+    mask = np.array([[True, True, True], [True, True, False]])
+    diff, ratio, stats = change_maps(a, b, mask_b=mask, threshold=0.6)
+
+    np.testing.assert_allclose(diff, [[1.0, -1.0, 5.0], [0.5, np.nan, np.nan]])
+    np.testing.assert_allclose(ratio, [[2.0, 0.5, np.nan], [1.125, np.nan, np.nan]])
+    assert stats["valid_px"] == 4
+    assert (stats["increase_px"], stats["decrease_px"]) == (2, 1)
+    assert stats["mean_diff"] == pytest.approx(1.375)
+
+
+def test_change_maps_area_per_row():
+    a = np.zeros((2, 3), dtype=np.float32)
+    b = np.array([[1.0, 1.0, -1.0], [1.0, -1.0, -1.0]], dtype=np.float32)
+    area = np.array([[2.0], [3.0]])
+    _, ratio, stats = change_maps(a[None], b[None], area_km2=area)
+    assert np.isnan(ratio).all()
+    assert stats["increase_km2"] == pytest.approx(2.0 + 2.0 + 3.0)
+    assert stats["decrease_km2"] == pytest.approx(2.0 + 3.0 + 3.0)
+    assert stats["valid_km2"] == pytest.approx(15.0)
+
+
+def test_scene_interval_ends_on_date():
+    assert scene_interval("2024-06-20") == ("2024-05-21", "2024-06-20")
+    assert scene_interval("2024-06-20T00:00:00", days=5) == ("2024-06-15", "2024-06-20")
+
+
+def test_two_date_change_resolves_scene_dates(config):
+    ev, label, tier = evalscripts["NDVI"]
+    out = two_date_change(config, ev, tier, label, BBOX, SIZE, "2024-06-01", "2024-06-20")
+    assert out["dates"] == ("2024-06-01", "2024-06-16")
+    assert out["diff"].shape == (SIZE[1], SIZE[0]) and out["stats"]["valid_px"] > 0
+    assert not any("المشهد نفسه" in w for w in out["warnings"])
+
+    same = two_date_change(config, ev, tier, label, BBOX, SIZE, "2024-06-17", "2024-06-20")
+    assert same["dates"] == ("2024-06-16", "2024-06-16")
+    assert any("المشهد نفسه" in w for w in same["warnings"])
+
+
+def test_two_date_change_clips_to_geometry(config):
+    ev, label, tier = evalscripts["NDVI"]
+    geometry = aoi_geometry([(31.0, 30.0), (31.03, 30.0), (31.0, 30.03)])
+    out = two_date_change(config, ev, tier, label, BBOX, SIZE, "2024-06-01", "2024-06-20", geometry=geometry)
+    inside = geometry_mask(geometry, BBOX, SIZE)
+    assert not inside.all() and np.isnan(out["diff"][~inside]).all()
+    assert out["stats"]["valid_px"] <= inside.sum()
+
+
+def test_two_date_change_without_scenes(config):
+    ev, label, tier = evalscripts["NDVI"]
+    with pytest.raises(NoScenesError):
+        two_date_change(config, ev, tier, label, BBOX, SIZE, "2014-01-01", "2014-02-01")
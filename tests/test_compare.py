@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sentinelhub import SHConfig
+
+from khaled import metrics
+from khaled.compare import band_requests, compare_indicators
+from khaled.indicators import aoi_grid, evalscripts
+from khaled.pipeline import data_collection, fetch_single
+from khaled.quality import QUALITY_EVALSCRIPT, encode
+from khaled.results import ResultsIndex, aoi_hash, resolution_key
+from khaled.standin import configure_standin, serve_in_thread
+
+BBOX, SIZE = aoi_grid([31.0, 31.03], [30.0, 30.03])
+INTERVAL = ("2024-06-01", "2024-06-12")
+KEYS = ["Chl_a (mg/m³)", "NDVI", "CDOM (mg/l)"]
+
+
+@pytest.fixture(scope="module")
+def config():
+    server, url = serve_in_thread()
+    yield configure_standin(SHConfig(), url)
+    server.shutdown()
+
+
+def test_band_requests_merge_by_tier():
+    requests = band_requests(KEYS)
+    assert list(requests) == ["L2A", "L1C"]
+    assert {"B03", "B08", "SCL"} <= set(requests["L2A"]) and requests["L2A"] == sorted(requests["L2A"])
+    assert "SCL" not in band_requests(["NDVI"])["L2A"]
+    assert "SCL" not in band_requests(["Chl_a (mg/m³)"], mask=False)["L2A"]
+
+
+def test_compare_matches_per_indicator_requests(config, tmp_path):
+    index = ResultsIndex(str(tmp_path / "r.sqlite"), str(tmp_path / "rasters"))
+    with metrics.collect("compare", emit_record=False) as run:
+        result = compare_indicators(config, KEYS, BBOX, SIZE, INTERVAL, index=index)
+    assert result["requests"] == 2 and not result["warnings"]
+    assert sum(s["stage"] == "bands_fetch" for s in run.record()["stages"]) == 2
+
+    date = result["scene_date"]
+    for key in KEYS:
+        evalscript, label, tier = evalscripts[key]
+        direct = fetch_single(config, evalscript, data_collection(tier), BBOX, SIZE, date)
+        np.testing.assert_allclose(result["images"][label], np.asarray(direct).squeeze(), rtol=1e-5,
+                                   equal_nan=True)
+        assert index.get(aoi_hash(BBOX), label, date, resolution_key(SIZE)) is not None
+    qa = fetch_single(config, QUALITY_EVALSCRIPT, data_collection("L2A"), BBOX, SIZE, date)
+    np.testing.assert_array_equal(result["qa"], encode(qa))
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from khaled import composite, settings
+from khaled.indicators import aoi_grid, evalscripts
+
+BBOX, SIZE = aoi_grid([31.0, 31.05], [30.0, 30.05])
+DATES = ["2024-06-01", "2024-06-06", "2024-06-11"]
+
+
+@pytest.fixture
+def tmp_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(composite, "catalog_dates", lambda *args: list(DATES))
+    return tmp_path / "tmp"
+
+
+def fake_layers(fail_on=None):
+    def fetch_layer(config, evalscript, dc, layer, bbox, size, date, tiles, geometry=None):
+        if date == fail_on:
+            raise ConnectionError(date)
+        w, h = size
+        if layer.startswith("QA"):
+            return np.full((h, w), 200 << 8, dtype=np.float32), bbox, size
+        return np.full((h, w), DATES.index(date) + 1.0, dtype=np.float32), bbox, size
+    return fetch_layer
+
+
+@pytest.mark.parametrize("method", composite.COMPOSITE_METHODS)
+def test_composite_reduces_scenes(tmp_dir, monkeypatch, method):
+    monkeypatch.setattr(composite, "fetch_layer", fake_layers())
+    ev, label, tier = evalscripts["Chl_a (mg/m³)"]
+    out = composite.temporal_composite(None, ev, tier, label, BBOX, SIZE, DATES, method=method)
+    expected = {"median": 2.0, "max": 3.0, "mean": 2.0}[method]
+    np.testing.assert_allclose(out["img"], expected)
+    assert out["n_scenes"] == 3 and (out["valid_count"] == 3).all()
+    assert not tmp_dir.exists() or not os.listdir(tmp_dir)
+
+
+def test_failed_fetch_removes_median_temp_file(tmp_dir, monkeypatch):
+    monkeypatch.setattr(composite, "fetch_layer", fake_layers(fail_on=DATES[1]))
+    ev, label, tier = evalscripts["Chl_a (mg/m³)"]
+    with pytest.raises(ConnectionError):
+        composite.temporal_composite(None, ev, tier, label, BBOX, SIZE, DATES, method="median")
+    assert not tmp_dir.exists() or not os.listdir(tmp_dir)
+
+
+def test_failure_before_first_scene_leaves_no_reducer(tmp_dir, monkeypatch):
+    monkeypatch.setattr(composite, "fetch_layer", fake_layers(fail_on=DATES[0]))
+    ev, label, tier = evalscripts["Chl_a (mg/m³)"]
+    with pytest.raises(ConnectionError):
+        composite.temporal_composite(None, ev, tier, label, BBOX, SIZE, DATES, method="median")
+
+
+def test_median_close_is_idempotent(tmp_dir):
+    reducer = composite.MedianReducer((4, 5), 2)
+    reducer.add(np.ones((4, 5), dtype=np.float32))
+    reducer.close()
+    reducer.close()
+    assert not tmp_dir.exists() or not os.listdir(tmp_dir)
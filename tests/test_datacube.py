@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sentinelhub import SHConfig
+
+from khaled import composite
+from khaled.datacube import DataCube, band_key
+from khaled.indicators import aoi_grid, evalscripts
+from khaled.standin import configure_standin, serve_in_thread
+from khaled.tiles import TILE_PX, TileCache, pixel_window
+
+BBOX, SIZE = aoi_grid([31.0, 31.05], [30.0, 30.05])
+INTERVAL = ("2024-06-01", "2024-06-12")
+
+
+class FakeBands:
+    """نطاقات اصطناعية: قيمة كل بكسل تعتمد على موقعه ونطاقه فقط (لا على المربع)."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tile_bbox, tile_size, names):
+        self.calls.append(tuple(names))
+        w, h = tile_size
+        xs = np.linspace(tile_bbox.min_x, tile_bbox.max_x, w, endpoint=False)
+        ys = np.linspace(tile_bbox.max_y, tile_bbox.min_y, h, endpoint=False)
+        gx, gy = np.meshgrid(xs, ys)
+        return np.stack([(gx + gy * (k + 2)) % 1.0 for k, _ in enumerate(names)], axis=-1)
+
+
+@pytest.fixture(scope="module")
+def config():
+    server, url = serve_in_thread()
+    yield configure_standin(SHConfig(), url)
+    server.shutdown()
+
+
+def test_window_fetches_only_missing_bands(tmp_path):
+    cube, fetch = DataCube(str(tmp_path)), FakeBands()
+    col0, row0, col1, row1 = pixel_window(BBOX, 0)
+    tiles = ((col1 - 1) // TILE_PX - col0 // TILE_PX + 1) * ((row1 - 1) // TILE_PX - row0 // TILE_PX + 1)
+
+    bands, out_bbox = cube.window(fetch, "L2A", ["B03", "B08"], BBOX, "2024-06-01", 0)
+    assert len(fetch.calls) == tiles and set(fetch.calls) == {("B03", "B08")}
+    assert bands["B03"].shape == (row1 - row0, col1 - col0)
+    assert np.isfinite(bands["B08"]).all()
+
+    again, _ = cube.window(fetch, "L2A", ["B08", "SCL"], BBOX, "2024-06-01", 0)
+    assert len(fetch.calls) == 2 * tiles and set(fetch.calls[tiles:]) == {("SCL",)}
+    np.testing.assert_array_equal(again["B08"], bands["B08"])
+
+
+def test_pixel_series_reads_stored_dates(tmp_path):
+    cube, fetch = DataCube(str(tmp_path)), FakeBands()
+    for date in ("2024-06-01", "2024-06-06", "2024-07-01"):
+        cube.window(fetch, "L2A", ["B03", "B08"], BBOX, date, 0)
+    dates, values = cube.pixel_series(band_key("L2A", "B03", BBOX.crs), 0, 31.02, 30.02, end="2024-06-30")
+    assert dates == ["2024-06-01", "2024-06-06"]
+    assert values.shape == (2,) and values[0] == values[1]
+
+    ev = '//VERSION=3\nfunction setup(){return{input:["B03","B08"],output:{bands:1}};}\n' \
+         'function evaluatePixel(s){\n    return [s.B03-s.B08];\n}'
+    dates, series = cube.indicator_series(ev, "L2A", BBOX.crs, 0, 31.02, 30.02)
+    b08 = cube.pixel_series(band_key("L2A", "B08", BBOX.crs), 0, 31.02, 30.02)[1]
+    assert len(dates) == 3
+    np.testing.assert_allclose(series, cube.pixel_series(band_key("L2A", "B03", BBOX.crs), 0, 31.02, 30.02)[1] - b08)
+
+
+def test_composite_from_cube_matches_service_and_goes_offline(config, tmp_path, monkeypatch):
+    ev, label, tier = evalscripts["Chl_a (mg/m³)"]
+    tiles = TileCache(str(tmp_path / "t.sqlite"), str(tmp_path / "tiles"))
+    cube = DataCube(str(tmp_path / "cube"))
+    direct = composite.temporal_composite(config, ev, tier, label, BBOX, SIZE, INTERVAL, tiles=tiles)
+    cubed = composite.temporal_composite(config, ev, tier, label, BBOX, SIZE, INTERVAL, cube=cube)
+    assert cubed["size"] == direct["size"] and list(cubed["bbox"]) == list(direct["bbox"])
+    np.testing.assert_allclose(cubed["img"], direct["img"], rtol=1e-5, equal_nan=True)
+
+    def offline(*args, **kwargs):
+        raise AssertionError("band fetch after the cube is filled")
+    monkeypatch.setattr(composite, "fetch_single", offline)
+    again = composite.temporal_composite(config, ev, tier, label, BBOX, SIZE, INTERVAL, cube=cube, method="max")
+    assert again["n_scenes"] == direct["n_scenes"]
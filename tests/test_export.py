@@ -0,0 +1,110 @@
+import io
+import warnings
+
+import numpy as np
+import pytest
+from sentinelhub import BBox, CRS
+
+from khaled import export
+from khaled.raster import Raster
+
+H, W = 520, 600  # ثلاثة مستويات: الدقة الكاملة ثم ملخصان بمعامل 2 و 4
+BBOX = BBox([31.0, 30.0, 31.06, 30.052], CRS.WGS84)
+
+
+def bands():
+    rng = np.random.default_rng(7)
+    value = rng.gamma(2.0, 3.0, (H, W)).astype(np.float32)
+    value[:40, :70] = np.nan
+    value[300, :] = np.nan
+    mask = (value > 6).astype(np.float32)
+    mask[np.isnan(value)] = np.nan
+    return {"Chl_a": value, "water": mask}
+
+
+def halve(a):
+    """متوسط 2×2 مستقل عن الكاتب (NaN فقط حين تكون الأربعة بلا قيمة)."""
+    h, w = a.shape
+    padded = np.full((h + h % 2, w + w % 2), np.nan, np.float32)
+    padded[:h, :w] = a
+    quads = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).transpose(0, 2, 1, 3)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Mean of empty slice
+        return np.nanmean(quads.reshape(*quads.shape[:2], 4), axis=-1)
+
+
+def write(writer, data, attrs=None):
+    buf = io.BytesIO()
+    writer(buf, data, BBOX, attrs)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def tifffile():
+    pytest.importorskip("imagecodecs")  # فك متنبئ الفاصلة العائمة (Predictor=3)
+    return pytest.importorskip("tifffile")
+
+
+def read_levels(tifffile, data):
+    with tifffile.TiffFile(io.BytesIO(data)) as tif:
+        pages = [(p.asarray(), {t.name: t.value for t in p.tags}) for p in tif.pages]
+        return tif.is_bigtiff, pages
+
+
+def test_cog_roundtrip_bands_georef_and_overviews(tifffile):
+    src = bands()
+    big, pages = read_levels(tifffile, write(export.write_cog, src, {"scene_date": "2024-06-01"}))
+    assert not big and len(pages) == 3
+
+    full, tags = pages[0]
+    assert full.shape == (2, H, W)
+    np.testing.assert_array_equal(full[0], src["Chl_a"])
+    np.testing.assert_array_equal(full[1], src["water"])
+    assert tags["ModelTiepointTag"][3:5] == (31.0, 30.052)
+    np.testing.assert_allclose(tags["ModelPixelScaleTag"][:2], (0.06 / W, 0.052 / H))
+    assert "scene_date" in tags["GDAL_METADATA"] and ">water<" in tags["GDAL_METADATA"]
+    assert tags["TileWidth"] == export.TILE and tags["Predictor"] == 3
+
+    expected = {k: halve(v) for k, v in src.items()}
+    level1, tags1 = pages[1]
+    assert level1.shape == (2, -(-H // 2), -(-W // 2)) and tags1["NewSubfileType"] == 1
+    np.testing.assert_allclose(level1[0], expected["Chl_a"], rtol=1e-6, equal_nan=True)
+    np.testing.assert_allclose(level1[1], expected["water"], rtol=1e-6, equal_nan=True)
+    # المستوى الثالث: عينة بخطوة 2 ثم متوسط 2×2
+    level2, _ = pages[2]
+    np.testing.assert_allclose(level2[0], halve(src["Chl_a"][::2, ::2]), rtol=1e-6, equal_nan=True)
+
+
+def test_cog_switches_to_bigtiff_at_threshold(tifffile, monkeypatch):
+    src = bands()
+    classic = write(export.write_cog, src)
+    monkeypatch.setattr(export, "BIGTIFF_AT", len(classic) + 1)
+    assert write(export.write_cog, src) == classic
+
+    monkeypatch.setattr(export, "BIGTIFF_AT", len(classic))
+    big, pages = read_levels(tifffile, write(export.write_cog, src))
+    _, classic_pages = read_levels(tifffile, classic)
+    assert big and len(pages) == len(classic_pages)
+    for (arr, _), (ref, _) in zip(pages, classic_pages):
+        np.testing.assert_array_equal(arr, ref)
+
+
+def test_cog_reads_raster_blockwise(tifffile):
+    value = bands()["Chl_a"]
+    raster = Raster.pack(value, bbox=BBOX)
+    _, pages = read_levels(tifffile, write(export.write_cog, {"Chl_a": raster}))
+    np.testing.assert_array_equal(pages[0][0], raster[:, :])
+
+
+def test_netcdf_roundtrip():
+    netcdf = pytest.importorskip("scipy.io")
+    src = bands()
+    data = write(export.write_netcdf, src, {"scene_date": "2024-06-01"})
+    with netcdf.netcdf_file(io.BytesIO(data), mmap=False) as nc:
+        assert nc.version_byte == 2 and nc.scene_date == b"2024-06-01"
+        assert set(nc.variables) == {"crs", "lat", "lon", "Chl_a", "water"}
+        np.testing.assert_array_equal(nc.variables["Chl_a"][:], src["Chl_a"])
+        np.testing.assert_array_equal(nc.variables["water"][:], src["water"])
+        np.testing.assert_allclose(nc.variables["lon"][[0, -1]], [31.0 + 0.03 / W, 31.06 - 0.03 / W])
+        np.testing.assert_allclose(nc.variables["lat"][[0, -1]], [30.052 - 0.026 / H, 30.0 + 0.026 / H])
+        assert nc.variables["Chl_a"].grid_mapping == b"crs"
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+import shapely
+from sentinelhub import BBox, CRS, Geometry
+from shapely.geometry import MultiPolygon, Polygon
+
+from khaled.georef import (
+    clip_to_geometry, geometry_mask, geometry_rings, lonlat_to_crs, lonlat_to_pixel, pixel_area_km2, polygon_mask,
+    sample_line, value_at
+)
+
+BBOX = BBox([31.0, 30.0, 31.1, 30.05], CRS.WGS84)
+SIZE = (100, 50)  # بكسل 0.001° × 0.001°
+
+
+@pytest.mark.parametrize("lon, lat, expected", [
+    (31.0005, 30.0495, (0, 0)),
+    (31.0995, 30.0005, (49, 99)),
+    (31.0, 30.05, (0, 0)),
+    (30.9995, 30.02, None),   # أقل من بكسل يسار الصورة
+    (31.05, 30.0504, None),   # أقل من بكسل أعلاها
+    (31.1, 30.02, None),
+    (31.05, 30.0, None),
+])
+def test_lonlat_to_pixel_edges(lon, lat, expected):
+    assert lonlat_to_pixel(BBOX, SIZE, lon, lat) == expected
+
+
+def test_lonlat_to_pixel_on_utm_grid():
+    x, y = lonlat_to_crs(CRS(32636), 31.05, 30.02)
+    bbox = BBox([x - 500, y - 500, x + 500, y + 500], CRS(32636))
+    assert lonlat_to_pixel(bbox, (100, 100), 31.05, 30.02) == (50, 50)
+
+
+def test_value_at_reads_the_stored_pixel():
+    img = np.arange(50 * 100, dtype=np.float32).reshape(50, 100)
+    assert value_at(img, BBOX, SIZE, 31.0125, 30.0405) == img[9, 12]
+    assert value_at(img, BBOX, SIZE, 30.99, 30.02) is None
+
+
+def test_sample_line_marks_outside_points_nan():
+    img = np.ones((50, 100), dtype=np.float32)
+    dist, values, lons, lats = sample_line(img, BBOX, SIZE, [(30.95, 30.025), (31.05, 30.025)])
+    assert dist[-1] == pytest.approx(0.1 * 111.32 * np.cos(np.radians(30.025)), rel=1e-3)
+    assert np.isnan(values[lons < 31.0]).all() and (values[lons > 31.0] == 1).all()
+
+
+def test_pixel_area_shrinks_with_latitude():
+    area = pixel_area_km2(BBox([31.0, 0.0, 31.1, 60.0], CRS.WGS84), (10, 6))
+    assert area.shape == (6, 1) and area[0, 0] < area[-1, 0]
+    assert pixel_area_km2(BBox([0, 0, 1000, 500], CRS(32636)), (100, 50))[0, 0] == pytest.approx(1e-4)
+
+
+# ───────────────────────────── قناع المضلع ─────────────────────────────
+def shapely_mask(shape, bbox, size):
+    """المرجع: مراكز البكسلات داخل المضلع بـ shapely."""
+    w, h = size
+    dx, dy = (bbox.max_x - bbox.min_x) / w, (bbox.max_y - bbox.min_y) / h
+    xs = bbox.min_x + (np.arange(w) + 0.5) * dx
+    ys = bbox.max_y - (np.arange(h) + 0.5) * dy
+    gx, gy = np.meshgrid(xs, ys)
+    return shapely.contains_xy(shape, gx, gy)
+
+
+def random_polygon(rng, cx, cy, r, n=12):
+    angles = np.sort(rng.uniform(0, 2 * np.pi, n))
+    radii = rng.uniform(0.3, 1.0, n) * r
+    return Polygon(np.column_stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)]))
+
+
+SHAPES = [
+    Polygon([(31.01, 30.01), (31.09, 30.012), (31.05, 30.045)]),
+    Polygon([(31.0, 30.0), (31.1, 30.0), (31.1, 30.05), (31.0, 30.05)],
+            [[(31.03, 30.01), (31.07, 30.01), (31.07, 30.04), (31.03, 30.04)]]),
+    # الرؤوس خارج شبكة مراكز البكسلات: مركز على الضلع تمامًا حالة حدّية يختلف فيها shapely (يستثني الحدود)
+    MultiPolygon([Polygon([(31.0052, 30.0051), (31.0304, 30.0053), (31.0301, 30.0307)]),
+                  Polygon([(31.06, 30.02), (31.12, 30.02), (31.12, 30.07), (31.06, 30.07)])]),
+    Polygon([(31.02, 30.01), (31.08, 30.01), (31.08, 30.04), (31.05, 30.02), (31.02, 30.04)]),  # مقعّر
+]
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_polygon_mask_matches_shapely(shape):
+    mask = polygon_mask(geometry_rings(shape), BBOX, SIZE)
+    assert mask.shape == (50, 100)
+    np.testing.assert_array_equal(mask, shapely_mask(shape, BBOX, SIZE))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_polygon_mask_matches_shapely_on_random_polygons(seed):
+    rng = np.random.default_rng(seed)
+    shape = random_polygon(rng, 31.05, 30.025, 0.03)
+    np.testing.assert_array_equal(polygon_mask(geometry_rings(shape), BBOX, SIZE), shapely_mask(shape, BBOX, SIZE))
+
+
+def test_clip_to_geometry_on_utm_grid():
+    shape = SHAPES[0]
+    x0, y0 = lonlat_to_crs(CRS(32636), 31.0, 30.0)
+    x1, y1 = lonlat_to_crs(CRS(32636), 31.1, 30.05)
+    bbox = BBox([x0, y0, x1, y1], CRS(32636))
+    size = (200, 110)
+    arr = np.ones((110, 200, 2), dtype=np.float32)
+    clipped = clip_to_geometry(arr, Geometry(shape, CRS.WGS84), bbox, size)
+    expected = shapely_mask(Geometry(shape, CRS.WGS84).transform(CRS(32636)).geometry, bbox, size)
+    np.testing.assert_array_equal(np.isfinite(clipped[..., 0]), expected)
+    np.testing.assert_array_equal(np.isfinite(clipped[..., 1]), expected)
+    assert geometry_mask(Geometry(shape, CRS.WGS84), bbox, size) is geometry_mask(
+        Geometry(shape, CRS.WGS84), bbox, size)  # القناع محسوب مرة ومخزن
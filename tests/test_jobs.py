@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from khaled.jobs import CANCELLED, DONE, FAILED, JobQueue, job_key
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), max_workers=2)
+
+
+def blocking(started, release, result="ok"):
+    def fn(ctx):
+        started.set()
+        while not release.wait(0.01):
+            ctx.progress(0.5, "waiting")
+        return result
+    return fn
+
+
+def test_job_key_ignores_argument_order():
+    assert job_key(a=1, b=[2, 3]) == job_key(b=[2, 3], a=1)
+    assert job_key(a=1) != job_key(a=2)
+
+
+def test_identical_jobs_are_merged(queue):
+    started, release = threading.Event(), threading.Event()
+    first = queue.submit("k", blocking(started, release, {"v": 1}))
+    second = queue.submit("k", blocking(threading.Event(), release, {"v": 2}))
+    assert first == second and [j["id"] for j in queue.active()] == [first]
+    release.set()
+    row = queue.wait(first, timeout=10)
+    assert row["status"] == DONE and row["progress"] == 1.0
+    result = queue.result(first)
+    assert result["v"] == 1 and "metrics" in result
+    assert queue.submit("k", lambda ctx: {"v": 3}) != first  # المهمة المكتملة لا تُدمج
+
+
+def test_cancel_waits_for_last_subscriber(queue):
+    started, release = threading.Event(), threading.Event()
+    job = queue.submit("k", blocking(started, release))
+    queue.submit("k", blocking(started, release))
+    assert started.wait(10)
+    assert queue.cancel(job)
+    assert queue.wait(job, timeout=0.2)["status"] != CANCELLED
+    assert queue.cancel(job)
+    assert queue.wait(job, timeout=10)["status"] == CANCELLED
+    assert queue.result(job) is None and not queue.cancel(job)
+
+
+def test_failures_are_recorded(queue):
+    def boom(ctx):
+        raise ValueError("no scenes")
+    row = queue.wait(queue.submit("k", boom), timeout=10)
+    assert row["status"] == FAILED and row["error"] == "ValueError: no scenes"
+
+
+def test_restart_marks_unfinished_jobs_failed(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    started, release = threading.Event(), threading.Event()
+    job = JobQueue(path).submit("k", blocking(started, release))
+    assert started.wait(10)
+    row = JobQueue(path).status(job)
+    release.set()
+    assert row["status"] == FAILED and row["error"] == "interrupted by restart"
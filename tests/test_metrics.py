@@ -0,0 +1,110 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from khaled import metrics
+
+
+@pytest.fixture
+def sinks(tmp_path, monkeypatch):
+    log, prom = tmp_path / "metrics.jsonl", tmp_path / "khaled.prom"
+    monkeypatch.setattr(metrics, "METRICS_LOG", str(log))
+    monkeypatch.setattr(metrics, "PROM_TEXTFILE", str(prom))
+    monkeypatch.setattr(metrics, "_totals", {})
+    return log, prom
+
+
+def records(log):
+    return [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+
+
+def test_run_metrics_record():
+    run = metrics.RunMetrics("indicator", label="NDVI")
+    run.add("fetch", 0.5, bytes=8, pixels=2)
+    run.add("render", 0.25)
+    rec = run.record()
+    assert rec["kind"] == "indicator" and rec["label"] == "NDVI" and rec["total_s"] >= 0
+    assert rec["stages"] == [{"stage": "fetch", "seconds": 0.5, "bytes": 8, "pixels": 2},
+                             {"stage": "render", "seconds": 0.25}]
+    rec["stages"].clear()
+    assert len(run.stages) == 2  # السجل نسخة لا مرجع
+
+
+def test_stage_outside_collect_records_nothing(sinks):
+    with metrics.stage("orphan") as counters:
+        counters["bytes"] = 1
+    assert metrics.current() is None and not sinks[0].exists()
+
+
+def test_collect_times_stages_and_counters(sinks):
+    log, _ = sinks
+    with metrics.collect("indicator", label="Chl_a") as run:
+        with metrics.stage("fetch") as counters:
+            time.sleep(0.05)
+            counters.update(metrics.array_counters(np.zeros((4, 5), dtype=np.float32)))
+        with metrics.stage("render", frames=3):
+            pass
+    [rec] = records(log)
+    assert rec["status"] == "ok" and rec["label"] == "Chl_a" and rec["stages"] == run.record()["stages"]
+    fetch, render = rec["stages"]
+    assert fetch["stage"] == "fetch" and fetch["seconds"] >= 0.05
+    assert (fetch["bytes"], fetch["pixels"]) == (80, 20) and render["frames"] == 3
+    assert rec["total_s"] >= fetch["seconds"]
+
+
+def test_failed_run_is_logged_with_its_error(sinks):
+    with pytest.raises(ValueError), metrics.collect("indicator"):
+        with metrics.stage("fetch"):
+            raise ValueError("boom")
+    [rec] = records(sinks[0])
+    assert rec["status"] == "ValueError" and [s["stage"] for s in rec["stages"]] == ["fetch"]
+
+
+def test_bind_carries_the_run_into_worker_threads(sinks):
+    def work(i):
+        with metrics.stage("tile", pixels=i):
+            pass
+
+    def bound(i):
+        with metrics.bind(run):
+            return work(i)
+
+    with metrics.collect("mosaic", emit_record=False) as run:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(work, range(3)))
+            assert len(run.stages) == 0  # خيوط المجمع لا ترث السياق
+            list(pool.map(bound, range(3)))
+            assert list(pool.map(lambda _: metrics.current(), range(3))) == [None] * 3  # bind يُفك بعد العمل
+    assert sorted(s["pixels"] for s in run.stages) == [0, 1, 2]
+    assert not sinks[0].exists()  # emit_record=False
+
+
+def test_nested_collect_restores_the_outer_run(sinks):
+    with metrics.collect("outer", emit_record=False) as outer:
+        with metrics.collect("inner", emit_record=False) as inner:
+            assert metrics.current() is inner
+        assert metrics.current() is outer
+    assert metrics.current() is None
+
+
+def test_prometheus_textfile_accumulates_totals(sinks):
+    _, prom = sinks
+    for _ in range(2):
+        with metrics.collect("indicator"):
+            with metrics.stage("fetch", bytes=100, pixels=25):
+                pass
+    with metrics.collect("report"):
+        with metrics.stage("render"):
+            pass
+    text = prom.read_text(encoding="utf-8")
+    assert 'khaled_stage_runs_total{kind="indicator",stage="fetch"} 2' in text
+    assert 'khaled_stage_bytes_total{kind="indicator",stage="fetch"} 200' in text
+    assert 'khaled_stage_pixels_total{kind="indicator",stage="fetch"} 50' in text
+    assert 'khaled_stage_runs_total{kind="report",stage="render"} 1' in text
+    assert text.count("# TYPE") == 4 and not (prom.parent / "khaled.prom.tmp").exists()
+    seconds = [line for line in text.splitlines() if line.startswith("khaled_stage_seconds_total{")]
+    assert len(seconds) == 2 and all(float(line.split()[-1]) >= 0 for line in seconds)
+    assert len(records(sinks[0])) == 3
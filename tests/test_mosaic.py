@@ -0,0 +1,80 @@
+import os
+import time
+
+import numpy as np
+from sentinelhub import BBox, CRS
+
+from khaled import mosaic
+from khaled.indicators import aoi_grid
+from khaled.mosaic import Mosaic, QualityTarget
+from khaled.tiles import TILE_PX, TileCache, pixel_window, window_bbox
+
+BBOX, SIZE = aoi_grid([31.0, 31.05], [30.0, 30.05])
+
+
+def fake_tile(tile_bbox, tile_size):
+    w, h = tile_size
+    xs = np.linspace(tile_bbox.min_x, tile_bbox.max_x, w, endpoint=False)
+    ys = np.linspace(tile_bbox.max_y, tile_bbox.min_y, h, endpoint=False)
+    gx, gy = np.meshgrid(xs, ys)
+    return ((gx * 7 + gy * 3) % 1.0)[..., None]
+
+
+def make_mosaic(root, name, shape=(64, 64), age=0.0, finish=True):
+    path = os.path.join(root, name)
+    m = Mosaic.create(path, shape, BBox([31, 30, 31.01, 30.01], CRS.WGS84))
+    if finish:
+        m.finish()
+        stamp = time.time() - age
+        os.utime(os.path.join(path, "meta.json"), (stamp, stamp))
+    else:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_streaming_assemble_does_not_store_tiles(tmp_path):
+    tiles = TileCache(str(tmp_path / "t.sqlite"), str(tmp_path / "tiles"))
+    window = pixel_window(BBOX, 0)
+    shape = (window[3] - window[1], window[2] - window[0])
+    m = Mosaic.create(str(tmp_path / "m"), shape, window_bbox(window, 0, BBOX.crs), has_qa=True)
+
+    out, _, (w, h), fetched = tiles.assemble(fake_tile, "L-x-L2A", BBOX, "2024-06-01", z=0, out=m)
+    assert out is m and (w, h) == (shape[1], shape[0]) and fetched > 0
+    assert not any(files for _, _, files in os.walk(tmp_path / "tiles"))
+    direct, *_ = tiles.assemble(fake_tile, "L-x-L2A", BBOX, "2024-06-01", z=0)
+    np.testing.assert_allclose(m[:, :], direct, atol=1e-3 * np.nanmax(direct))
+
+    tiles.assemble(lambda b, s: np.full((s[1], s[0], 1), 200 << 8, dtype=np.float32),
+                   "QA-x-L2A", BBOX, "2024-06-01", z=0, out=QualityTarget(m))
+    assert (np.asarray(m.qa) == 200 << 8).all()
+
+
+def test_streaming_assemble_stores_when_asked(tmp_path):
+    tiles = TileCache(str(tmp_path / "t.sqlite"), str(tmp_path / "tiles"))
+    window = pixel_window(BBOX, 0)
+    target = np.full((window[3] - window[1], window[2] - window[0]), np.nan, dtype=np.float32)
+    _, _, _, fetched = tiles.assemble(fake_tile, "L-x-L2A", BBOX, "2024-06-01", z=0, out=target, store=True)
+    _, _, _, again = tiles.assemble(fake_tile, "L-x-L2A", BBOX, "2024-06-01", z=0)
+    assert fetched > 0 and again == 0
+
+
+def test_evict_removes_least_recently_used(tmp_path):
+    root = str(tmp_path)
+    old = make_mosaic(root, "old", age=300)
+    mid = make_mosaic(root, "mid", age=200)
+    new = make_mosaic(root, "new", age=100)
+    each = 64 * 64 * 2
+    assert Mosaic.open(old) is not None  # الاستخدام يجدّد ترتيبه
+    removed = mosaic.evict(root, max_bytes=2.5 * each, keep=[new])
+    assert removed == [mid]
+    assert os.path.isdir(old) and os.path.isdir(new)
+    assert mosaic.evict(root, max_bytes=0, keep=[new]) == [old]
+
+
+def test_evict_removes_stale_unfinished_builds(tmp_path):
+    root = str(tmp_path)
+    stale = make_mosaic(root, "stale", age=mosaic.STALE_S + 60, finish=False)
+    running = make_mosaic(root, "running", finish=False)
+    assert mosaic.evict(root, max_bytes=10**12) == [stale]
+    assert os.path.isdir(running)
@@ -0,0 +1,85 @@
+from collections import deque
+
+import numpy as np
+import pytest
+from sentinelhub import BBox, CRS
+
+from khaled.objects import class_breaks, extract_objects, label_components
+
+
+def bfs_labels(mask, connectivity):
+    """وسم مرجعي بالبحث بالعرض بكسلًا بكسلًا."""
+    h, w = mask.shape
+    steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    if connectivity == 8:
+        steps += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+    labels, n = np.zeros((h, w), dtype=np.int32), 0
+    for r, c in zip(*np.nonzero(mask)):
+        if labels[r, c]:
+            continue
+        n += 1
+        labels[r, c] = n
+        todo = deque([(r, c)])
+        while todo:
+            y, x = todo.popleft()
+            for dy, dx in steps:
+                yy, xx = y + dy, x + dx
+                if 0 <= yy < h and 0 <= xx < w and mask[yy, xx] and not labels[yy, xx]:
+                    labels[yy, xx] = n
+                    todo.append((yy, xx))
+    return labels, n
+
+
+def same_partition(a, b):
+    """الوسمان يقسمان البكسلات المجموعات نفسها (الأرقام قد تختلف)."""
+    pairs = np.unique(np.stack([a.ravel(), b.ravel()]), axis=1)
+    return len(pairs[0]) == len(np.unique(a)) == len(np.unique(b))
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+@pytest.mark.parametrize("seed", range(6))
+def test_labels_match_bfs(seed, connectivity):
+    rng = np.random.default_rng(seed)
+    mask = rng.random((rng.integers(1, 60), rng.integers(1, 60))) < rng.uniform(0.2, 0.7)
+    labels, n = label_components(mask, connectivity)
+    ref, ref_n = bfs_labels(mask, connectivity)
+    assert n == ref_n
+    assert ((labels > 0) == mask).all()
+    assert same_partition(labels, ref)
+
+
+def test_labels_handle_spirals_and_empty_masks():
+    # لولب طويل: مقاطع كثيرة تُدمج عبر سلسلة أطول من دورة واحدة
+    mask = np.zeros((41, 41), dtype=bool)
+    top, left, bottom, right = 0, 0, 40, 40
+    while top <= bottom and left <= right:
+        mask[top, left:right + 1] = mask[top:bottom + 1, right] = True
+        mask[bottom, left:right + 1] = True
+        mask[top + 2:bottom + 1, left] = True
+        top, left, bottom, right = top + 2, left + 2, bottom - 2, right - 2
+    assert label_components(mask)[1] == bfs_labels(mask, 8)[1]
+    assert label_components(np.zeros((5, 5), dtype=bool))[1] == 0
+    diagonal = np.eye(4, dtype=bool)
+    assert label_components(diagonal, 8)[1] == 1 and label_components(diagonal, 4)[1] == 4
+
+
+def test_extract_objects_measures_each_blob():
+    img = np.full((20, 30), 0.1, dtype=np.float32)
+    img[2:6, 3:9] = 5.0     # 24 بكسلًا
+    img[10:13, 20:22] = 8.0  # 6 بكسلات
+    img[18, 0] = 9.0         # أصغر من min_pixels
+    img[0, 29] = np.nan
+    bbox = BBox([31.0, 30.0, 31.03, 30.02], CRS.WGS84)
+    objects, summary = extract_objects(img, 1.0, bbox, (30, 20), min_pixels=4)
+    assert [o["pixels"] for o in objects] == [24, 6] and summary["count"] == 2
+    assert objects[0]["mean"] == 5.0 and objects[1]["max"] == 8.0
+    assert objects[0]["polygon"].area == pytest.approx(6 * 0.001 * 4 * 0.001)
+    lon, lat = objects[0]["centroid"]
+    assert lon == pytest.approx(31.006) and lat == pytest.approx(30.016)
+    assert summary["total_km2"] == pytest.approx(sum(o["area_km2"] for o in objects))
+
+
+def test_class_breaks_from_description():
+    text = ("مقدمة\n**تفسير القيم:**\n"
+            "  * **< 10:** منخفض\n  * **10 - 25:** متوسط\n  * **> 25:** مرتفع\n* ملاحظة")
+    assert class_breaks(text) == [(-np.inf, "منخفض"), (10.0, "متوسط"), (25.0, "مرتفع")]
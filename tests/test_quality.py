@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from khaled import quality
+from khaled.bandmath import evaluate_evalscript
+
+
+def codes(mdwi, flags=0):
+    return np.uint16((quality.mdwi_code(mdwi) << 8) | flags)
+
+
+@pytest.mark.parametrize("shape", [(4, 5), (1, 5), (4, 1), (4, 5, 1), (1, 5, 1)])
+def test_encode_keeps_the_raster_shape(shape):
+    arr = np.full(shape, float(codes(0.5)), dtype=np.float32)
+    assert quality.encode(arr).shape == shape[:2]
+    assert quality.from_mdwi(np.full(shape, 0.5)).shape == shape[:2]
+
+
+def test_encode_nan_is_nodata():
+    qa = quality.encode(np.float32([[np.nan, codes(0.2, quality.FLAGS["cloud"])]]))
+    assert qa.dtype == np.uint16
+    assert qa[0, 0] == quality.NODATA
+    assert quality.flags(qa)[0, 1] == quality.FLAGS["cloud"] | quality.FLAGS["water"]
+
+
+def test_mdwi_round_trip_within_one_step():
+    mdwi = np.linspace(-1, 1, 101, dtype=np.float32)[None]
+    back = quality.decode_mdwi(quality.from_mdwi(mdwi))
+    assert np.abs(back - mdwi).max() <= 1 / 127 + 1e-6
+    assert np.isnan(quality.decode_mdwi(np.uint16([quality.NODATA]))).all()
+
+
+def test_water_threshold_and_undefined_mdwi():
+    mdwi_bytes = np.uint8([quality.mdwi_code(-0.2), quality.mdwi_code(0.1), quality.MDWI_NODATA])
+    assert quality.water(mdwi_bytes).tolist() == [False, True, False]
+    assert quality.water(mdwi_bytes, threshold=-0.5).tolist() == [True, True, False]
+
+
+def test_select_excludes_flags_and_nodata():
+    qa = np.uint16([codes(0.5), codes(0.5, quality.FLAGS["cloud"]), codes(0.5, quality.FLAGS["snow"]),
+                    codes(-0.5), quality.NODATA])
+    assert quality.select(qa).tolist() == [True, False, False, False, False]
+    assert quality.select(qa, exclude=("snow",)).tolist() == [True, True, False, False, False]
+    assert quality.select(qa, exclude=(), water_only=False).tolist() == [True, True, True, True, False]
+
+
+def test_coverage_fractions_ignore_nodata():
+    qa = np.uint16([codes(0.5), codes(0.5, quality.FLAGS["cloud"]), codes(-0.5), quality.NODATA])
+    cov = quality.coverage(qa)
+    assert cov["water"] == pytest.approx(2 / 3)
+    assert cov["cloud"] == pytest.approx(1 / 3)
+
+
+def test_evalscript_codes_match_scl_classes():
+    scl = np.float32([[0, 3, 4, 8, 9, 10, 11]])
+    b03, b08 = np.full_like(scl, 0.3), np.full_like(scl, 0.1)
+    qa = quality.encode(evaluate_evalscript(quality.QUALITY_EVALSCRIPT, {"B03": b03, "B08": b08, "SCL": scl}))
+    f = quality.flags(qa) & (0xFF ^ quality.FLAGS["water"])
+    F = quality.FLAGS
+    assert f[0].tolist() == [F["nodata"], F["shadow"], 0, F["cloud"], F["cloud"], F["cirrus"], F["snow"]]
+    assert quality.decode_mdwi(qa)[0, 2] == pytest.approx(0.5, abs=1 / 127)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from khaled import quality
+from khaled.raster import FLOAT16_TABLE, MaskBand, Raster, float16_codes, hist_percentiles, shared_mask
+from khaled.results import summary_stats
+
+CLEAR_WATER = 200 << 8
+
+
+def image(seed=0, shape=(37, 53)):
+    rng = np.random.default_rng(seed)
+    img = rng.lognormal(1.0, 1.2, shape).astype(np.float32)
+    img[rng.random(shape) < 0.1] = np.nan
+    return img
+
+
+def test_float16_codes_preserve_order():
+    values = np.float32([-60000, -3.5, -1e-6, 0.0, 1e-6, 0.25, 2.0, 65000, np.inf])
+    codes = float16_codes(values)
+    assert (np.diff(codes.astype(np.int64)) >= 0).all()
+    assert np.array_equal(FLOAT16_TABLE[codes], values.astype(np.float16).astype(np.float32))
+    finite = FLOAT16_TABLE[np.isfinite(FLOAT16_TABLE)]
+    assert (np.diff(finite) >= 0).all()
+
+
+@pytest.mark.parametrize("encoding", ["linear", "float16"])
+def test_pack_roundtrip_within_code_step(encoding):
+    img = image()
+    raster = Raster.pack(img, encoding=encoding)
+    out = raster[:, :]
+    assert np.array_equal(np.isnan(out), np.isnan(img))
+    rtol = 2 ** -11 if encoding == "float16" else 0
+    atol = 0 if encoding == "float16" else (np.nanmax(img) - np.nanmin(img)) / 65535
+    np.testing.assert_allclose(out, img, rtol=rtol, atol=atol * 0.51 + 1e-7, equal_nan=True)
+    # النافذة والبكسل المفرد والفهرسة بمصفوفة أعمدة
+    np.testing.assert_array_equal(raster[5:9, 10:20], out[5:9, 10:20])
+    assert raster[3, 4] == out[3, 4] or np.isnan(out[3, 4]) and np.isnan(raster[3, 4])
+    cols = np.array([0, 7, 8, 52])
+    np.testing.assert_array_equal(raster.mask("valid", 6, cols), ~np.isnan(img[6, cols]))
+
+
+def test_auto_encoding_picks_float16_for_long_tails():
+    tail = image()
+    tail[0, 0] = 5000.0  # بؤرة ازدهار: الخطوة الخطية (0.08) أكبر من ‰ القيمة النموذجية
+    assert Raster.pack(tail).table is FLOAT16_TABLE
+    assert Raster.pack(np.linspace(0.2, 0.4, 100, dtype=np.float32)[None]).table is not FLOAT16_TABLE
+    assert Raster.pack(np.float32([[1e6, 2e6]])).table is not FLOAT16_TABLE
+
+
+def test_packed_masks_are_one_bit_per_pixel():
+    img = image(shape=(64, 1000))
+    qa = np.full(img.shape, CLEAR_WATER, dtype=np.uint16)
+    raster = Raster.pack(img, qa)
+    assert raster.masks["valid"].shape == (64, 125)
+    assert raster.nbytes < img.nbytes  # رموز 2 بايت + أقنعة بتية + بايت MDWI
+
+
+@pytest.mark.parametrize("q", [[0], [2, 98], [50], [33.3, 99.9], [100]])
+def test_hist_percentiles_match_numpy(q):
+    raster = Raster.pack(image(1), encoding="float16")
+    values = raster[:, :]
+    expected = np.percentile(values[np.isfinite(values)], q)
+    np.testing.assert_allclose(raster.percentiles(q), expected, rtol=1e-6)
+
+
+def test_stats_match_summary_stats():
+    raster = Raster.pack(image(2))
+    stats, ref = raster.stats(), summary_stats(raster[:, :])
+    assert stats["valid_px"] == ref["valid_px"]
+    for k in ("min", "max", "mean", "p2", "p98"):
+        assert stats[k] == pytest.approx(ref[k], rel=1e-5)
+    with pytest.raises(ValueError):
+        hist_percentiles(FLOAT16_TABLE, np.zeros(65536, dtype=np.int64), [50])
+
+
+def test_quality_mask_matches_select():
+    img = image(3)
+    rng = np.random.default_rng(3)
+    mdwi = rng.integers(0, 256, img.shape).astype(np.uint16)
+    flags = rng.choice([0, 2, 4, 8, 16], img.shape).astype(np.uint16)
+    qa = (mdwi << 8) | flags
+    raster = Raster.pack(img, qa)
+    for options in ({}, {"water_only": False}, {"water_threshold": 0.3}, {"exclude": ("cloud",)}):
+        expected = np.where(quality.select(qa, **options), img, np.nan)
+        np.testing.assert_array_equal(np.isnan(raster.quality(**options)[:, :]), np.isnan(expected))
+
+
+def test_mask_band_and_shared_mask():
+    a, b = image(4), image(5)
+    ra, rb = shared_mask([Raster.pack(a), Raster.pack(b)])
+    both = np.isfinite(a) & np.isfinite(b)
+    assert np.array_equal(np.isfinite(ra[:, :]), both) and np.array_equal(np.isfinite(rb[:, :]), both)
+
+    qa = np.where(np.arange(a.shape[1]) % 2, CLEAR_WATER, 0).astype(np.uint16)[None].repeat(a.shape[0], 0)
+    band = MaskBand(Raster.pack(a, qa), "water")[:, :]
+    assert np.isnan(band[np.isnan(a)]).all()
+    np.testing.assert_array_equal(band[np.isfinite(a)], (qa[np.isfinite(a)] == CLEAR_WATER).astype(np.float32))
+
+
+def test_mapped_transforms_table_only():
+    raster = Raster.pack(image(6))
+    logged = raster.mapped(np.log1p)
+    assert logged.codes is raster.codes
+    np.testing.assert_allclose(logged[:, :], np.log1p(raster[:, :]), rtol=1e-6, equal_nan=True)
+
+
+@pytest.mark.parametrize("shape", [(1, 9), (9, 1), (1, 1), (6, 9, 1)])
+def test_pack_keeps_single_row_and_column_grids(shape):
+    img = np.arange(np.prod(shape), dtype=np.float32).reshape(shape)
+    qa = np.full(shape, CLEAR_WATER, dtype=np.uint16)
+    raster = Raster.pack(img, qa)
+    assert raster.shape == shape[:2] and raster.quality().stats()["valid_px"] == np.prod(shape)
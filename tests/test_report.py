@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from khaled.standin import serve_in_thread
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def standin():
+    server, url = serve_in_thread()
+    yield url
+    server.shutdown()
+
+
+def test_cli_writes_one_report_per_area(standin, tmp_path):
+    areas = tmp_path / "areas.json"
+    areas.write_text(json.dumps([{"name": "خزان 1", "bbox": [31.0, 30.0, 31.03, 30.03]},
+                                 {"name": "خزان 2", "bbox": [31.1, 30.0, 31.13, 30.03],
+                                  "indicators": ["FAI"]}]), encoding="utf-8")
+    env = {k: v for k, v in os.environ.items() if k not in ("INSTANCE_ID", "SH_CLIENT_ID", "SH_CLIENT_SECRET")}
+    env.update(PYTHONPATH=ROOT, KHALED_SH_STANDIN=standin, KHALED_CACHE_DIR=str(tmp_path / "cache"),
+               KHALED_METRICS_LOG=str(tmp_path / "metrics.jsonl"))
+    out = subprocess.run(
+        [sys.executable, "-m", "khaled.report", str(areas), "--indicators", "Chl_a", "Turbidity",
+         "--start", "2024-06-01", "--end", "2024-06-25", "--workers", "2", "--out", str(tmp_path / "out")],
+        capture_output=True, text=True, timeout=300, cwd=tmp_path, env=env
+    )
+    assert out.returncode == 0, out.stderr[-2000:]
+    reports = sorted(os.listdir(tmp_path / "out"))
+    assert len(reports) == 2 and all(r.endswith(".html") for r in reports)
+    assert "failed" not in out.stdout
+    assert [line.split()[-2] for line in out.stdout.splitlines()] == ["2", "1"]
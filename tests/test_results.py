@@ -0,0 +1,76 @@
+import datetime
+import os
+
+import numpy as np
+import pytest
+from sentinelhub import BBox, CRS, Geometry
+from shapely.geometry import box
+
+from khaled.results import ResultsIndex, aoi_hash, resolution_key, row_bbox, summary_stats
+
+BBOX = BBox([31.0, 30.0, 31.05, 30.04], CRS.WGS84)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ResultsIndex(str(tmp_path / "results.sqlite"), str(tmp_path / "rasters"))
+
+
+def test_aoi_hash_separates_polygons_sharing_a_bbox():
+    a = Geometry(box(31.0, 30.0, 31.05, 30.04), CRS.WGS84)
+    b = Geometry(box(31.01, 30.0, 31.05, 30.04), CRS.WGS84)
+    assert aoi_hash(BBOX) == aoi_hash(BBox(list(BBOX), CRS.WGS84))
+    assert len({aoi_hash(BBOX), aoi_hash(BBOX, a), aoi_hash(BBOX, b)}) == 3
+    assert resolution_key((512, 384)) == "512x384"
+
+
+def test_summary_stats_ignores_nan():
+    img = np.array([[1.0, np.nan], [3.0, 5.0]], dtype=np.float32)
+    stats = summary_stats(img)
+    assert (stats["min"], stats["max"], stats["mean"], stats["valid_px"]) == (1.0, 5.0, 3.0, 3)
+    assert summary_stats(np.full((2, 2), np.nan))["valid_px"] == 0
+
+
+def test_put_get_roundtrip(index):
+    img = np.arange(12, dtype=np.float32).reshape(3, 4)
+    qa = np.full((3, 4), 200 << 8, dtype=np.uint16)
+    index.put("aoi", "NDCI", "2024-06-01", "4x3", BBOX, img, qa)
+    row = index.get("aoi", "NDCI", "2024-06-01", "4x3")
+    assert row["has_mask"] == 1 and row["max"] == 11.0 and list(row_bbox(row)) == list(BBOX)
+    loaded, loaded_qa = index.load(row)
+    np.testing.assert_array_equal(loaded, img)
+    np.testing.assert_array_equal(loaded_qa, qa)
+    assert index.get("aoi", "NDCI", "2024-06-02", "4x3") is None
+
+
+def test_missing_raster_file_is_a_miss(index):
+    row = index.put("aoi", "NDCI", "2024-06-01", "1x1", BBOX, np.ones((1, 1), np.float32))
+    os.remove(row["raster_path"])
+    assert index.get("aoi", "NDCI", "2024-06-01", "1x1") is None
+
+
+def test_history_is_newest_first(index):
+    for date in ("2024-05-01", "2024-07-01", "2024-06-01"):
+        index.put("aoi", "NDCI", date, "1x1", BBOX, np.ones((1, 1), np.float32))
+    index.put("other", "NDCI", "2024-08-01", "1x1", BBOX, np.ones((1, 1), np.float32))
+    assert [r["scene_date"] for r in index.history("aoi")] == ["2024-07-01", "2024-06-01", "2024-05-01"]
+    assert len(index.history("aoi", limit=2)) == 2
+
+
+def test_searches_cached_only_for_closed_intervals(index):
+    index.store_search("aoi", "sentinel-2-l2a", ("2024-06-01", "2024-06-30"), "2024-06-28")
+    assert index.cached_search("aoi", "sentinel-2-l2a", ("2024-06-01", "2024-06-30")) == "2024-06-28"
+    today = datetime.date.today().isoformat()
+    index.store_search("aoi", "sentinel-2-l2a", ("2024-06-01", today), "2024-06-28")
+    assert index.cached_search("aoi", "sentinel-2-l2a", ("2024-06-01", today)) is None
+
+
+def test_stats_use_quality_mask(index):
+    img = np.array([[1.0, 2.0], [3.0, 100.0]], dtype=np.float32)
+    cloud = (200 << 8) | 2
+    qa = np.array([[200 << 8, 200 << 8], [200 << 8, cloud]], dtype=np.uint16)
+    row = index.put("aoi", "NDCI", "2024-06-01", "2x2", BBOX, img, qa)
+    assert (row["max"], row["mean"], row["valid_px"]) == (3.0, 2.0, 3)
+    stored = index.get("aoi", "NDCI", "2024-06-01", "2x2")
+    assert stored["max"] == 3.0
+    np.testing.assert_array_equal(index.load(stored)[0], img)  # النقطية نفسها تُخزن كاملة
@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+from sentinelhub import BBox, CRS, DataCollection
+
+from khaled import scenes
+from khaled.pipeline import CatalogSearchError
+from khaled.scenes import PAGE, SceneCatalog, cells_for, mgrs_tile, months
+
+DC = DataCollection.SENTINEL2_L2A
+BBOX = BBox([31.1, 30.1, 31.2, 30.2], CRS.WGS84)
+
+
+class FakeCatalog:
+    """كتالوج اصطناعي: مشهدان (بلاطتان) كل يومين، ويسجّل كل بحث وعدد العناصر المقروءة."""
+
+    searches = []
+    fail_after = None
+
+    def __init__(self, config=None):
+        pass
+
+    def search(self, collection, bbox, time, limit, fields):
+        assert limit == PAGE and "properties.datetime" in fields["include"]
+        FakeCatalog.searches.append(time)
+        return self._items(*time)
+
+    def _items(self, start, end):
+        day, n = datetime.date.fromisoformat(start), 0
+        while day <= datetime.date.fromisoformat(end):
+            if day.day % 2 == 0:
+                for k, tile in enumerate(("36RUU", "36RUV")):
+                    if FakeCatalog.fail_after is not None and n == FakeCatalog.fail_after:
+                        raise ConnectionError("catalog timeout")
+                    n += 1
+                    yield {"id": f"S2A_MSIL2A_{day:%Y%m%d}T083601_N0510_R064_T{tile}_x",
+                           "bbox": [30.5, 29.5, 31.8, 30.8],
+                           "properties": {"datetime": f"{day}T08:50:00Z", "eo:cloud_cover": 10.0 + 5 * k}}
+            day += datetime.timedelta(days=1)
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(scenes, "SentinelHubCatalog", FakeCatalog)
+    FakeCatalog.searches, FakeCatalog.fail_after = [], None
+    return SceneCatalog(str(tmp_path / "scenes.sqlite"))
+
+
+def test_helpers():
+    assert months(datetime.date(2023, 1, 15), datetime.date(2023, 3, 2)) == [
+        (datetime.date(2023, 1, 1), datetime.date(2023, 1, 31)),
+        (datetime.date(2023, 2, 1), datetime.date(2023, 2, 28)),
+        (datetime.date(2023, 3, 1), datetime.date(2023, 3, 31))]
+    assert cells_for(BBOX) == [(62, 60)]
+    assert len(cells_for(BBox([31.4, 30.4, 31.6, 30.6], CRS.WGS84))) == 4
+    assert mgrs_tile("S2B_MSIL2A_20230601T083559_N0509_R064_T36RUU_20230601") == "36RUU"
+    assert mgrs_tile(None) is None
+
+
+def test_calendar_groups_scenes_by_day(catalog):
+    days = catalog.calendar(None, DC, BBOX, ("2023-06-01", "2023-06-10"))
+    assert [d["date"] for d in days] == ["2023-06-02", "2023-06-04", "2023-06-06", "2023-06-08", "2023-06-10"]
+    assert days[0]["tiles"] == ["36RUU", "36RUV"] and len(days[0]["ids"]) == 2 and days[0]["cloud"] == 10.0
+    # الشهر يُجلب كاملًا ببحث واحد مرقّم (أكثر من صفحة)
+    assert FakeCatalog.searches == [("2023-06-01", "2023-06-30")]
+    assert len(catalog.dates(None, DC, BBOX, ("2023-06-01", "2023-06-30"))) == 15
+
+
+def test_extending_interval_fetches_only_new_months(catalog):
+    catalog.dates(None, DC, BBOX, ("2023-06-01", "2023-06-30"))
+    catalog.dates(None, DC, BBOX, ("2023-03-01", "2023-08-31"))
+    assert FakeCatalog.searches == [("2023-06-01", "2023-06-30"),
+                                    ("2023-03-01", "2023-05-31"), ("2023-07-01", "2023-08-31")]
+    catalog.dates(None, DC, BBOX, ("2023-04-10", "2023-07-20"))
+    assert len(FakeCatalog.searches) == 3
+
+
+def test_latest_stops_at_newest_month_with_scenes(catalog):
+    assert catalog.latest(None, DC, BBOX, ("2022-01-01", "2023-06-15")) == "2023-06-14"
+    assert FakeCatalog.searches == [("2023-06-01", "2023-06-30")]  # التغطية بالشهر الكامل
+
+
+def test_pages_stored_before_a_failure_and_month_refetched(catalog):
+    FakeCatalog.fail_after = PAGE + 10
+    with pytest.raises(CatalogSearchError):
+        catalog.calendar(None, DC, BBOX, ("2023-01-01", "2023-12-31"))
+    assert len(catalog._query(DC, BBOX, "2023-01-01", "2023-12-31")) == PAGE  # الصفحة الأولى كاملة فقط
+    FakeCatalog.fail_after = None
+    days = catalog.calendar(None, DC, BBOX, ("2023-01-01", "2023-12-31"))
+    year = [datetime.date(2023, 1, 1) + datetime.timedelta(days=i) for i in range(365)]
+    assert len(FakeCatalog.searches) == 2 and len(days) == sum(d.day % 2 == 0 for d in year)
@@ -0,0 +1,131 @@
+import datetime
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+import tifffile
+from sentinelhub import SHConfig
+
+from khaled.georef import geometry_mask
+from khaled.indicators import aoi_geometry, aoi_grid, evalscripts
+from khaled.pipeline import catalog_dates, data_collection, fetch_single
+from khaled.standin import CATALOG_PATH, PROCESS_PATH, configure_standin, scene_dates, serve_in_thread
+
+BBOX, SIZE = aoi_grid([31.0, 31.03], [30.0, 30.03])
+NDVI = evalscripts["NDVI"][0]
+
+
+@pytest.fixture
+def standin():
+    servers = []
+
+    def start(**options):
+        server, url = serve_in_thread(**options)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def post(url, path, payload):
+    """يعيد (الحالة، الترويسات، الجسم) دون رفع استثناء لرموز الخطأ."""
+    req = urllib.request.Request(url + path, data=json.dumps(payload).encode("utf-8"),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def process_request(date="2024-06-11", width=8, height=6):
+    return {"input": {"bounds": {"bbox": list(BBOX),
+                                 "properties": {"crs": f"http://www.opengis.net/def/crs/EPSG/0/{BBOX.crs.epsg}"}},
+                      "data": [{"dataFilter": {"timeRange": {"from": f"{date}T00:00:00Z",
+                                                             "to": f"{date}T23:59:59Z"}}}]},
+            "output": {"width": width, "height": height}, "evalscript": NDVI}
+
+
+def test_process_endpoint_returns_float_tiff(standin):
+    server, url = standin()
+    status, headers, body = post(url, PROCESS_PATH, process_request())
+    assert status == 200 and headers["Content-Type"] == "image/tiff"
+    arr = tifffile.imread(io.BytesIO(body))
+    assert arr.shape == (6, 8) and arr.dtype == np.float32 and np.isfinite(arr).all()
+    assert server.state.counts["process"] == 1
+
+    status, _, body = post(url, PROCESS_PATH, {"input": {}})
+    assert status == 400 and "KeyError" in json.loads(body)["error"]["message"]
+
+
+def test_catalog_pages_follow_next(standin):
+    _, url = standin()
+    request = {"datetime": "2024-01-01T00:00:00Z/2024-12-31T23:59:59Z", "limit": 10}
+    dates, pages = [], 0
+    while True:
+        status, _, body = post(url, CATALOG_PATH, request)
+        assert status == 200
+        page = json.loads(body)
+        pages += 1
+        dates += [f["properties"]["datetime"][:10] for f in page["features"]]
+        if "next" not in page["context"]:
+            break
+        request["next"] = page["context"]["next"]
+    expected = [d.isoformat() for d in scene_dates(datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))]
+    assert dates == expected and pages == -(-len(expected) // 10)
+
+
+def test_client_catalog_and_fetch_single(standin):
+    _, url = standin()
+    config = configure_standin(SHConfig(), url)
+    dc = data_collection("L2A")
+    dates = catalog_dates(config, dc, BBOX, ("2024-06-01", "2024-06-30"))
+    assert dates == ["2024-06-01", "2024-06-06", "2024-06-11", "2024-06-16", "2024-06-21", "2024-06-26"]
+
+    arr = fetch_single(config, NDVI, dc, BBOX, SIZE, dates[0])
+    assert arr.shape == (SIZE[1], SIZE[0]) and np.isfinite(arr).all() and (arr != 0).all()
+
+    geometry = aoi_geometry([(31.0, 30.0), (31.03, 30.0), (31.0, 30.03)])
+    clipped = fetch_single(config, NDVI, dc, BBOX, SIZE, dates[0], geometry)
+    inside = geometry_mask(geometry, BBOX, SIZE)
+    assert not inside.all() and (clipped[~inside] == 0).all()
+    np.testing.assert_array_equal(clipped[inside], arr[inside])
+
+
+def test_record_then_replay(standin, tmp_path):
+    _, upstream = standin()
+    _, record_url = standin(upstream=upstream, record_dir=str(tmp_path))
+    status, _, recorded = post(record_url, PROCESS_PATH, process_request())
+    assert status == 200 and len(os.listdir(tmp_path)) == 2  # .bin + .json
+
+    replay, replay_url = standin(replay_dir=str(tmp_path), strict=True)
+    status, headers, replayed = post(replay_url, PROCESS_PATH, process_request())
+    assert status == 200 and replayed == recorded and headers["Content-Type"] == "image/tiff"
+    assert replay.state.counts["replayed"] == 1
+
+    status, _, _ = post(replay_url, PROCESS_PATH, process_request(date="2024-06-16"))
+    assert status == 404 and replay.state.counts["replayed"] == 1
+
+
+def test_latency_and_error_injection(standin):
+    _, slow_url = standin(latency=0.2)
+    t0 = time.perf_counter()
+    assert post(slow_url, PROCESS_PATH, process_request())[0] == 200
+    assert time.perf_counter() - t0 >= 0.2
+
+    server, url = standin(error_rate=1.0, error_status=429, seed=0)
+    status, headers, body = post(url, CATALOG_PATH, {"datetime": "2024-06-01T00:00:00Z/2024-06-30T00:00:00Z"})
+    assert status == 429 and headers["Retry-After"] == "1"
+    assert json.loads(body)["error"]["reason"] == "injected"
+    assert server.state.counts["errors"] == 1
+
+    server, url = standin(error_rate=0.5, seed=1)
+    statuses = [post(url, PROCESS_PATH, process_request(width=2, height=2))[0] for _ in range(20)]
+    assert set(statuses) == {200, 503} and statuses.count(503) == server.state.counts["errors"]
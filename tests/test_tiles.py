@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from sentinelhub import BBox, CRS, Geometry
+from shapely.geometry import box
+
+from khaled.tiles import (
+    BASE_RES_DEG, MAX_PX, TILE_PX, TileCache, grid_layer, grid_level, layer_key, pixel_window, window_bbox
+)
+
+WGS = BBox([31.0, 30.0, 31.1, 30.08], CRS.WGS84)
+UTM = BBox([300_003.0, 3_320_007.0, 305_118.0, 3_324_991.0], CRS(32636))
+
+
+class FakeService:
+    """قيمة كل بكسل دالة في موقع مركزه فقط، فالتجميع من مربعات يطابق الطلب المباشر."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, tile_bbox, tile_size):
+        self.calls.append(tile_bbox)
+        w, h = tile_size
+        dx, dy = (tile_bbox.max_x - tile_bbox.min_x) / w, (tile_bbox.max_y - tile_bbox.min_y) / h
+        xs = tile_bbox.min_x + (np.arange(w) + 0.5) * dx
+        ys = tile_bbox.max_y - (np.arange(h) + 0.5) * dy
+        return (np.sin(xs[None, :] * 50) + np.cos(ys[:, None] * 70)).astype(np.float32)
+
+
+def tiles_of(bbox, z=0):
+    col0, row0, col1, row1 = pixel_window(bbox, z)
+    return {(tx, ty) for tx in range(col0 // TILE_PX, (col1 - 1) // TILE_PX + 1)
+            for ty in range(row0 // TILE_PX, (row1 - 1) // TILE_PX + 1)}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TileCache(str(tmp_path / "tiles.sqlite"), str(tmp_path / "tiles"))
+
+
+@pytest.mark.parametrize("bbox", [WGS, UTM])
+def test_window_covers_bbox_on_grid(bbox):
+    for z in (0, 1, 3):
+        window = pixel_window(bbox, z)
+        aligned = window_bbox(window, z, bbox.crs)
+        assert aligned.min_x <= bbox.min_x and aligned.max_x >= bbox.max_x
+        assert aligned.min_y <= bbox.min_y and aligned.max_y >= bbox.max_y
+        assert pixel_window(aligned, z) == window  # الـ bbox المحاذي يعطي النافذة نفسها
+
+
+def test_utm_grid_uses_native_10m_pixels():
+    col0, row0, col1, row1 = pixel_window(UTM, 0)
+    aligned = window_bbox((col0, row0, col1, row1), 0, UTM.crs)
+    assert (aligned.max_x - aligned.min_x) / (col1 - col0) == 10.0
+    assert aligned.min_x % 10 == 0 and aligned.max_y % 10 == 0
+    assert grid_layer("L", UTM.crs) == "L@32636" and grid_layer("L", CRS.WGS84) == "L"
+
+
+def test_grid_level_keeps_image_within_max_px():
+    assert grid_level(WGS) == 0
+    wide = BBox([30.0, 29.0, 30.0 + 3 * MAX_PX * BASE_RES_DEG, 29.5], CRS.WGS84)
+    z = grid_level(wide)
+    col0, _, col1, _ = pixel_window(wide, z)
+    assert z == 2 and col1 - col0 <= MAX_PX + 1
+
+
+def test_layer_key_tracks_evalscript():
+    assert layer_key("NDCI", "a", "L2A") == layer_key("NDCI", "a", "L2A")
+    assert layer_key("NDCI", "a", "L2A") != layer_key("NDCI", "b", "L2A")
+    assert layer_key("NDCI", "a", "L2A").startswith("NDCI-")
+
+
+@pytest.mark.parametrize("bbox", [WGS, UTM])
+def test_assemble_matches_direct_request(cache, bbox):
+    service = FakeService()
+    img, out_bbox, (w, h), fetched = cache.assemble(service, "L", bbox, "2024-06-01", z=0)
+    assert img.shape == (h, w) and fetched == len(service.calls)
+    np.testing.assert_allclose(img, service(out_bbox, (w, h)), atol=1e-5)
+
+
+def test_overlapping_aoi_fetches_only_missing_tiles(cache):
+    service = FakeService()
+    _, _, _, first = cache.assemble(service, "L", WGS, "2024-06-01", z=0)
+    _, _, _, again = cache.assemble(service, "L", WGS, "2024-06-01", z=0)
+    assert first > 0 and again == 0
+
+    shifted = BBox([31.05, 30.0, 31.15, 30.08], CRS.WGS84)
+    _, _, _, more = cache.assemble(service, "L", shifted, "2024-06-01", z=0)
+    assert more == len(tiles_of(shifted) - tiles_of(WGS))
+    _, _, _, other_date = cache.assemble(service, "L", WGS, "2024-06-02", z=0)
+    assert other_date == first
+
+
+def test_assemble_skips_tiles_outside_geometry(cache):
+    service = FakeService()
+    corner = Geometry(box(31.0, 30.075, 31.005, 30.08), CRS.WGS84)
+    img, _, _, fetched = cache.assemble(service, "L", WGS, "2024-06-01", z=0, geometry=corner)
+    full = TileCache(cache.db_path + ".2", cache.tile_dir + "2").assemble(service, "L", WGS, "2024-06-01", z=0)
+    assert 0 < fetched < full[3]
+    assert np.isnan(img).any() and np.isfinite(img).any()
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from khaled import timelapse as tl
+from khaled.indicators import aoi_grid, evalscripts
+from khaled.timelapse import ordered_frames, render_pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_workers_never_import_the_main_script(tmp_path):
+    """كل عمال المجمع (لا الأول وحده) يُطلقون دون إعادة تشغيل السكربت الرئيسي كـ ``__mp_main__``."""
+    marker = tmp_path / "reimported"
+    script = tmp_path / "app.py"
+    script.write_text(textwrap.dedent(f"""
+        import time
+        if __name__ != "__main__":
+            open({str(marker)!r}, "a").write(__name__ + "\\n")
+        from khaled.timelapse import render_pool
+        if __name__ == "__main__":
+            with render_pool(3) as pool:
+                for future in [pool.submit(time.sleep, 0.2) for _ in range(9)]:
+                    future.result()
+                print(len(pool._processes))
+    """))
+    out = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120,
+                         env={**os.environ, "PYTHONPATH": ROOT})
+    assert out.returncode == 0, out.stderr
+    assert out.stdout.strip() == "3"
+    assert not marker.exists(), marker.read_text()
+
+
+def test_ordered_frames_keeps_submission_order():
+    with render_pool(2) as pool:
+        frames = list(ordered_frames(pool, ((np.full(3, i),) for i in range(7)), window=3, fn=np.sum))
+    assert frames == [3 * i for i in range(7)]
+
+
+DATES = ["2024-06-01", "2024-06-06", "2024-06-11"]
+
+
+def fake_scene(config, evalscript, tier, bbox, size, date, quality=False, **kwargs):
+    w, h = size
+    img = np.full((h, w), DATES.index(date) / 2, dtype=np.float32)
+    img[0, 0] = np.nan
+    return {"img": img, "qa": None, "scene_date": date, "warnings": []}
+
+
+@pytest.mark.parametrize("fmt, public_api", [("gif", False), ("webp", False), ("webp", True)])
+def test_timelapse_writes_every_frame(tmp_path, monkeypatch, fmt, public_api):
+    if public_api:  # Pillow بلا المرمِّز التزايدي: الإطارات تُكتب بـ Image.save(save_all=True)
+        monkeypatch.setattr(tl, "_anim_encoder", lambda size: None)
+    monkeypatch.setattr(tl, "fetch_scene", fake_scene)
+    bbox, size = aoi_grid([31.0, 31.01], [30.0, 30.01])
+    ev, label, tier = evalscripts["NDVI"]
+    path = str(tmp_path / f"movie.{fmt}")
+    out = tl.timelapse(None, ev, tier, label, bbox, size, ("2024-06-01", "2024-06-11"), path, fmt=fmt,
+                       dates=list(DATES), fps=5, max_side=64, workers=1)
+    assert out["frames"] == 3 and out["mime"] == tl.FORMATS[fmt] and out["bytes"] == os.path.getsize(path)
+    with Image.open(path) as movie:
+        assert movie.format == fmt.upper() and movie.n_frames == 3
+        centres = []
+        for i in range(3):
+            movie.seek(i)
+            centres.append(tuple(np.asarray(movie.convert("RGB"))[movie.height // 2, movie.width // 2]))
+            assert movie.info["duration"] == 200 and movie.info["loop"] == 0
+    assert len(set(centres)) == 3  # كل إطار بلون مشهده
@@ -0,0 +1,70 @@
+import logging
+import sqlite3
+import threading
+
+import numpy as np
+
+from khaled import watchlist
+from khaled.indicators import aoi_geometry, aoi_grid
+from khaled.watchlist import Scheduler, WatchList, classify
+
+BBOX, SIZE = aoi_grid([31.0, 31.03], [30.0, 30.03])
+
+
+def test_scheduler_logs_failures_and_keeps_running(caplog):
+    calls, twice = [], threading.Event()
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 2:
+            twice.set()
+        if len(calls) == 1:
+            raise RuntimeError("catalog down")
+
+    scheduler = Scheduler(fn, 0.01)
+    with caplog.at_level(logging.ERROR, logger="khaled.watchlist"):
+        scheduler.start()
+        assert twice.wait(5)
+        scheduler.stop()
+        scheduler.join(5)
+    [record] = caplog.records
+    assert record.getMessage() == "watch-list run failed" and "catalog down" in caplog.text
+    assert record.exc_info[0] is RuntimeError
+
+
+def test_classify_picks_highest_break_below_value():
+    breaks = [(float("-inf"), "low"), (10.0, "mid"), (25.0, "high")]
+    assert [classify(v, breaks) for v in (3, 10, 24.9, 40, None)] == ["low", "mid", "mid", "high", None]
+
+
+def test_watch_geometry_round_trip_and_clips_scenes(tmp_path, monkeypatch):
+    wl = WatchList(str(tmp_path / "w.sqlite"))
+    geometry = aoi_geometry([(31.0, 30.0), (31.03, 30.0), (31.0, 30.03)])
+    wl.add("triangle", BBOX, SIZE, ["NDVI"], "2024-06-01", geometry=geometry)
+    wl.add("box", BBOX, SIZE, ["NDVI"], "2024-06-01")
+    box, triangle = wl.watches()
+    assert box["geometry"] is None
+    assert triangle["geometry"].crs == BBOX.crs
+    assert triangle["geometry"].geometry.equals_exact(geometry.transform(BBOX.crs).geometry, 1e-3)
+
+    seen = []
+
+    def fetch_scene(*args, **kwargs):
+        seen.append(kwargs["geometry"])
+        return {"img": np.ones((SIZE[1], SIZE[0]), dtype=np.float32), "qa": None}
+
+    monkeypatch.setattr(watchlist, "fetch_scene", fetch_scene)
+    watchlist.scene_stats(None, triangle, "NDVI", "2024-06-01")
+    assert seen == [triangle["geometry"]]
+
+
+def test_watchlist_adds_geometry_column_to_old_db(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE watches (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE, "
+                     "bbox TEXT NOT NULL, crs INTEGER NOT NULL, width INTEGER NOT NULL, height INTEGER NOT NULL, "
+                     "indicators TEXT NOT NULL, thresholds TEXT NOT NULL, start TEXT NOT NULL, created REAL NOT NULL)")
+        conn.execute("INSERT INTO watches (name, bbox, crs, width, height, indicators, thresholds, start, created) "
+                     "VALUES ('old', '1,2,3,4', 32636, 3, 3, '[]', '{}', '2024-01-01', 0)")
+    [watch] = WatchList(path).watches()
+    assert watch["name"] == "old" and watch["geometry"] is None